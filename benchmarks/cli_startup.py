@@ -0,0 +1,134 @@
+# Standard Library
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+FAKE_GITLEAKS = os.path.join(os.path.dirname(__file__), "fake_gitleaks.py")
+RULES = os.path.join(os.path.dirname(__file__), "rules.toml")
+DEFAULT_RUNS = 10
+# Median wall time in milliseconds of a fresh interpreter, the dir scan includes the run of the fake gitleaks
+DEFAULT_BUDGETS_MS = {"import": 250, "help": 300, "dir": 1000}
+
+# Same entry point as the secret_scanner console script
+CLI_ENTRY_POINT = (
+    "import sys\n"
+    "from vcs_scanner.secret_scanners.cli import scan_repository_from_cli\n"
+    "sys.argv = ['secret_scanner'] + sys.argv[1:]\n"
+    "scan_repository_from_cli()\n"
+)
+
+
+def build_scenarios(directory: str) -> dict[str, list[str]]:
+    """
+        Commands of the measured cold starts
+    :param directory:
+        Directory the dir scan scans
+    :return: dict.
+        The command of every scenario, keyed by name
+    """
+    return {
+        "import": [sys.executable, "-c", "import vcs_scanner.secret_scanners.cli"],
+        "help": [sys.executable, "-c", CLI_ENTRY_POINT, "--help"],
+        "dir": [
+            sys.executable,
+            "-c",
+            CLI_ENTRY_POINT,
+            "dir",
+            f"--gitleaks-path={FAKE_GITLEAKS}",
+            f"--gitleaks-rules-path={RULES}",
+            f"--dir={directory}",
+        ],
+    }
+
+
+def _child_environment() -> dict[str, str]:
+    # The CLI runs from another working directory, so a relative or missing PYTHONPATH would not find the package
+    package_root = os.path.dirname(os.path.dirname(importlib.util.find_spec("vcs_scanner").origin))
+    python_path = [package_root] + [path for path in os.environ.get("PYTHONPATH", "").split(os.pathsep) if path]
+    return {**os.environ, "PYTHONPATH": os.pathsep.join(python_path)}
+
+
+def measure_command(command: list[str], runs: int, work_directory: str) -> list[float]:
+    environment = _child_environment()
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=work_directory, env=environment, check=True, capture_output=True)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def run_startup_benchmark(runs: int, work_directory: str, scenarios: list[str] | None = None) -> dict[str, float]:
+    """
+        Measure the cold start of the secret_scanner CLI, every run starts a new interpreter
+    :param runs:
+        Number of runs per scenario
+    :param work_directory:
+        Directory to run the CLI in, it holds the log file and the scanned directory
+    :param scenarios:
+        Names of the scenarios to run, all of them by default
+    :return: dict.
+        The median duration in milliseconds of every scenario
+    """
+    scanned_directory = os.path.join(work_directory, "scanned")
+    os.makedirs(scanned_directory, exist_ok=True)
+    with open(os.path.join(scanned_directory, "settings.py"), "w", encoding="utf-8") as scanned_file:
+        scanned_file.write("DEBUG = False\n")
+
+    commands = build_scenarios(scanned_directory)
+    results = {}
+    for name in scenarios or list(commands):
+        # One run outside the measurement, so every measured run finds the bytecode compiled
+        measure_command(commands[name], 1, work_directory)
+        results[name] = statistics.median(measure_command(commands[name], runs, work_directory)) * 1000
+    return results
+
+
+def check_budgets(results: dict[str, float], budgets: dict[str, float]) -> list[str]:
+    return [name for name, duration in results.items() if name in budgets and duration > budgets[name]]
+
+
+def parse_budgets(value: str) -> dict[str, float]:
+    budgets = dict(DEFAULT_BUDGETS_MS)
+    for budget in value.split(","):
+        name, milliseconds = budget.split("=", 1)
+        budgets[name] = float(milliseconds)
+    return budgets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold start benchmark of the secret_scanner CLI")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(DEFAULT_BUDGETS_MS), help="Scenarios to run")
+    parser.add_argument(
+        "--budgets",
+        type=parse_budgets,
+        default=dict(DEFAULT_BUDGETS_MS),
+        help="Comma separated budgets in milliseconds, import=250,help=300,dir=1000 by default",
+    )
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="resc-cli-startup-") as work_directory:
+        results = run_startup_benchmark(args.runs, work_directory, args.scenarios)
+
+    for name, duration in results.items():
+        print(f"{name:<8} median {duration:7.1f} ms, budget {args.budgets[name]:.0f} ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    over_budget = check_budgets(results, args.budgets)
+    if over_budget:
+        print(f"Over budget: {', '.join(over_budget)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+# Standard Library
+import argparse
+import json
+import logging
+import os
+import resource
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+
+# Third Party
+from prettytable import PrettyTable
+
+# First Party
+from benchmarks.rws_stub import RWSStub
+from benchmarks.synthetic_repository import (
+    SyntheticRepository,
+    SyntheticRepositorySpec,
+    export_bare_repository,
+    generate_repository,
+)
+from vcs_scanner.api.schema.repository import Repository
+from vcs_scanner.helpers.providers.rule_file import RuleFileProvider
+from vcs_scanner.helpers.providers.rule_tag import RuleTagProvider
+from vcs_scanner.output_modules.rws_api_writer import RESTAPIWriter
+from vcs_scanner.post_processing.post_processor import PostProcessor
+from vcs_scanner.secret_scanners.secret_scanner import SecretScanner
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_RULES = os.path.join(os.path.dirname(__file__), "rules.toml")
+REPOSITORY_NAME = "benchmark.git"
+
+
+@dataclass
+class StageResult:
+    stage: str
+    outcome: str
+    seconds: float
+    python_peak_bytes: int
+    child_peak_rss_bytes: int
+
+
+@dataclass
+class RunResult:
+    seconds: float
+    findings_written: int
+    stages: list[StageResult] = field(default_factory=list)
+
+
+class BenchmarkSecretScanner(SecretScanner):
+    """
+    SecretScanner recording the duration and peak memory of every step of the scan.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stage_results: list[StageResult] = []
+
+    def _run_pipe(self, stage: str, pipe: Callable[[], bool]) -> str:
+        tracemalloc.reset_peak()
+        outcome = "error"
+        start = time.perf_counter()
+        try:
+            outcome = super()._run_pipe(stage, pipe)
+        finally:
+            seconds = time.perf_counter() - start
+            self.stage_results.append(
+                StageResult(
+                    stage=stage,
+                    outcome=outcome,
+                    seconds=seconds,
+                    python_peak_bytes=tracemalloc.get_traced_memory()[1],
+                    # Lifetime maximum of the waited for child processes: git and gitleaks
+                    child_peak_rss_bytes=resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024,
+                )
+            )
+        return outcome
+
+
+def _head_commit(repository_path: str) -> str:
+    return subprocess.run(
+        ["git", "rev-parse", "HEAD"], cwd=repository_path, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def run_benchmark(
+    spec: SyntheticRepositorySpec,
+    gitleaks_path: str,
+    work_directory: str,
+    runs: int = 3,
+    rules_path: str = BENCHMARK_RULES,
+    latency_seconds: float = 0.0,
+) -> dict:
+    """
+        Generate a synthetic repository and scan it end to end, through clone, gitleaks, post processing and upload
+    :param spec:
+        Shape of the generated repository
+    :param gitleaks_path:
+        The gitleaks executable
+    :param work_directory:
+        Directory for the generated repository, the clones and the rule files
+    :param runs:
+        Number of scans, every scan is a base scan
+    :param rules_path:
+        The rule pack to scan with
+    :param latency_seconds:
+        Latency added to every response of the stand-in RWS
+    :return: dict.
+        The benchmark report
+    """
+    generation_start = time.perf_counter()
+    repository: SyntheticRepository = generate_repository(os.path.join(work_directory, "source"), spec)
+    generation_seconds = time.perf_counter() - generation_start
+    git_root = os.path.join(work_directory, "git")
+    export_bare_repository(repository.path, os.path.join(git_root, REPOSITORY_NAME))
+    latest_commit = _head_commit(repository.path)
+
+    gitleaks_rules_provider = RuleFileProvider(rules_path)
+    gitleaks_rules_provider.init(
+        destination_rule_as_repo=os.path.join(work_directory, "repo_rules.toml"),
+        destination_rule_as_dir=os.path.join(work_directory, "dir_rules.toml"),
+    )
+    rule_tag_provider = RuleTagProvider()
+    rule_tag_provider.load(rules_path)
+    clone_directory = os.path.join(work_directory, "clones")
+    os.makedirs(clone_directory, exist_ok=True)
+
+    results: list[RunResult] = []
+    tracemalloc.start()
+    try:
+        with RWSStub(rules_path, git_root=git_root, latency_seconds=latency_seconds) as stub:
+            for _ in range(runs):
+                findings_before = stub.findings_received
+                secret_scanner = BenchmarkSecretScanner(
+                    gitleaks_binary_path=gitleaks_path,
+                    gitleaks_rules_provider=gitleaks_rules_provider,
+                    rule_pack_version=stub.rule_pack_version,
+                    output_plugin=RESTAPIWriter(rws_url=stub.url, rule_tag_provider=rule_tag_provider),
+                    post_processor=PostProcessor(rule_tag_provider=rule_tag_provider),
+                    repository=Repository(
+                        project_key="benchmark",
+                        repository_id="benchmark",
+                        repository_name="benchmark",
+                        repository_url=stub.repository_url(REPOSITORY_NAME),
+                        vcs_instance=1,
+                    ),
+                    username="",
+                    personal_access_token="",
+                    scan_tmp_directory=clone_directory,
+                    force_base_scan=True,
+                    latest_commit=latest_commit,
+                )
+                start = time.perf_counter()
+                secret_scanner.run_scan(as_dir=True, as_repo=True)
+                results.append(
+                    RunResult(
+                        seconds=time.perf_counter() - start,
+                        findings_written=stub.findings_received - findings_before,
+                        stages=secret_scanner.stage_results,
+                    )
+                )
+            requests = dict(stub.requests)
+    finally:
+        tracemalloc.stop()
+
+    return _build_report(repository, generation_seconds, results, requests)
+
+
+def _build_report(
+    repository: SyntheticRepository, generation_seconds: float, results: list[RunResult], requests: dict[str, int]
+) -> dict:
+    stages: dict[str, list[StageResult]] = {}
+    for result in results:
+        for stage_result in result.stages:
+            stages.setdefault(stage_result.stage, []).append(stage_result)
+
+    stage_report = {}
+    for stage, stage_results in stages.items():
+        seconds = statistics.median(stage_result.seconds for stage_result in stage_results)
+        stage_report[stage] = {
+            "median_seconds": seconds,
+            "min_seconds": min(stage_result.seconds for stage_result in stage_results),
+            "python_peak_bytes": max(stage_result.python_peak_bytes for stage_result in stage_results),
+            "child_peak_rss_bytes": max(stage_result.child_peak_rss_bytes for stage_result in stage_results),
+            "outcomes": sorted({stage_result.outcome for stage_result in stage_results}),
+        }
+    # Every stage handles the whole history, so its throughput is measured against the size of the generated history
+    for stage in ("clone_repo", "run_repo_scan", "run_dir_scan"):
+        if stage in stage_report and stage_report[stage]["median_seconds"] > 0:
+            stage_seconds = stage_report[stage]["median_seconds"]
+            stage_report[stage]["megabytes_per_second"] = repository.bytes_written / stage_seconds / 1_000_000
+            stage_report[stage]["commits_per_second"] = repository.spec.commits / stage_seconds
+
+    return {
+        "repository": {
+            **asdict(repository.spec),
+            "bytes_written": repository.bytes_written,
+            "planted_secrets": len(repository.planted_secrets),
+            "generation_seconds": generation_seconds,
+        },
+        "runs": len(results),
+        "median_scan_seconds": statistics.median(result.seconds for result in results) if results else 0.0,
+        "findings_written": [result.findings_written for result in results],
+        "stages": stage_report,
+        "rws_requests": requests,
+    }
+
+
+def print_report(report: dict) -> None:
+    table = PrettyTable()
+    table.field_names = ["Stage", "Median (s)", "Min (s)", "Python peak (MB)", "Child peak RSS (MB)", "MB/s"]
+    for stage, stage_report in report["stages"].items():
+        throughput = stage_report.get("megabytes_per_second")
+        table.add_row(
+            [
+                stage,
+                f"{stage_report['median_seconds']:.4f}",
+                f"{stage_report['min_seconds']:.4f}",
+                f"{stage_report['python_peak_bytes'] / 1_000_000:.1f}",
+                f"{stage_report['child_peak_rss_bytes'] / 1_000_000:.1f}",
+                f"{throughput:.1f}" if throughput is not None else "",
+            ]
+        )
+    repository = report["repository"]
+    print(
+        f"Repository: {repository['commits']} commits, {repository['bytes_written'] / 1_000_000:.1f} MB written, "
+        f"{repository['planted_secrets']} planted secrets"
+    )
+    print(table)
+    print(
+        f"Median scan: {report['median_scan_seconds']:.3f} s over {report['runs']} runs, "
+        f"findings written per run: {report['findings_written']}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End to end benchmark of SecretScanner.run_scan")
+    parser.add_argument("--gitleaks-path", default=os.environ.get("RESC_GITLEAKS_PATH", "gitleaks"))
+    parser.add_argument("--rules", default=BENCHMARK_RULES, help="Rule pack to scan with")
+    parser.add_argument("--commits", type=int, default=SyntheticRepositorySpec.commits)
+    parser.add_argument("--files", type=int, default=SyntheticRepositorySpec.files)
+    parser.add_argument("--files-per-commit", type=int, default=SyntheticRepositorySpec.files_per_commit)
+    parser.add_argument("--file-size", type=int, default=SyntheticRepositorySpec.file_size)
+    parser.add_argument("--secrets", type=int, default=SyntheticRepositorySpec.secrets)
+    parser.add_argument("--seed", type=int, default=SyntheticRepositorySpec.seed)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--rws-latency", type=float, default=0.0, help="Seconds added to every RWS response")
+    parser.add_argument("--work-dir", help="Directory to work in, a temporary directory by default")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    spec = SyntheticRepositorySpec(
+        commits=args.commits,
+        files=args.files,
+        files_per_commit=args.files_per_commit,
+        file_size=args.file_size,
+        secrets=args.secrets,
+        seed=args.seed,
+    )
+    with tempfile.TemporaryDirectory(prefix="resc-benchmark-", dir=args.work_dir) as work_directory:
+        report = run_benchmark(
+            spec,
+            gitleaks_path=args.gitleaks_path,
+            work_directory=work_directory,
+            runs=args.runs,
+            rules_path=args.rules,
+            latency_seconds=args.rws_latency,
+        )
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the gitleaks executable, for load tests of the Python side of the scanner.
+It accepts the arguments the GitLeaksWrapper passes, does not read the scanned source and writes a report
+of generated findings. The report and the run time are set through environment variables:
+
+    FAKE_GITLEAKS_FINDINGS   Number of findings per report, 0 by default
+    FAKE_GITLEAKS_LATENCY    Seconds every scan takes, 0 by default
+    FAKE_GITLEAKS_SEED       Seed of the generated findings, reports are the same for the same seed and arguments
+    FAKE_GITLEAKS_EXIT_CODE  Exit code which overrides the regular one, to model a failing gitleaks
+"""
+
+# Standard Library
+import hashlib
+import json
+import os
+import random
+import string
+import sys
+import time
+import tomllib
+
+FINDINGS = "FAKE_GITLEAKS_FINDINGS"
+LATENCY = "FAKE_GITLEAKS_LATENCY"
+SEED = "FAKE_GITLEAKS_SEED"
+EXIT_CODE = "FAKE_GITLEAKS_EXIT_CODE"
+DEFAULT_RULE_ID = "fake-rule"
+
+
+def parse_arguments(arguments: list[str]) -> tuple[str, dict[str, str], set[str]]:
+    """
+        Split the gitleaks arguments into the command, the options with a value and the flags
+    :param arguments:
+        The arguments without the executable
+    :return: tuple.
+        The command, the options keyed by name and the flags
+    """
+    command = ""
+    options: dict[str, str] = {}
+    flags: set[str] = set()
+    for argument in arguments:
+        if not argument.startswith("--"):
+            command = command or argument
+        elif "=" in argument:
+            name, value = argument.split("=", 1)
+            options[name] = value
+        else:
+            flags.add(argument)
+    return command, options, flags
+
+
+def read_rule_ids(config_path: str | None) -> list[str]:
+    if not config_path:
+        return [DEFAULT_RULE_ID]
+    try:
+        with open(config_path, "rb") as config_file:
+            rules = tomllib.load(config_file).get("rules", [])
+    except (OSError, tomllib.TOMLDecodeError):
+        return [DEFAULT_RULE_ID]
+    return [rule["id"] for rule in rules if "id" in rule] or [DEFAULT_RULE_ID]
+
+
+def generate_findings(count: int, rule_ids: list[str], seed: str, git_scan: bool) -> list[dict]:
+    """
+        Generate gitleaks report entries
+    :param count:
+        Number of findings
+    :param rule_ids:
+        Rule ids the findings are spread over
+    :param seed:
+        Seed of the generated content
+    :param git_scan:
+        Whether the findings come from the history, directory findings have no commit
+    :return: list.
+        The report entries
+    """
+    rng = random.Random(seed)
+    findings = []
+    for index in range(count):
+        commit = "".join(rng.choices("0123456789abcdef", k=40)) if git_scan else ""
+        secret = "".join(rng.choices(string.ascii_letters + string.digits, k=32))
+        file_path = f"module_{index % 10}/file_{index}.py"
+        line = rng.randint(1, 500)
+        findings.append(
+            {
+                "Description": "Fake finding",
+                "StartLine": line,
+                "EndLine": line,
+                "StartColumn": 1,
+                "EndColumn": 1 + len(secret),
+                "Match": secret,
+                "Secret": secret,
+                "File": file_path,
+                "SymlinkFile": "",
+                "Commit": commit,
+                "Entropy": round(rng.uniform(3.0, 6.0), 4),
+                "Author": "Fake Author" if git_scan else "",
+                "Email": "fake@example.com" if git_scan else "",
+                "Date": "2023-01-01T12:00:00Z" if git_scan else "",
+                "Message": f"Fake commit {index}" if git_scan else "",
+                "Tags": [],
+                "RuleID": rule_ids[index % len(rule_ids)],
+                "Fingerprint": f"{commit}:{file_path}:{rule_ids[index % len(rule_ids)]}:{line}",
+            }
+        )
+    return findings
+
+
+def format_verbose(finding: dict) -> str:
+    # Same layout as gitleaks --verbose --no-color
+    return (
+        f"Finding:     {finding['Match']}\n"
+        f"Secret:      {finding['Secret']}\n"
+        f"RuleID:      {finding['RuleID']}\n"
+        f"Entropy:     {finding['Entropy']}\n"
+        f"File:        {finding['File']}\n"
+        f"Line:        {finding['StartLine']}\n"
+        f"Commit:      {finding['Commit']}\n"
+        f"Author:      {finding['Author']}\n"
+        f"Email:       {finding['Email']}\n"
+        f"Date:        {finding['Date']}\n"
+        f"Fingerprint: {finding['Fingerprint']}\n"
+    )
+
+
+def main(arguments: list[str]) -> int:
+    command, options, flags = parse_arguments(arguments)
+    if command not in ("detect", "protect"):
+        print(f"fake gitleaks: unsupported command '{command}'", file=sys.stderr)
+        return 126
+
+    latency = float(os.environ.get(LATENCY) or 0)
+    if latency > 0:
+        time.sleep(latency)
+
+    # Same arguments give the same report, different sources and scan types give different findings
+    seed_material = f"{os.environ.get(SEED, '0')}:{options.get('--source', '')}:{'--no-git' in flags}"
+    seed = hashlib.sha256(seed_material.encode("utf-8")).hexdigest()
+    findings = generate_findings(
+        count=int(os.environ.get(FINDINGS) or 0),
+        rule_ids=read_rule_ids(options.get("--config")),
+        seed=seed,
+        git_scan="--no-git" not in flags,
+    )
+
+    if "--verbose" in flags:
+        sys.stdout.write("\n".join(format_verbose(finding) for finding in findings))
+        sys.stdout.flush()
+    if "--report-path" in options:
+        with open(options["--report-path"], "w", encoding="utf-8") as report_file:
+            json.dump(findings, report_file)
+
+    if os.environ.get(EXIT_CODE):
+        return int(os.environ[EXIT_CODE])
+    if findings:
+        return int(options.get("--exit-code", "1"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
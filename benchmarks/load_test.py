@@ -0,0 +1,266 @@
+# Standard Library
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# First Party
+from benchmarks.end_to_end import BENCHMARK_RULES
+from benchmarks.rws_stub import RWSStub
+from benchmarks.synthetic_repository import SyntheticRepositorySpec, export_bare_repository, generate_repository
+from vcs_scanner.api.constants import GITHUB_PUBLIC
+from vcs_scanner.model import RepositoryRuntime
+
+FAKE_GITLEAKS = os.path.join(os.path.dirname(__file__), "fake_gitleaks.py")
+REPOSITORY_NAME = "load-test.git"
+VCS_INSTANCE_NAME = "load-test"
+
+# Set by the initializer of every worker process
+_celery_worker = None
+
+
+def _worker_environment(
+    stub: RWSStub,
+    vcs_instances_file: str,
+    findings_per_scan: int,
+    gitleaks_latency_seconds: float,
+    batch_concurrency: int,
+) -> dict[str, str]:
+    host, port = stub.url.removeprefix("http://").split(":")
+    return {
+        # The task is run in process, no message is sent to the broker
+        "RABBITMQ_DEFAULT_VHOST": "load-test",
+        "RABBITMQ_USERNAME": "load-test",
+        "RABBITMQ_PASSWORD": "load-test",
+        "RABBITMQ_QUEUE": "load-test",
+        "RESC_RABBITMQ_SERVICE_HOST": "127.0.0.1",
+        "RESC_API_NO_AUTH_SERVICE_HOST": host,
+        "RESC_API_NO_AUTH_SERVICE_PORT": port,
+        "VCS_INSTANCES_FILE_PATH": vcs_instances_file,
+        "GITLEAKS_PATH": FAKE_GITLEAKS,
+        "FORCE_BASE_SCAN": "true",
+        "RESC_BATCH_CONCURRENCY": str(batch_concurrency),
+        "FAKE_GITLEAKS_FINDINGS": str(findings_per_scan),
+        "FAKE_GITLEAKS_LATENCY": str(gitleaks_latency_seconds),
+    }
+
+
+def _initialize_worker(environment: dict[str, str], work_directory: str, lock) -> None:
+    global _celery_worker  # pylint: disable=W0603
+    os.environ.update(environment)
+    # Clones are made relative to the working directory, every process gets its own
+    process_directory = tempfile.mkdtemp(prefix=f"worker-{os.getpid()}-", dir=work_directory)
+    os.chdir(process_directory)
+
+    # First Party
+    from vcs_scanner.secret_scanners import celery_worker  # pylint: disable=C0415
+
+    logging.getLogger().setLevel(logging.WARNING)
+    # The rule pack is downloaded to a path shared by all processes, only one of them writes it at a time
+    with lock:
+        celery_worker.DOWNLOADED_RULE_PACK_VERSION = celery_worker.rws_writer.download_rule_pack()
+    _celery_worker = celery_worker
+
+
+def _run_task(payloads: list[str]) -> tuple[float, bool]:
+    start = time.perf_counter()
+    if len(payloads) == 1:
+        result = _celery_worker.scan_repository.apply(args=[payloads[0]])
+    else:
+        result = _celery_worker.scan_repositories.apply(args=[payloads])
+    return time.perf_counter() - start, result.successful()
+
+
+def _write_vcs_instances_file(file_path: str, stub: RWSStub) -> None:
+    host, port = stub.url.removeprefix("http://").split(":")
+    vcs_instances = {
+        VCS_INSTANCE_NAME: {
+            "name": VCS_INSTANCE_NAME,
+            "provider_type": GITHUB_PUBLIC,
+            "hostname": host,
+            "port": int(port),
+            "scheme": "http",
+            # Names of environment variables which are not set, the served repository needs no credentials
+            "username": "RESC_LOAD_TEST_USERNAME",
+            "token": "RESC_LOAD_TEST_TOKEN",
+            "exceptions": [],
+            "scope": [],
+        }
+    }
+    with open(file_path, "w", encoding="utf-8") as vcs_instances_file:
+        json.dump(vcs_instances, vcs_instances_file)
+
+
+def _percentile(sorted_values: list[float], percentile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, round(percentile / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def run_load_test(
+    tasks: int,
+    processes: int,
+    work_directory: str,
+    findings_per_scan: int = 10,
+    gitleaks_latency_seconds: float = 0.0,
+    rws_latency_seconds: float = 0.0,
+    spec: SyntheticRepositorySpec | None = None,
+    batch_size: int = 1,
+    batch_concurrency: int = 4,
+) -> dict:
+    """
+        Run the scan_repository or scan_repositories Celery task many times in parallel, against the fake gitleaks
+        and the stand-in RWS.
+        The tasks are applied in the worker processes, so the broker is left out and only the Python side is measured.
+    :param tasks:
+        Number of repositories to scan
+    :param processes:
+        Number of worker processes, the equivalent of the Celery worker concurrency
+    :param work_directory:
+        Directory for the served repository and the clones
+    :param findings_per_scan:
+        Number of findings the fake gitleaks reports for every scan of a repository and of a directory
+    :param gitleaks_latency_seconds:
+        Seconds every fake gitleaks scan takes
+    :param rws_latency_seconds:
+        Latency added to every response of the stand-in RWS
+    :param spec:
+        Shape of the repository every task clones, a small repository by default
+    :param batch_size:
+        Number of repositories per message, messages of more than one repository go to the scan_repositories task
+    :param batch_concurrency:
+        Number of repositories of a batch scanned at the same time
+    :return: dict.
+        The load test report
+    """
+    spec = spec or SyntheticRepositorySpec(commits=5, files=5, files_per_commit=2, file_size=256, secrets=0)
+    repository = generate_repository(os.path.join(work_directory, "source"), spec)
+    git_root = os.path.join(work_directory, "git")
+    export_bare_repository(repository.path, os.path.join(git_root, REPOSITORY_NAME))
+    latest_commit = subprocess.run(
+        ["git", "rev-parse", "HEAD"], cwd=repository.path, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+    with RWSStub(BENCHMARK_RULES, git_root=git_root, latency_seconds=rws_latency_seconds) as stub:
+        vcs_instances_file = os.path.join(work_directory, "vcs_instances.json")
+        _write_vcs_instances_file(vcs_instances_file, stub)
+        environment = _worker_environment(
+            stub, vcs_instances_file, findings_per_scan, gitleaks_latency_seconds, batch_concurrency
+        )
+        payloads = [
+            RepositoryRuntime(
+                project_key="load-test",
+                repository_id=str(index),
+                repository_name=f"repository-{index}",
+                repository_url=stub.repository_url(REPOSITORY_NAME),
+                vcs_instance_name=VCS_INSTANCE_NAME,
+                latest_commit=latest_commit,
+            ).model_dump_json()
+            for index in range(tasks)
+        ]
+        messages = [payloads[start : start + batch_size] for start in range(0, len(payloads), batch_size)]
+
+        # Spawned processes start without the threads of the stub and import the worker from scratch
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=context,
+            initializer=_initialize_worker,
+            initargs=(environment, work_directory, context.Lock()),
+        ) as executor:
+            # Warm up every process, so the measured window does not include the imports
+            list(executor.map(time.sleep, [0.1] * processes))
+            start = time.perf_counter()
+            futures = [executor.submit(_run_task, message) for message in messages]
+            latencies: list[float] = []
+            failures = 0
+            for future in as_completed(futures):
+                latency, successful = future.result()
+                latencies.append(latency)
+                failures += 0 if successful else 1
+            elapsed = time.perf_counter() - start
+        findings_received = stub.findings_received
+        requests = dict(stub.requests)
+
+    latencies.sort()
+    return {
+        "tasks": tasks,
+        "processes": processes,
+        "batch_size": batch_size,
+        "failures": failures,
+        "elapsed_seconds": elapsed,
+        "tasks_per_minute": tasks / elapsed * 60 if elapsed else 0.0,
+        "latency_seconds": {
+            "mean": statistics.mean(latencies) if latencies else 0.0,
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "p99": _percentile(latencies, 99),
+            "max": latencies[-1] if latencies else 0.0,
+        },
+        "findings_received": findings_received,
+        "rws_requests": requests,
+    }
+
+
+def print_report(report: dict) -> None:
+    latency = report["latency_seconds"]
+    print(
+        f"{report['tasks']} tasks on {report['processes']} processes in {report['elapsed_seconds']:.2f} s: "
+        f"{report['tasks_per_minute']:.0f} tasks per minute, {report['failures']} failed"
+    )
+    print(
+        f"Message latency, {report['batch_size']} repositories per message: mean {latency['mean']:.3f} s, "
+        f"p50 {latency['p50']:.3f} s, p95 {latency['p95']:.3f} s, p99 {latency['p99']:.3f} s, "
+        f"max {latency['max']:.3f} s"
+    )
+    print(f"Findings received by the RWS: {report['findings_received']}")
+    for route, count in sorted(report["rws_requests"].items()):
+        print(f"  {route}: {count}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Load test of the scan_repository Celery task with a fake gitleaks and a stand-in RWS"
+    )
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--findings", type=int, default=10, help="Findings reported by every fake gitleaks scan")
+    parser.add_argument("--gitleaks-latency", type=float, default=0.0, help="Seconds every fake gitleaks scan takes")
+    parser.add_argument("--rws-latency", type=float, default=0.0, help="Seconds added to every RWS response")
+    parser.add_argument("--batch-size", type=int, default=1, help="Repositories per scan_repositories message")
+    parser.add_argument("--batch-concurrency", type=int, default=4, help="Repositories of a batch scanned at once")
+    parser.add_argument("--work-dir", help="Directory to work in, a temporary directory by default")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    with tempfile.TemporaryDirectory(prefix="resc-load-test-", dir=args.work_dir) as work_directory:
+        report = run_load_test(
+            tasks=args.tasks,
+            processes=args.processes,
+            work_directory=work_directory,
+            findings_per_scan=args.findings,
+            gitleaks_latency_seconds=args.gitleaks_latency,
+            rws_latency_seconds=args.rws_latency,
+            batch_size=args.batch_size,
+            batch_concurrency=args.batch_concurrency,
+        )
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+    if report["failures"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
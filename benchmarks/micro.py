@@ -0,0 +1,344 @@
+# Standard Library
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+# Third Party
+from prettytable import PrettyTable
+
+# First Party
+from benchmarks.end_to_end import BENCHMARK_RULES
+from vcs_scanner.api.interface.findings import serialize_findings
+from vcs_scanner.api.schema.finding import FindingBase, FindingCreate
+from vcs_scanner.helpers.finding_filter import should_process_finding
+from vcs_scanner.helpers.providers.rule_comment import RuleCommentProvider
+from vcs_scanner.helpers.providers.rule_tag import RuleTagProvider
+from vcs_scanner.output_modules.stdout_writer import STDOUTWriter
+from vcs_scanner.post_processing.post_processor import PostProcessor, create_processors
+from vcs_scanner.secret_scanners.gitleaks_wrapper import GitLeaksWrapper
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_REPEAT = 3
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+RESULT_FORMAT_VERSION = 1
+RULE_IDS = ("benchmark-aws-access-key", "benchmark-github-token", "benchmark-password", "unknown-rule")
+
+
+def generate_report(file_path: str, count: int, seed: int = 0) -> None:
+    """
+        Write a gitleaks JSON report with the given number of findings
+    :param file_path:
+        Path of the report
+    :param count:
+        Number of findings
+    :param seed:
+        Seed of the generated content, the same seed always generates the same report
+    """
+    rng = random.Random(seed)
+    with open(file_path, "w", encoding="utf-8") as report_file:
+        report_file.write("[")
+        for index in range(count):
+            commit = "".join(rng.choices("0123456789abcdef", k=40))
+            secret = "".join(rng.choices(string.ascii_letters + string.digits, k=32))
+            start_column = rng.randint(1, 80)
+            result = {
+                "Description": "Generated finding",
+                "StartLine": rng.randint(1, 5000),
+                "EndLine": 0,
+                "StartColumn": start_column,
+                "EndColumn": start_column + len(secret),
+                "Match": f"token = {secret}",
+                "Secret": secret,
+                "File": f"module_{index % 100}/file_{index % 5000}.py",
+                "SymlinkFile": "",
+                "Commit": commit,
+                "Entropy": round(rng.uniform(2.0, 6.0), 4),
+                "Author": f"author {index % 250}",
+                "Email": f"author{index % 250}@example.com",
+                "Date": f"2023-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00Z",
+                "Message": f"Commit message {index}",
+                "Tags": [],
+                "RuleID": rng.choice(RULE_IDS),
+                "Fingerprint": f"{commit}:file_{index}.py:{index}",
+            }
+            if index:
+                report_file.write(",")
+            json.dump(result, report_file)
+        report_file.write("]")
+
+
+@dataclass
+class BenchmarkContext:
+    size: int
+    report_path: str
+    rule_tag_provider: RuleTagProvider
+    findings: list[FindingBase]
+    findings_create: list[FindingCreate]
+
+
+def _bench_parse_output(context: BenchmarkContext) -> None:
+    GitLeaksWrapper._parse_output(context.report_path)
+
+
+def _bench_should_process_finding(context: BenchmarkContext) -> None:
+    rule_tags = context.rule_tag_provider.get_rule_tags()
+    for finding in context.findings_create:
+        should_process_finding(finding=finding, rule_tags=rule_tags, include_tags=["Warn"], ignore_tags=["Info"])
+
+
+def _bench_stdout_write_findings(context: BenchmarkContext) -> None:
+    rule_comment_provider = RuleCommentProvider()
+    rule_comment_provider.load(BENCHMARK_RULES)
+    writer = STDOUTWriter(
+        exit_code_warn=2,
+        exit_code_block=1,
+        rule_tag_provider=context.rule_tag_provider,
+        rule_comment_provider=rule_comment_provider,
+    )
+    try:
+        writer.write_findings(scan_id=1, repository_id=1, scan_findings=context.findings_create)
+    except SystemExit:
+        pass
+
+
+def _bench_post_processor_run(context: BenchmarkContext) -> None:
+    PostProcessor(rule_tag_provider=context.rule_tag_provider).run(context.findings)
+
+
+def _bench_post_processor_run_entropy(context: BenchmarkContext) -> None:
+    processors = create_processors({"Warn": 4.5})
+    PostProcessor(rule_tag_provider=context.rule_tag_provider, processors=processors).run(context.findings)
+
+
+def _bench_findings_json_encoding(context: BenchmarkContext) -> None:
+    # Same encoding as create_findings_with_scan_id: the payload, then the request body requests builds from it
+    json.dumps(serialize_findings(context.findings_create))
+
+
+BENCHMARKS: dict[str, Callable[[BenchmarkContext], None]] = {
+    "parse_output": _bench_parse_output,
+    "should_process_finding": _bench_should_process_finding,
+    "stdout_write_findings": _bench_stdout_write_findings,
+    "post_processor_run": _bench_post_processor_run,
+    "post_processor_run_entropy": _bench_post_processor_run_entropy,
+    "findings_json_encoding": _bench_findings_json_encoding,
+}
+
+
+def _time(function: Callable[[BenchmarkContext], None], context: BenchmarkContext, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function(context)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(__file__),
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    sizes: list[int], names: list[str] | None = None, repeat: int = DEFAULT_REPEAT, seed: int = 0
+) -> dict:
+    """
+        Run the microbenchmarks against generated findings
+    :param sizes:
+        Numbers of findings to run every benchmark with
+    :param names:
+        Benchmarks to run, all of them when None
+    :param repeat:
+        Number of timed runs per benchmark and size
+    :param seed:
+        Seed of the generated findings
+    :return: dict.
+        The results, keyed by benchmark name and size
+    """
+    names = names or list(BENCHMARKS)
+    rule_tag_provider = RuleTagProvider()
+    rule_tag_provider.load(BENCHMARK_RULES)
+    results = {}
+    # The STDOUT writer logs a table of every finding, only the time to build it is of interest
+    logging.disable(logging.CRITICAL)
+    try:
+        with tempfile.TemporaryDirectory(prefix="resc-micro-") as work_directory:
+            for size in sizes:
+                report_path = os.path.join(work_directory, f"report_{size}.json")
+                generate_report(report_path, size, seed)
+                findings = GitLeaksWrapper._parse_output(report_path)
+                context = BenchmarkContext(
+                    size=size,
+                    report_path=report_path,
+                    rule_tag_provider=rule_tag_provider,
+                    findings=findings,
+                    findings_create=[
+                        FindingCreate.create_from_base_class(base_object=finding, repository_id=1)
+                        for finding in findings
+                    ],
+                )
+                for name in names:
+                    timings = _time(BENCHMARKS[name], context, repeat)
+                    results[f"{name}[{size}]"] = {
+                        "benchmark": name,
+                        "size": size,
+                        "min_seconds": min(timings),
+                        "median_seconds": statistics.median(timings),
+                        "min_ns_per_finding": min(timings) / size * 1e9,
+                    }
+                del context, findings
+    finally:
+        logging.disable(logging.NOTSET)
+
+    return {
+        "version": RESULT_FORMAT_VERSION,
+        "metadata": {
+            "commit": _current_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": datetime.now(UTC).isoformat(),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare_results(
+    baseline: dict, current: dict, threshold: float = DEFAULT_REGRESSION_THRESHOLD
+) -> tuple[list[dict], bool]:
+    """
+        Compare two result files on the fastest run of every benchmark, which is the least noisy
+    :param baseline:
+        Results of the reference commit
+    :param current:
+        Results of the commit under test
+    :param threshold:
+        Relative slowdown above which a benchmark counts as a regression, 0.10 is 10% slower
+    :return: tuple.
+        One comparison per benchmark present in both files, and whether any of them regressed
+    """
+    comparisons = []
+    regressed = False
+    for key, current_result in current["results"].items():
+        baseline_result = baseline["results"].get(key)
+        if baseline_result is None:
+            continue
+        ratio = current_result["min_seconds"] / baseline_result["min_seconds"]
+        status = "ok"
+        if ratio > 1 + threshold:
+            status = "regression"
+            regressed = True
+        elif ratio < 1 - threshold:
+            status = "improvement"
+        comparisons.append(
+            {
+                "benchmark": key,
+                "baseline_seconds": baseline_result["min_seconds"],
+                "current_seconds": current_result["min_seconds"],
+                "ratio": ratio,
+                "status": status,
+            }
+        )
+    return comparisons, regressed
+
+
+def print_results(results: dict) -> None:
+    table = PrettyTable()
+    table.field_names = ["Benchmark", "Findings", "Min (s)", "Median (s)", "ns / finding"]
+    table.align["Benchmark"] = "l"
+    for result in results["results"].values():
+        table.add_row(
+            [
+                result["benchmark"],
+                result["size"],
+                f"{result['min_seconds']:.4f}",
+                f"{result['median_seconds']:.4f}",
+                f"{result['min_ns_per_finding']:.0f}",
+            ]
+        )
+    print(table)
+
+
+def print_comparison(comparisons: list[dict]) -> None:
+    table = PrettyTable()
+    table.field_names = ["Benchmark", "Baseline (s)", "Current (s)", "Ratio", "Status"]
+    table.align["Benchmark"] = "l"
+    for comparison in comparisons:
+        table.add_row(
+            [
+                comparison["benchmark"],
+                f"{comparison['baseline_seconds']:.4f}",
+                f"{comparison['current_seconds']:.4f}",
+                f"{comparison['ratio']:.2f}",
+                comparison["status"],
+            ]
+        )
+    print(table)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the report parsing and findings hot paths")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_run = subparsers.add_parser("run", help="Run the microbenchmarks")
+    parser_run.add_argument(
+        "--sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=list(DEFAULT_SIZES),
+        help="Comma separated numbers of findings, 10000,100000,1000000 by default",
+    )
+    parser_run.add_argument("--benchmarks", nargs="+", choices=sorted(BENCHMARKS), help="Benchmarks to run")
+    parser_run.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser_run.add_argument("--seed", type=int, default=0)
+    parser_run.add_argument("--output", help="Write the results as JSON to this file")
+
+    parser_compare = subparsers.add_parser("compare", help="Compare two result files, fails on a regression")
+    parser_compare.add_argument("baseline", help="Results of the reference commit")
+    parser_compare.add_argument("current", help="Results of the commit under test")
+    parser_compare.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        results = run_benchmarks(args.sizes, args.benchmarks, args.repeat, args.seed)
+        print_results(results)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as output_file:
+                json.dump(results, output_file, indent=2)
+        return
+
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    with open(args.current, encoding="utf-8") as current_file:
+        current = json.load(current_file)
+    comparisons, regressed = compare_results(baseline, current, args.threshold)
+    print_comparison(comparisons)
+    if regressed:
+        print(f"Regression: at least one benchmark is more than {args.threshold:.0%} slower than the baseline")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# Standard Library
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# First Party
+from vcs_scanner.api.constants import (
+    RWS_ROUTE_FINDINGS,
+    RWS_ROUTE_LAST_SCAN,
+    RWS_ROUTE_REPOSITORIES,
+    RWS_ROUTE_RULE_PACKS,
+    RWS_ROUTE_SCANS,
+    RWS_ROUTE_VCS,
+    RWS_VERSION_PREFIX,
+)
+from vcs_scanner.common import get_rule_pack_version_from_file
+
+logger = logging.getLogger(__name__)
+
+GIT_ROUTE = "/git/"
+
+
+class RWSStub:
+    """
+    In-memory stand-in for the RESC web service, serving the routes the scanner uses.
+    It also serves bare repositories as static files under /git/, so they can be cloned over the dumb HTTP protocol.
+    """
+
+    def __init__(self, rule_pack_path: str, git_root: str | None = None, latency_seconds: float = 0.0):
+        """
+        :param rule_pack_path:
+            The rule pack served as the active rule pack
+        :param git_root:
+            Directory containing the bare repositories to serve
+        :param latency_seconds:
+            Delay added to every RWS response, to model the latency of a remote service
+        """
+        with open(rule_pack_path, "rb") as rule_pack_file:
+            self.rule_pack: bytes = rule_pack_file.read()
+        self.rule_pack_version: str = get_rule_pack_version_from_file(self.rule_pack) or "0.0.0"
+        self.git_root: str | None = git_root
+        self.latency_seconds: float = latency_seconds
+        self.repositories: dict[str, dict] = {}
+        self.scans: dict[int, dict] = {}
+        self.findings: dict[int, list[dict]] = {}
+        self.requests: Counter = Counter()
+        self._lock: threading.Lock = threading.Lock()
+        self._next_id: int = 1
+        self._server: ThreadingHTTPServer | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def repository_url(self, name: str) -> str:
+        return f"{self.url}{GIT_ROUTE}{name}"
+
+    def start(self) -> "RWSStub":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately, without this every response waits for a delayed ACK
+            disable_nagle_algorithm = True
+
+            def do_GET(self):  # noqa: N802
+                stub.handle(self, "GET")
+
+            def do_POST(self):  # noqa: N802
+                stub.handle(self, "POST")
+
+            def log_message(self, format, *args):  # noqa: A002 pylint: disable=W0622
+                logger.debug(format % args)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="rws-stub", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "RWSStub":
+        return self.start()
+
+    def __exit__(self, *_exc_info) -> None:
+        self.stop()
+
+    def _new_id(self) -> int:
+        with self._lock:
+            new_id = self._next_id
+            self._next_id += 1
+            return new_id
+
+    @property
+    def findings_received(self) -> int:
+        with self._lock:
+            return sum(len(findings) for findings in self.findings.values())
+
+    def handle(self, request: BaseHTTPRequestHandler, method: str) -> None:
+        path = request.path.split("?", 1)[0]
+        if method == "GET" and path.startswith(GIT_ROUTE):
+            self._serve_git_file(request, path.removeprefix(GIT_ROUTE))
+            return
+
+        length = int(request.headers.get("Content-Length") or 0)
+        body = request.rfile.read(length) if length else b""
+        route = path.removeprefix(RWS_VERSION_PREFIX)
+        route_name = re.sub(r"/\d+", "/{id}", route)
+        with self._lock:
+            self.requests[f"{method} {route_name}"] += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+        status, payload = self._route(method, route, body)
+        if isinstance(payload, bytes):
+            self._respond(request, status, payload, "application/octet-stream")
+        else:
+            self._respond(request, status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def _route(self, method: str, route: str, body: bytes) -> tuple[int, object]:  # pylint: disable=R0911
+        if method == "POST" and route == RWS_ROUTE_VCS:
+            return 201, {**json.loads(body), "id_": self._new_id()}
+
+        if method == "POST" and route == RWS_ROUTE_REPOSITORIES:
+            repository = json.loads(body)
+            with self._lock:
+                known = self.repositories.get(repository["repository_url"])
+            if known is None:
+                known = {**repository, "id_": self._new_id()}
+                with self._lock:
+                    self.repositories[repository["repository_url"]] = known
+            return 201, known
+
+        last_scan = re.fullmatch(rf"{RWS_ROUTE_REPOSITORIES}/(\d+){RWS_ROUTE_LAST_SCAN}", route)
+        if method == "GET" and last_scan:
+            repository_id = int(last_scan.group(1))
+            with self._lock:
+                scans = [scan for scan in self.scans.values() if scan["repository_id"] == repository_id]
+            return 200, max(scans, key=lambda scan: scan["id_"]) if scans else None
+
+        if method == "POST" and route == RWS_ROUTE_SCANS:
+            scan = {**json.loads(body), "id_": self._new_id()}
+            with self._lock:
+                self.scans[scan["id_"]] = scan
+            return 201, scan
+
+        scan_findings = re.fullmatch(rf"{RWS_ROUTE_SCANS}/(\d+){RWS_ROUTE_FINDINGS}", route)
+        if method == "POST" and scan_findings:
+            findings = json.loads(body)
+            with self._lock:
+                self.findings.setdefault(int(scan_findings.group(1)), []).extend(findings)
+            return 201, len(findings)
+
+        if method == "GET" and route == f"{RWS_ROUTE_RULE_PACKS}/versions":
+            rule_pack = {"version": self.rule_pack_version, "active": True, "global_allow_list": None}
+            return 200, {"data": [rule_pack], "total": 1, "limit": 100, "skip": 0}
+
+        if method == "GET" and route == RWS_ROUTE_RULE_PACKS:
+            return 200, self.rule_pack
+
+        return 404, {"detail": f"{method} {route} is not served by the stub"}
+
+    def _serve_git_file(self, request: BaseHTTPRequestHandler, relative_path: str) -> None:
+        file_path = os.path.realpath(os.path.join(self.git_root or "", relative_path))
+        if not self.git_root or not file_path.startswith(os.path.realpath(self.git_root) + os.sep):
+            self._respond(request, 404, b"", "text/plain")
+            return
+        try:
+            with open(file_path, "rb") as git_file:
+                content = git_file.read()
+        except OSError:
+            self._respond(request, 404, b"", "text/plain")
+            return
+        self._respond(request, 200, content, "application/octet-stream")
+
+    @staticmethod
+    def _respond(request: BaseHTTPRequestHandler, status: int, content: bytes, content_type: str) -> None:
+        request.send_response(status)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(content)))
+        request.end_headers()
+        request.wfile.write(content)
@@ -0,0 +1,182 @@
+# Standard Library
+import os
+import random
+import string
+import subprocess
+from dataclasses import dataclass, field
+
+BRANCH = "main"
+COMMITTER = "RESC Benchmark <benchmark@example.com>"
+FIRST_COMMIT_TIMESTAMP = 1_600_000_000
+WORDS = (
+    "account",
+    "buffer",
+    "config",
+    "deploy",
+    "element",
+    "factory",
+    "gateway",
+    "handler",
+    "index",
+    "json",
+    "kernel",
+    "lambda",
+    "module",
+    "network",
+    "object",
+    "payload",
+    "queue",
+    "request",
+    "service",
+    "token",
+    "update",
+    "value",
+    "worker",
+)
+FILE_EXTENSIONS = (".py", ".java", ".yaml", ".json", ".md", ".properties")
+
+
+def _random_aws_access_key(rng: random.Random) -> str:
+    return "AKIA" + "".join(rng.choices(string.ascii_uppercase + string.digits, k=16))
+
+
+def _random_github_token(rng: random.Random) -> str:
+    return "ghp_" + "".join(rng.choices(string.ascii_letters + string.digits, k=36))
+
+
+def _random_password(rng: random.Random) -> str:
+    return 'password = "' + "".join(rng.choices(string.ascii_letters + string.digits, k=20)) + '"'
+
+
+# Rule id of the benchmark rule pack matching each kind of planted secret, see rules.toml
+SECRET_GENERATORS = {
+    "benchmark-aws-access-key": _random_aws_access_key,
+    "benchmark-github-token": _random_github_token,
+    "benchmark-password": _random_password,
+}
+
+
+@dataclass
+class SyntheticRepositorySpec:
+    """
+    Shape of a generated repository, the same spec and seed always generate the same history.
+    """
+
+    commits: int = 100
+    files: int = 50
+    files_per_commit: int = 5
+    file_size: int = 4096
+    secrets: int = 10
+    seed: int = 0
+
+
+@dataclass
+class PlantedSecret:
+    rule_id: str
+    file_path: str
+    commit_index: int
+    value: str
+
+
+@dataclass
+class SyntheticRepository:
+    path: str
+    spec: SyntheticRepositorySpec
+    bytes_written: int = 0
+    planted_secrets: list[PlantedSecret] = field(default_factory=list)
+
+
+def _random_line(rng: random.Random) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(4, 12)))
+
+
+def _random_content(rng: random.Random, size: int) -> list[str]:
+    lines: list[str] = []
+    written = 0
+    while written < size:
+        line = _random_line(rng)
+        lines.append(line)
+        written += len(line) + 1
+    return lines
+
+
+def _data(payload: bytes) -> bytes:
+    return b"data " + str(len(payload)).encode("ascii") + b"\n" + payload + b"\n"
+
+
+def generate_repository(path: str, spec: SyntheticRepositorySpec) -> SyntheticRepository:
+    """
+        Generate a git repository with a linear history of random text files and planted secrets.
+        The history is streamed into git fast-import, which keeps the generation of large repositories fast.
+    :param path:
+        Directory the repository is created in, it must not exist yet or be empty
+    :param spec:
+        Shape of the repository
+    :return: SyntheticRepository.
+        The generated repository and the secrets planted in its history
+    """
+    rng = random.Random(spec.seed)
+    repository = SyntheticRepository(path=path, spec=spec)
+    file_paths = [
+        os.path.join(f"module_{index % 10}", f"file_{index}{rng.choice(FILE_EXTENSIONS)}")
+        for index in range(spec.files)
+    ]
+    files_per_commit = min(spec.files_per_commit, len(file_paths))
+    total_slots = spec.commits * files_per_commit
+    secret_slots = sorted(rng.sample(range(total_slots), k=min(spec.secrets, total_slots)))
+
+    subprocess.run(["git", "init", "--quiet", "-b", BRANCH, path], check=True)
+    with subprocess.Popen(
+        ["git", "fast-import", "--quiet"],
+        cwd=path,
+        stdin=subprocess.PIPE,
+    ) as fast_import:
+        slot = 0
+        for commit_index in range(spec.commits):
+            timestamp = FIRST_COMMIT_TIMESTAMP + commit_index * 60
+            message = f"Commit {commit_index}: {_random_line(rng)}\n".encode()
+            chunks = [
+                f"commit refs/heads/{BRANCH}\n".encode(),
+                f"mark :{commit_index + 1}\n".encode(),
+                f"committer {COMMITTER} {timestamp} +0000\n".encode(),
+                _data(message),
+            ]
+            if commit_index:
+                chunks.append(f"from :{commit_index}\n".encode())
+            for file_path in rng.sample(file_paths, k=files_per_commit):
+                lines = _random_content(rng, spec.file_size)
+                if secret_slots and secret_slots[0] == slot:
+                    secret_slots.pop(0)
+                    rule_id = rng.choice(sorted(SECRET_GENERATORS))
+                    value = SECRET_GENERATORS[rule_id](rng)
+                    lines.insert(rng.randint(0, len(lines)), value)
+                    repository.planted_secrets.append(
+                        PlantedSecret(rule_id=rule_id, file_path=file_path, commit_index=commit_index, value=value)
+                    )
+                slot += 1
+                content = ("\n".join(lines) + "\n").encode()
+                repository.bytes_written += len(content)
+                chunks.append(f"M 100644 inline {file_path}\n".encode())
+                chunks.append(_data(content))
+            fast_import.stdin.write(b"".join(chunks))
+        fast_import.stdin.close()
+        if fast_import.wait() != 0:
+            raise RuntimeError(f"git fast-import failed with exit code {fast_import.returncode}")
+
+    subprocess.run(["git", "checkout", "--quiet", BRANCH], cwd=path, check=True)
+    return repository
+
+
+def export_bare_repository(repository_path: str, destination: str) -> str:
+    """
+        Create a bare copy of a repository which can be served as static files over the dumb HTTP protocol
+    :param repository_path:
+        The repository to copy
+    :param destination:
+        Path of the bare repository
+    :return: str.
+        The path of the bare repository
+    """
+    subprocess.run(["git", "clone", "--quiet", "--bare", repository_path, destination], check=True)
+    subprocess.run(["git", "update-server-info"], cwd=destination, check=True)
+    return destination
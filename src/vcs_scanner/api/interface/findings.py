@@ -12,27 +12,36 @@ from vcs_scanner.api.constants import (
     RWS_VERSION_PREFIX,
 )
 from vcs_scanner.api.schema.finding import FindingCreate
+from vcs_scanner.helpers.tracing import traced
 
 logger = logging.getLogger(__name__)
 
 
-def create_findings(url: str, findings: list[FindingCreate]) -> requests.Response:
-    api_url = f"{url}{RWS_VERSION_PREFIX}{RWS_ROUTE_FINDINGS}"
-
+def serialize_findings(findings: list[FindingCreate]) -> list[dict]:
+    """
+        Convert the findings to the JSON compatible payload of the findings routes
+    :param findings:
+        The findings to send
+    :return: list[dict].
+        One JSON object per finding
+    """
     findings_json = []
     for finding in findings:
         findings_json.append(json.loads(finding.model_dump_json()))
+    return findings_json
 
+
+@traced("rws.create_findings")
+def create_findings(url: str, findings: list[FindingCreate]) -> requests.Response:
+    api_url = f"{url}{RWS_VERSION_PREFIX}{RWS_ROUTE_FINDINGS}"
+    findings_json = serialize_findings(findings)
     response = requests.post(api_url, json=findings_json, proxies={"http": "", "https": ""}, timeout=10)
     return response
 
 
+@traced("rws.create_findings_with_scan_id")
 def create_findings_with_scan_id(url: str, findings: list[FindingCreate], scan_id: int) -> requests.Response:
     api_url = f"{url}{RWS_VERSION_PREFIX}{RWS_ROUTE_SCANS}/{scan_id}{RWS_ROUTE_FINDINGS}"
-
-    findings_json = []
-    for finding in findings:
-        findings_json.append(json.loads(finding.model_dump_json()))
-
+    findings_json = serialize_findings(findings)
     response = requests.post(api_url, json=findings_json, proxies={"http": "", "https": ""}, timeout=10)
     return response
@@ -11,16 +11,19 @@ from vcs_scanner.api.constants import (
     RWS_VERSION_PREFIX,
 )
 from vcs_scanner.api.schema.repository import Repository
+from vcs_scanner.helpers.tracing import traced
 
 logger = logging.getLogger(__name__)
 
 
+@traced("rws.create_repository")
 def create_repository(url: str, repository: Repository):
     api_url = f"{url}{RWS_VERSION_PREFIX}{RWS_ROUTE_REPOSITORIES}"
     response = requests.post(api_url, data=repository.model_dump_json(), proxies={"http": "", "https": ""}, timeout=10)
     return response
 
 
+@traced("rws.get_last_scan_for_repository")
 def get_last_scan_for_repository(url: str, repository_id: int):
     api_url = f"{url}{RWS_VERSION_PREFIX}{RWS_ROUTE_REPOSITORIES}/{repository_id}{RWS_ROUTE_LAST_SCAN}"
     response = requests.get(api_url, proxies={"http": "", "https": ""}, timeout=10)
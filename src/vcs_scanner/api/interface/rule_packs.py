@@ -11,10 +11,12 @@ from vcs_scanner.api.constants import (
     RWS_ROUTE_RULE_PACKS,
     RWS_VERSION_PREFIX,
 )
+from vcs_scanner.helpers.tracing import traced
 
 logger = logging.getLogger(__name__)
 
 
+@traced("rws.upload_rule_pack_toml_file")
 def upload_rule_pack_toml_file(url: str, rule_file_path: str):
     with open(rule_file_path, "rb") as toml_file:
         files = {
@@ -29,6 +31,7 @@ def upload_rule_pack_toml_file(url: str, rule_file_path: str):
     return response
 
 
+@traced("rws.download_rule_pack_toml_file")
 def download_rule_pack_toml_file(rws_url: str, rule_pack_version: str | None = "") -> Response:
     params = {}
     if rule_pack_version:
@@ -49,6 +52,7 @@ def download_rule_pack_toml_file(rws_url: str, rule_pack_version: str | None = "
     return response
 
 
+@traced("rws.get_rule_packs")
 def get_rule_packs(
     url: str,
     version: str | None = None,
@@ -7,10 +7,12 @@ import requests
 # First Party
 from vcs_scanner.api.constants import RWS_ROUTE_VCS, RWS_VERSION_PREFIX
 from vcs_scanner.api.schema.vcs_instance import VCSInstanceCreate
+from vcs_scanner.helpers.tracing import traced
 
 logger = logging.getLogger(__name__)
 
 
+@traced("rws.create_vcs_instance")
 def create_vcs_instance(url: str, vcs_instance: VCSInstanceCreate):
     api_url = f"{url}{RWS_VERSION_PREFIX}{RWS_ROUTE_VCS}"
     response = requests.post(
@@ -4,7 +4,7 @@ import sys
 from typing import Annotated
 
 # Third Party
-from pydantic import BaseModel, ConfigDict, Field, StringConstraints
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, StringConstraints
 
 
 class FindingBase(BaseModel):
@@ -19,6 +19,27 @@ class FindingBase(BaseModel):
     email: Annotated[str, StringConstraints(max_length=100)]
     event_sent_on: datetime.datetime | None = None
     rule_name: Annotated[str, StringConstraints(max_length=400)]
+    # The matched secret is only kept in memory for post processing, it is never sent to the API nor written to disk
+    _secret: str | None = PrivateAttr(default=None)
+    # The Shannon entropy of the secret, which the scan caches keep instead of the secret itself
+    _secret_entropy: float | None = PrivateAttr(default=None)
+
+    @property
+    def secret(self) -> str | None:
+        # Read from the private attributes directly, the attribute lookup of pydantic is slow for a batch of findings
+        return self.__pydantic_private__["_secret"]
+
+    @secret.setter
+    def secret(self, secret: str | None) -> None:
+        self._secret = secret
+
+    @property
+    def secret_entropy(self) -> float | None:
+        return self.__pydantic_private__["_secret_entropy"]
+
+    @secret_entropy.setter
+    def secret_entropy(self, secret_entropy: float | None) -> None:
+        self._secret_entropy = secret_entropy
 
 
 class FindingPatch(BaseModel):
@@ -0,0 +1,94 @@
+# Standard Library
+import logging
+import os
+import sqlite3
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+
+# First Party
+from vcs_scanner.cache.commit_cache import COMMIT_CACHE_FILE
+
+logger = logging.getLogger(__name__)
+
+
+class BranchTipStore:
+    """
+    The tips of the branches and tags of every repository as of its last scan, stored next to the commit scan cache.
+
+    The last scan the web service keeps only covers HEAD. An incremental scan of all branches scans the commits of
+    any ref which are not reachable from the tips of the previous scan, so the new commits of every branch are
+    scanned once, and the branches of which the tips did not move are not scanned at all.
+    The tips are kept per rule pack version: a scan with another rule pack does not cover the same findings.
+    A repository is keyed by its url, or by its path when it is scanned locally: local repositories without a remote
+    share the same placeholder url.
+    """
+
+    def __init__(self, cache_directory: str):
+        self.database_path: str = os.path.join(cache_directory, COMMIT_CACHE_FILE)
+        os.makedirs(cache_directory, exist_ok=True)
+        with self._connect() as connection:
+            # The former branch_tips table keyed the local repositories by their shared placeholder url
+            connection.execute("DROP TABLE IF EXISTS branch_tips")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS repository_branch_tips ("
+                "repository_key TEXT NOT NULL, "
+                "ref TEXT NOT NULL, "
+                "commit_sha TEXT NOT NULL, "
+                "rule_pack TEXT NOT NULL, "
+                "scanned_at TEXT NOT NULL, "
+                "PRIMARY KEY (repository_key, ref))"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.database_path, timeout=60)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get_tips(self, repository_key: str, rule_pack: str) -> dict[str, str] | None:
+        """
+            Get the tips of the refs of a repository as of its last scan with the rule pack
+        :param repository_key:
+            Url of the repository, or its path when it is scanned locally
+        :param rule_pack:
+            Version of the rule pack the scan runs with
+        :return: dict or None.
+            The commit sha by ref name, None when the repository was not scanned with the rule pack
+        """
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT ref, commit_sha, rule_pack FROM repository_branch_tips WHERE repository_key = ?",
+                (str(repository_key),),
+            ).fetchall()
+        if not rows or any(row[2] != rule_pack for row in rows):
+            return None
+        return {ref: commit_sha for ref, commit_sha, _ in rows}
+
+    def record_tips(self, repository_key: str, tips: dict[str, str], rule_pack: str) -> None:
+        """
+            Replace the tips of the refs of a repository by those of the scan which completed
+        :param repository_key:
+            Url of the repository, or its path when it is scanned locally
+        :param tips:
+            The commit sha by ref name of every ref the scan covered
+        :param rule_pack:
+            Version of the rule pack the scan ran with
+        """
+        scanned_at = datetime.now(UTC).isoformat()
+        try:
+            with self._connect() as connection:
+                connection.execute(
+                    "DELETE FROM repository_branch_tips WHERE repository_key = ?", (str(repository_key),)
+                )
+                connection.executemany(
+                    "INSERT INTO repository_branch_tips (repository_key, ref, commit_sha, rule_pack, scanned_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(str(repository_key), ref, commit, rule_pack, scanned_at) for ref, commit in tips.items()],
+                )
+        except sqlite3.Error as error:
+            logger.warning(f"Unable to store the branch tips of {repository_key}: {error}")
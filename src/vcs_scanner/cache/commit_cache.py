@@ -0,0 +1,140 @@
+# Standard Library
+import json
+import logging
+import os
+import sqlite3
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+
+# First Party
+from vcs_scanner.api.schema.finding import FindingBase
+from vcs_scanner.post_processing.entropy_processor import shannon_entropies
+
+logger = logging.getLogger(__name__)
+
+COMMIT_CACHE_FILE = "commits.sqlite"
+# Stay well below the maximum number of host parameters of sqlite
+QUERY_BATCH_SIZE = 500
+
+
+def dump_findings(findings: list[FindingBase]) -> list[dict]:
+    """
+        Serialize findings for a scan cache. The secrets are not written to disk, only their entropy is kept so that
+        replayed findings can be post processed
+    :param findings:
+        The findings to serialize
+    :return: list[dict].
+        The fields of every finding and the entropy of its secret
+    """
+    secrets = [finding.secret for finding in findings]
+    entropies = shannon_entropies([secret for secret in secrets if secret is not None]).tolist()
+    entropy_iterator = iter(entropies)
+    return [
+        {
+            **finding.model_dump(mode="json"),
+            "secret_entropy": next(entropy_iterator) if secret is not None else finding.secret_entropy,
+        }
+        for finding, secret in zip(findings, secrets, strict=True)
+    ]
+
+
+def load_finding(data: dict) -> FindingBase:
+    """
+        Restore a finding serialized for a scan cache
+    :param data:
+        The serialized finding
+    :return: FindingBase.
+        The finding with the entropy of its secret, it has no secret
+    """
+    fields = dict(data)
+    secret_entropy = fields.pop("secret_entropy", None)
+    finding = FindingBase(**fields)
+    finding.secret_entropy = secret_entropy
+    return finding
+
+
+class CommitScanCache:
+    """
+    Cache of the history scan results of individual commits, shared by every repository scanned on this worker.
+
+    The findings of a commit only depend on the commit itself and on the rule pack, so the cache is keyed by
+    the commit sha and the rule pack hash. Forks and mirrors share most of their commits and can therefore
+    reuse the results of each other. Commits without findings are cached as well.
+    """
+
+    def __init__(self, cache_directory: str, rule_pack_hash: str):
+        self.database_path: str = os.path.join(cache_directory, COMMIT_CACHE_FILE)
+        self.rule_pack_hash: str = rule_pack_hash
+        os.makedirs(cache_directory, exist_ok=True)
+        with self._connect() as connection:
+            # The findings of the former commit_results table kept their secrets, overwrite them when dropping it
+            connection.execute("PRAGMA secure_delete=ON")
+            connection.execute("DROP TABLE IF EXISTS commit_results")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS commit_findings ("
+                "rule_pack_hash TEXT NOT NULL, "
+                "commit_sha TEXT NOT NULL, "
+                "findings TEXT NOT NULL, "
+                "scanned_at TEXT NOT NULL, "
+                "PRIMARY KEY (rule_pack_hash, commit_sha))"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.database_path, timeout=60)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get_findings(self, commits: list[str]) -> dict[str, list[FindingBase]]:
+        """
+            Retrieve the cached findings of the given commits
+        :param commits:
+            The commit shas to look up
+        :return: dict.
+            The findings per commit sha, commits which are not cached are absent from the dictionary
+        """
+        cached: dict[str, list[FindingBase]] = {}
+        with self._connect() as connection:
+            for start in range(0, len(commits), QUERY_BATCH_SIZE):
+                batch = commits[start : start + QUERY_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = connection.execute(
+                    f"SELECT commit_sha, findings FROM commit_findings "
+                    f"WHERE rule_pack_hash = ? AND commit_sha IN ({placeholders})",
+                    [self.rule_pack_hash, *batch],
+                )
+                for commit_sha, findings in rows:
+                    cached[commit_sha] = [load_finding(finding) for finding in json.loads(findings)]
+        return cached
+
+    def store(self, commits: list[str], findings: list[FindingBase]) -> None:
+        """
+            Store the results of a successful scan of the given commits
+        :param commits:
+            All the commit shas which were scanned, including those without findings
+        :param findings:
+            The findings reported by the scan of these commits
+        """
+        findings_per_commit: dict[str, list[dict]] = defaultdict(list)
+        for finding, dumped in zip(findings, dump_findings(findings), strict=True):
+            findings_per_commit[finding.commit_id].append(dumped)
+
+        scanned_at = datetime.now(UTC).isoformat()
+        try:
+            with self._connect() as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO commit_findings (rule_pack_hash, commit_sha, findings, scanned_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (self.rule_pack_hash, commit, json.dumps(findings_per_commit.get(commit, [])), scanned_at)
+                        for commit in commits
+                    ],
+                )
+        except sqlite3.Error as error:
+            logger.warning(f"Unable to store {len(commits)} commits in the commit scan cache: {error}")
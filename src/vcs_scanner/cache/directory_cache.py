@@ -0,0 +1,182 @@
+# Standard Library
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from contextlib import suppress
+from dataclasses import dataclass, field
+
+# Third Party
+from vcs_scanner.api.schema.finding import FindingBase
+
+# First Party
+from vcs_scanner.cache.commit_cache import dump_findings, load_finding
+from vcs_scanner.cache.hashing import hash_file
+
+logger = logging.getLogger(__name__)
+
+# Version 3 keeps the entropy of the secret of the findings instead of the secret
+CACHE_FORMAT_VERSION = 3
+
+
+@dataclass
+class CachedFile:
+    size: int
+    mtime_ns: int
+    sha256: str
+    findings: list[dict] = field(default_factory=list)
+
+
+class DirectoryScanCache:
+    """
+    Persistent cache of the directory scan results of one directory.
+
+    Every file is recorded with its content hash and the findings gitleaks reported for it.
+    A later scan only needs to hand the new and changed files to gitleaks and can replay the findings of the others.
+    The cache is bound to a rule pack hash, when the rule pack changes every file is scanned again.
+    """
+
+    def __init__(self, cache_directory: str, cache_key: str, rule_pack_hash: str):
+        self.cache_directory: str = cache_directory
+        self.cache_key: str = cache_key
+        self.rule_pack_hash: str = rule_pack_hash
+        self.cache_file_path: str = os.path.join(
+            cache_directory, f"dir-{hashlib.sha256(cache_key.encode('utf-8')).hexdigest()[:32]}.json"
+        )
+        self._entries: dict[str, CachedFile] = {}
+        self._current: dict[str, CachedFile] = {}
+        self._to_scan: list[str] = []
+
+    def load(self) -> None:
+        """
+        Load the entries of the cache file, entries made for another rule pack are discarded.
+        """
+        self._entries = {}
+        try:
+            with open(self.cache_file_path, encoding="utf-8") as cache_file:
+                content = json.load(cache_file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as error:
+            logger.warning(f"Ignoring unreadable directory scan cache {self.cache_file_path}: {error}")
+            return
+
+        if content.get("version") != CACHE_FORMAT_VERSION:
+            # Version 2 kept the secrets of the findings, do not leave them on disk until the directory is scanned again
+            logger.info(f"Directory scan cache for {self.cache_key} has an outdated format, removing it")
+            with suppress(OSError):
+                os.remove(self.cache_file_path)
+            return
+        if content.get("rule_pack_hash") != self.rule_pack_hash:
+            logger.info(f"Directory scan cache for {self.cache_key} is outdated, scanning every file")
+            return
+
+        self._entries = {path: CachedFile(**entry) for path, entry in content.get("files", {}).items()}
+
+    def plan(self, directory_path: str) -> list[str]:
+        """
+            Walk the directory and determine which files have to be scanned.
+            A file is unchanged when its size and modification time match the cache,
+            or, failing that, when its content hash does.
+        :param directory_path:
+            The directory to be scanned
+        :return: list[str].
+            The paths, relative to directory_path, of the new and changed files
+        """
+        self._current = {}
+        self._to_scan = []
+        for root, directories, files in os.walk(directory_path):
+            directories[:] = [directory for directory in directories if directory != ".git"]
+            for file_name in files:
+                full_path = os.path.join(root, file_name)
+                if os.path.islink(full_path) or not os.path.isfile(full_path):
+                    continue
+                relative_path = os.path.relpath(full_path, directory_path)
+                try:
+                    stat = os.stat(full_path)
+                    cached = self._entries.get(relative_path)
+                    if cached and cached.size == stat.st_size and cached.mtime_ns == stat.st_mtime_ns:
+                        self._current[relative_path] = cached
+                        continue
+
+                    sha256 = hash_file(full_path)
+                except OSError as error:
+                    logger.warning(f"Unable to read {full_path}, it will be scanned: {error}")
+                    self._to_scan.append(relative_path)
+                    continue
+
+                if cached and cached.sha256 == sha256:
+                    self._current[relative_path] = CachedFile(
+                        size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=sha256, findings=cached.findings
+                    )
+                    continue
+
+                self._current[relative_path] = CachedFile(size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=sha256)
+                self._to_scan.append(relative_path)
+
+        logger.info(
+            f"Directory scan cache for {self.cache_key}: {len(self._to_scan)} of {len(self._current)} files to scan"
+        )
+        return self._to_scan
+
+    def get_cached_findings(self, directory_path: str) -> list[FindingBase]:
+        """
+            Replay the findings of the files that do not need to be scanned
+        :param directory_path:
+            The directory being scanned, used to report the paths as gitleaks would
+        :return: list[FindingBase].
+            The cached findings of the unchanged files
+        """
+        to_scan = set(self._to_scan)
+        findings: list[FindingBase] = []
+        for relative_path, cached in self._current.items():
+            if relative_path in to_scan:
+                continue
+            for finding in cached.findings:
+                finding = load_finding(finding)
+                finding.file_path = os.path.normpath(os.path.join(directory_path, relative_path))
+                findings.append(finding)
+        return findings
+
+    def update(self, directory_path: str, findings: list[FindingBase]) -> None:
+        """
+            Record the findings of the scanned files
+        :param directory_path:
+            The directory the findings paths are relative to
+        :param findings:
+            The findings gitleaks reported for the new and changed files
+        """
+        for finding, dumped in zip(findings, dump_findings(findings), strict=True):
+            relative_path = os.path.relpath(finding.file_path, directory_path)
+            cached = self._current.get(relative_path)
+            if cached is None:
+                logger.debug(f"Finding for unknown file {finding.file_path} is not cached")
+                continue
+            cached.findings.append(dumped)
+
+    def save(self) -> None:
+        """
+        Atomically write the cache file, only the files seen during the last plan are kept.
+        """
+        content = {
+            "version": CACHE_FORMAT_VERSION,
+            "cache_key": self.cache_key,
+            "rule_pack_hash": self.rule_pack_hash,
+            "files": {path: cached.__dict__ for path, cached in self._current.items()},
+        }
+        temporary_path = None
+        try:
+            os.makedirs(self.cache_directory, exist_ok=True)
+            # A file of its own, the scans of several threads or processes can save the same cache at once
+            descriptor, temporary_path = tempfile.mkstemp(
+                prefix=f"{os.path.basename(self.cache_file_path)}.", suffix=".tmp", dir=self.cache_directory
+            )
+            with open(descriptor, "w", encoding="utf-8") as cache_file:
+                json.dump(content, cache_file)
+            os.replace(temporary_path, self.cache_file_path)
+        except OSError as error:
+            logger.warning(f"Unable to write the directory scan cache {self.cache_file_path}: {error}")
+            if temporary_path is not None:
+                with suppress(OSError):
+                    os.remove(temporary_path)
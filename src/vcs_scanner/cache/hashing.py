@@ -0,0 +1,19 @@
+# Standard Library
+import hashlib
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: str) -> str:
+    """
+        Compute the sha256 of the content of a file
+    :param file_path:
+        Path to the file to hash
+    :return: str.
+        The hex digest of the content
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,92 @@
+# Standard Library
+import json
+import logging
+import os
+from datetime import UTC, datetime
+
+# Third Party
+from vcs_scanner.api.schema.scan import ScanRead
+from vcs_scanner.api.schema.scan_type import ScanType
+
+logger = logging.getLogger(__name__)
+
+STATE_FORMAT_VERSION = 1
+
+
+class ScanStateStore:
+    """
+    Local record of the last scan of every repository the CLI scanned, for runs without a RESC web service.
+
+    Like the last scan the web service keeps, it tells whether a repository needs a base scan, an incremental scan
+    from the last scanned commit, or no scan at all because neither its HEAD nor the rule pack changed.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path: str = file_path
+
+    def _load(self) -> dict[str, dict]:
+        try:
+            with open(self.file_path, encoding="utf-8") as state_file:
+                content = json.load(state_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as error:
+            logger.warning(f"Ignoring unreadable scan state {self.file_path}: {error}")
+            return {}
+        if not isinstance(content, dict) or content.get("version") != STATE_FORMAT_VERSION:
+            logger.warning(f"Ignoring scan state {self.file_path} of another format")
+            return {}
+        return content.get("repositories", {})
+
+    def get_last_scan(self, repository_url: str) -> ScanRead | None:
+        """
+            Get the last recorded scan of a repository
+        :param repository_url:
+            Url of the repository
+        :return: ScanRead or None.
+            The last scan, None when the repository was never scanned
+        """
+        state = self._load().get(str(repository_url))
+        if not state:
+            return None
+        try:
+            return ScanRead(
+                scan_type=state.get("scan_type", ScanType.BASE),
+                last_scanned_commit=state["last_scanned_commit"],
+                timestamp=state["timestamp"],
+                rule_pack=state["rule_pack"],
+                repository_id=1,
+                id_=1,
+            )
+        except (KeyError, ValueError) as error:
+            logger.warning(f"Ignoring invalid scan state of {repository_url}: {error}")
+            return None
+
+    def record_scan(self, repository_url: str, scan_type: ScanType, last_scanned_commit: str, rule_pack: str) -> None:
+        """
+            Atomically record the scan of a repository, replacing its previous scan
+        :param repository_url:
+            Url of the repository
+        :param scan_type:
+            Type of the scan
+        :param last_scanned_commit:
+            The commit the scan covered the history up to
+        :param rule_pack:
+            Version of the rule pack the scan ran with
+        """
+        repositories = self._load()
+        repositories[str(repository_url)] = {
+            "scan_type": scan_type,
+            "last_scanned_commit": last_scanned_commit,
+            "timestamp": datetime.now(UTC).isoformat(),
+            "rule_pack": rule_pack,
+        }
+        content = {"version": STATE_FORMAT_VERSION, "repositories": repositories}
+        temporary_path = f"{self.file_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.file_path)), exist_ok=True)
+            with open(temporary_path, "w", encoding="utf-8") as state_file:
+                json.dump(content, state_file, indent=2)
+            os.replace(temporary_path, self.file_path)
+        except OSError as error:
+            logger.warning(f"Unable to write the scan state {self.file_path}: {error}")
@@ -0,0 +1,174 @@
+# Standard Library
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+
+# First Party
+from vcs_scanner.cache.commit_cache import COMMIT_CACHE_FILE, QUERY_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CLAIM_LEASE_SECONDS = 2 * 60 * 60
+DEFAULT_SHARED_HISTORY_WAIT_SECONDS = 10 * 60
+
+
+class SharedHistoryIndex:
+    """
+    Index of the root commits of the repositories scanned on this worker, stored next to the commit scan cache.
+
+    Repositories sharing a root commit are forks or mirrors of each other. When such repositories are scanned
+    concurrently, the commits they have in common are claimed by the first scan to reach them. The other scans
+    wait for the results to land in the commit scan cache instead of scanning the same commits again.
+    Claims are leases: the commits of a scan which crashed become available again once the lease expires, or as soon
+    as its process is gone when it ran on this host.
+    """
+
+    def __init__(
+        self,
+        cache_directory: str,
+        rule_pack_hash: str,
+        lease_seconds: int = DEFAULT_CLAIM_LEASE_SECONDS,
+    ):
+        self.database_path: str = os.path.join(cache_directory, COMMIT_CACHE_FILE)
+        self.rule_pack_hash: str = rule_pack_hash
+        self.lease_seconds: int = lease_seconds
+        self._hostname: str = socket.gethostname()
+        self.owner: str = f"{self._hostname}:{os.getpid()}:{uuid.uuid4().hex}"
+        os.makedirs(cache_directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS root_commits ("
+                "root_sha TEXT NOT NULL, "
+                "repository_url TEXT NOT NULL, "
+                "last_seen TEXT NOT NULL, "
+                "PRIMARY KEY (root_sha, repository_url))"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS commit_claims ("
+                "rule_pack_hash TEXT NOT NULL, "
+                "commit_sha TEXT NOT NULL, "
+                "owner TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, "
+                "PRIMARY KEY (rule_pack_hash, commit_sha))"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.database_path, timeout=60, isolation_level=None)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+    def register_roots(self, repository_url: str, root_commits: list[str]) -> list[str]:
+        """
+            Record the root commits of a repository
+        :param repository_url:
+            The url of the repository
+        :param root_commits:
+            The root commits of the repository
+        :return: list[str].
+            The urls of the other repositories sharing at least one root commit
+        """
+        last_seen = datetime.now(UTC).isoformat()
+        related: set[str] = set()
+        with self._connect() as connection:
+            for root_commit in root_commits:
+                rows = connection.execute(
+                    "SELECT repository_url FROM root_commits WHERE root_sha = ? AND repository_url != ?",
+                    (root_commit, repository_url),
+                )
+                related.update(row[0] for row in rows)
+                connection.execute(
+                    "INSERT OR REPLACE INTO root_commits (root_sha, repository_url, last_seen) VALUES (?, ?, ?)",
+                    (root_commit, repository_url, last_seen),
+                )
+        return sorted(related)
+
+    def claim(self, commits: list[str]) -> tuple[list[str], list[str]]:
+        """
+            Claim the given commits for this scan
+        :param commits:
+            The commits this scan would have to scan
+        :return: tuple.
+            The commits claimed by this scan, and the commits currently claimed by another scan
+        """
+        now = time.time()
+        claimed: list[str] = []
+        claimed_by_others: list[str] = []
+        with self._connect() as connection:
+            connection.execute("DELETE FROM commit_claims WHERE expires_at < ?", (now,))
+            for start in range(0, len(commits), QUERY_BATCH_SIZE):
+                batch = commits[start : start + QUERY_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = connection.execute(
+                    f"SELECT commit_sha FROM commit_claims "
+                    f"WHERE rule_pack_hash = ? AND owner != ? AND commit_sha IN ({placeholders})",
+                    [self.rule_pack_hash, self.owner, *batch],
+                )
+                taken = {row[0] for row in rows}
+                claimed_by_others.extend(commit for commit in batch if commit in taken)
+                free = [commit for commit in batch if commit not in taken]
+                connection.executemany(
+                    "INSERT OR REPLACE INTO commit_claims (rule_pack_hash, commit_sha, owner, expires_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(self.rule_pack_hash, commit, self.owner, now + self.lease_seconds) for commit in free],
+                )
+                claimed.extend(free)
+        return claimed, claimed_by_others
+
+    def release(self) -> None:
+        """
+        Release every claim held by this scan.
+        """
+        with self._connect() as connection:
+            connection.execute("DELETE FROM commit_claims WHERE owner = ?", (self.owner,))
+
+    def live_claims(self, commits: list[str]) -> set[str]:
+        """
+            Get the commits still claimed by another scan which is running
+        :param commits:
+            The commits to check
+        :return: set[str].
+            The commits of which the claim did not expire, and of which the owner process was not found gone
+        """
+        now = time.time()
+        claimed: set[str] = set()
+        with self._connect() as connection:
+            for start in range(0, len(commits), QUERY_BATCH_SIZE):
+                batch = commits[start : start + QUERY_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = connection.execute(
+                    f"SELECT commit_sha, owner FROM commit_claims "
+                    f"WHERE rule_pack_hash = ? AND owner != ? AND expires_at >= ? AND commit_sha IN ({placeholders})",
+                    [self.rule_pack_hash, self.owner, now, *batch],
+                )
+                claimed.update(commit for commit, owner in rows if self._is_owner_alive(owner))
+        return claimed
+
+    def _is_owner_alive(self, owner: str) -> bool:
+        hostname, _, remainder = owner.partition(":")
+        pid = remainder.partition(":")[0]
+        # The processes of other hosts cannot be checked, their claims last until the lease expires
+        if hostname != self._hostname or not pid.isdigit():
+            return True
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
@@ -5,6 +5,16 @@ LOG_FILE_PATH = "secret_scanner.log"
 LEAKS_FOUND_EXIT_CODE = 42
 NO_LEAKS_FOUND_EXIT_CODE = 0
 
+# Engines a scan can run with: the gitleaks executable, or the in-process implementation of its rules
+SCAN_ENGINE_GITLEAKS = "gitleaks"
+SCAN_ENGINE_NATIVE = "native"
+SCAN_ENGINES = (SCAN_ENGINE_GITLEAKS, SCAN_ENGINE_NATIVE)
+
+# Pools the batches of the post processors can be spread over
+POST_PROCESSING_EXECUTOR_THREAD = "thread"
+POST_PROCESSING_EXECUTOR_PROCESS = "process"
+POST_PROCESSING_EXECUTORS = (POST_PROCESSING_EXECUTOR_THREAD, POST_PROCESSING_EXECUTOR_PROCESS)
+
 # These values are used as vcs names whenever a CLI scan is done
 CLI_VCS_LOCAL_SCAN = "LOCAL_SCAN"
 CLI_VCS_BITBUCKET = "CLI_BITBUCKET"
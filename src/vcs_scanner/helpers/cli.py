@@ -1,6 +1,7 @@
 import pathlib
 from argparse import ArgumentParser
 
+from vcs_scanner.constants import POST_PROCESSING_EXECUTORS, SCAN_ENGINES
 from vcs_scanner.helpers.env_default import EnvDefault
 
 
@@ -77,6 +78,112 @@ def create_cli_argparser() -> ArgumentParser:
         "Provided as comma separated list. "
         "Can also be set via the RESC_IGNORE_TAGS environment variable",
     )
+    parser_common.add_argument(
+        "--scan-cache-dir",
+        type=pathlib.Path,
+        required=False,
+        action=EnvDefault,
+        envvar="RESC_SCAN_CACHE_DIR",
+        help="Directory in which scan results are cached between runs, so unchanged content is not scanned again. "
+        "Can also be set via the RESC_SCAN_CACHE_DIR environment variable",
+    )
+    parser_common.add_argument(
+        "--entropy-thresholds",
+        required=False,
+        action=EnvDefault,
+        type=str,
+        envvar="RESC_ENTROPY_THRESHOLDS",
+        help="Drop the findings of which the secret has a Shannon entropy below the threshold of a tag of their rule. "
+        "Provided as comma separated list of tag=threshold, in bits per byte, for instance Generic=3.5. "
+        "Can also be set via the RESC_ENTROPY_THRESHOLDS environment variable",
+    )
+    parser_common.add_argument(
+        "--post-processing-workers",
+        type=int,
+        required=False,
+        action=EnvDefault,
+        envvar="RESC_POST_PROCESSING_WORKERS",
+        help="Number of workers the batches of findings of the post processors are spread over, defaults to 1 which "
+        "processes them in the CLI process. Can also be set via the RESC_POST_PROCESSING_WORKERS environment variable",
+    )
+    parser_common.add_argument(
+        "--post-processing-executor",
+        choices=POST_PROCESSING_EXECUTORS,
+        required=False,
+        action=EnvDefault,
+        envvar="RESC_POST_PROCESSING_EXECUTOR",
+        help="Pool of the post processing workers: threads, or processes for processors doing CPU bound work in "
+        "Python. Defaults to thread. Can also be set via the RESC_POST_PROCESSING_EXECUTOR environment variable",
+    )
+    parser_common.add_argument(
+        "--keyword-filter",
+        required=False,
+        action="store_true",
+        help="Only hand the files and commits containing a keyword of the rule pack to gitleaks",
+    )
+    parser_common.add_argument(
+        "--engine",
+        choices=SCAN_ENGINES,
+        required=False,
+        action=EnvDefault,
+        envvar="RESC_SCAN_ENGINE",
+        help="Engine the scan runs with: the gitleaks executable, or the native engine which applies the gitleaks "
+        "rules in process. Defaults to gitleaks. Can also be set via the RESC_SCAN_ENGINE environment variable",
+    )
+    parser_common.add_argument(
+        "--engine-processes",
+        type=int,
+        required=False,
+        action=EnvDefault,
+        envvar="RESC_ENGINE_PROCESSES",
+        help="Number of processes the native engine scans with, defaults to 1. "
+        "Can also be set via the RESC_ENGINE_PROCESSES environment variable",
+    )
+    parser_common.add_argument(
+        "--metrics-file",
+        type=pathlib.Path,
+        required=False,
+        action=EnvDefault,
+        envvar="RESC_METRICS_FILE",
+        help="File the timing and finding metrics of the scan are written to, in the Prometheus text format. "
+        "Can also be set via the RESC_METRICS_FILE environment variable",
+    )
+    parser_common.add_argument(
+        "--trace-file",
+        type=pathlib.Path,
+        required=False,
+        action=EnvDefault,
+        envvar="RESC_TRACE_FILE",
+        help="File the tracing spans of clone, scan, parse, filter and upload are appended to as JSON lines. "
+        "Can also be set via the RESC_TRACE_FILE environment variable",
+    )
+    parser_common.add_argument(
+        "--gitleaks-timeout",
+        type=float,
+        required=False,
+        action=EnvDefault,
+        envvar="RESC_GITLEAKS_TIMEOUT",
+        help="Maximum wall clock time of a gitleaks scan in seconds, findings reported before the timeout are kept. "
+        "Can also be set via the RESC_GITLEAKS_TIMEOUT environment variable",
+    )
+    parser_common.add_argument(
+        "--gitleaks-max-memory",
+        type=int,
+        required=False,
+        action=EnvDefault,
+        envvar="RESC_GITLEAKS_MAX_MEMORY",
+        help="Maximum memory of a gitleaks scan in megabytes. "
+        "Can also be set via the RESC_GITLEAKS_MAX_MEMORY environment variable",
+    )
+    parser_common.add_argument(
+        "--gitleaks-max-cpu",
+        type=int,
+        required=False,
+        action=EnvDefault,
+        envvar="RESC_GITLEAKS_MAX_CPU",
+        help="Maximum cpu time of a gitleaks scan in seconds. "
+        "Can also be set via the RESC_GITLEAKS_MAX_CPU environment variable",
+    )
     parser_common.add_argument(
         "-v",
         "--verbose",
@@ -95,6 +202,13 @@ def create_cli_argparser() -> ArgumentParser:
         help="The name of the repository. Can also be set via the RESC_REPO_NAME environment variable",
     )
     repository_common.add_argument("--force-base-scan", required=False, action="store_true")
+    repository_common.add_argument(
+        "--all-branches",
+        required=False,
+        action="store_true",
+        help="Scan the new commits of every branch and tag incrementally, not only those of HEAD. The tips of the "
+        "scanned refs are kept in the --scan-cache-dir, without it every commit not on HEAD is scanned again",
+    )
 
     repository_common.add_argument(
         "--rws-url",
@@ -132,7 +246,7 @@ def create_cli_argparser() -> ArgumentParser:
         title="repository_location",
         dest="repository_location",
         required=True,
-        help="Options local, remote",
+        help="Options local, remote, staged",
     )
     repository_local = repository_subparser.add_parser(
         "local",
@@ -147,6 +261,13 @@ def create_cli_argparser() -> ArgumentParser:
         parents=[parser_common, repository_common],
     )
 
+    repository_staged = repository_subparser.add_parser(
+        "staged",
+        description="Scan only the staged changes of a locally cloned repository, e.g. from a pre-commit hook",
+        help="Scan only the staged changes of a locally cloned repository",
+        parents=[parser_common],
+    )
+
     repository_local.add_argument(
         "--dir",
         type=pathlib.Path,
@@ -157,6 +278,24 @@ def create_cli_argparser() -> ArgumentParser:
         "Can also be set via the RESC_SCAN_PATH environment variable",
     )
 
+    repository_staged.add_argument(
+        "--dir",
+        type=pathlib.Path,
+        required=True,
+        action=EnvDefault,
+        envvar="RESC_SCAN_PATH",
+        help="The path to the directory where the repo is located. "
+        "Can also be set via the RESC_SCAN_PATH environment variable",
+    )
+    repository_staged.add_argument(
+        "--repo-name",
+        type=str,
+        required=False,
+        action=EnvDefault,
+        envvar="RESC_REPO_NAME",
+        help="The name of the repository. Can also be set via the RESC_REPO_NAME environment variable",
+    )
+
     repository_remote.add_argument(
         "--repo-url",
         type=str,
@@ -176,5 +315,15 @@ def create_cli_argparser() -> ArgumentParser:
         "Can also be set via the RESC_REPO_USERNAME & RESC_REPO_PASSWORD environment "
         "variable",
     )
+    repository_remote.add_argument(
+        "--state-file",
+        type=pathlib.Path,
+        required=False,
+        action=EnvDefault,
+        envvar="RESC_STATE_FILE",
+        help="File the last scanned commit of every scanned repository is kept in when no --rws-url is given, so "
+        "later scans are incremental and repositories of which the HEAD did not change are not cloned again. "
+        "Can also be set via the RESC_STATE_FILE environment variable",
+    )
 
     return parser
@@ -0,0 +1,190 @@
+# Standard Library
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import deque
+
+# First Party
+from vcs_scanner.helpers.metrics import SCRATCH_DIRECTORIES_REAPED
+
+logger = logging.getLogger(__name__)
+
+# Prefix of the scratch directories the repositories are cloned in, only those are swept as orphans
+SCRATCH_DIRECTORY_PREFIX = "resc-scan-"
+DEFAULT_ORPHAN_MAX_AGE_SECONDS = 24 * 60 * 60
+SWEEP_INTERVAL_SECONDS = 60 * 60
+# Number of files removed between two checks of the throttle
+THROTTLE_BATCH_SIZE = 100
+
+
+class DirectoryReaper:
+    """
+    Removes directories on a background thread, so a task does not wait for the removal of its clone.
+
+    A directory is renamed into the trash directory, which is atomic on the file system the trash lives on,
+    and removed from there at a limited number of files per second, to leave the disk to the running scans.
+    The reaper also sweeps the orphans of crashed tasks: scratch directories and trash entries older than the
+    maximum age, which should be longer than the longest scan.
+    """
+
+    def __init__(
+        self,
+        trash_directory: str,
+        scratch_directory: str | None = None,
+        files_per_second: int = 0,
+        orphan_max_age_seconds: float = DEFAULT_ORPHAN_MAX_AGE_SECONDS,
+    ):
+        self.trash_directory: str = trash_directory
+        self.scratch_directory: str | None = scratch_directory
+        self.files_per_second: int = files_per_second
+        self.orphan_max_age_seconds: float = orphan_max_age_seconds
+        self._queue: deque[tuple[str, str]] = deque()
+        self._condition: threading.Condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._thread_pid: int | None = None
+        self._busy: bool = False
+        self._next_sweep: float = 0.0
+
+    def discard(self, path: str) -> None:
+        """
+            Move a directory to the trash, it is removed in the background
+        :param path:
+            The directory to remove
+        """
+        try:
+            trash_path = self._move_to_trash(path)
+        except FileNotFoundError:
+            return
+        except OSError as error:
+            # The trash is on another file system, or cannot be created
+            logger.warning(f"Unable to move {path} to the trash, removing it now: {error}")
+            shutil.rmtree(path, ignore_errors=True)
+            SCRATCH_DIRECTORIES_REAPED.inc(origin="scan")
+            return
+        logger.debug(f"Moved {path} to the trash {trash_path}")
+        self._enqueue(trash_path, origin="scan")
+
+    def sweep_orphans(self) -> int:
+        """
+            Move the orphans of crashed tasks to the trash: scratch directories, and trash entries nobody removes,
+            older than the maximum age
+        :return: int.
+            Number of orphans found
+        """
+        self._next_sweep = time.monotonic() + SWEEP_INTERVAL_SECONDS
+        deadline = time.time() - self.orphan_max_age_seconds
+        orphans = 0
+        for entry in self._list_directory(self.trash_directory):
+            # The name of a trash entry starts with the time it was moved to the trash
+            moved_at, _, _ = entry.partition("-")
+            if not moved_at.isdigit() or int(moved_at) >= deadline:
+                continue
+            # Renaming claims the entry, when several processes sweep the trash only one of them removes it
+            try:
+                trash_path = self._move_to_trash(os.path.join(self.trash_directory, entry))
+            except OSError:
+                continue
+            self._enqueue(trash_path, origin="orphan")
+            orphans += 1
+
+        if self.scratch_directory:
+            for entry in self._list_directory(self.scratch_directory):
+                path = os.path.join(self.scratch_directory, entry)
+                try:
+                    if not entry.startswith(SCRATCH_DIRECTORY_PREFIX) or os.lstat(path).st_mtime >= deadline:
+                        continue
+                    trash_path = self._move_to_trash(path)
+                except OSError:
+                    continue
+                self._enqueue(trash_path, origin="orphan")
+                orphans += 1
+
+        if orphans:
+            logger.info(f"Moved {orphans} orphaned directories to the trash {self.trash_directory}")
+        return orphans
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+            Wait until the directories discarded so far are removed
+        :param timeout:
+            Maximum number of seconds to wait, no maximum when None
+        :return: bool.
+            True when the trash was emptied within the timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def _move_to_trash(self, path: str) -> str:
+        os.makedirs(self.trash_directory, exist_ok=True)
+        name = os.path.basename(os.path.normpath(path))
+        trash_path = os.path.join(self.trash_directory, f"{int(time.time())}-{uuid.uuid4().hex[:12]}-{name}")
+        os.rename(path, trash_path)
+        return trash_path
+
+    @staticmethod
+    def _list_directory(directory: str) -> list[str]:
+        try:
+            return os.listdir(directory)
+        except OSError:
+            return []
+
+    def _enqueue(self, trash_path: str, origin: str) -> None:
+        with self._condition:
+            self._queue.append((trash_path, origin))
+            # A thread does not survive a fork, the process a worker forked gets a thread of its own
+            if self._thread is None or self._thread_pid != os.getpid():
+                self._thread = threading.Thread(target=self._run, name="directory-reaper", daemon=True)
+                self._thread_pid = os.getpid()
+                self._thread.start()
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
+                while not self._queue:
+                    if not self._condition.wait(timeout=SWEEP_INTERVAL_SECONDS):
+                        break
+                self._busy = True
+                trash_path, origin = self._queue.popleft() if self._queue else (None, None)
+
+            if trash_path is not None:
+                try:
+                    self._remove(trash_path)
+                    SCRATCH_DIRECTORIES_REAPED.inc(origin=origin)
+                except Exception as error:  # pylint: disable=W0718
+                    logger.error(f"Failed to remove the trash entry {trash_path}: {error}")
+            if time.monotonic() >= self._next_sweep:
+                self.sweep_orphans()
+
+    def _remove(self, path: str) -> None:
+        """
+            Remove a directory bottom up, sleeping when files are removed faster than the throttle allows
+        :param path:
+            The directory to remove
+        """
+        start = time.monotonic()
+        removed = 0
+        for root, directories, files in os.walk(path, topdown=False):
+            for name in files:
+                try:
+                    os.unlink(os.path.join(root, name))
+                except FileNotFoundError:
+                    pass
+                removed += 1
+                if self.files_per_second and removed % THROTTLE_BATCH_SIZE == 0:
+                    ahead = removed / self.files_per_second - (time.monotonic() - start)
+                    if ahead > 0:
+                        time.sleep(ahead)
+            for name in directories:
+                directory = os.path.join(root, name)
+                # os.walk lists the symbolic links to directories as directories, without following them
+                if os.path.islink(directory):
+                    os.unlink(directory)
+                else:
+                    shutil.rmtree(directory, ignore_errors=True)
+        shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,80 @@
+# Standard Library
+import logging
+import os
+import shutil
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# Files at the root of a scanned directory which gitleaks reads its settings from, they are staged with any subset
+GITLEAKS_ROOT_FILES = (".gitleaksignore", ".gitleaks.toml")
+
+
+def list_files(directory_path: str) -> list[str]:
+    """
+        List the regular files of a directory, the way gitleaks walks it for a directory scan
+    :param directory_path:
+        The directory to list
+    :return: list[str].
+        The paths of the files, relative to directory_path
+    """
+    relative_paths = []
+    for root, directories, files in os.walk(directory_path):
+        directories[:] = [directory for directory in directories if directory != ".git"]
+        for file_name in files:
+            full_path = os.path.join(root, file_name)
+            if os.path.islink(full_path) or not os.path.isfile(full_path):
+                continue
+            relative_paths.append(os.path.relpath(full_path, directory_path))
+    return relative_paths
+
+
+def stage_files(directory_path: str, relative_paths: list[str], staging_root: str | None = None) -> str:
+    """
+        Mirror a subset of the files of a directory into a fresh staging directory.
+        Files are hard linked when possible, and copied when the staging directory lives on another device.
+        The gitleaks settings at the root of the directory are always staged, so they apply to the subset too.
+    :param directory_path:
+        Directory the files are taken from
+    :param relative_paths:
+        Paths of the files to stage, relative to directory_path
+    :param staging_root:
+        Optional parent directory of the staging directory, defaults to the system temp directory
+    :return: str.
+        The path of the staging directory, it is up to the caller to remove it
+    """
+    staging_directory = tempfile.mkdtemp(prefix="resc-staging-", dir=staging_root)
+    settings_files = [
+        file_name
+        for file_name in GITLEAKS_ROOT_FILES
+        if file_name not in relative_paths and os.path.isfile(os.path.join(directory_path, file_name))
+    ]
+    for relative_path in [*relative_paths, *settings_files]:
+        source = os.path.join(directory_path, relative_path)
+        destination = os.path.join(staging_directory, relative_path)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        try:
+            os.link(source, destination)
+        except OSError:
+            try:
+                shutil.copy2(source, destination)
+            except OSError as error:
+                logger.warning(f"Unable to stage {source}: {error}")
+    return staging_directory
+
+
+def restore_staged_path(file_path: str, staging_directory: str, directory_path: str) -> str:
+    """
+        Translate a path reported for a staging directory back to the directory it was staged from,
+        in the same form gitleaks would have reported it when scanning directory_path directly.
+    :param file_path:
+        Path as reported by the scan of the staging directory
+    :param staging_directory:
+        The staging directory that was scanned
+    :param directory_path:
+        The original directory
+    :return: str.
+        The path of the file within directory_path
+    """
+    relative_path = os.path.relpath(file_path, staging_directory)
+    return os.path.normpath(os.path.join(directory_path, relative_path))
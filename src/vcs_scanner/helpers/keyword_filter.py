@@ -0,0 +1,123 @@
+# Standard Library
+import logging
+import os
+import re
+import tomllib
+from collections.abc import Iterable
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def _build_trie_pattern(keywords: list[str]) -> str:
+    """
+        Build a regular expression matching any of the keywords, with the keywords folded into a trie.
+        Keywords sharing a prefix share the branch of the pattern, so every position of the content is matched
+        against the trie once instead of against every keyword.
+    :param keywords:
+        The keywords, non empty
+    :return: str.
+        The pattern
+    """
+    trie: dict = {}
+    for keyword in keywords:
+        node = trie
+        for character in keyword:
+            node = node.setdefault(character, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        # A keyword ends here, longer keywords starting with it cannot add a match
+        if "" in node:
+            return ""
+        branches = [re.escape(character) + emit(child) for character, child in sorted(node.items())]
+        return branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+
+    return emit(trie)
+
+
+class KeywordFilter:
+    """
+    Pre-filter on the keywords of the rules of a rule pack.
+
+    Gitleaks only applies the regex of a rule to content containing one of the keywords of that rule,
+    so content without any keyword of the rule pack cannot produce a finding and need not be handed to gitleaks.
+    Like gitleaks, keywords are matched case-insensitively.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: list[str] = sorted({keyword.lower() for keyword in keywords if keyword})
+        if not self.keywords:
+            raise ValueError("A keyword filter needs at least one keyword")
+        self.max_keyword_length: int = max(len(keyword.encode("utf-8")) for keyword in self.keywords)
+        # Content is lowercased as bytes unless a keyword needs the unicode case folding of str
+        self._ascii: bool = all(keyword.isascii() for keyword in self.keywords)
+        pattern = _build_trie_pattern(self.keywords)
+        self._pattern: re.Pattern = re.compile(pattern.encode("utf-8") if self._ascii else pattern)
+
+    @classmethod
+    def from_rule_file(cls, rule_file_path: str) -> "KeywordFilter | None":
+        """
+            Create the keyword filter of a gitleaks rule file
+        :param rule_file_path:
+            Path of the gitleaks rule file
+        :return: KeywordFilter or None.
+            None when a rule has no keywords, gitleaks applies such a rule to all content
+        """
+        with open(rule_file_path, "rb") as rule_file:
+            rules = tomllib.load(rule_file).get("rules", [])
+
+        keywords: list[str] = []
+        for rule in rules:
+            if not rule.get("keywords"):
+                logger.info(f"Rule {rule.get('id')} has no keywords, the keyword filter is disabled")
+                return None
+            keywords.extend(rule["keywords"])
+        return cls(keywords) if keywords else None
+
+    def matches(self, content: bytes) -> bool:
+        """
+            Whether the content contains any keyword
+        :param content:
+            The content to search
+        :return: bool.
+            True when a rule could match the content
+        """
+        if self._ascii:
+            return self._pattern.search(content.lower()) is not None
+        return self._pattern.search(content.decode("utf-8", errors="replace").lower()) is not None
+
+    def matches_file(self, file_path: str) -> bool:
+        """
+            Whether the file contains any keyword, the file is read in chunks
+        :param file_path:
+            Path of the file to search
+        :return: bool.
+            True when a rule could match the file, or the file cannot be read
+        """
+        # The tail of the previous chunk is searched again, for the keywords crossing the chunk boundary
+        overlap = self.max_keyword_length - 1
+        tail = b""
+        try:
+            with open(file_path, "rb") as file:
+                while chunk := file.read(READ_CHUNK_SIZE):
+                    if self.matches(tail + chunk):
+                        return True
+                    tail = chunk[-overlap:] if overlap else b""
+        except OSError as error:
+            logger.warning(f"Unable to read {file_path}, it will be scanned: {error}")
+            return True
+        return False
+
+    def filter_files(self, directory_path: str, relative_paths: list[str]) -> list[str]:
+        """
+            Select the files which contain any keyword
+        :param directory_path:
+            Directory the paths are relative to
+        :param relative_paths:
+            Paths of the files, relative to directory_path
+        :return: list[str].
+            The paths of the files gitleaks needs to scan
+        """
+        return [path for path in relative_paths if self.matches_file(os.path.join(directory_path, path))]
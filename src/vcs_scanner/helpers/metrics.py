@@ -0,0 +1,252 @@
+# Standard Library
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(label_names: tuple[str, ...], label_values: tuple[str, ...]) -> str:
+    if not label_names:
+        return ""
+    pairs = []
+    for name, value in zip(label_names, label_values, strict=True):
+        escaped = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class _Metric:
+    metric_type: str = ""
+
+    def __init__(self, name: str, description: str, label_names: tuple[str, ...], lock: threading.Lock):
+        self.name: str = name
+        self.description: str = description
+        self.label_names: tuple[str, ...] = label_names
+        self._lock: threading.Lock = lock
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"Metric {self.name} expects the labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _render_samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._render_samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing value per label set.
+    """
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, description: str, label_names: tuple[str, ...], lock: threading.Lock):
+        super().__init__(name, description, label_names, lock)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError(f"Counter {self.name} can only be increased")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Summary(_Metric):
+    """
+    Count and sum of the observed values per label set, the average is sum / count.
+    """
+
+    metric_type = "summary"
+
+    def __init__(self, name: str, description: str, label_names: tuple[str, ...], lock: threading.Lock):
+        super().__init__(name, description, label_names, lock)
+        self._values: dict[tuple[str, ...], tuple[int, float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            count, total = self._values.get(key, (0, 0.0))
+            self._values[key] = (count + 1, total + value)
+
+    def get(self, **labels: str) -> tuple[int, float]:
+        """
+        :return: tuple.
+            The number of observations and their sum
+        """
+        with self._lock:
+            return self._values.get(self._key(labels), (0, 0.0))
+
+    def _render_samples(self) -> list[str]:
+        lines = []
+        for key, (count, total) in sorted(self._values.items()):
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_count{labels} {count}")
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process registry of the metrics of a worker or CLI run, rendered in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._lock: threading.Lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = {}
+
+    def _register(self, metric_class: type[_Metric], name: str, description: str, label_names: tuple[str, ...]):
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                if not isinstance(existing, metric_class) or existing.label_names != label_names:
+                    raise ValueError(f"Metric {name} is already registered with another type or labels")
+                return existing
+            metric = metric_class(name, description, label_names, self._lock)
+            self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, description: str, label_names: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter, name, description, label_names)
+
+    def summary(self, name: str, description: str, label_names: tuple[str, ...] = ()) -> Summary:
+        return self._register(Summary, name, description, label_names)
+
+    def render(self) -> str:
+        """
+            Render every metric in the Prometheus text exposition format
+        :return: str.
+            The rendered metrics
+        """
+        with self._lock:
+            return "".join(f"{metric.render()}\n" for metric in self._metrics.values())
+
+    def write_to_file(self, file_path: str) -> None:
+        """
+            Atomically write the rendered metrics to a file, e.g. for the node exporter textfile collector
+        :param file_path:
+            Path of the metrics file
+        """
+        temporary_path = f"{file_path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_path, "w", encoding="utf-8") as metrics_file:
+                metrics_file.write(self.render())
+            os.replace(temporary_path, file_path)
+        except OSError as error:
+            logger.warning(f"Unable to write the metrics to {file_path}: {error}")
+
+
+def start_metrics_server(registry: MetricsRegistry, port: int, address: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+        Serve the metrics of the registry on /metrics from a daemon thread
+    :param registry:
+        The registry to expose
+    :param port:
+        Port to listen on, 0 picks a free port
+    :param address:
+        Address to listen on, only the local host by default
+    :return: ThreadingHTTPServer.
+        The running server, call shutdown() on it to stop serving
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):  # noqa: A002 pylint: disable=W0622
+            logger.debug(f"Metrics request: {format % args}")
+
+    server = ThreadingHTTPServer((address, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    logger.info(f"Serving metrics on http://{address}:{server.server_address[1]}/metrics")
+    return server
+
+
+REGISTRY = MetricsRegistry()
+
+SCAN_STAGE_DURATION = REGISTRY.summary(
+    "resc_scan_stage_duration_seconds",
+    "Time spent in each step of a scan, by outcome of the step.",
+    ("stage", "outcome"),
+)
+SCAN_BYTES_CLONED = REGISTRY.counter(
+    "resc_scan_cloned_bytes_total",
+    "Size of the object database of the cloned repositories.",
+)
+SCAN_FINDINGS = REGISTRY.counter(
+    "resc_scan_findings_total",
+    "Findings per source: repo and dir as reported by gitleaks, written after post processing.",
+    ("source",),
+)
+SCANS = REGISTRY.counter(
+    "resc_scans_total",
+    "Scans by the step they ended at and the outcome of that step.",
+    ("stage", "outcome"),
+)
+SCAN_TASKS_ROUTED = REGISTRY.counter(
+    "resc_scan_tasks_routed_total",
+    "Scan tasks routed to another queue, by destination queue.",
+    ("queue",),
+)
+SCAN_TASKS_COALESCED = REGISTRY.counter(
+    "resc_scan_tasks_coalesced_total",
+    "Scan tasks not run because their repository was being scanned: dropped duplicates or deferred newer commits.",
+    ("action",),
+)
+SCAN_KEYWORD_FILTERED = REGISTRY.counter(
+    "resc_scan_keyword_filtered_total",
+    "Files and commits not handed to gitleaks because they contain no keyword of the rule pack, by kind.",
+    ("kind",),
+)
+POST_PROCESSING_FALSE_POSITIVES = REGISTRY.counter(
+    "resc_post_processing_false_positives_total",
+    "Findings dropped by post processing as false positive, by the tag of the processor.",
+    ("tag",),
+)
+POST_PROCESSING_MEMO_HITS = REGISTRY.counter(
+    "resc_post_processing_memo_hits_total",
+    "Findings not processed because the verdict of their rule and secret was known.",
+)
+SCRATCH_DIRECTORIES_REAPED = REGISTRY.counter(
+    "resc_scratch_directories_reaped_total",
+    "Directories removed after a scan, by origin: the clone of a scan, or an orphan of a crashed task.",
+    ("origin",),
+)
+SCRATCH_ALLOCATIONS = REGISTRY.counter(
+    "resc_scratch_allocations_total",
+    "Scratch directories allocated for clones, by medium: memory or disk.",
+    ("medium",),
+)
@@ -36,5 +36,6 @@ class RuleTagProvider:
             for toml_rule in toml_rule_dictionary["rules"]:
                 rule_id = toml_rule.get("id", None)
                 if rule_id:
-                    self.rule_tags[rule_id] = toml_rule.get("tags", [])
+                    # Plain strings, iterating the tomlkit array of every finding is slow
+                    self.rule_tags[rule_id] = [str(tag) for tag in toml_rule.get("tags", [])]
         return self.rule_tags
@@ -0,0 +1,162 @@
+# Standard Library
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+# First Party
+from vcs_scanner.helpers.directory_reaper import SCRATCH_DIRECTORY_PREFIX
+
+logger = logging.getLogger(__name__)
+
+SCRATCH_LEDGER_FILE = ".resc-scratch-ledger.sqlite3"
+# A clone holds the packed objects and the checkout of the files, which is about as large again
+CLONE_SIZE_FACTOR = 2
+# Lease of a reservation, renewed while its scratch directory is in use
+DEFAULT_RESERVATION_SECONDS = 10 * 60
+
+
+class ScratchAllocator:
+    """
+    Hands out scratch directories for clones on a memory backed file system, such as a tmpfs mount.
+
+    Repositories up to the maximum size are cloned in memory, as long as the clones of all the tasks sharing the
+    memory directory fit in the memory budget. The reservations are kept in a ledger next to the clones, shared by
+    the worker processes of the host. A reservation is a short lease which a thread of the allocator renews until
+    the directory is released, so the memory of a task which crashed is reclaimed soon after.
+    Repositories which are larger, of which the size is unknown or which do not fit are cloned on disk.
+    """
+
+    def __init__(
+        self,
+        memory_directory: str,
+        max_repository_size_bytes: int,
+        budget_bytes: int,
+        reservation_seconds: float = DEFAULT_RESERVATION_SECONDS,
+    ):
+        self.memory_directory: str = memory_directory
+        self.max_repository_size_bytes: int = max_repository_size_bytes
+        self.budget_bytes: int = budget_bytes
+        self.reservation_seconds: float = reservation_seconds
+        self.ledger_path: str = os.path.join(memory_directory, SCRATCH_LEDGER_FILE)
+        self._held: set[str] = set()
+        self._held_lock = threading.Lock()
+        self._renewer: threading.Thread | None = None
+        self._renewer_pid: int = os.getpid()
+        os.makedirs(memory_directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS reservations ("
+                "directory TEXT PRIMARY KEY, "
+                "size_bytes INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.ledger_path, timeout=60, isolation_level=None)
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+    def allocate(self, repository_size_bytes: int | None) -> str | None:
+        """
+            Reserve memory for the clone of a repository and create its scratch directory
+        :param repository_size_bytes:
+            Estimated size of the repository, None when unknown
+        :return: str or None.
+            The scratch directory in memory, None when the repository is to be cloned on disk
+        """
+        if repository_size_bytes is None or repository_size_bytes > self.max_repository_size_bytes:
+            return None
+        reservation_bytes = max(repository_size_bytes, 1) * CLONE_SIZE_FACTOR
+
+        now = time.time()
+        directory = None
+        with self._connect() as connection:
+            expired = [
+                row[0] for row in connection.execute("SELECT directory FROM reservations WHERE expires_at < ?", (now,))
+            ]
+            connection.execute("DELETE FROM reservations WHERE expires_at < ?", (now,))
+            reserved_bytes = connection.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM reservations").fetchone()[0]
+            # The file system can also hold files outside the ledger
+            free_bytes = shutil.disk_usage(self.memory_directory).free
+            if reserved_bytes + reservation_bytes <= self.budget_bytes and reservation_bytes <= free_bytes:
+                directory = tempfile.mkdtemp(prefix=SCRATCH_DIRECTORY_PREFIX, dir=self.memory_directory)
+                connection.execute(
+                    "INSERT INTO reservations (directory, size_bytes, expires_at) VALUES (?, ?, ?)",
+                    (directory, reservation_bytes, now + self.reservation_seconds),
+                )
+
+        if directory is not None:
+            self._hold(directory)
+        # The clones of crashed tasks are removed once their reservation expired
+        for expired_directory in expired:
+            logger.info(f"Removing the scratch directory {expired_directory} of which the reservation expired")
+            shutil.rmtree(expired_directory, ignore_errors=True)
+        if directory is None:
+            logger.info(
+                f"No memory left for a clone of {reservation_bytes} bytes, "
+                f"{reserved_bytes} of {self.budget_bytes} bytes reserved, cloning on disk"
+            )
+        return directory
+
+    def release(self, directory: str) -> None:
+        """
+            Remove a scratch directory and return its memory to the budget
+        :param directory:
+            A scratch directory handed out by allocate
+        """
+        with self._held_lock:
+            self._held.discard(directory)
+        shutil.rmtree(directory, ignore_errors=True)
+        with self._connect() as connection:
+            connection.execute("DELETE FROM reservations WHERE directory = ?", (directory,))
+
+    def reserved_bytes(self) -> int:
+        with self._connect() as connection:
+            return connection.execute(
+                "SELECT COALESCE(SUM(size_bytes), 0) FROM reservations WHERE expires_at >= ?", (time.time(),)
+            ).fetchone()[0]
+
+    def _hold(self, directory: str) -> None:
+        with self._held_lock:
+            # A thread does not survive a fork, the process a worker forked renews the directories it holds itself.
+            # The directories of the parent are left to the renewer of the parent
+            if self._renewer_pid != os.getpid():
+                self._held.clear()
+                self._renewer = None
+                self._renewer_pid = os.getpid()
+            self._held.add(directory)
+            if self._renewer is None and self.reservation_seconds > 0:
+                self._renewer = threading.Thread(target=self._renew, name="scratch-lease-renewer", daemon=True)
+                self._renewer.start()
+
+    def _renew(self) -> None:
+        # Renewed well before the lease runs out, a late renewal would let another task reclaim the directory
+        while True:
+            time.sleep(self.reservation_seconds / 3)
+            with self._held_lock:
+                held = list(self._held)
+            if not held:
+                continue
+            try:
+                with self._connect() as connection:
+                    connection.executemany(
+                        "UPDATE reservations SET expires_at = ? WHERE directory = ?",
+                        [(time.time() + self.reservation_seconds, directory) for directory in held],
+                    )
+            except sqlite3.Error as error:
+                logger.warning(f"Unable to renew the reservations of {len(held)} scratch directories: {error}")
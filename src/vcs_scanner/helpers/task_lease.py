@@ -0,0 +1,113 @@
+# Standard Library
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from enum import Enum
+
+logger = logging.getLogger(__name__)
+
+TASK_LEASE_FILE = "task_leases.sqlite3"
+DEFAULT_TASK_LEASE_SECONDS = 4 * 60 * 60
+
+
+class LeaseResult(str, Enum):
+    ACQUIRED = "acquired"
+    # The same commit of the repository is being scanned by another task
+    DUPLICATE = "duplicate"
+    # Another commit of the repository is being scanned by another task
+    BUSY = "busy"
+
+
+class TaskLeaseStore:
+    """
+    Leases on the repositories being scanned, shared by the worker processes through a local SQLite file.
+
+    A task holds the lease of its repository while it scans, tasks delivered for the same repository in the
+    meantime are told whether they are a duplicate of the running scan or bring a newer commit.
+    Leases expire, so the repository of a task which crashed is picked up again.
+    """
+
+    def __init__(self, directory: str, lease_seconds: int = DEFAULT_TASK_LEASE_SECONDS):
+        self.database_path: str = os.path.join(directory, TASK_LEASE_FILE)
+        self.lease_seconds: int = lease_seconds
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS task_leases ("
+                "repository_key TEXT PRIMARY KEY, "
+                "commit_sha TEXT NOT NULL, "
+                "owner TEXT NOT NULL, "
+                "expires_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.database_path, timeout=60, isolation_level=None)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+    def acquire(self, repository_key: str, commit_sha: str, owner: str) -> LeaseResult:
+        """
+            Take the lease of a repository
+        :param repository_key:
+            Identifies the repository across vcs instances
+        :param commit_sha:
+            The commit the task is going to scan
+        :param owner:
+            Identifies the task taking the lease
+        :return: LeaseResult.
+            ACQUIRED when the lease was taken, otherwise why another task holds it
+        """
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute("DELETE FROM task_leases WHERE expires_at < ?", (now,))
+            row = connection.execute(
+                "SELECT commit_sha, owner FROM task_leases WHERE repository_key = ?", (repository_key,)
+            ).fetchone()
+            if row and row[1] != owner:
+                return LeaseResult.DUPLICATE if row[0] == commit_sha else LeaseResult.BUSY
+            connection.execute(
+                "INSERT OR REPLACE INTO task_leases (repository_key, commit_sha, owner, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (repository_key, commit_sha, owner, now + self.lease_seconds),
+            )
+        return LeaseResult.ACQUIRED
+
+    def release(self, repository_key: str, owner: str) -> None:
+        with self._connect() as connection:
+            connection.execute(
+                "DELETE FROM task_leases WHERE repository_key = ? AND owner = ?", (repository_key, owner)
+            )
+
+    @contextmanager
+    def lease(self, repository_key: str, commit_sha: str) -> Iterator[LeaseResult]:
+        """
+            Hold the lease of a repository for the duration of the block, when it can be acquired
+        :param repository_key:
+            Identifies the repository across vcs instances
+        :param commit_sha:
+            The commit the task is going to scan
+        :return: LeaseResult.
+            ACQUIRED when the block runs with the lease, otherwise why another task holds it
+        """
+        owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        result = self.acquire(repository_key, commit_sha, owner)
+        try:
+            yield result
+        finally:
+            if result == LeaseResult.ACQUIRED:
+                self.release(repository_key, owner)
@@ -0,0 +1,168 @@
+# Standard Library
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """
+    A timed operation, nested in the span that was active when it started.
+    """
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_time: float
+    duration_seconds: float = 0.0
+    status: str = "ok"
+    error: str | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+
+class NonRecordingSpan(Span):
+    """
+    Span handed out while tracing is disabled, nothing is recorded.
+    """
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+class SpanExporter:
+    """
+    Receives every finished span, subclasses decide where they go.
+    """
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Appends the finished spans as JSON lines to a local file, so latency breakdowns can be analysed offline.
+    Each span is written with a single append, several processes can share the same file.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path: str = file_path
+        self._file_descriptor: int = os.open(file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._lock: threading.Lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps({**asdict(span), "pid": os.getpid()}, default=str) + "\n"
+        with self._lock:
+            if self._file_descriptor >= 0:
+                os.write(self._file_descriptor, line.encode("utf-8"))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._file_descriptor >= 0:
+                os.close(self._file_descriptor)
+                self._file_descriptor = -1
+
+
+_exporters: list[SpanExporter] = []
+_current_span: ContextVar[Span | None] = ContextVar("resc_current_span", default=None)
+_DISABLED_SPAN = NonRecordingSpan(name="", trace_id="", span_id="", parent_id=None, start_time=0.0)
+
+
+def add_exporter(exporter: SpanExporter) -> None:
+    """
+        Start sending the finished spans to the given exporter, tracing is disabled as long as there is none
+    :param exporter:
+        The exporter to add
+    """
+    _exporters.append(exporter)
+
+
+def shutdown_exporters() -> None:
+    """
+    Shut down and remove every exporter, which disables tracing.
+    """
+    while _exporters:
+        _exporters.pop().shutdown()
+
+
+def get_current_span() -> Span | None:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """
+        Time the enclosed block as a child of the active span
+    :param name:
+        Name of the operation
+    :param attributes:
+        Attributes recorded on the span
+    :return: Span.
+        The span, more attributes can be set on it while it is active
+    """
+    if not _exporters:
+        yield _DISABLED_SPAN
+        return
+
+    parent = _current_span.get()
+    current = Span(
+        name=name,
+        trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+        span_id=uuid.uuid4().hex[:16],
+        parent_id=parent.span_id if parent else None,
+        start_time=time.time(),
+        attributes=attributes,
+    )
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as error:
+        current.status = "error"
+        current.error = f"{type(error).__name__}: {error}"
+        raise
+    finally:
+        current.duration_seconds = time.perf_counter() - start
+        _current_span.reset(token)
+        for exporter in list(_exporters):
+            try:
+                exporter.export(current)
+            except Exception as error:  # pylint: disable=W0718
+                logger.debug(f"Unable to export span {current.name}: {error}")
+
+
+def traced(name: str | None = None) -> Callable[[Callable], Callable]:
+    """
+        Decorator running every call of the function in its own span
+    :param name:
+        Name of the span, the qualified name of the function by default
+    """
+
+    def decorator(function: Callable) -> Callable:
+        span_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -7,7 +7,7 @@ from typing import Annotated
 # Third Party
 from pydantic import BaseModel, Field, StringConstraints, field_validator
 
-from vcs_scanner.api.schema.repository import Repository
+from vcs_scanner.api.schema.repository import Repository, RepositoryRead
 from vcs_scanner.api.schema.vcs_provider import VCSProviders
 
 logger = logging.getLogger(__name__)
@@ -20,6 +20,11 @@ class RepositoryRuntime(BaseModel):
     project_key: str
     vcs_instance_name: str
     latest_commit: str | None = None
+    # Size of the repository as reported by the VCS provider, used to route the scan to a queue
+    estimated_size_kb: int | None = None
+    # The repository as created in the RWS when the task was routed, so the lane it is routed to does not write it
+    # again. Its last scan is not carried: it can change before the lane runs the task, the scan looks it up itself
+    rws_repository: RepositoryRead | None = None
 
     def convert_to_repository(self, vcs_instance_id: int) -> Repository:
         return Repository(
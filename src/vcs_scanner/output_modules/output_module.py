@@ -39,7 +39,8 @@ class OutputModule(metaclass=abc.ABCMeta):
     def write_scan(
         self,
         scan_type_to_run: ScanType,
-        last_scanned_commit: str,
+        # None when the scan did not complete and the repository has no complete scan to keep the commit of
+        last_scanned_commit: str | None,
         scan_timestamp: str,
         repository: Repository,
         rule_pack: str,
@@ -40,6 +40,7 @@ from vcs_scanner.api.schema.vcs_instance import (
 from vcs_scanner.common import get_rule_pack_version_from_file
 from vcs_scanner.helpers.finding_filter import should_process_finding
 from vcs_scanner.helpers.providers.rule_tag import RuleTagProvider
+from vcs_scanner.helpers.tracing import span
 from vcs_scanner.model import VCSInstanceRuntime
 from vcs_scanner.output_modules.output_module import OutputModule
 
@@ -99,22 +100,24 @@ class RESTAPIWriter(OutputModule):
     ) -> None:
         findings_create = []
 
-        rule_tags = self.rule_tag_provider.get_rule_tags()
-        for finding in scan_findings:
-            # We strip the repository name here because in the case of
-            # scan as dir the path of the finding is prefixed with the repository name
-            if finding.author == "vcs-scanner":
-                finding.file_path = finding.file_path.removeprefix(repository_name + "/")
+        with span("rws.filter_findings", findings=len(scan_findings)) as filter_span:
+            rule_tags = self.rule_tag_provider.get_rule_tags()
+            for finding in scan_findings:
+                # We strip the repository name here because in the case of
+                # scan as dir the path of the finding is prefixed with the repository name
+                if finding.author == "vcs-scanner":
+                    finding.file_path = finding.file_path.removeprefix(repository_name + "/")
 
-            new_finding = FindingCreate.create_from_base_class(base_object=finding, repository_id=repository_id)
+                new_finding = FindingCreate.create_from_base_class(base_object=finding, repository_id=repository_id)
 
-            if should_process_finding(
-                finding=finding,
-                rule_tags=rule_tags,
-                ignore_tags=self.ignore_tags,
-                include_tags=self.include_tags,
-            ):
-                findings_create.append(new_finding)
+                if should_process_finding(
+                    finding=finding,
+                    rule_tags=rule_tags,
+                    ignore_tags=self.ignore_tags,
+                    include_tags=self.include_tags,
+                ):
+                    findings_create.append(new_finding)
+            filter_span.set_attribute("kept", len(findings_create))
 
         response = create_findings_with_scan_id(self.rws_url, findings_create, scan_id)
 
@@ -127,12 +130,16 @@ class RESTAPIWriter(OutputModule):
     def write_scan(
         self,
         scan_type_to_run: ScanType,
-        last_scanned_commit: str,
+        last_scanned_commit: str | None,
         scan_timestamp: datetime,
         repository: RepositoryRead,
         rule_pack: str,
     ) -> ScanRead | None:
         created_scan = None
+        if last_scanned_commit is None:
+            # The RWS takes the latest scan as the last scan, without a scan the next scan is a base scan
+            logger.warning(f"Not creating a scan for repository {repository.repository_url}, it has no scanned commit")
+            return created_scan
         scan_object = ScanCreate.create_from_base_class(
             base_object=Scan(
                 scan_type=scan_type_to_run,
@@ -15,6 +15,7 @@ from vcs_scanner.api.schema.scan_type import ScanType
 from vcs_scanner.api.schema.vcs_instance import VCSInstanceRead
 
 # First Party
+from vcs_scanner.cache.scan_state import ScanStateStore
 from vcs_scanner.helpers.finding_action import FindingAction
 from vcs_scanner.helpers.finding_filter import should_process_finding
 from vcs_scanner.helpers.providers.ignore_list import IgnoredListProvider
@@ -37,6 +38,7 @@ class STDOUTWriter(OutputModule):
         ignore_findings_providers: IgnoredListProvider = IgnoredListProvider(None),
         rule_tag_provider: RuleTagProvider = RuleTagProvider(),
         rule_comment_provider: RuleCommentProvider = RuleCommentProvider(),
+        state_store: ScanStateStore | None = None,
     ):
         self.exit_code_warn: int = exit_code_warn
         self.exit_code_block: int = exit_code_block
@@ -47,6 +49,7 @@ class STDOUTWriter(OutputModule):
         self.ignore_findings_providers: IgnoredListProvider = ignore_findings_providers
         self.rule_tag_provider: RuleTagProvider = rule_tag_provider
         self.rule_comment_provider: RuleCommentProvider = rule_comment_provider
+        self.state_store: ScanStateStore | None = state_store
 
     def load_rules(self, toml_rule_file_path: str) -> None:
         self.rule_tag_provider.load(toml_rule_file_path)
@@ -249,7 +252,7 @@ class STDOUTWriter(OutputModule):
     def write_scan(
         self,
         scan_type_to_run: ScanType,
-        last_scanned_commit: str,
+        last_scanned_commit: str | None,
         scan_timestamp: datetime,
         repository: Repository,
         rule_pack: str,
@@ -264,7 +267,9 @@ class STDOUTWriter(OutputModule):
         )
 
     def get_last_scan_for_repository(self, repository: Repository) -> ScanRead | None:
-        return None
+        if self.state_store is None:
+            return None
+        return self.state_store.get_last_scan(repository.repository_url)
 
     @staticmethod
     def make(args: Namespace) -> "STDOUTWriter":
@@ -282,15 +287,20 @@ class STDOUTWriter(OutputModule):
 
         ignored_finding_provider = IgnoredListProvider(args.ignored_blocker_path)
 
+        state_file = getattr(args, "state_file", None)
+        state_store = ScanStateStore(f"{state_file.absolute()}") if state_file else None
+
         output_plugin = STDOUTWriter(
             exit_code_warn=args.exit_code_warn,
             exit_code_block=args.exit_code_block,
             include_tags=args.include_tags,
             ignore_tags=args.ignore_tags,
-            working_dir=args.dir,
+            # A remote repository is cloned, it has no directory on the command line
+            working_dir=getattr(args, "dir", ""),
             ignore_findings_providers=ignored_finding_provider,
             rule_tag_provider=rule_tag_provider,
             rule_comment_provider=rule_comment_provider,
+            state_store=state_store,
         )
 
         return output_plugin
@@ -0,0 +1,66 @@
+# Third Party
+import numpy as np
+
+# First Party
+from vcs_scanner.api.schema.finding import FindingBase
+from vcs_scanner.post_processing.processor_interface import PostProcessingStatus, Processor
+
+# Secrets per batch of byte histograms, bounds the histograms to CHUNK_SIZE x 256 counts
+CHUNK_SIZE = 1024
+
+
+def shannon_entropies(secrets: list[str]) -> np.ndarray:
+    """
+        Shannon entropy in bits per byte of every secret, computed from the byte histograms of a chunk of secrets at
+        once. With n the length of a secret and c the count of each of its bytes, the entropy is
+        log2(n) - sum(c * log2(c)) / n, where c * log2(c) is looked up in a table instead of computed per count.
+    :param secrets:
+        The secrets
+    :return: np.ndarray.
+        The entropy of every secret, 0 for an empty secret
+    """
+    entropies = np.zeros(len(secrets), dtype=np.float64)
+    for offset in range(0, len(secrets), CHUNK_SIZE):
+        encoded = [secret.encode("utf-8") for secret in secrets[offset : offset + CHUNK_SIZE]]
+        lengths = np.fromiter((len(secret) for secret in encoded), dtype=np.int64, count=len(encoded))
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+        # Row i of the histograms counts the bytes of secret i
+        rows = np.repeat(np.arange(len(encoded), dtype=np.int64), lengths)
+        histograms = np.bincount(rows * 256 + data, minlength=len(encoded) * 256).reshape(len(encoded), 256)
+
+        counts = np.arange(int(lengths.max(initial=0)) + 1, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            count_log_counts = np.where(counts > 0, counts * np.log2(counts), 0.0)
+            chunk_entropies = np.log2(lengths) - count_log_counts[histograms].sum(axis=1) / lengths
+        entropies[offset : offset + len(encoded)] = np.where(lengths > 0, chunk_entropies, 0.0)
+    return entropies
+
+
+class EntropyProcessor(Processor):
+    """
+    Marks findings of which the secret has a Shannon entropy below the threshold as false positive.
+
+    Findings replayed from a scan cache have no secret, the entropy of their secret kept by the cache is used instead.
+    Findings without either are not processed.
+    """
+
+    memoizable = True
+
+    def __init__(self, threshold: float):
+        self.threshold: float = threshold
+
+    def process_finding(self, finding: FindingBase) -> PostProcessingStatus:
+        return self.process_findings([finding])[0]
+
+    def process_findings(self, findings: list[FindingBase]) -> list[PostProcessingStatus]:
+        statuses = [PostProcessingStatus.NOT_PROCESSED] * len(findings)
+        indices = [index for index, finding in enumerate(findings) if finding.secret is not None]
+        entropies = shannon_entropies([findings[index].secret for index in indices])
+        for index in np.flatnonzero(entropies < self.threshold).tolist():
+            statuses[indices[index]] = PostProcessingStatus.FALSE_POSITIVE
+        for index, finding in enumerate(findings):
+            entropy = finding.secret_entropy
+            if finding.secret is None and entropy is not None and entropy < self.threshold:
+                statuses[index] = PostProcessingStatus.FALSE_POSITIVE
+        return statuses
@@ -1,46 +1,175 @@
 from argparse import Namespace
+from collections import Counter
 
 from vcs_scanner.api.schema.finding import FindingBase
+from vcs_scanner.constants import POST_PROCESSING_EXECUTOR_THREAD
+from vcs_scanner.helpers.metrics import POST_PROCESSING_FALSE_POSITIVES, POST_PROCESSING_MEMO_HITS
 from vcs_scanner.helpers.providers.rule_tag import RuleTagProvider
+from vcs_scanner.helpers.tracing import traced
 from vcs_scanner.post_processing.processor_interface import PostProcessingStatus, Processor
+from vcs_scanner.post_processing.processor_registry import ProcessorRegistry, RuleProcessors
+from vcs_scanner.post_processing.processor_runner import ProcessorRunner
+from vcs_scanner.post_processing.verdict_memo import MemoKey, Verdict, VerdictMemo, secret_fingerprint
+
+
+def parse_entropy_thresholds(value: str | None) -> dict[str, float]:
+    """
+        Parse the entropy thresholds per rule tag
+    :param value:
+        Comma separated list of tag=threshold, for instance "Cli=3.5,Generic=4"
+    :return: dict.
+        The threshold in bits per byte of every tag
+    :raises ValueError:
+        When an entry is not a tag followed by a number
+    """
+    thresholds: dict[str, float] = {}
+    for entry in (value or "").split(","):
+        if not entry.strip():
+            continue
+        tag, separator, threshold = entry.partition("=")
+        if not separator or not tag.strip():
+            raise ValueError(f"Invalid entropy threshold '{entry}', expected <tag>=<threshold>")
+        thresholds[tag.strip()] = float(threshold)
+    return thresholds
+
+
+def create_processors(entropy_thresholds: dict[str, float]) -> ProcessorRegistry:
+    """
+        Create the registry of the processors of the rule tags
+    :param entropy_thresholds:
+        The entropy threshold of every tag of which low entropy findings are false positives
+    :return: ProcessorRegistry.
+        The processor of every tag
+    """
+    registry = ProcessorRegistry()
+    if not entropy_thresholds:
+        return registry
+
+    # NumPy is only imported when a processor needs it
+    from vcs_scanner.post_processing.entropy_processor import EntropyProcessor  # pylint: disable=C0415
+
+    for tag, threshold in entropy_thresholds.items():
+        registry.register(tag, EntropyProcessor(threshold))
+    return registry
 
 
 class PostProcessor:
-    def __init__(self, rule_tag_provider: RuleTagProvider):
+    def __init__(
+        self,
+        rule_tag_provider: RuleTagProvider,
+        processors: ProcessorRegistry | dict[str, Processor] | None = None,
+        runner: ProcessorRunner | None = None,
+        memo: VerdictMemo | None = None,
+    ):
         self.rule_tag_provider = rule_tag_provider
+        # Processor classes that follow the Processor interface, registered with their tag
+        self.processors: ProcessorRegistry = (
+            processors if isinstance(processors, ProcessorRegistry) else ProcessorRegistry(processors)
+        )
+        self.runner: ProcessorRunner = runner or ProcessorRunner()
+        # Can be shared by post processors with the same processors, the verdicts do not depend on the rule pack
+        self.memo: VerdictMemo = memo or VerdictMemo()
 
+    @traced("post_processing.run")
     def run(self, findings: list[FindingBase]) -> list[FindingBase]:
-        processors: dict[str, Processor] = {
-            # Processor classes go here that follow the Processor interface with the tag as key in the dictionary
-        }
-
         output: list[FindingBase] = []
-        rule_tags = self.rule_tag_provider.get_rule_tags()
+        verdicts = self._judge(findings)
+        false_positives: Counter[str] = Counter()
 
-        for finding in findings:
-            tags = rule_tags.get(finding.rule_name, [])
-            status = PostProcessingStatus.NOT_PROCESSED
+        for finding, (status, tag) in zip(findings, verdicts, strict=True):
+            if status == PostProcessingStatus.FALSE_POSITIVE:
+                # ignore this finding and continue to next finding
+                false_positives[tag] += 1
+                continue
+            # true positives and findings no processor is applicable to are added to the output
+            output.append(finding)
+
+        for tag, count in false_positives.items():
+            POST_PROCESSING_FALSE_POSITIVES.inc(count, tag=tag)
+        return output
 
-            for tag in tags:
-                processor = processors.get(tag, None)
-                if processor is None:
-                    # Tag has no processor, check next tag
+    def _judge(self, findings: list[FindingBase]) -> list[Verdict]:
+        """
+            Judge the findings. Findings of which the verdict is memoized, or of which the rule and secret occur
+            earlier in the findings, are not processed again.
+        :param findings:
+            The findings to judge
+        :return: list.
+            The status and the tag of the processor that decided it, for every finding
+        """
+        verdicts: list[Verdict] = [(PostProcessingStatus.NOT_PROCESSED, None)] * len(findings)
+        if not len(self.processors):
+            return verdicts
+
+        index = self.processors.rule_index(self.rule_tag_provider.get_rule_tags())
+        self.memo.validate(self.processors.version)
+
+        candidates: list[tuple[int, RuleProcessors, MemoKey | None]] = []
+        for position, finding in enumerate(findings):
+            rule = index.get(finding.rule_name)
+            if rule is None:
+                continue
+            secret = finding.secret
+            # The tags are part of the key, a new rule pack can change the processors of a rule
+            key = (rule.rule, rule.tags, secret_fingerprint(secret)) if rule.memoizable and secret is not None else None
+            candidates.append((position, rule, key))
+
+        # The findings to process per rule, and the findings sharing the key of one of them
+        pending: dict[str, tuple[RuleProcessors, list[int]]] = {}
+        pending_keys: dict[MemoKey, int] = {}
+        duplicates: list[tuple[int, int]] = []
+        memoized = self.memo.get_many([key for _, _, key in candidates])
+        for (position, rule, key), verdict in zip(candidates, memoized, strict=True):
+            if verdict is not None:
+                verdicts[position] = verdict
+                continue
+            if key is not None:
+                if key in pending_keys:
+                    duplicates.append((position, pending_keys[key]))
                     continue
+                pending_keys[key] = position
+            pending.setdefault(rule.rule, (rule, []))[1].append(position)
+        POST_PROCESSING_MEMO_HITS.inc(len(candidates) - sum(len(positions) for _, positions in pending.values()))
 
-                status = processor.process_finding(finding)
-                if status == PostProcessingStatus.TRUE_POSITIVE:
-                    # add finding to output list and continue to next finding
-                    output.append(finding)
-                    break
-                elif status == PostProcessingStatus.FALSE_POSITIVE:
-                    # ignore this finding and continue to next finding
-                    break
+        self._process_per_tag(findings, pending, verdicts)
+        for position, original in duplicates:
+            verdicts[position] = verdicts[original]
+        self.memo.put_many([(key, verdicts[position]) for key, position in pending_keys.items()])
+        return verdicts
 
-            if status == PostProcessingStatus.NOT_PROCESSED:
-                # no processor is applicable, add finding to output
-                output.append(finding)
+    def _process_per_tag(
+        self,
+        findings: list[FindingBase],
+        pending: dict[str, tuple[RuleProcessors, list[int]]],
+        verdicts: list[Verdict],
+    ) -> None:
+        """
+            Process the findings of every tag with a processor as one batch. Every processor of the tags of a finding
+            processes it, so the batches of all tags can run at the same time. The first verdict in the order of the
+            tags of the rule is the one that counts.
+        :param findings:
+            The findings to judge
+        :param pending:
+            The processors of the rule and the positions of the findings to process, for every rule
+        :param verdicts:
+            The verdict of every finding, updated with the verdicts of the processed findings
+        """
+        batches: dict[str, tuple[Processor, list[FindingBase]]] = {}
+        # Offset of the findings of every rule in the batch of every tag of the rule
+        offsets: dict[tuple[str, str], int] = {}
+        for rule, positions in pending.values():
+            for tag, processor in rule.processors:
+                batch = batches.setdefault(tag, (processor, []))[1]
+                offsets[(rule.rule, tag)] = len(batch)
+                batch.extend(findings[position] for position in positions)
 
-        return output
+        statuses = self.runner.run(batches)
+        for rule, positions in pending.values():
+            for tag, _ in reversed(rule.processors):
+                offset = offsets[(rule.rule, tag)]
+                for index, status in enumerate(statuses[tag][offset : offset + len(positions)]):
+                    if status != PostProcessingStatus.NOT_PROCESSED:
+                        verdicts[positions[index]] = (status, tag)
 
     @staticmethod
     def make(args: Namespace) -> "PostProcessor":
@@ -52,4 +181,8 @@ class PostProcessor:
         rule_tag_provider = RuleTagProvider()
         rule_tag_provider.load(args.gitleaks_rules_path)
 
-        return PostProcessor(rule_tag_provider)
+        runner = ProcessorRunner(
+            executor=args.post_processing_executor or POST_PROCESSING_EXECUTOR_THREAD,
+            max_workers=args.post_processing_workers or 1,
+        )
+        return PostProcessor(rule_tag_provider, create_processors(args.entropy_thresholds or {}), runner)
@@ -13,6 +13,19 @@ class PostProcessingStatus(Enum):
 
 
 class Processor(metaclass=abc.ABCMeta):
+    # Whether the verdict only depends on the rule and the secret of the finding, so it can be memoized
+    memoizable: bool = False
+
     @abc.abstractmethod
     def process_finding(self, finding: FindingBase) -> PostProcessingStatus:
         raise NotImplementedError
+
+    def process_findings(self, findings: list[FindingBase]) -> list[PostProcessingStatus]:
+        """
+            Process a batch of findings, processors which can do the work for a whole batch at once override this
+        :param findings:
+            The findings to process
+        :return: list[PostProcessingStatus].
+            The status of every finding, in the order of the findings
+        """
+        return [self.process_finding(finding) for finding in findings]
@@ -0,0 +1,80 @@
+# Standard Library
+import threading
+from dataclasses import dataclass
+
+# First Party
+from vcs_scanner.post_processing.processor_interface import Processor
+
+
+@dataclass(frozen=True)
+class RuleProcessors:
+    rule: str
+    # The tag and processor of every tag of the rule with a processor, in the order of the tags
+    processors: list[tuple[str, Processor]]
+    tags: tuple[str, ...]
+    # Whether the verdict of every processor of the rule only depends on the secret
+    memoizable: bool
+
+
+class ProcessorRegistry:
+    """
+    The processors of the rule tags, registered once when the post processing is configured.
+
+    From the tags of the rules the registry derives, for every rule, the processors of its tags in the order of the
+    tags. The index is built once per set of rule tags instead of walking every tag of every finding.
+    """
+
+    def __init__(self, processors: dict[str, Processor] | None = None):
+        self._processors: dict[str, Processor] = {}
+        # Increased on every registration, verdicts of an older version are stale
+        self.version: int = 0
+        self._lock = threading.Lock()
+        self._index: dict[str, RuleProcessors] = {}
+        self._indexed_rule_tags: dict[str, list[str]] | None = None
+        for tag, processor in (processors or {}).items():
+            self.register(tag, processor)
+
+    def register(self, tag: str, processor: Processor) -> None:
+        """
+            Register the processor of a tag, replacing the processor registered before
+        :param tag:
+            The rule tag
+        :param processor:
+            The processor of the findings of the rules with the tag
+        """
+        with self._lock:
+            self._processors[tag] = processor
+            self.version += 1
+            self._indexed_rule_tags = None
+
+    def get(self, tag: str) -> Processor | None:
+        return self._processors.get(tag)
+
+    def __contains__(self, tag: str) -> bool:
+        return tag in self._processors
+
+    def __len__(self) -> int:
+        return len(self._processors)
+
+    def rule_index(self, rule_tags: dict[str, list[str]]) -> dict[str, RuleProcessors]:
+        """
+            The processors of every rule, built once per rule tags
+        :param rule_tags:
+            The tags of every rule, the same dictionary for every call until the rule pack changes
+        :return: dict.
+            The processors of every rule with at least one processor
+        """
+        with self._lock:
+            if rule_tags is not self._indexed_rule_tags:
+                self._index = {}
+                for rule, tags in rule_tags.items():
+                    processors = [(tag, self._processors[tag]) for tag in tags if tag in self._processors]
+                    if processors:
+                        self._index[rule] = RuleProcessors(
+                            rule=rule,
+                            processors=processors,
+                            tags=tuple(tag for tag, _ in processors),
+                            memoizable=all(processor.memoizable for _, processor in processors),
+                        )
+                self._indexed_rule_tags = rule_tags
+            return self._index
@@ -0,0 +1,94 @@
+# Standard Library
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+# First Party
+from vcs_scanner.api.schema.finding import FindingBase
+from vcs_scanner.constants import (
+    POST_PROCESSING_EXECUTOR_PROCESS,
+    POST_PROCESSING_EXECUTOR_THREAD,
+    POST_PROCESSING_EXECUTORS,
+)
+from vcs_scanner.post_processing.processor_interface import PostProcessingStatus, Processor
+
+DEFAULT_BATCH_SIZE = 10_000
+
+
+def _process_batch(processor: Processor, findings: list[FindingBase]) -> list[PostProcessingStatus]:
+    # Module level, so a process pool can pickle it
+    return processor.process_findings(findings)
+
+
+class ProcessorRunner:
+    """
+    Runs the batches of findings of the processors, in the calling thread or spread over a thread or process pool.
+
+    The findings of every processor are split in batches of batch_size, so a single processor with many findings
+    also uses all workers. A process pool needs the processors to be picklable.
+    """
+
+    def __init__(
+        self,
+        executor: str = POST_PROCESSING_EXECUTOR_THREAD,
+        max_workers: int = 1,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        if executor not in POST_PROCESSING_EXECUTORS:
+            raise ValueError(
+                f"Unknown post processing executor {executor}, expected one of {POST_PROCESSING_EXECUTORS}"
+            )
+        if max_workers < 1 or batch_size < 1:
+            raise ValueError("The post processing workers and batch size must be at least 1")
+        self.executor: str = executor
+        self.max_workers: int = max_workers
+        self.batch_size: int = batch_size
+        self._pool: Executor | None = None
+        self._pool_lock = threading.Lock()
+
+    def run(self, batches: dict[str, tuple[Processor, list[FindingBase]]]) -> dict[str, list[PostProcessingStatus]]:
+        """
+            Process the findings of every tag with the processor of that tag
+        :param batches:
+            The processor and the findings of every tag
+        :return: dict.
+            The status of every finding of every tag, in the order of the findings
+        """
+        chunks = [
+            (tag, processor, findings[start : start + self.batch_size])
+            for tag, (processor, findings) in batches.items()
+            for start in range(0, len(findings), self.batch_size)
+        ]
+        statuses: dict[str, list[PostProcessingStatus]] = {tag: [] for tag in batches}
+        if self.max_workers == 1 or len(chunks) <= 1:
+            for tag, processor, findings in chunks:
+                statuses[tag].extend(_process_batch(processor, findings))
+            return statuses
+
+        pool = self._get_pool()
+        futures = [(tag, pool.submit(_process_batch, processor, findings)) for tag, processor, findings in chunks]
+        # The chunks of a tag were submitted in order, so extending in submission order keeps the findings order
+        for tag, future in futures:
+            statuses[tag].extend(future.result())
+        return statuses
+
+    def _get_pool(self) -> Executor:
+        with self._pool_lock:
+            if self._pool is None:
+                if self.executor == POST_PROCESSING_EXECUTOR_PROCESS:
+                    # Spawned like the pool of the native engine, forking a worker with threads running is unsafe
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="post-processing")
+            return self._pool
+
+    def shutdown(self) -> None:
+        """
+        Stop the workers of the pool, a next run starts a new pool
+        """
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
@@ -0,0 +1,86 @@
+# Standard Library
+import hashlib
+import threading
+from collections import OrderedDict
+
+# First Party
+from vcs_scanner.post_processing.processor_interface import PostProcessingStatus
+
+DEFAULT_MEMO_SIZE = 100_000
+
+Verdict = tuple[PostProcessingStatus, str | None]
+# Rule, the tags of the rule with a processor, and the fingerprint of the secret
+MemoKey = tuple[str, tuple[str, ...], bytes]
+
+
+def secret_fingerprint(secret: str) -> bytes:
+    """
+        Fingerprint of a secret, so the memo does not keep the secrets themselves
+    :param secret:
+        The secret
+    :return: bytes.
+        The digest of the secret
+    """
+    return hashlib.blake2b(secret.encode("utf-8"), digest_size=16).digest()
+
+
+class VerdictMemo:
+    """
+    Least recently used memo of the post processing verdicts, keyed by rule and secret fingerprint.
+    The memo is cleared when the processors change.
+
+    A secret committed many times is judged once, for the processors of which the verdict only depends on the rule
+    and the secret of the finding.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MEMO_SIZE):
+        self.maxsize: int = maxsize
+        self._verdicts: OrderedDict[MemoKey, Verdict] = OrderedDict()
+        self._lock = threading.Lock()
+        self._processors_version: int | None = None
+
+    def validate(self, processors_version: int) -> None:
+        """
+            Drop the verdicts of other processors
+        :param processors_version:
+            Version of the processor registry the verdicts are judged with
+        """
+        with self._lock:
+            if processors_version != self._processors_version:
+                self._verdicts.clear()
+                self._processors_version = processors_version
+
+    def get_many(self, keys: list[MemoKey | None]) -> list[Verdict | None]:
+        """
+            Look up the verdicts of a batch of findings
+        :param keys:
+            The key of every finding, None for a finding which cannot be memoized
+        :return: list.
+            The verdict of every finding, None when it is not known
+        """
+        verdicts: list[Verdict | None] = []
+        with self._lock:
+            for key in keys:
+                verdict = self._verdicts.get(key) if key is not None else None
+                if verdict is not None:
+                    self._verdicts.move_to_end(key)
+                verdicts.append(verdict)
+        return verdicts
+
+    def put_many(self, verdicts: list[tuple[MemoKey, Verdict]]) -> None:
+        """
+            Remember the verdicts of a batch of findings, evicting the least recently used verdicts
+        :param verdicts:
+            The key and verdict of every finding
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            for key, verdict in verdicts:
+                self._verdicts[key] = verdict
+                self._verdicts.move_to_end(key)
+            while len(self._verdicts) > self.maxsize:
+                self._verdicts.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._verdicts)
@@ -2,10 +2,18 @@
 # Standard Library
 import json
 import os
+import tempfile
+import threading
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass, field
 
 # Third Party
 from celery import Celery
-from celery.utils.log import get_task_logger
+from celery.exceptions import SoftTimeLimitExceeded
+from celery.signals import worker_process_init
+from celery.utils.log import current_process_index, get_task_logger
 
 from vcs_scanner.api.constants import TEMP_RULE_DIR_FILE, TEMP_RULE_FILE, TEMP_RULE_REPO_FILE
 from vcs_scanner.api.schema.repository import Repository
@@ -13,27 +21,70 @@ from vcs_scanner.api.schema.repository import Repository
 # First Party
 from vcs_scanner.common import initialise_logs, load_vcs_instances
 from vcs_scanner.constants import LOG_FILE_PATH
+from vcs_scanner.helpers.directory_reaper import SCRATCH_DIRECTORY_PREFIX, DirectoryReaper
 from vcs_scanner.helpers.environment_wrapper import validate_environment
+from vcs_scanner.helpers.metrics import REGISTRY, SCAN_TASKS_COALESCED, SCAN_TASKS_ROUTED, start_metrics_server
 from vcs_scanner.helpers.providers.rule_file import RuleFileProvider
 from vcs_scanner.helpers.providers.rule_tag import RuleTagProvider
-from vcs_scanner.model import RepositoryRuntime
+from vcs_scanner.helpers.scratch_allocator import ScratchAllocator
+from vcs_scanner.helpers.task_lease import LeaseResult, TaskLeaseStore
+from vcs_scanner.helpers.tracing import FileSpanExporter, add_exporter
+from vcs_scanner.model import RepositoryRuntime, VCSInstanceRuntime
 from vcs_scanner.output_modules.rws_api_writer import RESTAPIWriter
-from vcs_scanner.post_processing.post_processor import PostProcessor
+from vcs_scanner.post_processing.post_processor import PostProcessor, create_processors, parse_entropy_thresholds
+from vcs_scanner.post_processing.processor_runner import ProcessorRunner
+from vcs_scanner.post_processing.verdict_memo import VerdictMemo
 from vcs_scanner.secret_scanners.configuration import (
+    GITLEAKS_MAX_CPU_SECONDS,
+    GITLEAKS_MAX_MEMORY_MB,
     GITLEAKS_PATH,
+    GITLEAKS_TIMEOUT_SECONDS,
     RABBITMQ_DEFAULT_VHOST,
+    RABBITMQ_FAST_QUEUE,
+    RABBITMQ_LARGE_QUEUE,
     RABBITMQ_PASSWORD,
     RABBITMQ_QUEUE,
+    RABBITMQ_QUEUE_MAX_PRIORITY,
     RABBITMQ_SERVICE_HOST,
     RABBITMQ_USERNAME,
     REQUIRED_ENV_VARS,
     RESC_API_NO_AUTH_SERVICE_HOST,
     RESC_API_NO_AUTH_SERVICE_PORT,
+    RESC_BATCH_CONCURRENCY,
+    RESC_ENGINE_PROCESSES,
+    RESC_ENTROPY_THRESHOLDS,
     RESC_IGNORE_TAGS,
     RESC_INCLUDE_TAGS,
+    RESC_KEYWORD_FILTER,
+    RESC_LARGE_REPOSITORY_SIZE_KB,
+    RESC_MEMORY_SCRATCH_BUDGET_MB,
+    RESC_MEMORY_SCRATCH_DIR,
+    RESC_MEMORY_SCRATCH_LEASE_SECONDS,
+    RESC_MEMORY_SCRATCH_MAX_REPOSITORY_KB,
+    RESC_METRICS_PORT,
+    RESC_OBJECT_STORE_DIR,
+    RESC_OBJECT_STORE_MAINTENANCE_SECONDS,
+    RESC_ORPHAN_MAX_AGE_SECONDS,
+    RESC_POST_PROCESSING_EXECUTOR,
+    RESC_POST_PROCESSING_MEMO_SIZE,
+    RESC_POST_PROCESSING_WORKERS,
+    RESC_REAPER_FILES_PER_SECOND,
+    RESC_SCAN_ALL_BRANCHES,
+    RESC_SCAN_CACHE_DIR,
+    RESC_SCAN_ENGINE,
+    RESC_SCRATCH_DIR,
+    RESC_SHARED_HISTORY_WAIT_SECONDS,
+    RESC_TASK_DEFER_SECONDS,
+    RESC_TASK_LEASE_DIR,
+    RESC_TASK_LEASE_SECONDS,
+    RESC_TASK_SOFT_TIME_LIMIT_SECONDS,
+    RESC_TRACE_FILE,
+    RESC_TRASH_DIR,
     VCS_INSTANCES_FILE_PATH,
 )
-from vcs_scanner.secret_scanners.secret_scanner import SecretScanner
+from vcs_scanner.secret_scanners.gitleaks_wrapper import GitLeaksLimits
+from vcs_scanner.secret_scanners.secret_scanner import SecretScanner, determine_scan_type
+from vcs_scanner.secret_scanners.task_routing import RoutingPolicy, TaskRoute
 
 env_variables = validate_environment(REQUIRED_ENV_VARS)
 app = Celery(
@@ -50,20 +101,166 @@ app = Celery(
 app.conf.update({"worker_hijack_root_logger": False})
 app.conf.update({"broker_connection_retry": True})
 app.conf.update({"broker_connection_max_retries": 100})
+if env_variables[RESC_TASK_SOFT_TIME_LIMIT_SECONDS]:
+    app.conf.update({"task_soft_time_limit": float(env_variables[RESC_TASK_SOFT_TIME_LIMIT_SECONDS])})
 
 logger = get_task_logger(__name__)
 logger_config = initialise_logs(LOG_FILE_PATH)
 rabbitmq_queue = env_variables[RABBITMQ_QUEUE]
 rws_url = f"http://{env_variables[RESC_API_NO_AUTH_SERVICE_HOST]}:{env_variables[RESC_API_NO_AUTH_SERVICE_PORT]}"
 rws_writer: RESTAPIWriter = RESTAPIWriter(rws_url=rws_url)
+routing_policy = RoutingPolicy(
+    default_queue=rabbitmq_queue,
+    fast_queue=env_variables[RABBITMQ_FAST_QUEUE],
+    large_queue=env_variables[RABBITMQ_LARGE_QUEUE],
+    large_repository_size_kb=int(env_variables[RESC_LARGE_REPOSITORY_SIZE_KB]),
+    max_priority=int(env_variables[RABBITMQ_QUEUE_MAX_PRIORITY]),
+)
+task_lease_store = (
+    TaskLeaseStore(env_variables[RESC_TASK_LEASE_DIR], lease_seconds=int(env_variables[RESC_TASK_LEASE_SECONDS]))
+    if env_variables[RESC_TASK_LEASE_DIR]
+    else None
+)
+# Shared by the scan setups of all rule packs, so the pool is started and the verdicts are remembered once per
+# worker process
+post_processing_processors = create_processors(parse_entropy_thresholds(env_variables[RESC_ENTROPY_THRESHOLDS]))
+post_processing_runner = ProcessorRunner(
+    executor=env_variables[RESC_POST_PROCESSING_EXECUTOR],
+    max_workers=int(env_variables[RESC_POST_PROCESSING_WORKERS]),
+)
+post_processing_memo = VerdictMemo(maxsize=int(env_variables[RESC_POST_PROCESSING_MEMO_SIZE]))
+directory_reaper = DirectoryReaper(
+    trash_directory=env_variables[RESC_TRASH_DIR] or os.path.join(env_variables[RESC_SCRATCH_DIR], ".resc-trash"),
+    scratch_directory=env_variables[RESC_SCRATCH_DIR],
+    files_per_second=int(env_variables[RESC_REAPER_FILES_PER_SECOND]),
+    orphan_max_age_seconds=float(env_variables[RESC_ORPHAN_MAX_AGE_SECONDS]),
+)
+scratch_allocator = (
+    ScratchAllocator(
+        memory_directory=env_variables[RESC_MEMORY_SCRATCH_DIR],
+        max_repository_size_bytes=int(env_variables[RESC_MEMORY_SCRATCH_MAX_REPOSITORY_KB]) * 1024,
+        budget_bytes=int(env_variables[RESC_MEMORY_SCRATCH_BUDGET_MB]) * 1024 * 1024,
+        reservation_seconds=float(env_variables[RESC_MEMORY_SCRATCH_LEASE_SECONDS]),
+    )
+    if env_variables[RESC_MEMORY_SCRATCH_DIR]
+    else None
+)
+if routing_policy.is_enabled():
+    app.conf.update({"task_queues": routing_policy.queues()})
+    app.conf.update({"task_default_queue": rabbitmq_queue})
 
 VCS_INSTANCES_LIST = None
 VCS_INSTANCES = None
 DOWNLOADED_RULE_PACK_VERSION = None
 
 
-@app.task(name="scan_repository", Queue=rabbitmq_queue)
-def scan_repository(repository):
+@worker_process_init.connect
+def serve_metrics(**_kwargs):
+    # Every pool process keeps its own metrics, so each one is served on its own port
+    if env_variables[RESC_METRICS_PORT]:
+        port = int(env_variables[RESC_METRICS_PORT]) + (current_process_index(base=0) or 0)
+        try:
+            start_metrics_server(REGISTRY, port)
+        except OSError as error:
+            logger.warning(f"Unable to serve metrics on port {port}: {error}")
+
+
+@worker_process_init.connect
+def sweep_orphans(**_kwargs):
+    directory_reaper.sweep_orphans()
+
+
+if env_variables[RESC_TRACE_FILE]:
+    add_exporter(FileSpanExporter(env_variables[RESC_TRACE_FILE]))
+
+
+def get_gitleaks_limits() -> GitLeaksLimits:
+    max_memory_mb = env_variables[GITLEAKS_MAX_MEMORY_MB]
+    max_cpu_seconds = env_variables[GITLEAKS_MAX_CPU_SECONDS]
+    timeout_seconds = env_variables[GITLEAKS_TIMEOUT_SECONDS]
+    return GitLeaksLimits(
+        timeout_seconds=float(timeout_seconds) if timeout_seconds else None,
+        max_memory_bytes=int(max_memory_mb) * 1024 * 1024 if max_memory_mb else None,
+        max_cpu_seconds=int(max_cpu_seconds) if max_cpu_seconds else None,
+    )
+
+
+def get_task_route(
+    repository: Repository, repository_runtime: RepositoryRuntime, rule_pack_version: str, force_base_scan: bool
+) -> tuple[TaskRoute, RepositoryRuntime]:
+    """
+        Select the lane of a repository from the scan it needs
+    :param repository:
+        The repository to route
+    :param repository_runtime:
+        The repository as received from the queue
+    :param rule_pack_version:
+        The rule pack the scan would run with
+    :param force_base_scan:
+        Whether every scan is a base scan
+    :return: tuple.
+        The route, and the repository to send on it, which carries the repository created in the RWS
+    """
+    created_repository = rws_writer.write_repository(repository)
+    last_scan = rws_writer.get_last_scan_for_repository(created_repository) if created_repository else None
+    scan_type = determine_scan_type(
+        last_scan_for_repository=last_scan,
+        rule_pack_version=rule_pack_version,
+        latest_commit=repository_runtime.latest_commit,
+        force_base_scan=force_base_scan,
+    )
+    if created_repository:
+        repository_runtime = repository_runtime.model_copy(update={"rws_repository": created_repository})
+    return routing_policy.route(scan_type, repository_runtime.estimated_size_kb), repository_runtime
+
+
+def task_lease(repository_runtime: RepositoryRuntime) -> AbstractContextManager[LeaseResult]:
+    if not task_lease_store:
+        return nullcontext(LeaseResult.ACQUIRED)
+    return task_lease_store.lease(
+        repository_key=f"{repository_runtime.vcs_instance_name}:{repository_runtime.repository_id}",
+        commit_sha=repository_runtime.latest_commit or "",
+    )
+
+
+@dataclass
+class ScanSetup:
+    """
+    Everything the scans of a task share: the rule pack and the objects built from it.
+    """
+
+    rule_pack_version: str
+    rule_tag_provider: RuleTagProvider
+    post_processor: PostProcessor
+    gitleaks_rules_provider: RuleFileProvider
+    rest_api_writers: dict[str, RESTAPIWriter] = field(default_factory=dict)
+
+    def get_rest_api_writer(self, vcs_instance: VCSInstanceRuntime) -> RESTAPIWriter:
+        if vcs_instance.name not in self.rest_api_writers:
+            # Split the include_tags by comma if supplied
+            include_tags = env_variables[RESC_INCLUDE_TAGS].split(",") if env_variables[RESC_INCLUDE_TAGS] else []
+            include_tags = list(set(include_tags) | set(vcs_instance.include_tags))
+
+            # Split the ignore_tags by comma if supplied
+            ignore_tags = env_variables[RESC_IGNORE_TAGS].split(",") if env_variables[RESC_IGNORE_TAGS] else []
+            ignore_tags = list(set(ignore_tags) | set(vcs_instance.ignore_tags))
+
+            logger.debug(
+                f"include_tags for vcs {vcs_instance.name}: "
+                f"{include_tags}, "
+                f"ignore_tags for vcs {vcs_instance.name}: "
+                f"{ignore_tags}"
+            )
+            self.rest_api_writers[vcs_instance.name] = RESTAPIWriter(
+                rws_url=rws_url,
+                include_tags=include_tags,
+                ignore_tags=ignore_tags,
+                rule_tag_provider=self.rule_tag_provider,
+            )
+        return self.rest_api_writers[vcs_instance.name]
+
+
+def get_active_rule_pack_version() -> str:
     global VCS_INSTANCES_LIST, VCS_INSTANCES, DOWNLOADED_RULE_PACK_VERSION
     if not VCS_INSTANCES_LIST:
         VCS_INSTANCES_LIST = load_vcs_instances(env_variables[VCS_INSTANCES_FILE_PATH])
@@ -72,69 +269,261 @@ def scan_repository(repository):
     if not DOWNLOADED_RULE_PACK_VERSION:
         DOWNLOADED_RULE_PACK_VERSION = rws_writer.download_rule_pack()
 
-    active_rule_pack_version = rws_writer.check_active_rule_pack_version(rule_pack_version=DOWNLOADED_RULE_PACK_VERSION)
+    return rws_writer.check_active_rule_pack_version(rule_pack_version=DOWNLOADED_RULE_PACK_VERSION)
 
-    repository_runtime = RepositoryRuntime(**json.loads(repository))
 
-    logger.info(
-        f"Received repository to scan via the queue '{rabbitmq_queue}' => "
-        f"{repository_runtime.project_key}/{repository_runtime.repository_name}"
+def create_scan_setup(active_rule_pack_version: str) -> ScanSetup:
+    rule_tag_provider = RuleTagProvider()
+    rule_tag_provider.load(TEMP_RULE_FILE)
+
+    gitleaks_rules_provider = RuleFileProvider(TEMP_RULE_FILE)
+    gitleaks_rules_provider.init(
+        destination_rule_as_repo=TEMP_RULE_REPO_FILE,
+        destination_rule_as_dir=TEMP_RULE_DIR_FILE,
+    )
+    return ScanSetup(
+        rule_pack_version=active_rule_pack_version,
+        rule_tag_provider=rule_tag_provider,
+        post_processor=PostProcessor(
+            rule_tag_provider=rule_tag_provider,
+            processors=post_processing_processors,
+            runner=post_processing_runner,
+            memo=post_processing_memo,
+        ),
+        gitleaks_rules_provider=gitleaks_rules_provider,
     )
-    try:
-        vcs_instance = VCS_INSTANCES[repository_runtime.vcs_instance_name]
-
-        repository = Repository(
-            project_key=repository_runtime.project_key,
-            repository_id=repository_runtime.repository_id,
-            repository_name=repository_runtime.repository_name,
-            repository_url=repository_runtime.repository_url,
-            vcs_instance=vcs_instance.id_,
-        )
-        # Split the include_tags by comma if supplied
-        include_tags = env_variables[RESC_INCLUDE_TAGS].split(",") if env_variables[RESC_INCLUDE_TAGS] else []
-        include_tags = list(set(include_tags) | set(vcs_instance.include_tags))
-
-        # Split the ignore_tags by comma if supplied
-        ignore_tags = env_variables[RESC_IGNORE_TAGS].split(",") if env_variables[RESC_IGNORE_TAGS] else []
-        ignore_tags = list(set(ignore_tags) | set(vcs_instance.ignore_tags))
-
-        logger.debug(
-            f"include_tags for vcs {repository_runtime.vcs_instance_name}: "
-            f"{include_tags}, "
-            f"ignore_tags for vcs {repository_runtime.vcs_instance_name}: "
-            f"{ignore_tags}"
-        )
 
-        rule_tag_provider = RuleTagProvider()
-        rule_tag_provider.load(TEMP_RULE_FILE)
 
-        rest_api_writer = RESTAPIWriter(
-            rws_url=rws_url, include_tags=include_tags, ignore_tags=ignore_tags, rule_tag_provider=rule_tag_provider
-        )
-        post_processor = PostProcessor(rule_tag_provider=rule_tag_provider)
+def get_repository(repository_runtime: RepositoryRuntime) -> tuple[VCSInstanceRuntime, Repository]:
+    vcs_instance = VCS_INSTANCES[repository_runtime.vcs_instance_name]
+    repository = Repository(
+        project_key=repository_runtime.project_key,
+        repository_id=repository_runtime.repository_id,
+        repository_name=repository_runtime.repository_name,
+        repository_url=repository_runtime.repository_url,
+        vcs_instance=vcs_instance.id_,
+    )
+    return vcs_instance, repository
+
+
+def is_force_base_scan() -> bool:
+    return os.getenv("FORCE_BASE_SCAN", "false").lower() in "true"
 
-        gitleaks_rules_provider = RuleFileProvider(TEMP_RULE_FILE)
-        gitleaks_rules_provider.init(
-            destination_rule_as_repo=TEMP_RULE_REPO_FILE,
-            destination_rule_as_dir=TEMP_RULE_DIR_FILE,
+
+def scan(
+    repository_runtime: RepositoryRuntime,
+    setup: ScanSetup,
+    scan_tmp_directory: str,
+    cancel_event: threading.Event | None = None,
+) -> None:
+    """
+        Scan a repository, unless another task of this worker host is already scanning it
+    :param repository_runtime:
+        The repository as received from the queue
+    :param setup:
+        The rule pack and the objects shared with the other scans of the task
+    :param scan_tmp_directory:
+        Directory the repository is cloned in
+    :param cancel_event:
+        Event of the task, the scan is cancelled once it is set
+    """
+    try:
+        vcs_instance, repository = get_repository(repository_runtime)
+    except KeyError:
+        logger.error(
+            f"No configuration found for vcs instance {repository_runtime.vcs_instance_name}, "
+            f"unable to scan {repository_runtime.project_key}/{repository_runtime.repository_name}"
         )
+        return
+
+    with task_lease(repository_runtime) as lease_result:
+        # Another task is scanning this commit, its scan covers this delivery
+        if lease_result == LeaseResult.DUPLICATE:
+            logger.info(
+                f"Dropping duplicate task for {repository_runtime.project_key}/"
+                f"{repository_runtime.repository_name}, commit {repository_runtime.latest_commit} is being scanned"
+            )
+            SCAN_TASKS_COALESCED.inc(action="dropped")
+            return
+        # Another task is scanning an older commit, once it is done only the new commits are left to scan
+        if lease_result == LeaseResult.BUSY:
+            logger.info(
+                f"Deferring task for {repository_runtime.project_key}/{repository_runtime.repository_name}, "
+                f"an older commit is being scanned"
+            )
+            SCAN_TASKS_COALESCED.inc(action="deferred")
+            # The running scan records a new last scan, the deferred task looks it up again
+            deferred_runtime = repository_runtime.model_copy(update={"rws_repository": None})
+            scan_repository.apply_async(
+                args=[deferred_runtime.model_dump_json()],
+                queue=rabbitmq_queue,
+                countdown=int(env_variables[RESC_TASK_DEFER_SECONDS]),
+            )
+            return
 
         secret_scanner = SecretScanner(
             gitleaks_binary_path=env_variables[GITLEAKS_PATH],
-            gitleaks_rules_provider=gitleaks_rules_provider,
-            rule_pack_version=active_rule_pack_version,
-            output_plugin=rest_api_writer,
-            post_processor=post_processor,
+            gitleaks_rules_provider=setup.gitleaks_rules_provider,
+            rule_pack_version=setup.rule_pack_version,
+            output_plugin=setup.get_rest_api_writer(vcs_instance),
+            post_processor=setup.post_processor,
             repository=repository,
             username=vcs_instance.username,
             personal_access_token=vcs_instance.token,
-            force_base_scan=os.getenv("FORCE_BASE_SCAN", "false").lower() in "true",
+            scan_tmp_directory=scan_tmp_directory,
+            force_base_scan=is_force_base_scan(),
             latest_commit=repository_runtime.latest_commit,
+            scan_cache_directory=env_variables[RESC_SCAN_CACHE_DIR],
+            shared_history_wait_seconds=int(env_variables[RESC_SHARED_HISTORY_WAIT_SECONDS]),
+            gitleaks_limits=get_gitleaks_limits(),
+            keyword_filter=env_variables[RESC_KEYWORD_FILTER].lower() == "true",
+            scan_engine=env_variables[RESC_SCAN_ENGINE],
+            engine_processes=int(env_variables[RESC_ENGINE_PROCESSES]),
+            directory_reaper=directory_reaper,
+            scratch_allocator=scratch_allocator,
+            estimated_size_kb=repository_runtime.estimated_size_kb,
+            object_store_directory=env_variables[RESC_OBJECT_STORE_DIR],
+            object_store_maintenance_seconds=int(env_variables[RESC_OBJECT_STORE_MAINTENANCE_SECONDS]),
+            all_branches=env_variables[RESC_SCAN_ALL_BRANCHES].lower() == "true",
+            cancel_event=cancel_event,
+            created_repository=repository_runtime.rws_repository,
         )
 
         secret_scanner.run_scan(as_dir=True, as_repo=True)
-    except KeyError:
-        logger.error(
-            f"No configuration found for vcs instance {repository_runtime.vcs_instance_name}, "
-            f"unable to scan {repository_runtime.project_key}/{repository_runtime.repository_name}"
+
+
+def route(repository_runtimes: list[RepositoryRuntime], rule_pack_version: str) -> dict[tuple[str, int], list[str]]:
+    """
+        Select the lane of every repository
+    :param repository_runtimes:
+        The repositories as received from the queue
+    :param rule_pack_version:
+        The rule pack the scans would run with
+    :return: dict.
+        The repositories as json, by queue and priority
+    """
+    routes: dict[tuple[str, int], list[str]] = {}
+    for repository_runtime in repository_runtimes:
+        try:
+            _, repository = get_repository(repository_runtime)
+        except KeyError:
+            logger.error(
+                f"No configuration found for vcs instance {repository_runtime.vcs_instance_name}, "
+                f"unable to route {repository_runtime.project_key}/{repository_runtime.repository_name}"
+            )
+            continue
+        task_route, routed_runtime = get_task_route(
+            repository, repository_runtime, rule_pack_version, is_force_base_scan()
+        )
+        logger.info(
+            f"Routing {repository_runtime.project_key}/{repository_runtime.repository_name} "
+            f"to the queue '{task_route.queue}' with priority {task_route.priority}"
+        )
+        SCAN_TASKS_ROUTED.inc(queue=task_route.queue)
+        routes.setdefault((task_route.queue, task_route.priority), []).append(routed_runtime.model_dump_json())
+    return routes
+
+
+@app.task(name="scan_repository", Queue=rabbitmq_queue)
+def scan_repository(repository, routed=False):
+    active_rule_pack_version = get_active_rule_pack_version()
+    repository_runtime = RepositoryRuntime(**json.loads(repository))
+
+    logger.info(
+        f"Received repository to scan via the queue '{rabbitmq_queue}' => "
+        f"{repository_runtime.project_key}/{repository_runtime.repository_name}"
+    )
+    # Tasks arriving on the default queue are sent on to the lane matching their scan, lanes scan them directly
+    if routing_policy.is_enabled() and not routed:
+        for (queue, priority), repositories in route([repository_runtime], active_rule_pack_version).items():
+            scan_repository.apply_async(args=[repositories[0]], kwargs={"routed": True}, queue=queue, priority=priority)
+        return
+
+    setup = create_scan_setup(active_rule_pack_version)
+    cancel_event = threading.Event()
+    # The scan runs on a thread of its own, the soft time limit interrupts the task thread, which cancels the scan
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="scan") as executor:
+        wait_for_scans(
+            [executor.submit(_scan_in_scratch_directory, repository_runtime, setup, cancel_event)], cancel_event
+        )
+
+
+def wait_for_scans(futures: list[Future], cancel_event: threading.Event | None = None) -> list:
+    """
+        Wait for the scans of a task, cancelling them when the task exceeds its soft time limit
+    :param futures:
+        The scans running on the threads of the task
+    :param cancel_event:
+        Event shared by the scans of the task
+    :return: list.
+        The results of the scans
+    """
+    try:
+        return [future.result() for future in futures]
+    except SoftTimeLimitExceeded:
+        logger.warning(f"Soft time limit exceeded, cancelling {len(futures)} scans of the task")
+        for future in futures:
+            future.cancel()
+        if cancel_event is not None:
+            cancel_event.set()
+        raise
+
+
+def _scan_in_scratch_directory(
+    repository_runtime: RepositoryRuntime, setup: ScanSetup, cancel_event: threading.Event
+) -> None:
+    with scratch_directory() as scan_tmp_directory:
+        scan(repository_runtime, setup, scan_tmp_directory, cancel_event)
+
+
+@contextmanager
+def scratch_directory() -> Iterator[str]:
+    """
+        Directory of its own for the clone of a scan, so scans running side by side do not share a directory,
+        and the reaper recognizes the directory as orphan when the task crashes
+    :return: Iterator[str].
+        The path of the directory, it is handed to the reaper when the scan is done
+    """
+    directory = tempfile.mkdtemp(prefix=SCRATCH_DIRECTORY_PREFIX, dir=env_variables[RESC_SCRATCH_DIR])
+    try:
+        yield directory
+    finally:
+        directory_reaper.discard(directory)
+
+
+def _scan_batch_repository(
+    repository_runtime: RepositoryRuntime, setup: ScanSetup, cancel_event: threading.Event
+) -> bool:
+    # Repositories of a batch are cloned side by side, every one of them gets its own directory
+    try:
+        _scan_in_scratch_directory(repository_runtime, setup, cancel_event)
+        return True
+    except Exception as error:  # pylint: disable=W0718
+        logger.error(f"Scan of {repository_runtime.project_key}/{repository_runtime.repository_name} failed: {error}")
+        return False
+
+
+@app.task(name="scan_repositories", Queue=rabbitmq_queue)
+def scan_repositories(repositories, routed=False):
+    active_rule_pack_version = get_active_rule_pack_version()
+    repository_runtimes = [RepositoryRuntime(**json.loads(repository)) for repository in repositories]
+
+    logger.info(f"Received {len(repository_runtimes)} repositories to scan via the queue '{rabbitmq_queue}'")
+    # Every lane receives its part of the batch as a batch of its own
+    if routing_policy.is_enabled() and not routed:
+        for (queue, priority), lane_repositories in route(repository_runtimes, active_rule_pack_version).items():
+            scan_repositories.apply_async(
+                args=[lane_repositories], kwargs={"routed": True}, queue=queue, priority=priority
+            )
+        return
+
+    setup = create_scan_setup(active_rule_pack_version)
+    # The scans spend most of their time waiting for git, gitleaks and the RWS, threads keep them overlapping
+    concurrency = max(1, min(int(env_variables[RESC_BATCH_CONCURRENCY]), len(repository_runtimes)))
+    cancel_event = threading.Event()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="scan") as executor:
+        results = wait_for_scans(
+            [executor.submit(_scan_batch_repository, runtime, setup, cancel_event) for runtime in repository_runtimes],
+            cancel_event,
         )
+    logger.info(f"Scanned a batch of {len(results)} repositories, {results.count(False)} failed")
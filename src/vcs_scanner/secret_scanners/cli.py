@@ -1,39 +1,43 @@
+# pylint: disable=C0415
+# The CLI runs as a pre-commit hook, where its startup time adds to every commit. Only the standard library and
+# the argument parser are imported at module level, every subcommand imports what it needs when it runs.
 # Standard Library
 import getpass
 import json
 import logging.config
 import os
 from argparse import ArgumentParser, Namespace
+from typing import TYPE_CHECKING
 from urllib.parse import urlparse
 
-# Third Party
-from vcs_scanner.api.schema.vcs_provider import VCSProviders
-
 # First Party
-from vcs_scanner.common import get_rule_pack_version_from_file, initialise_logs
+from vcs_scanner.api.schema.vcs_provider import VCSProviders
 from vcs_scanner.constants import (
     CLI_VCS_AZURE,
     CLI_VCS_BITBUCKET,
     CLI_VCS_LOCAL_SCAN,
     LOG_FILE_PATH_CLI,
+    SCAN_ENGINE_GITLEAKS,
 )
 from vcs_scanner.helpers.cli import create_cli_argparser
-from vcs_scanner.helpers.providers.rule_file import RuleFileProvider
-from vcs_scanner.model import RepositoryRuntime
-from vcs_scanner.output_modules.rws_api_writer import RESTAPIWriter
-from vcs_scanner.output_modules.stdout_writer import STDOUTWriter
-from vcs_scanner.post_processing.post_processor import PostProcessor
-from vcs_scanner.secret_scanners.git_operation import read_repo_from_local
-from vcs_scanner.secret_scanners.secret_scanner import SecretScanner
-
-logger_config = initialise_logs(LOG_FILE_PATH_CLI)
+
+if TYPE_CHECKING:
+    from vcs_scanner.model import RepositoryRuntime
+    from vcs_scanner.output_modules.stdout_writer import STDOUTWriter
+    from vcs_scanner.secret_scanners.gitleaks_wrapper import GitLeaksLimits
+    from vcs_scanner.secret_scanners.secret_scanner import SecretScanner
+
 logger = logging.getLogger(__name__)
 
 FAKE_COMMIT = "hash"
+# The latest commit of a repository of which the HEAD could not be determined before it is cloned
+UNKNOWN_COMMIT = "unknown"
 FAKE_URL = "http://fake-host.none"
 
 
-def deserialize_repository_from_file(filepath: str) -> RepositoryRuntime:
+def deserialize_repository_from_file(filepath: str) -> "RepositoryRuntime":
+    from vcs_scanner.model import RepositoryRuntime
+
     with open(filepath, encoding="utf-8") as repo_file:
         repository_str: str = repo_file.read()
     repository: RepositoryRuntime = RepositoryRuntime(**json.loads(repository_str))
@@ -70,11 +74,14 @@ def validate_cli_arguments(args: Namespace):  # pylint: disable=R0912
         else:
             args.password = getpass.getpass("Password:")
 
+    if args.command == "repo" and args.repository_location == "remote" and not args.username:
+        args.password = None
+
     # Derive the repository name from the directory or url if not provided
     if args.command == "repo" and args.repository_location == "remote" and not args.repo_name:
         args.repo_name = get_repository_name_from_url(args.repo_url)
     elif args.command == "dir" or (
-        args.command == "repo" and args.repository_location == "local" and not args.repo_name
+        args.command == "repo" and args.repository_location in ("local", "staged") and not args.repo_name
     ):
         if not os.path.isdir(args.dir.absolute()):
             logger.error(f"The directory {args.dir.absolute()} does not exist")
@@ -87,6 +94,15 @@ def validate_cli_arguments(args: Namespace):  # pylint: disable=R0912
     # Split the ignore_tags by comma if supplied
     args.ignore_tags = args.ignore_tags.split(",") if args.ignore_tags else None
 
+    # Parse the entropy thresholds per tag if supplied
+    from vcs_scanner.post_processing.post_processor import parse_entropy_thresholds
+
+    try:
+        args.entropy_thresholds = parse_entropy_thresholds(args.entropy_thresholds)
+    except ValueError as error:
+        logger.error(f"Invalid --entropy-thresholds: {error}")
+        valid_arguments = False
+
     if not valid_arguments:
         return False
 
@@ -99,6 +115,11 @@ def scan_repository_from_cli():
     """
     parser: ArgumentParser = create_cli_argparser()
     args: Namespace = parser.parse_args()
+
+    from vcs_scanner.common import initialise_logs
+    from vcs_scanner.helpers.tracing import FileSpanExporter, add_exporter, shutdown_exporters
+
+    logger_config = initialise_logs(LOG_FILE_PATH_CLI)
     args = validate_cli_arguments(args)
 
     if args.verbose:
@@ -106,24 +127,40 @@ def scan_repository_from_cli():
     else:
         logger_config.setLevel(logging.INFO)
 
-    if args.command == "dir":
-        logger.info(f"Scanning directory {args.dir.absolute()}")
-        scan_directory(args)
-    elif args.command == "repo":
-        if args.repository_location == "local":
-            logger.info(f"Scanning repository local {args.dir.absolute()}")
-            args.repo_url = fetch_url_from_dot_git_config(args.dir.absolute())
-            args.username = None
-            args.password = None
-        elif args.repository_location == "remote":
-            logger.info(f"Scanning repository remote {args.repo_url}")
-        scan_repository(args)
+    if args.trace_file:
+        add_exporter(FileSpanExporter(f"{args.trace_file.absolute()}"))
+
+    try:
+        if args.command == "dir":
+            logger.info(f"Scanning directory {args.dir.absolute()}")
+            scan_directory(args)
+        elif args.command == "repo":
+            if args.repository_location == "local":
+                logger.info(f"Scanning repository local {args.dir.absolute()}")
+                args.repo_url = fetch_url_from_dot_git_config(args.dir.absolute())
+                args.username = None
+                args.password = None
+            elif args.repository_location == "remote":
+                logger.info(f"Scanning repository remote {args.repo_url}")
+            elif args.repository_location == "staged":
+                logger.info(f"Scanning staged changes of repository {args.dir.absolute()}")
+                scan_staged(args)
+                return
+            scan_repository(args)
+    finally:
+        if args.metrics_file:
+            from vcs_scanner.helpers.metrics import REGISTRY
+
+            REGISTRY.write_to_file(f"{args.metrics_file.absolute()}")
+        shutdown_exporters()
 
 
 def fetch_url_from_dot_git_config(path: str):
     if not os.path.exists(path / ".git/config"):
         return FAKE_URL
 
+    from vcs_scanner.secret_scanners.git_operation import read_repo_from_local
+
     return read_repo_from_local(path)
 
 
@@ -134,6 +171,12 @@ def scan_directory(args: Namespace):
     :param args:
         Namespace object containing the CLI arguments
     """
+    from vcs_scanner.helpers.providers.rule_file import RuleFileProvider
+    from vcs_scanner.model import RepositoryRuntime
+    from vcs_scanner.output_modules.stdout_writer import STDOUTWriter
+    from vcs_scanner.post_processing.post_processor import PostProcessor
+    from vcs_scanner.secret_scanners.secret_scanner import SecretScanner
+
     repository = RepositoryRuntime(
         repository_url=FAKE_URL,
         repository_name="local",
@@ -165,17 +208,82 @@ def scan_directory(args: Namespace):
         # we force a base scan because it does not matter
         # in this use case: we are not sending data to RESC.
         force_base_scan=True,
+        scan_cache_directory=_get_scan_cache_directory(args),
+        gitleaks_limits=_get_gitleaks_limits(args),
+        scan_engine=args.engine or SCAN_ENGINE_GITLEAKS,
+        engine_processes=args.engine_processes or 1,
+        keyword_filter=args.keyword_filter,
     )
 
     secret_scanner.run_scan(as_dir=True)
 
 
+def scan_staged(args: Namespace):
+    """
+        Start the process of scanning the staged changes of a local git repository.
+        Only the diff of the index is handed to gitleaks, which keeps this fast enough for a pre-commit hook.
+    :param args:
+        Namespace object containing the CLI arguments
+    """
+    from vcs_scanner.helpers.providers.rule_file import RuleFileProvider
+    from vcs_scanner.model import RepositoryRuntime
+    from vcs_scanner.output_modules.stdout_writer import STDOUTWriter
+    from vcs_scanner.post_processing.post_processor import PostProcessor
+    from vcs_scanner.secret_scanners.secret_scanner import SecretScanner
+
+    repository = RepositoryRuntime(
+        repository_url=FAKE_URL,
+        repository_name=args.repo_name,
+        repository_id=args.repo_name,
+        project_key=args.repo_name,
+        vcs_instance_name=CLI_VCS_LOCAL_SCAN,
+        latest_commit=FAKE_COMMIT,
+    )
+
+    output_plugin = STDOUTWriter.make(args)
+    rule_pack_version = _get_rule_pack_version(args)
+    post_processor = PostProcessor.make(args)
+
+    if not rule_pack_version:
+        rule_pack_version = "0.0.0"
+
+    gitleaks_rules_provider = RuleFileProvider(args.gitleaks_rules_path, init=True)
+
+    secret_scanner = SecretScanner(
+        gitleaks_binary_path=args.gitleaks_path,
+        gitleaks_rules_provider=gitleaks_rules_provider,
+        rule_pack_version=rule_pack_version,
+        output_plugin=output_plugin,
+        post_processor=post_processor,
+        repository=repository.convert_to_repository(vcs_instance_id=1),
+        username="",
+        personal_access_token="",
+        local_path=f"{args.dir.absolute()}",
+        # Staged changes have no history to be incremental on.
+        force_base_scan=True,
+        # The index is scanned even in a repository without commits yet
+        latest_commit=FAKE_COMMIT,
+        staged=True,
+        gitleaks_limits=_get_gitleaks_limits(args),
+        scan_engine=args.engine or SCAN_ENGINE_GITLEAKS,
+        engine_processes=args.engine_processes or 1,
+    )
+
+    secret_scanner.run_scan(as_repo=True)
+
+
 def scan_repository(args: Namespace):
     """
         Start the process of scanning a git repository (remote or local)
     :param args:
         Namespace object containing the CLI arguments
     """
+    from vcs_scanner.helpers.providers.rule_file import RuleFileProvider
+    from vcs_scanner.model import RepositoryRuntime
+    from vcs_scanner.output_modules.stdout_writer import STDOUTWriter
+    from vcs_scanner.post_processing.post_processor import PostProcessor
+    from vcs_scanner.secret_scanners.secret_scanner import SecretScanner
+
     vcs_type = guess_vcs_provider(args.repo_url)
     vcs_name = determine_vcs_name(args.repo_url, vcs_type)
 
@@ -188,12 +296,16 @@ def scan_repository(args: Namespace):
         latest_commit=FAKE_COMMIT,
     )
 
+    state_writer: STDOUTWriter | None = None
     if args.rws_url:
+        # requests and tenacity are only needed to talk to the RWS
+        from vcs_scanner.output_modules.rws_api_writer import RESTAPIWriter
+
         output_plugin = RESTAPIWriter.make(args)
         rule_pack_version = output_plugin.download_rule_pack()
 
     else:
-        output_plugin = STDOUTWriter.make(args)
+        output_plugin = state_writer = STDOUTWriter.make(args)
         rule_pack_version = _get_rule_pack_version(args)
     post_processor = PostProcessor.make(args)
     if not rule_pack_version:
@@ -210,12 +322,78 @@ def scan_repository(args: Namespace):
         repository=repository.convert_to_repository(vcs_instance_id=1),
         username=args.username,
         personal_access_token=args.password,
-        local_path=f"{args.dir.absolute()}",
+        # A remote repository is cloned into the working directory
+        local_path=f"{args.dir.absolute()}" if args.repository_location == "local" else None,
         force_base_scan=args.force_base_scan,
-        latest_commit="unknown",
+        latest_commit=_get_latest_commit(args),
+        scan_cache_directory=_get_scan_cache_directory(args),
+        gitleaks_limits=_get_gitleaks_limits(args),
+        scan_engine=args.engine or SCAN_ENGINE_GITLEAKS,
+        engine_processes=args.engine_processes or 1,
+        keyword_filter=args.keyword_filter,
+        all_branches=args.all_branches,
     )
 
-    secret_scanner.run_scan(as_repo=True)
+    try:
+        secret_scanner.run_scan(as_repo=True)
+    finally:
+        # The STDOUT writer exits the process when there are findings
+        if state_writer is not None and state_writer.state_store is not None:
+            _record_scan_state(state_writer, secret_scanner)
+
+
+def _get_latest_commit(args: Namespace) -> str:
+    """
+        Get the latest commit of the repository before it is cloned, so the scan of a remote repository of which
+        the HEAD did not change since its last scan stops before cloning it
+    :param args:
+        Namespace object containing the CLI arguments
+    :return: str.
+        The sha of the HEAD of a remote repository, UNKNOWN_COMMIT when it cannot be determined or is not needed
+    """
+    if args.repository_location != "remote":
+        return UNKNOWN_COMMIT
+    # Without the RWS or a state file there is no last scan to compare the HEAD with
+    if not args.rws_url and not getattr(args, "state_file", None):
+        return UNKNOWN_COMMIT
+
+    from vcs_scanner.secret_scanners.git_operation import get_remote_head
+
+    latest_commit = get_remote_head(
+        repository_url=args.repo_url,
+        username=args.username,
+        personal_access_token=args.password,
+    )
+    if not latest_commit:
+        logger.info(f"HEAD of {args.repo_url} unknown, the repository is cloned to determine it")
+        return UNKNOWN_COMMIT
+    return latest_commit
+
+
+def _record_scan_state(output_plugin: "STDOUTWriter", secret_scanner: "SecretScanner") -> None:
+    """
+        Record the scan in the state store of the output plugin, once the findings were reported
+    :param output_plugin:
+        STDOUT writer with the state store
+    :param secret_scanner:
+        The secret scanner which ran the scan
+    """
+    if not secret_scanner.scan_completed or secret_scanner.truncated:
+        return
+    # The clone can be newer than the HEAD queried before cloning
+    if secret_scanner.head_commit is not None:
+        scanned_commit = secret_scanner.head_commit.hexsha
+    else:
+        scanned_commit = secret_scanner.latest_commit
+    if not scanned_commit or scanned_commit == UNKNOWN_COMMIT:
+        logger.info(f"Last scanned commit of {secret_scanner.repository.repository_url} unknown, it is not recorded")
+        return
+    output_plugin.state_store.record_scan(
+        repository_url=secret_scanner.repository.repository_url,
+        scan_type=secret_scanner.scan_type,
+        last_scanned_commit=scanned_commit,
+        rule_pack=secret_scanner.rule_pack_version,
+    )
 
 
 def guess_vcs_provider(repo_url: str) -> VCSProviders:
@@ -254,6 +432,22 @@ def determine_vcs_name(repo_url: str, vcs_type: VCSProviders) -> str:
     return vcs_name
 
 
+def _get_scan_cache_directory(args: Namespace) -> str | None:
+    return f"{args.scan_cache_dir.absolute()}" if args.scan_cache_dir else None
+
+
+def _get_gitleaks_limits(args: Namespace) -> "GitLeaksLimits":
+    from vcs_scanner.secret_scanners.gitleaks_wrapper import GitLeaksLimits
+
+    return GitLeaksLimits(
+        timeout_seconds=args.gitleaks_timeout,
+        max_memory_bytes=args.gitleaks_max_memory * 1024 * 1024 if args.gitleaks_max_memory else None,
+        max_cpu_seconds=args.gitleaks_max_cpu,
+    )
+
+
 def _get_rule_pack_version(args: Namespace) -> str | None:
+    from vcs_scanner.common import get_rule_pack_version_from_file
+
     with open(args.gitleaks_rules_path, encoding="utf-8") as rule_pack:
         return get_rule_pack_version_from_file(rule_pack.read())
@@ -11,6 +11,9 @@ RABBITMQ_DEFAULT_VHOST = "RABBITMQ_DEFAULT_VHOST"
 RABBITMQ_USERNAME = "RABBITMQ_USERNAME"
 RABBITMQ_PASSWORD = "RABBITMQ_PASSWORD"
 RABBITMQ_QUEUE = "RABBITMQ_QUEUE"
+RABBITMQ_FAST_QUEUE = "RABBITMQ_FAST_QUEUE"
+RABBITMQ_LARGE_QUEUE = "RABBITMQ_LARGE_QUEUE"
+RABBITMQ_QUEUE_MAX_PRIORITY = "RABBITMQ_QUEUE_MAX_PRIORITY"
 
 VCS_INSTANCES_FILE_PATH = "VCS_INSTANCES_FILE_PATH"
 
@@ -20,6 +23,38 @@ RESC_API_NO_AUTH_SERVICE_PORT = "RESC_API_NO_AUTH_SERVICE_PORT"
 RESC_INCLUDE_TAGS = "RESC_INCLUDE_TAGS"
 RESC_IGNORE_TAGS = "RESC_IGNORE_TAGS"
 
+RESC_SCAN_CACHE_DIR = "RESC_SCAN_CACHE_DIR"
+RESC_SHARED_HISTORY_WAIT_SECONDS = "RESC_SHARED_HISTORY_WAIT_SECONDS"
+GITLEAKS_TIMEOUT_SECONDS = "GITLEAKS_TIMEOUT_SECONDS"
+RESC_METRICS_PORT = "RESC_METRICS_PORT"
+RESC_TRACE_FILE = "RESC_TRACE_FILE"
+GITLEAKS_MAX_MEMORY_MB = "GITLEAKS_MAX_MEMORY_MB"
+GITLEAKS_MAX_CPU_SECONDS = "GITLEAKS_MAX_CPU_SECONDS"
+RESC_LARGE_REPOSITORY_SIZE_KB = "RESC_LARGE_REPOSITORY_SIZE_KB"
+RESC_SCRATCH_DIR = "RESC_SCRATCH_DIR"
+RESC_TRASH_DIR = "RESC_TRASH_DIR"
+RESC_REAPER_FILES_PER_SECOND = "RESC_REAPER_FILES_PER_SECOND"
+RESC_ORPHAN_MAX_AGE_SECONDS = "RESC_ORPHAN_MAX_AGE_SECONDS"
+RESC_MEMORY_SCRATCH_DIR = "RESC_MEMORY_SCRATCH_DIR"
+RESC_MEMORY_SCRATCH_MAX_REPOSITORY_KB = "RESC_MEMORY_SCRATCH_MAX_REPOSITORY_KB"
+RESC_MEMORY_SCRATCH_BUDGET_MB = "RESC_MEMORY_SCRATCH_BUDGET_MB"
+RESC_MEMORY_SCRATCH_LEASE_SECONDS = "RESC_MEMORY_SCRATCH_LEASE_SECONDS"
+RESC_OBJECT_STORE_DIR = "RESC_OBJECT_STORE_DIR"
+RESC_OBJECT_STORE_MAINTENANCE_SECONDS = "RESC_OBJECT_STORE_MAINTENANCE_SECONDS"
+RESC_TASK_LEASE_DIR = "RESC_TASK_LEASE_DIR"
+RESC_TASK_LEASE_SECONDS = "RESC_TASK_LEASE_SECONDS"
+RESC_TASK_DEFER_SECONDS = "RESC_TASK_DEFER_SECONDS"
+RESC_TASK_SOFT_TIME_LIMIT_SECONDS = "RESC_TASK_SOFT_TIME_LIMIT_SECONDS"
+RESC_BATCH_CONCURRENCY = "RESC_BATCH_CONCURRENCY"
+RESC_KEYWORD_FILTER = "RESC_KEYWORD_FILTER"
+RESC_SCAN_ALL_BRANCHES = "RESC_SCAN_ALL_BRANCHES"
+RESC_SCAN_ENGINE = "RESC_SCAN_ENGINE"
+RESC_ENGINE_PROCESSES = "RESC_ENGINE_PROCESSES"
+RESC_ENTROPY_THRESHOLDS = "RESC_ENTROPY_THRESHOLDS"
+RESC_POST_PROCESSING_WORKERS = "RESC_POST_PROCESSING_WORKERS"
+RESC_POST_PROCESSING_EXECUTOR = "RESC_POST_PROCESSING_EXECUTOR"
+RESC_POST_PROCESSING_MEMO_SIZE = "RESC_POST_PROCESSING_MEMO_SIZE"
+
 REQUIRED_ENV_VARS = [
     EnvironmentVariable(
         GITLEAKS_PATH,
@@ -67,6 +102,30 @@ REQUIRED_ENV_VARS = [
         "The rabbitmq queue to connect to.",
         required=True,
     ),
+    EnvironmentVariable(
+        RABBITMQ_FAST_QUEUE,
+        "The rabbitmq queue incremental scans of small repositories are routed to. No fast lane when not set.",
+        required=False,
+        default=None,
+    ),
+    EnvironmentVariable(
+        RABBITMQ_LARGE_QUEUE,
+        "The rabbitmq queue scans of large repositories are routed to. No large lane when not set.",
+        required=False,
+        default=None,
+    ),
+    EnvironmentVariable(
+        RABBITMQ_QUEUE_MAX_PRIORITY,
+        "The maximum priority of the fast and large rabbitmq queues.",
+        required=False,
+        default="9",
+    ),
+    EnvironmentVariable(
+        RESC_LARGE_REPOSITORY_SIZE_KB,
+        "Estimated size in kilobytes from which a repository is scanned in the large lane.",
+        required=False,
+        default="1048576",
+    ),
     EnvironmentVariable(
         VCS_INSTANCES_FILE_PATH,
         "The absolute path to the json file containing the vcs_instances_definitions",
@@ -84,4 +143,201 @@ REQUIRED_ENV_VARS = [
         required=False,
         default=None,
     ),
+    EnvironmentVariable(
+        RESC_SCAN_CACHE_DIR,
+        "Directory in which scan results are cached between scans, caching is disabled when not set.",
+        required=False,
+        default=None,
+    ),
+    EnvironmentVariable(
+        RESC_SHARED_HISTORY_WAIT_SECONDS,
+        "Maximum number of seconds to wait for commits shared with a fork which are being scanned by another task. "
+        "The commits are scanned by the waiting task once the other task is gone or the time is up.",
+        required=False,
+        default="600",
+    ),
+    EnvironmentVariable(
+        GITLEAKS_TIMEOUT_SECONDS,
+        "Maximum wall clock time of a gitleaks scan in seconds, the scan is stopped and reported as truncated when "
+        "it is exceeded. No limit when not set.",
+        required=False,
+        default=None,
+    ),
+    EnvironmentVariable(
+        GITLEAKS_MAX_MEMORY_MB,
+        "Maximum memory of a gitleaks scan in megabytes. No limit when not set.",
+        required=False,
+        default=None,
+    ),
+    EnvironmentVariable(
+        GITLEAKS_MAX_CPU_SECONDS,
+        "Maximum cpu time of a gitleaks scan in seconds. No limit when not set.",
+        required=False,
+        default=None,
+    ),
+    EnvironmentVariable(
+        RESC_TASK_SOFT_TIME_LIMIT_SECONDS,
+        "Soft time limit of a scan task in seconds, the scans of a task which exceeds it are cancelled and the "
+        "findings of a cancelled scan are not reported. No limit when not set.",
+        required=False,
+        default=None,
+    ),
+    EnvironmentVariable(
+        RESC_METRICS_PORT,
+        "Local port on which the scan metrics are served in the Prometheus text format, every worker process "
+        "listens on this port plus its pool index. Metrics are not served when not set.",
+        required=False,
+        default=None,
+    ),
+    EnvironmentVariable(
+        RESC_TRACE_FILE,
+        "File the tracing spans of the scans are appended to as JSON lines. Tracing is disabled when not set.",
+        required=False,
+        default=None,
+    ),
+    EnvironmentVariable(
+        RESC_SCRATCH_DIR,
+        "Directory the repositories are cloned in, the working directory when not set.",
+        required=False,
+        default=".",
+    ),
+    EnvironmentVariable(
+        RESC_TRASH_DIR,
+        "Directory the clones are moved to once scanned, to be removed in the background. It must be on the file "
+        "system of RESC_SCRATCH_DIR, the .resc-trash directory within RESC_SCRATCH_DIR when not set.",
+        required=False,
+        default=None,
+    ),
+    EnvironmentVariable(
+        RESC_REAPER_FILES_PER_SECOND,
+        "Maximum number of files per second the background removal of the clones removes, 0 for no maximum.",
+        required=False,
+        default="10000",
+    ),
+    EnvironmentVariable(
+        RESC_ORPHAN_MAX_AGE_SECONDS,
+        "Number of seconds after which the clones of crashed tasks are removed, it must exceed the longest scan.",
+        required=False,
+        default="86400",
+    ),
+    EnvironmentVariable(
+        RESC_MEMORY_SCRATCH_DIR,
+        "Directory on a memory backed file system, such as a tmpfs mount, small repositories are cloned in. "
+        "All repositories are cloned in RESC_SCRATCH_DIR when not set.",
+        required=False,
+        default=None,
+    ),
+    EnvironmentVariable(
+        RESC_MEMORY_SCRATCH_MAX_REPOSITORY_KB,
+        "Maximum estimated size of a repository cloned in RESC_MEMORY_SCRATCH_DIR, in kilobytes.",
+        required=False,
+        default="512000",
+    ),
+    EnvironmentVariable(
+        RESC_MEMORY_SCRATCH_BUDGET_MB,
+        "Memory the clones in RESC_MEMORY_SCRATCH_DIR of all the worker processes sharing it may take together, in "
+        "megabytes. A clone is estimated at twice the size of its repository.",
+        required=False,
+        default="4096",
+    ),
+    EnvironmentVariable(
+        RESC_MEMORY_SCRATCH_LEASE_SECONDS,
+        "Lease of the memory reserved for a clone in RESC_MEMORY_SCRATCH_DIR, in seconds. The worker renews it while "
+        "the clone is in use, the memory of a crashed task is reclaimed once its lease expired.",
+        required=False,
+        default="600",
+    ),
+    EnvironmentVariable(
+        RESC_OBJECT_STORE_DIR,
+        "Directory holding an object store per project, which the clones of the repositories of the project borrow "
+        "their objects from, so objects shared by the repositories are downloaded and stored once. The object stores "
+        "are kept between scans. Every clone downloads all its objects when not set.",
+        required=False,
+        default=None,
+    ),
+    EnvironmentVariable(
+        RESC_OBJECT_STORE_MAINTENANCE_SECONDS,
+        "Minimum number of seconds between two maintenances of an object store in RESC_OBJECT_STORE_DIR, which "
+        "repack its objects and prune those no branch refers to anymore. 0 never maintains the object stores.",
+        required=False,
+        default="604800",
+    ),
+    EnvironmentVariable(
+        RESC_TASK_LEASE_DIR,
+        "Directory shared by the worker processes in which the repositories being scanned are leased. Duplicate "
+        "tasks for a repository being scanned are dropped. No de-duplication when not set.",
+        required=False,
+        default=None,
+    ),
+    EnvironmentVariable(
+        RESC_TASK_LEASE_SECONDS,
+        "Number of seconds after which the lease of a repository expires, when the task holding it did not finish.",
+        required=False,
+        default="14400",
+    ),
+    EnvironmentVariable(
+        RESC_TASK_DEFER_SECONDS,
+        "Number of seconds a task for a newer commit of a repository being scanned is postponed.",
+        required=False,
+        default="60",
+    ),
+    EnvironmentVariable(
+        RESC_BATCH_CONCURRENCY,
+        "Maximum number of repositories of a scan_repositories batch which are scanned at the same time.",
+        required=False,
+        default="4",
+    ),
+    EnvironmentVariable(
+        RESC_KEYWORD_FILTER,
+        "Only hand the files and commits containing a keyword of the rule pack to gitleaks, when set to 'true'.",
+        required=False,
+        default="false",
+    ),
+    EnvironmentVariable(
+        RESC_SCAN_ALL_BRANCHES,
+        "Scan the new commits of every branch and tag incrementally, not only those of HEAD, when set to 'true'. "
+        "The tips of the scanned refs are kept in the scan cache directory.",
+        required=False,
+        default="false",
+    ),
+    EnvironmentVariable(
+        RESC_SCAN_ENGINE,
+        "Engine the scans of this worker run with: 'gitleaks' for the gitleaks executable, or 'native' for the "
+        "in-process engine which compiles the rules once per worker process.",
+        required=False,
+        default="gitleaks",
+    ),
+    EnvironmentVariable(
+        RESC_ENGINE_PROCESSES,
+        "Number of processes the native engine of every worker process scans with.",
+        required=False,
+        default="1",
+    ),
+    EnvironmentVariable(
+        RESC_ENTROPY_THRESHOLDS,
+        "Comma separated list of tag=threshold. Findings of which the secret has a Shannon entropy in bits per byte "
+        "below the threshold of a tag of their rule are dropped as false positive.",
+        required=False,
+        default="",
+    ),
+    EnvironmentVariable(
+        RESC_POST_PROCESSING_WORKERS,
+        "Number of workers the batches of findings of the post processors are spread over, 1 processes them in the "
+        "worker process.",
+        required=False,
+        default="1",
+    ),
+    EnvironmentVariable(
+        RESC_POST_PROCESSING_EXECUTOR,
+        "Pool of the post processing workers: 'thread', or 'process' for processors doing CPU bound work in Python.",
+        required=False,
+        default="thread",
+    ),
+    EnvironmentVariable(
+        RESC_POST_PROCESSING_MEMO_SIZE,
+        "Number of post processing verdicts the worker process remembers by rule and secret, so a secret found again "
+        "is not processed again. 0 disables the memo.",
+        required=False,
+        default="100000",
+    ),
 ]
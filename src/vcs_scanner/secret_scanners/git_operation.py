@@ -1,21 +1,155 @@
 # pylint: disable=bad-option-value,C0413
 # Standard Library
+import fcntl
+import hashlib
 import logging
 import os
+import subprocess
+import time
 
 os.environ["GIT_PYTHON_REFRESH"] = "quiet"
 
 # Third Party
 from git import Commit, Repo  # noqa: E402
 
+# First Party
+from vcs_scanner.helpers.keyword_filter import KeywordFilter  # noqa: E402
+from vcs_scanner.helpers.tracing import traced  # noqa: E402
+
 logger = logging.getLogger(__name__)
 
+REMOTE_HEAD_TIMEOUT_SECONDS = 60
+# Clones run with the messages of git untranslated, so its errors can be recognized whatever the locale of the worker
+CLONE_ENVIRONMENT = {"LC_ALL": "C", "LANGUAGE": "C"}
+
+
+def _get_authenticated_url(repository_url: str, username: str | None, personal_access_token: str | None) -> str:
+    if not username and not personal_access_token:
+        return repository_url
+    url = str(repository_url).replace("https://", "")
+    return f"https://{username}:{personal_access_token}@{url}"
+
+
+def _list_remote_refs(
+    repository_url: str,
+    username: str | None,
+    personal_access_token: str | None,
+    options: list[str],
+    patterns: list[str],
+    timeout_seconds: float,
+) -> list[tuple[str, str]] | None:
+    """
+        List the refs of a remote repository with git ls-remote, without cloning it
+    :param repository_url:
+        Repository url to query
+    :param username:
+        Username to query the repository, only needed if the repository is private
+    :param personal_access_token:
+        Personal access token|password to query the repository, only needed if the repository is private
+    :param options:
+        Options of git ls-remote
+    :param patterns:
+        Patterns the names of the listed refs match, every ref when empty
+    :param timeout_seconds:
+        Maximum wall clock time of the query
+    :return: list or None.
+        The commit sha and the name of every ref, or None when the remote cannot be queried
+    """
+    remote_url = _get_authenticated_url(repository_url, username, personal_access_token)
+    try:
+        result = subprocess.run(
+            ["git", "ls-remote", *options, remote_url, *patterns],
+            capture_output=True,
+            check=False,
+            timeout=timeout_seconds,
+            # Fail instead of prompting for credentials, the clone prompts when it needs them
+            env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+        )
+    except (OSError, subprocess.TimeoutExpired) as error:
+        logger.warning(f"Unable to query the refs of {repository_url}: {type(error).__name__}")
+        return None
+    if result.returncode != 0:
+        # The error of git can contain the url with the credentials
+        message = result.stderr.decode("utf-8", errors="replace").replace(remote_url, repository_url).strip()
+        logger.warning(f"Unable to query the refs of {repository_url}: {message}")
+        return None
+
+    refs = []
+    for line in result.stdout.decode("utf-8", errors="replace").splitlines():
+        commit, _, ref = line.partition("\t")
+        refs.append((commit, ref))
+    return refs
+
+
+@traced("git.get_remote_head")
+def get_remote_head(
+    repository_url: str,
+    username: str = "",
+    personal_access_token: str = "",
+    timeout_seconds: float = REMOTE_HEAD_TIMEOUT_SECONDS,
+) -> str | None:
+    """
+        Get the commit the HEAD of a remote repository points to with git ls-remote, without cloning it
+    :param repository_url:
+        Repository url to query
+    :param username:
+        Username to query the repository, only needed if the repository is private
+    :param personal_access_token:
+        Personal access token|password to query the repository, only needed if the repository is private
+    :param timeout_seconds:
+        Maximum wall clock time of the query
+    :return: str or None.
+        The commit sha, or None when the remote cannot be queried or has no HEAD
+    """
+    refs = _list_remote_refs(repository_url, username, personal_access_token, [], ["HEAD"], timeout_seconds)
+    for commit, ref in refs or []:
+        if ref == "HEAD":
+            return commit
+    return None
+
+
+@traced("git.list_remote_ref_tips")
+def list_remote_ref_tips(
+    repository_url: str,
+    username: str = "",
+    personal_access_token: str = "",
+    timeout_seconds: float = REMOTE_HEAD_TIMEOUT_SECONDS,
+) -> dict[str, str] | None:
+    """
+        Get the commits the branches and tags of a remote repository point to, without cloning it
+    :param repository_url:
+        Repository url to query
+    :param username:
+        Username to query the repository, only needed if the repository is private
+    :param personal_access_token:
+        Personal access token|password to query the repository, only needed if the repository is private
+    :param timeout_seconds:
+        Maximum wall clock time of the query
+    :return: dict or None.
+        The commit sha by ref name, as listed by list_ref_tips for a clone, or None when the remote cannot be queried
+    """
+    refs = _list_remote_refs(
+        repository_url, username, personal_access_token, ["--heads", "--tags"], [], timeout_seconds
+    )
+    if refs is None:
+        return None
+    tips: dict[str, str] = {}
+    for commit, ref in refs:
+        # An annotated tag is listed twice, the peeled line gives the commit it points to
+        if ref.endswith("^{}"):
+            tips[ref[: -len("^{}")]] = commit
+        else:
+            tips.setdefault(ref, commit)
+    return tips
+
 
+@traced("git.clone_repository")
 def clone_repository(
     repository_url: str,
     repo_clone_path: str,
     username: str = "",
     personal_access_token: str = "",
+    reference: str | None = None,
 ) -> Commit:
     """
         Clones the given repository
@@ -27,18 +161,137 @@ def clone_repository(
         Username to clone the repository, only needed if the repository is private
     :param personal_access_token:
         Personal access token|password to clone the repository, only needed if the repository is private
+    :param reference:
+        Optional object store the clone borrows objects from through git alternates, the objects present in it are
+        neither downloaded nor stored in the clone
     """
-    if username == "" and personal_access_token == "":
-        repo_clone_url = repository_url
+    repo_clone_url = _get_authenticated_url(repository_url, username, personal_access_token)
+    if reference:
+        repo = Repo.clone_from(repo_clone_url, repo_clone_path, env=CLONE_ENVIRONMENT, reference=reference)
     else:
-        url = str(repository_url).replace("https://", "")
-        repo_clone_url = f"https://{username}:{personal_access_token}@{url}"
-    repo = Repo.clone_from(repo_clone_url, repo_clone_path)
+        repo = Repo.clone_from(repo_clone_url, repo_clone_path, env=CLONE_ENVIRONMENT)
     logger.debug(f"Repository {repository_url} cloned successfully")
     logger.info(f"Repository cloned to {repo_clone_path}")
     return repo.head.commit
 
 
+def _run_object_store_command(command: list[str], object_store_path: str, remote_url: str, repository_url: str) -> bool:
+    result = subprocess.run(command, capture_output=True, check=False, env={**os.environ, "GIT_TERMINAL_PROMPT": "0"})
+    if result.returncode != 0:
+        # The error of git can contain the url with the credentials
+        message = result.stderr.decode("utf-8", errors="replace").replace(remote_url, repository_url).strip()
+        logger.warning(f"Unable to fetch {repository_url} into the object store {object_store_path}: {message}")
+        return False
+    return True
+
+
+@traced("git.update_object_store")
+def update_object_store(
+    object_store_path: str,
+    repository_url: str,
+    username: str = "",
+    personal_access_token: str = "",
+) -> bool:
+    """
+        Fetch the objects of a repository into a shared object store, a bare repository which keeps the branches of
+        every repository fetched into it under a namespace of their own. Only the objects missing from the store
+        are downloaded. Fetches into the same store run concurrently, each one only writes the refs of its own
+        namespace under the ref locks of git. They share a lock file next to the store, which only the maintenance
+        of the store takes exclusively: a fetch during a maintenance skips the store.
+    :param object_store_path:
+        Path of the object store, it is created when missing
+    :param repository_url:
+        Repository url to fetch
+    :param username:
+        Username to fetch the repository, only needed if the repository is private
+    :param personal_access_token:
+        Personal access token|password to fetch the repository, only needed if the repository is private
+    :return: bool.
+        True when the store holds the objects of the branches of the repository
+    """
+    remote_url = _get_authenticated_url(repository_url, username, personal_access_token)
+    namespace = hashlib.sha256(str(repository_url).encode("utf-8")).hexdigest()[:16]
+    fetch_command = [
+        "git",
+        "-C",
+        object_store_path,
+        "fetch",
+        "--quiet",
+        "--no-tags",
+        "--no-write-fetch-head",
+        "--prune",
+        remote_url,
+        f"+refs/heads/*:refs/resc/{namespace}/heads/*",
+    ]
+    os.makedirs(os.path.dirname(os.path.abspath(object_store_path)), exist_ok=True)
+    with open(f"{object_store_path}.lock", "a", encoding="utf-8") as lock_file:
+        if not os.path.exists(os.path.join(object_store_path, "HEAD")):
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            for command in (
+                ["git", "init", "--quiet", "--bare", object_store_path],
+                # The objects are only repacked and pruned by maintain_object_store
+                ["git", "-C", object_store_path, "config", "gc.auto", "0"],
+            ):
+                if not _run_object_store_command(command, object_store_path, remote_url, repository_url):
+                    return False
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except BlockingIOError:
+            logger.info(f"Object store {object_store_path} is being maintained, {repository_url} is cloned without it")
+            return False
+        if not _run_object_store_command(fetch_command, object_store_path, remote_url, repository_url):
+            return False
+    logger.debug(f"Repository {repository_url} fetched into the object store {object_store_path}")
+    return True
+
+
+@traced("git.maintain_object_store")
+def maintain_object_store(object_store_path: str, interval_seconds: int) -> bool:
+    """
+        Repack the objects of an object store and prune the objects no branch refers to anymore, at most once per
+        interval. Automatic garbage collection is disabled in the stores, without this maintenance they only grow.
+        git gc only prunes objects which have been unreferenced for two weeks, so clones borrowing the objects of
+        a branch removed since keep working. The maintenance is skipped while a fetch into the store is running.
+    :param object_store_path:
+        Path of the object store
+    :param interval_seconds:
+        Minimum number of seconds between two maintenances of the store, 0 to never maintain it
+    :return: bool.
+        True when the store was maintained
+    """
+    marker_path = f"{object_store_path}.maintained"
+    if interval_seconds <= 0 or not os.path.exists(os.path.join(object_store_path, "HEAD")):
+        return False
+
+    def is_due() -> bool:
+        try:
+            return time.time() - os.path.getmtime(marker_path) >= interval_seconds
+        except FileNotFoundError:
+            # A new store is maintained once its first interval passed
+            with open(marker_path, "a", encoding="utf-8"):
+                pass
+            return False
+
+    if not is_due():
+        return False
+    with open(f"{object_store_path}.lock", "a", encoding="utf-8") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        # Another process may have maintained the store while this one checked the marker
+        if not is_due():
+            return False
+        result = subprocess.run(["git", "-C", object_store_path, "gc", "--quiet"], capture_output=True, check=False)
+        if result.returncode != 0:
+            message = result.stderr.decode("utf-8", errors="replace").strip()
+            logger.warning(f"Unable to maintain the object store {object_store_path}: {message}")
+            return False
+        os.utime(marker_path)
+    logger.info(f"Object store {object_store_path} was repacked and pruned")
+    return True
+
+
 def read_repo_from_local(path_to_dir: str) -> str:
     """Given a path returns the remote address of the repository
 
@@ -51,3 +304,178 @@ def read_repo_from_local(path_to_dir: str) -> str:
     repo = Repo(path_to_dir)
     logger.debug(repo.remotes[0].url)
     return repo.remotes[0].url
+
+
+def list_ref_tips(repository_path: str, remote: str | None = None) -> dict[str, str]:
+    """
+        Get the commits the branches and tags of a repository point to
+    :param repository_path:
+        Path to the repository
+    :param remote:
+        Remote of which the remote-tracking branches are listed as the branches of a clone, under refs/heads.
+        When None, the local branches and every remote-tracking branch are listed under their own name
+    :return: dict.
+        The commit sha by ref name, tags which do not point to a commit are left out
+    """
+    repo = Repo(repository_path)
+    output = repo.git.for_each_ref(
+        "--format=%(refname)%09%(symref)%09%(objecttype)%09%(objectname)%09%(*objecttype)%09%(*objectname)",
+        "refs/heads",
+        "refs/remotes",
+        "refs/tags",
+    )
+    tips: dict[str, str] = {}
+    for line in output.splitlines():
+        ref, symref, object_type, commit, peeled_type, peeled_commit = line.split("\t")
+        # The HEAD of a remote is a symbolic ref to one of its branches
+        if symref:
+            continue
+        if object_type != "commit":
+            if peeled_type != "commit":
+                continue
+            commit = peeled_commit
+        if remote is not None:
+            if ref.startswith(f"refs/remotes/{remote}/"):
+                ref = f"refs/heads/{ref[len(f'refs/remotes/{remote}/') :]}"
+            elif not ref.startswith("refs/tags/"):
+                continue
+        tips[ref] = commit
+    return tips
+
+
+def list_commits(
+    repository_path: str, scan_from: str | None = None, scanned_tips: list[str] | None = None
+) -> list[str]:
+    """
+        List the commits a history scan covers, matching the revisions gitleaks walks:
+        every ref for a base scan, the commits on HEAD since scan_from for an incremental one.
+        With scanned tips, the commits on any ref which are not reachable from those tips: the new commits of every
+        branch, each commit listed once however many branches contain it.
+    :param repository_path:
+        Path to the cloned repository
+    :param scan_from:
+        Last scanned commit, or None for a base scan
+    :param scanned_tips:
+        The tips of the refs an earlier scan covered, the tips missing from the repository are ignored
+    :return: list[str].
+        The commit shas, newest first
+    """
+    if scanned_tips is not None:
+        # The tips are read from stdin, a repository can have more refs than fit on a command line
+        result = subprocess.run(
+            ["git", "-C", repository_path, "rev-list", "--all", "--ignore-missing", "--stdin"],
+            input="".join(f"^{tip}\n" for tip in scanned_tips).encode("utf-8"),
+            capture_output=True,
+            check=True,
+        )
+        return result.stdout.decode("utf-8").split()
+    repo = Repo(repository_path)
+    revisions = f"{scan_from}..HEAD" if scan_from else "--all"
+    return repo.git.rev_list(revisions).split()
+
+
+def list_root_commits(repository_path: str) -> list[str]:
+    """
+        List the root commits reachable from any ref, repositories sharing one share (part of) their history
+    :param repository_path:
+        Path to the cloned repository
+    :return: list[str].
+        The root commit shas
+    """
+    repo = Repo(repository_path)
+    return repo.git.rev_list("--max-parents=0", "--all").split()
+
+
+def get_object_database_size(repository_path: str) -> int:
+    """
+        Size of the object database of a repository, loose and packed objects, as reported by git count-objects
+    :param repository_path:
+        Path to the cloned repository
+    :return: int.
+        The size in bytes
+    """
+    repo = Repo(repository_path)
+    statistics = dict(line.split(": ", 1) for line in repo.git.count_objects("-v").splitlines() if ": " in line)
+    size_kib = int(statistics.get("size", 0)) + int(statistics.get("size-pack", 0))
+    return size_kib * 1024
+
+
+@traced("git.filter_commits_by_keywords")
+def filter_commits_by_keywords(repository_path: str, commits: list[str], keyword_filter: KeywordFilter) -> list[str]:
+    """
+        Select the commits whose added lines contain a keyword of the rule pack.
+        The patches are streamed from git log, like gitleaks only the added lines of a commit are searched.
+    :param repository_path:
+        Path to the cloned repository
+    :param commits:
+        The commit shas to filter
+    :param keyword_filter:
+        Keyword filter of the rule pack the commits are scanned with
+    :return: list[str].
+        The commit shas gitleaks needs to scan, in the order of commits
+    """
+    if not commits:
+        return []
+
+    candidates: set[str] = set()
+    with subprocess.Popen(
+        ["git", "log", "-p", "-U0", "--no-color", "--no-ext-diff", "--format=%x00%H", "--no-walk", "--stdin"],
+        cwd=repository_path,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    ) as process:
+        # git reads all revisions from stdin before it writes any output
+        process.stdin.write("".join(f"{commit}\n" for commit in commits).encode("ascii"))
+        process.stdin.close()
+
+        commit, added_lines = None, []
+        for line in process.stdout:
+            if line.startswith(b"\x00"):
+                if commit and keyword_filter.matches(b"".join(added_lines)):
+                    candidates.add(commit)
+                commit, added_lines = line[1:].strip().decode("ascii"), []
+            elif line.startswith(b"+"):
+                added_lines.append(line)
+        if commit and keyword_filter.matches(b"".join(added_lines)):
+            candidates.add(commit)
+
+    if process.returncode != 0:
+        logger.warning(f"Unable to filter the commits of {repository_path} by keywords, scanning all of them")
+        return commits
+    return [commit for commit in commits if commit in candidates]
+
+
+@traced("git.list_changed_files")
+def list_changed_files(directory_path: str, scan_from: str) -> list[str] | None:
+    """
+        List the files of a checkout which changed since a commit: the tracked files that differ from the commit,
+        and the untracked and ignored files, of which git cannot tell whether they changed
+    :param directory_path:
+        Path to the checkout, or to a directory within it
+    :param scan_from:
+        Last scanned commit
+    :return: list[str] or None.
+        The paths of the existing files, relative to directory_path, or None when git cannot compare the checkout to
+        the commit, for instance because the commit is not in its history
+    """
+    commands = [
+        ["git", "diff", "--name-only", "-z", "--relative", "--no-renames", "--diff-filter=d", scan_from, "--"],
+        ["git", "ls-files", "--others", "-z"],
+    ]
+    changed_files: set[str] = set()
+    for command in commands:
+        result = subprocess.run(command, cwd=directory_path, capture_output=True, check=False)
+        if result.returncode != 0:
+            logger.warning(
+                f"Unable to list the files of {directory_path} changed since {scan_from}: "
+                f"{result.stderr.decode('utf-8', errors='replace').strip()}"
+            )
+            return None
+        changed_files.update(path for path in os.fsdecode(result.stdout).split("\0") if path)
+
+    # Like a scan of the whole directory, symbolic links and removed files are not scanned
+    return sorted(
+        path
+        for path in changed_files
+        if os.path.isfile(os.path.join(directory_path, path)) and not os.path.islink(os.path.join(directory_path, path))
+    )
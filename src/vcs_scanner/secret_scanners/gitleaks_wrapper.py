@@ -1,17 +1,70 @@
 # Standard Library
 import json
 import logging
+import os
+import signal
 import subprocess
+import threading
+import time
+from dataclasses import dataclass
 from datetime import UTC, datetime
 
+try:
+    import resource
+except ImportError:  # pragma: no cover - resource limits are only available on POSIX systems
+    resource = None
+
 # Third Party
 from vcs_scanner.api.schema.finding import FindingBase
 
 # First Party
 from vcs_scanner.constants import LEAKS_FOUND_EXIT_CODE, NO_LEAKS_FOUND_EXIT_CODE
+from vcs_scanner.helpers.tracing import get_current_span, traced
 
 logger: logging.Logger = logging.getLogger(__name__)
 
+# Interval at which a running gitleaks process is checked for timeout and cancellation
+CANCELLATION_POLL_SECONDS = 1.0
+# Seconds between the soft (SIGXCPU) and the hard (SIGKILL) cpu time limit
+CPU_LIMIT_GRACE_SECONDS = 5
+# Share of the memory limit given to the Go runtime as soft limit, so it collects garbage before hitting the hard limit
+GO_MEMORY_LIMIT_RATIO = 0.9
+
+VERBOSE_FINDING_FIELDS = {
+    "Finding",
+    "Secret",
+    "RuleID",
+    "Entropy",
+    "Tags",
+    "File",
+    "Line",
+    "Link",
+    "Commit",
+    "Author",
+    "Email",
+    "Date",
+    "Fingerprint",
+}
+
+
+@dataclass
+class GitLeaksLimits:
+    """
+    Limits applied to a gitleaks process, None disables the limit.
+
+    The memory limit caps the address space of the process, Linux does not enforce a limit on the resident set size.
+    """
+
+    timeout_seconds: float | None = None
+    max_memory_bytes: int | None = None
+    max_cpu_seconds: int | None = None
+
+    def is_bounded(self) -> bool:
+        return any(limit is not None for limit in (self.timeout_seconds, self.max_memory_bytes, self.max_cpu_seconds))
+
+    def has_resource_limits(self) -> bool:
+        return bool(self.max_memory_bytes or self.max_cpu_seconds)
+
 
 class GitLeaksWrapper:
     SCAN_TMP_DIRECTORY: str = "."
@@ -24,6 +77,10 @@ class GitLeaksWrapper:
         scan_from: str = None,
         gitleaks_path: str = "gitleaks",
         git_scan: bool = True,
+        staged: bool = False,
+        commits: list[str] | None = None,
+        limits: GitLeaksLimits | None = None,
+        cancel_event: threading.Event | None = None,
     ):
         self.rules_filepath = rules_filepath
         self.report_filepath = report_filepath
@@ -31,12 +88,18 @@ class GitLeaksWrapper:
         self.scan_from = scan_from
         self.gitleaks_path = gitleaks_path
         self.git_scan = git_scan
+        self.staged = staged
+        self.commits = commits
+        self.limits: GitLeaksLimits = limits or GitLeaksLimits()
+        self.cancel_event: threading.Event | None = cancel_event
+        self.exit_code: int | None = None
+        self.truncated: bool = False
 
     def _build_gitleaks_command(self):
-        # Base scan command
+        # Base scan command, staged changes are only reachable through the protect command
         command = [
             f"{self.gitleaks_path}",
-            "detect",
+            "protect" if self.staged else "detect",
             f"--source={self.repository_path}",
             f"--config={self.rules_filepath}",
             f"--report-path={self.report_filepath}",
@@ -46,33 +109,76 @@ class GitLeaksWrapper:
         if not self.git_scan:
             command.append("--no-git")
 
+        # Findings are printed as they are found, so they can be recovered when the scan is stopped early
+        if self.limits.is_bounded():
+            command.extend(["--verbose", "--no-color"])
+
+        # Staged scan command: only the diff of the index is scanned, the history is left untouched
+        if self.staged:
+            command.append("--staged")
+            return command
+
+        # Scan of an explicit set of commits, without walking their ancestors
+        if self.commits:
+            command.append(f"--log-opts=--no-walk {' '.join(self.commits)}")
+            return command
+
         # Incremental scan command
         if self.scan_from:
             command.append(f"--log-opts={self.scan_from}..")
         return command
 
+    def succeeded(self) -> bool:
+        """
+        Whether the last scan ran to completion, regardless of leaks being found.
+        """
+        return self.exit_code in (NO_LEAKS_FOUND_EXIT_CODE, LEAKS_FOUND_EXIT_CODE)
+
+    @traced("gitleaks.start_scan")
     def start_scan(self) -> list[FindingBase]:
         """
         :return: Output.
             If Successful, a list of FindingCreate objects is returned.
-            Otherwise, a None object is returned
+            If the scan was stopped by a limit or cancelled, the findings reported so far are returned
+            and the scan is marked as truncated.
+            Otherwise, an empty list is returned
         """
         try:
-            result = subprocess.run(
+            process = subprocess.Popen(
                 self._build_gitleaks_command(),
-                check=False,
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=self._build_environment(),
             )
+            self._apply_resource_limits(process)
+            stdout, stderr, stop_reason = self._wait_for_process(process)
 
-            exitcode = result.returncode
-            if exitcode == NO_LEAKS_FOUND_EXIT_CODE:
+            exitcode = process.returncode
+            self.exit_code = exitcode
+            current_span = get_current_span()
+            if current_span is not None:
+                current_span.set_attribute("exit_code", exitcode)
+                current_span.set_attribute("stop_reason", stop_reason)
+            if stop_reason is None and exitcode == NO_LEAKS_FOUND_EXIT_CODE:
                 return []
-            if exitcode == LEAKS_FOUND_EXIT_CODE:
+            if stop_reason is None and exitcode == LEAKS_FOUND_EXIT_CODE:
                 return self._parse_output(self.report_filepath)
 
-            error_output = result.stderr.decode("utf-8")
-            logger.error(f"GitLeaks exited with an unexpected code: {exitcode}. Output: {error_output}")
-            return []
+            error_output = stderr.decode("utf-8", errors="replace")
+            if stop_reason is None:
+                stop_reason = self._get_resource_limit_stop_reason(exitcode, error_output)
+            if stop_reason is None:
+                logger.error(f"GitLeaks exited with an unexpected code: {exitcode}. Output: {error_output}")
+                return []
+
+            # Stopped by the timeout, a resource limit or a cancellation
+            self.truncated = True
+            findings = self._parse_verbose_output(stdout.decode("utf-8", errors="replace"))
+            logger.error(
+                f"GitLeaks scan of {self.repository_path} was truncated ({stop_reason or f'exit code {exitcode}'}), "
+                f"{len(findings)} findings were reported before it stopped. Output: {error_output[-2000:]}"
+            )
+            return findings
 
         except subprocess.CalledProcessError as called_process_error:
             logger.error(
@@ -83,6 +189,133 @@ class GitLeaksWrapper:
             logger.error(f"Unable to locate a file: {error}")
             return []
 
+    def _wait_for_process(self, process: subprocess.Popen) -> tuple[bytes, bytes, str | None]:
+        """
+            Wait for the gitleaks process to exit, killing it on timeout or cancellation
+        :param process:
+            The running gitleaks process
+        :return: tuple.
+            stdout, stderr and the reason the process was stopped, None if it exited on its own
+        """
+        deadline = time.monotonic() + self.limits.timeout_seconds if self.limits.timeout_seconds else None
+        try:
+            while True:
+                poll_timeout = (
+                    CANCELLATION_POLL_SECONDS if self.limits.is_bounded() or self.cancel_event is not None else None
+                )
+                if deadline is not None:
+                    poll_timeout = max(0.0, min(poll_timeout, deadline - time.monotonic()))
+                try:
+                    stdout, stderr = process.communicate(timeout=poll_timeout)
+                    return stdout, stderr, None
+                except subprocess.TimeoutExpired:
+                    stop_reason = None
+                    if self.cancel_event is not None and self.cancel_event.is_set():
+                        stop_reason = "cancelled"
+                    elif deadline is not None and time.monotonic() >= deadline:
+                        stop_reason = f"timeout of {self.limits.timeout_seconds} seconds"
+                    if stop_reason is not None:
+                        process.kill()
+                        stdout, stderr = process.communicate()
+                        return stdout, stderr, stop_reason
+        finally:
+            # Never leave gitleaks running behind, e.g. when the task itself is interrupted
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+    def _get_resource_limit_stop_reason(self, exit_code: int, error_output: str) -> str | None:
+        """
+            Tell whether gitleaks was stopped by one of its resource limits, rather than failing on its own
+        :param exit_code:
+            Exit code of the process, negative when it was killed by a signal
+        :param error_output:
+            The stderr of the process
+        :return: str or None.
+            The limit which stopped the process, None when it failed for another reason
+        """
+        # The soft cpu limit sends SIGXCPU, the hard limit SIGKILL
+        if self.limits.max_cpu_seconds and exit_code in (-signal.SIGXCPU, -signal.SIGKILL):
+            return f"cpu time limit of {self.limits.max_cpu_seconds} seconds"
+        # The Go runtime aborts when an allocation fails with ENOMEM
+        if self.limits.max_memory_bytes and (
+            exit_code == -signal.SIGKILL or "out of memory" in error_output or "cannot allocate memory" in error_output
+        ):
+            return f"memory limit of {self.limits.max_memory_bytes} bytes"
+        return None
+
+    def _build_environment(self) -> dict[str, str]:
+        environment = dict(os.environ)
+        if self.limits.max_memory_bytes:
+            environment["GOMEMLIMIT"] = str(int(self.limits.max_memory_bytes * GO_MEMORY_LIMIT_RATIO))
+        return environment
+
+    def _apply_resource_limits(self, process: subprocess.Popen) -> None:
+        """
+            Apply the resource limits to the started gitleaks process. They are set from the parent, as a preexec_fn
+            is not safe in the threaded worker, right after the start so gitleaks has hardly allocated any memory yet
+        :param process:
+            The started gitleaks process
+        """
+        if not self.limits.has_resource_limits():
+            return
+        if resource is None or not hasattr(resource, "prlimit"):
+            logger.warning("The memory and cpu limits of gitleaks are not supported on this platform")
+            return
+        try:
+            if self.limits.max_memory_bytes:
+                resource.prlimit(
+                    process.pid, resource.RLIMIT_AS, (self.limits.max_memory_bytes, self.limits.max_memory_bytes)
+                )
+            if self.limits.max_cpu_seconds:
+                resource.prlimit(
+                    process.pid,
+                    resource.RLIMIT_CPU,
+                    (self.limits.max_cpu_seconds, self.limits.max_cpu_seconds + CPU_LIMIT_GRACE_SECONDS),
+                )
+        except ProcessLookupError:
+            # gitleaks already exited
+            pass
+        except OSError as error:
+            logger.warning(f"Unable to apply the resource limits to gitleaks: {error}")
+
+    @classmethod
+    @traced("gitleaks.parse_verbose_output")
+    def _parse_verbose_output(cls, output: str) -> list[FindingBase]:
+        """
+        Parse the findings gitleaks printed in verbose mode, used when no report was written
+        :param output: the stdout of gitleaks
+        :return: list of Finding objects
+        """
+        findings = []
+        for block in output.split("\n\n"):
+            fields: dict[str, str] = {}
+            for line in block.splitlines():
+                key, separator, value = line.partition(":")
+                if separator and key in VERBOSE_FINDING_FIELDS:
+                    fields[key] = value.strip()
+            if "RuleID" not in fields or "File" not in fields:
+                continue
+            try:
+                line_number = int(fields.get("Line", "0"))
+            except ValueError:
+                line_number = 0
+            finding = FindingBase(
+                file_path=fields["File"],
+                line_number=line_number,
+                column_start=0,
+                column_end=0,
+                email=fields.get("Email", ""),
+                author=fields.get("Author", ""),
+                commit_id=fields.get("Commit", ""),
+                commit_message="",
+                commit_timestamp=cls._get_valid_timestamp(fields.get("Date", "")),
+                rule_name=fields["RuleID"],
+            )
+            finding.secret = fields.get("Secret")
+            findings.append(finding)
+        return findings
+
     @staticmethod
     def _calculate_permanent_leak_url(leak_url: str, repository: str, commit_id: str) -> str:
         """
@@ -122,6 +355,7 @@ class GitLeaksWrapper:
         return converted_timestamp
 
     @classmethod
+    @traced("gitleaks.parse_output")
     def _parse_output(cls, file_path: str) -> list[FindingBase]:
         """
         Parse the gitleaks findings from the temp file and return a list of Finding objects
@@ -146,6 +380,7 @@ class GitLeaksWrapper:
                 commit_timestamp=commit_timestamp,
                 rule_name=result["RuleID"],
             )
+            finding.secret = result.get("Secret")
             logger.debug(finding)
 
             findings.append(finding)
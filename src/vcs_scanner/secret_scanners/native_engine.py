@@ -0,0 +1,694 @@
+# Standard Library
+import logging
+import math
+import multiprocessing
+import os
+import re
+import subprocess
+import threading
+import time
+import tomllib
+from collections import Counter, deque
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+# First Party
+from vcs_scanner.api.schema.finding import FindingBase
+from vcs_scanner.constants import LEAKS_FOUND_EXIT_CODE, NO_LEAKS_FOUND_EXIT_CODE
+from vcs_scanner.helpers.file_staging import list_files
+from vcs_scanner.helpers.tracing import get_current_span, traced
+from vcs_scanner.secret_scanners.gitleaks_wrapper import GitLeaksLimits, GitLeaksWrapper
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+DEFAULT_ENGINE_PROCESSES = 1
+# Work handed to a pool process at once
+FILES_PER_TASK = 64
+FRAGMENT_CHARACTERS_PER_TASK = 1024 * 1024
+# Interval at which a running scan is checked for timeout and cancellation
+CANCELLATION_POLL_SECONDS = 1.0
+# Bytes inspected to tell binary files apart, the same heuristic as git
+BINARY_CHECK_BYTES = 8000
+GITLEAKS_ALLOW_SIGNATURE = "gitleaks:allow"
+
+# Separators of the commit header fields in the git log output
+COMMIT_START = "\x00"
+FIELD_SEPARATOR = "\x1f"
+COMMIT_HEADER_END = "\x1e"
+GIT_LOG_FORMAT = "--format=%x00%H%x1f%an%x1f%ae%x1f%aI%x1f%B%x1e"
+HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+
+# RE2 syntax used by gitleaks rules which the re module spells differently
+POSIX_CLASSES = {
+    "[:alnum:]": "a-zA-Z0-9",
+    "[:alpha:]": "a-zA-Z",
+    "[:digit:]": "0-9",
+    "[:lower:]": "a-z",
+    "[:upper:]": "A-Z",
+    "[:space:]": r"\s",
+    "[:xdigit:]": "0-9a-fA-F",
+    "[:word:]": r"\w",
+}
+
+
+def translate_go_regex(pattern: str) -> str:
+    """
+        Rewrite the RE2 constructs of a gitleaks regex which the re module does not understand
+    :param pattern:
+        The regex as written in the rule pack
+    :return: str.
+        The regex for the re module
+    """
+    pattern = pattern.replace(r"\z", r"\Z")
+    for posix_class, replacement in POSIX_CLASSES.items():
+        pattern = pattern.replace(posix_class, replacement)
+    return pattern
+
+
+def shannon_entropy(data: str) -> float:
+    if not data:
+        return 0.0
+    # Same as gitleaks: characters are counted, the length is in bytes
+    inverse_length = 1.0 / len(data.encode("utf-8"))
+    entropy = 0.0
+    for count in Counter(data).values():
+        frequency = count * inverse_length
+        entropy -= frequency * math.log2(frequency)
+    return entropy
+
+
+@dataclass
+class Fragment:
+    """
+    Content gitleaks applies the rules to at once: a file for directory scans, the added lines of a hunk for history
+    scans. Line numbers of findings are offset by start_line.
+    """
+
+    raw: str
+    file_path: str
+    start_line: int = 1
+    commit_id: str = ""
+    author: str = ""
+    email: str = ""
+    date: str = ""
+    message: str = ""
+
+
+@dataclass
+class CompiledAllowlist:
+    regexes: list[re.Pattern] = field(default_factory=list)
+    regex_target: str = "secret"
+    paths: list[re.Pattern] = field(default_factory=list)
+    stopwords: list[str] = field(default_factory=list)
+    commits: set[str] = field(default_factory=set)
+
+    @classmethod
+    def compile(cls, allowlist: dict | None) -> "CompiledAllowlist":
+        allowlist = allowlist or {}
+        return cls(
+            regexes=[re.compile(translate_go_regex(regex)) for regex in allowlist.get("regexes", [])],
+            regex_target=allowlist.get("regexTarget") or "secret",
+            paths=[re.compile(translate_go_regex(path)) for path in allowlist.get("paths", [])],
+            stopwords=[stopword.lower() for stopword in allowlist.get("stopwords", [])],
+            commits={commit.lower() for commit in allowlist.get("commits", [])},
+        )
+
+    def allows_commit(self, commit_id: str) -> bool:
+        return bool(commit_id) and commit_id.lower() in self.commits
+
+    def allows_path(self, file_path: str) -> bool:
+        return any(path.search(file_path) for path in self.paths)
+
+    def allows(self, secret: str, match: str, line: str) -> bool:
+        target = {"match": match, "line": line}.get(self.regex_target, secret)
+        if any(regex.search(target) for regex in self.regexes):
+            return True
+        lowered_secret = secret.lower()
+        return any(stopword in lowered_secret for stopword in self.stopwords)
+
+
+@dataclass
+class CompiledRule:
+    rule_id: str
+    regex: re.Pattern | None
+    path: re.Pattern | None = None
+    keywords: list[str] = field(default_factory=list)
+    entropy: float = 0.0
+    secret_group: int = 0
+    allowlist: CompiledAllowlist = field(default_factory=CompiledAllowlist)
+
+
+def _location(raw: str, newline_indices: list[int], start: int, end: int) -> tuple[int, int, int, int, int, int]:
+    """
+        Port of the location calculation of gitleaks, quirks included, so both engines report the same positions
+    :return: tuple.
+        Start line, end line, start column, end column, and the start and end index of the line of the match
+    """
+    # A fragment without newlines is treated as ending in one
+    newline_indices = newline_indices or [len(raw)]
+    start_line = end_line = start_column = end_column = line_start_index = 0
+    line_end_index = 0
+    previous_newline = 0
+    line_number = 0
+    line_set = False
+    for line_number, newline_index in enumerate(newline_indices):
+        if previous_newline <= start < newline_index:
+            line_set = True
+            start_line = end_line = line_number
+            start_column = start - previous_newline + 1
+            line_start_index = previous_newline
+            line_end_index = newline_index
+        if previous_newline < end <= newline_index:
+            end_line = line_number
+            end_column = end - previous_newline
+            line_end_index = newline_index
+        previous_newline = newline_index
+
+    if not line_set:
+        # The match is on the last line, which does not end in a newline
+        start_column = start - previous_newline + 1
+        end_column = end - previous_newline
+        start_line = end_line = line_number + 1
+        line_start_index = previous_newline
+        # Like gitleaks, the line runs up to and including the next newline
+        newline = raw.find("\n", end)
+        line_end_index = len(raw) if newline == -1 else newline + 1
+    return start_line, end_line, start_column, end_column, line_start_index, line_end_index
+
+
+class NativeRulePack:
+    """
+    The rules of a gitleaks rule file compiled for the re module, applied the way gitleaks detect applies them:
+    keyword pre-filter, path rules, secret groups, allowlists, stopwords and entropy thresholds.
+    """
+
+    def __init__(
+        self,
+        rules: list[CompiledRule],
+        allowlist: CompiledAllowlist,
+        unsupported_rules: list[str] | None = None,
+        rules_filepath: str = "",
+    ):
+        self.rules: list[CompiledRule] = rules
+        self.allowlist: CompiledAllowlist = allowlist
+        self.unsupported_rules: list[str] = unsupported_rules or []
+        self.rules_filepath: str = rules_filepath
+
+    @classmethod
+    def load(cls, rules_filepath: str) -> "NativeRulePack":
+        """
+            Compile the rules of a gitleaks rule file
+        :param rules_filepath:
+            Path of the gitleaks rule file
+        :return: NativeRulePack.
+            The compiled rules, rules whose regex the re module cannot compile are listed as unsupported
+        """
+        with open(rules_filepath, "rb") as rule_file:
+            config = tomllib.load(rule_file)
+
+        rules: list[CompiledRule] = []
+        unsupported_rules: list[str] = []
+        for rule in config.get("rules", []):
+            try:
+                rules.append(
+                    CompiledRule(
+                        rule_id=rule["id"],
+                        regex=re.compile(translate_go_regex(rule["regex"])) if rule.get("regex") else None,
+                        path=re.compile(translate_go_regex(rule["path"])) if rule.get("path") else None,
+                        keywords=[keyword.lower() for keyword in rule.get("keywords", [])],
+                        entropy=float(rule.get("entropy", 0.0)),
+                        secret_group=int(rule.get("secretGroup", 0)),
+                        allowlist=CompiledAllowlist.compile(rule.get("allowlist")),
+                    )
+                )
+            except re.error as error:
+                logger.warning(f"Rule {rule.get('id')} is not supported by the native engine: {error}")
+                unsupported_rules.append(rule.get("id", ""))
+        return cls(rules, CompiledAllowlist.compile(config.get("allowlist")), unsupported_rules, rules_filepath)
+
+    def detect(self, fragment: Fragment) -> list[dict]:
+        """
+            Apply the rules to a fragment
+        :param fragment:
+            The content to scan
+        :return: list[dict].
+            The findings, with the fields of a gitleaks report entry
+        """
+        if self.allowlist.allows_path(fragment.file_path) or self.allowlist.allows_commit(fragment.commit_id):
+            return []
+
+        lowered = fragment.raw.lower()
+        newline_indices = [match.start() for match in re.finditer("\n", fragment.raw)]
+        findings: list[dict] = []
+        for rule in self.rules:
+            if rule.keywords and not any(keyword in lowered for keyword in rule.keywords):
+                continue
+            findings.extend(self._detect_rule(fragment, rule, newline_indices))
+
+        for finding in findings:
+            finding["StartLine"] += fragment.start_line
+            finding["EndLine"] += fragment.start_line
+        return self._filter_generic(findings)
+
+    def _detect_rule(self, fragment: Fragment, rule: CompiledRule, newline_indices: list[int]) -> list[dict]:
+        if rule.allowlist.allows_commit(fragment.commit_id) or rule.allowlist.allows_path(fragment.file_path):
+            return []
+        if rule.path is not None:
+            if not rule.path.search(fragment.file_path):
+                return []
+            if rule.regex is None:
+                return [self._create_finding(fragment, rule, f"file detected: {fragment.file_path}", "", 0, 0, 0, 0)]
+        if rule.regex is None:
+            return []
+
+        findings = []
+        for match in rule.regex.finditer(fragment.raw):
+            matched = match.group(0).strip("\n")
+            start_line, end_line, start_column, end_column, line_start, line_end = _location(
+                fragment.raw, newline_indices, match.start(), match.end()
+            )
+            line_end = max(line_end, match.end())
+            line = fragment.raw[line_start:line_end]
+            if GITLEAKS_ALLOW_SIGNATURE in line:
+                continue
+
+            secret = matched
+            groups = rule.regex.search(matched)
+            group_values = groups.groups() if groups else ()
+            if rule.secret_group == 0:
+                if len(group_values) == 1:
+                    secret = group_values[0] or ""
+            else:
+                if len(group_values) < rule.secret_group:
+                    continue
+                secret = group_values[rule.secret_group - 1] or ""
+
+            if rule.allowlist.allows(secret, matched, line) or self.allowlist.allows(secret, matched, line):
+                continue
+
+            entropy = shannon_entropy(secret)
+            if rule.entropy:
+                if entropy <= rule.entropy:
+                    continue
+                # Like gitleaks, generic rules need a digit in the secret
+                if rule.rule_id.startswith("generic") and not any(character.isdigit() for character in secret):
+                    continue
+
+            finding = self._create_finding(
+                fragment, rule, matched, secret, start_line, end_line, start_column, end_column
+            )
+            finding["Entropy"] = entropy
+            findings.append(finding)
+        return findings
+
+    @staticmethod
+    def _create_finding(
+        fragment: Fragment,
+        rule: CompiledRule,
+        matched: str,
+        secret: str,
+        start_line: int,
+        end_line: int,
+        start_column: int,
+        end_column: int,
+    ) -> dict:
+        return {
+            "RuleID": rule.rule_id,
+            "File": fragment.file_path,
+            "StartLine": start_line,
+            "EndLine": end_line,
+            "StartColumn": start_column,
+            "EndColumn": end_column,
+            "Match": matched,
+            "Secret": secret,
+            "Entropy": 0.0,
+            "Commit": fragment.commit_id,
+            "Author": fragment.author,
+            "Email": fragment.email,
+            "Date": fragment.date,
+            "Message": fragment.message,
+        }
+
+    @staticmethod
+    def _filter_generic(findings: list[dict]) -> list[dict]:
+        # Generic findings are dropped when a specific rule reported the same secret on the same line
+        return [
+            finding
+            for finding in findings
+            if "generic" not in finding["RuleID"].lower()
+            or not any(
+                other["StartLine"] == finding["StartLine"]
+                and other["Commit"] == finding["Commit"]
+                and other["RuleID"] != finding["RuleID"]
+                and finding["Secret"] in other["Secret"]
+                and "generic" not in other["RuleID"].lower()
+                for other in findings
+            )
+        ]
+
+
+# Rule packs compiled by this process, keyed by path and modification, shared by every scan run in it
+_rule_packs: dict[tuple[str, int, int], NativeRulePack] = {}
+_rule_packs_lock = threading.Lock()
+
+
+def get_rule_pack(rules_filepath: str) -> NativeRulePack:
+    stat = os.stat(rules_filepath)
+    key = (os.path.abspath(rules_filepath), stat.st_mtime_ns, stat.st_size)
+    with _rule_packs_lock:
+        if key not in _rule_packs:
+            _rule_packs[key] = NativeRulePack.load(rules_filepath)
+        return _rule_packs[key]
+
+
+def scan_fragments(rules_filepath: str, fragments: list[Fragment]) -> list[dict]:
+    rule_pack = get_rule_pack(rules_filepath)
+    return [finding for fragment in fragments for finding in rule_pack.detect(fragment)]
+
+
+def scan_files(rules_filepath: str, directory_path: str, relative_paths: list[str]) -> list[dict]:
+    """
+        Read and scan files of a directory, runs in the pool processes so the content is not sent to them
+    :param rules_filepath:
+        Path of the gitleaks rule file
+    :param directory_path:
+        The scanned directory, findings are reported with paths joined to it
+    :param relative_paths:
+        Paths of the files, relative to directory_path
+    :return: list[dict].
+        The findings
+    """
+    rule_pack = get_rule_pack(rules_filepath)
+    findings: list[dict] = []
+    for relative_path in relative_paths:
+        file_path = os.path.join(directory_path, relative_path)
+        if os.path.abspath(file_path) == os.path.abspath(rules_filepath):
+            continue
+        try:
+            with open(file_path, "rb") as scanned_file:
+                content = scanned_file.read()
+        except OSError as error:
+            logger.warning(f"Unable to read {file_path}: {error}")
+            continue
+        if not content or b"\x00" in content[:BINARY_CHECK_BYTES]:
+            continue
+        # Directory findings have no commit, the line numbers are offset by one as gitleaks does
+        findings.extend(rule_pack.detect(Fragment(raw=content.decode("utf-8", errors="replace"), file_path=file_path)))
+    return findings
+
+
+def iter_patch_fragments(lines: Iterable[str]) -> Iterator[Fragment]:
+    """
+        Turn the output of git log -p -U0, or git diff -U0, into fragments of the added lines of every hunk
+    :param lines:
+        The output lines, git log output uses GIT_LOG_FORMAT for the commit headers
+    :return: Iterator[Fragment].
+        A fragment per hunk with added lines
+    """
+    commit: dict[str, str] = {}
+    header: list[str] = []
+    in_header = False
+    file_path = ""
+    in_hunk = False
+    start_line = 0
+    added: list[str] = []
+
+    def flush() -> Iterator[Fragment]:
+        if added and file_path:
+            yield Fragment(raw="".join(added), file_path=file_path, start_line=start_line, **commit)
+        added.clear()
+
+    for line in lines:
+        if line.startswith(COMMIT_START) and not in_header:
+            yield from flush()
+            in_header, header, file_path, in_hunk = True, [], "", False
+            line = line[len(COMMIT_START) :]
+        if in_header:
+            # The commit message spans lines, the header ends at its separator
+            header.append(line)
+            if COMMIT_HEADER_END in line:
+                in_header = False
+                commit = _parse_commit_header("".join(header).split(COMMIT_HEADER_END)[0])
+            continue
+        if line.startswith("diff --git "):
+            yield from flush()
+            file_path, in_hunk = "", False
+        elif not in_hunk and line.startswith("+++ "):
+            new_path = line[4:].rstrip("\n").strip('"')
+            file_path = "" if new_path == "/dev/null" else new_path.removeprefix("b/")
+        elif line.startswith("@@"):
+            yield from flush()
+            hunk = HUNK_HEADER.match(line)
+            in_hunk = hunk is not None
+            start_line = int(hunk.group(1)) if hunk else 0
+        elif in_hunk and line.startswith("+"):
+            added.append(line[1:])
+    yield from flush()
+
+
+def _parse_commit_header(header: str) -> dict[str, str]:
+    commit_id, author, email, date, message = header.split(FIELD_SEPARATOR, 4)
+    return {"commit_id": commit_id, "author": author, "email": email, "date": _to_utc(date), "message": message.strip()}
+
+
+def _to_utc(date: str) -> str:
+    # gitleaks reports the author date in UTC
+    try:
+        return datetime.fromisoformat(date).astimezone(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+    except ValueError:
+        return date
+
+
+def _batch_fragments(fragments: Iterable[Fragment]) -> Iterator[list[Fragment]]:
+    batch: list[Fragment] = []
+    characters = 0
+    for fragment in fragments:
+        batch.append(fragment)
+        characters += len(fragment.raw)
+        if characters >= FRAGMENT_CHARACTERS_PER_TASK:
+            yield batch
+            batch, characters = [], 0
+    if batch:
+        yield batch
+
+
+# Idle pools of worker processes by size, kept for the lifetime of this process so every pool process compiles a
+# rule pack once. A scan checks a pool out for itself, so stopping a scan terminates the tasks of that scan only.
+_idle_pools: dict[int, list] = {}
+_pools_lock = threading.Lock()
+
+
+def acquire_pool(processes: int):
+    with _pools_lock:
+        idle_pools = _idle_pools.get(processes)
+        if idle_pools:
+            return idle_pools.pop()
+    # Spawned processes do not inherit the threads of a Celery worker or the state of its locks
+    return multiprocessing.get_context("spawn").Pool(processes)
+
+
+def release_pool(pool, processes: int) -> None:
+    with _pools_lock:
+        _idle_pools.setdefault(processes, []).append(pool)
+
+
+def shutdown_pools() -> None:
+    with _pools_lock:
+        pools = [pool for idle_pools in _idle_pools.values() for pool in idle_pools]
+        _idle_pools.clear()
+    for pool in pools:
+        pool.terminate()
+        pool.join()
+
+
+class ScanStoppedError(Exception):
+    pass
+
+
+class NativeScanEngine:
+    """
+    In-process alternative to the gitleaks executable, behind the interface of the GitLeaksWrapper.
+
+    The rules are compiled once per process and reused by every scan, directory content and the patches
+    of the history are scanned in a pool of processes reused by the scans of this process. The rules always run
+    in the pool, even with a single process, so a regex which backtracks catastrophically can be stopped.
+    The memory and cpu limits only apply to gitleaks processes, the timeout applies to both engines.
+    """
+
+    def __init__(
+        self,
+        rules_filepath: str,
+        report_filepath: str,
+        repository_path: str,
+        scan_from: str = None,
+        gitleaks_path: str = "gitleaks",
+        git_scan: bool = True,
+        staged: bool = False,
+        commits: list[str] | None = None,
+        limits: GitLeaksLimits | None = None,
+        cancel_event: threading.Event | None = None,
+        processes: int = DEFAULT_ENGINE_PROCESSES,
+    ):
+        self.rules_filepath = rules_filepath
+        # Kept for the interface of the GitLeaksWrapper, no report file is written
+        self.report_filepath = report_filepath
+        self.repository_path = repository_path
+        self.scan_from = scan_from
+        self.gitleaks_path = gitleaks_path
+        self.git_scan = git_scan
+        self.staged = staged
+        self.commits = commits
+        self.limits: GitLeaksLimits = limits or GitLeaksLimits()
+        self.cancel_event: threading.Event | None = cancel_event
+        self.processes: int = processes
+        self.exit_code: int | None = None
+        self.truncated: bool = False
+        self._deadline: float | None = None
+
+    def succeeded(self) -> bool:
+        """
+        Whether the last scan ran to completion, regardless of leaks being found.
+        """
+        return self.exit_code in (NO_LEAKS_FOUND_EXIT_CODE, LEAKS_FOUND_EXIT_CODE)
+
+    def _build_git_command(self) -> list[str]:
+        # Same revisions as the gitleaks command of the GitLeaksWrapper
+        command = ["git", "-c", "core.quotePath=false"]
+        if self.staged:
+            return command + ["diff", "-U0", "--no-color", "--no-ext-diff", "--staged", "."]
+        command += ["log", "-p", "-U0", "--no-color", "--no-ext-diff", GIT_LOG_FORMAT]
+        if self.commits:
+            return command + ["--no-walk", "--stdin"]
+        if self.scan_from:
+            return command + [f"{self.scan_from}.."]
+        return command + ["--full-history", "--all"]
+
+    @traced("native.start_scan")
+    def start_scan(self) -> list[FindingBase]:
+        """
+        :return: Output.
+            The findings, with the same content as the findings of the GitLeaksWrapper.
+            If the scan was stopped by the timeout or cancelled, the findings reported so far are returned
+            and the scan is marked as truncated.
+            Otherwise, on an error an empty list is returned
+        """
+        self._deadline = time.monotonic() + self.limits.timeout_seconds if self.limits.timeout_seconds else None
+        results: list[dict] = []
+        stop_reason = None
+        try:
+            rule_pack = get_rule_pack(self.rules_filepath)
+            if rule_pack.unsupported_rules:
+                logger.warning(
+                    f"{len(rule_pack.unsupported_rules)} rules are skipped by the native engine: "
+                    f"{', '.join(rule_pack.unsupported_rules)}"
+                )
+            if self.git_scan:
+                self._scan_history(results)
+            else:
+                files = list_files(self.repository_path)
+                batches = (files[start : start + FILES_PER_TASK] for start in range(0, len(files), FILES_PER_TASK))
+                self._run_tasks(
+                    scan_files, ((self.rules_filepath, self.repository_path, batch) for batch in batches), results
+                )
+            self.exit_code = LEAKS_FOUND_EXIT_CODE if results else NO_LEAKS_FOUND_EXIT_CODE
+        except ScanStoppedError as stopped:
+            stop_reason = str(stopped)
+            self.truncated = True
+            logger.error(
+                f"Native scan of {self.repository_path} was truncated ({stop_reason}), "
+                f"{len(results)} findings were reported before it stopped"
+            )
+        except (OSError, ValueError, subprocess.CalledProcessError) as error:
+            logger.error(f"Native scan of {self.repository_path} failed: {error}")
+            self.exit_code = 1
+            return []
+
+        current_span = get_current_span()
+        if current_span is not None:
+            current_span.set_attribute("exit_code", self.exit_code)
+            current_span.set_attribute("stop_reason", stop_reason)
+        return [self._to_finding(result) for result in results]
+
+    def _scan_history(self, results: list[dict]) -> None:
+        with subprocess.Popen(
+            self._build_git_command(),
+            cwd=self.repository_path,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            encoding="utf-8",
+            errors="replace",
+        ) as process:
+            try:
+                # git reads all revisions from stdin before it writes any output
+                if self.commits:
+                    process.stdin.write("".join(f"{commit}\n" for commit in self.commits))
+                process.stdin.close()
+                batches = _batch_fragments(iter_patch_fragments(process.stdout))
+                self._run_tasks(scan_fragments, ((self.rules_filepath, batch) for batch in batches), results)
+            finally:
+                if process.poll() is None:
+                    process.kill()
+                stderr = process.stderr.read()
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, "git", stderr=stderr)
+
+    def _check_stop(self) -> None:
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ScanStoppedError("cancelled")
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            raise ScanStoppedError(f"timeout of {self.limits.timeout_seconds} seconds")
+
+    def _run_tasks(self, function: Callable[..., list[dict]], tasks: Iterable[tuple], results: list[dict]) -> None:
+        """
+            Run the scan tasks in a pool of processes and collect their findings
+        :param function:
+            The module level function scanning one task
+        :param tasks:
+            The arguments of every task
+        :param results:
+            The list the findings are appended to, it holds the findings so far when the scan is stopped
+        """
+        pool = acquire_pool(self.processes)
+        # A bounded number of tasks is in flight, so the history is not read into memory ahead of the pool
+        pending: deque = deque()
+        try:
+            for task in tasks:
+                self._check_stop()
+                pending.append(pool.apply_async(function, task))
+                while len(pending) >= 2 * self.processes:
+                    results.extend(self._wait(pending.popleft()))
+            while pending:
+                results.extend(self._wait(pending.popleft()))
+        except BaseException:
+            # The tasks handed to the pool cannot be withdrawn and may be stuck in a regex, the pool is terminated
+            pool.terminate()
+            pool.join()
+            raise
+        release_pool(pool, self.processes)
+
+    def _wait(self, async_result) -> list[dict]:
+        while True:
+            self._check_stop()
+            try:
+                return async_result.get(timeout=CANCELLATION_POLL_SECONDS)
+            except multiprocessing.TimeoutError:
+                continue
+
+    @staticmethod
+    def _to_finding(result: dict) -> FindingBase:
+        finding = FindingBase(
+            file_path=result["File"],
+            line_number=result["StartLine"],
+            column_start=result["StartColumn"],
+            column_end=result["EndColumn"],
+            email=result["Email"],
+            author=result["Author"],
+            commit_id=result["Commit"],
+            commit_message=result["Message"],
+            commit_timestamp=GitLeaksWrapper._get_valid_timestamp(result["Date"]),  # pylint: disable=W0212
+            rule_name=result["RuleID"],
+        )
+        finding.secret = result["Secret"]
+        return finding
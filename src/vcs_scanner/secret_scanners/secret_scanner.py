@@ -1,15 +1,17 @@
 # pylint: disable=E1101
 # Standard Library
+import errno
+import hashlib
 import logging
 import os
 import shutil
+import sqlite3
+import threading
 import time
 import uuid
 from collections.abc import Callable
 from datetime import UTC, datetime
-
-# Third Party
-from git import Commit
+from typing import TYPE_CHECKING
 
 from vcs_scanner.api.schema.finding import FindingBase
 from vcs_scanner.api.schema.repository import Repository, RepositoryBase
@@ -17,21 +19,85 @@ from vcs_scanner.api.schema.scan import Scan, ScanRead
 from vcs_scanner.api.schema.scan_type import ScanType
 
 # First Party
+from vcs_scanner.cache.branch_tips import BranchTipStore
+from vcs_scanner.cache.commit_cache import CommitScanCache
+from vcs_scanner.cache.directory_cache import DirectoryScanCache
+from vcs_scanner.cache.hashing import hash_file
+from vcs_scanner.cache.shared_history import DEFAULT_SHARED_HISTORY_WAIT_SECONDS, SharedHistoryIndex
+from vcs_scanner.constants import SCAN_ENGINE_GITLEAKS, SCAN_ENGINE_NATIVE
+from vcs_scanner.helpers.directory_reaper import DirectoryReaper
+from vcs_scanner.helpers.file_staging import GITLEAKS_ROOT_FILES, list_files, restore_staged_path, stage_files
+from vcs_scanner.helpers.keyword_filter import KeywordFilter
+from vcs_scanner.helpers.metrics import (
+    SCAN_BYTES_CLONED,
+    SCAN_FINDINGS,
+    SCAN_KEYWORD_FILTERED,
+    SCAN_STAGE_DURATION,
+    SCANS,
+    SCRATCH_ALLOCATIONS,
+)
 from vcs_scanner.helpers.providers.rule_file import RuleFileProvider
+from vcs_scanner.helpers.scratch_allocator import ScratchAllocator
+from vcs_scanner.helpers.tracing import span
 from vcs_scanner.output_modules.output_module import OutputModule
 from vcs_scanner.post_processing.post_processor import PostProcessor
 from vcs_scanner.resc_worker import RESCWorker
-from vcs_scanner.secret_scanners.git_operation import clone_repository
-from vcs_scanner.secret_scanners.gitleaks_wrapper import GitLeaksWrapper
+from vcs_scanner.secret_scanners.gitleaks_wrapper import GitLeaksLimits, GitLeaksWrapper
+
+if TYPE_CHECKING:
+    # Third Party
+    from git import Commit
+
+    # First Party
+    from vcs_scanner.secret_scanners.native_engine import NativeScanEngine
 
 # This is an arbitrary number to distinguish between no issues, an error and
 # the situation in which leaks are found. Note that this number cannot be bigger than 255 (OS limitation)
 LEAKS_FOUND_EXIT_CODE = 42
 NO_LEAKS_FOUND_EXIT_CODE = 0
 
+# Commits handed to a single gitleaks run when scanning explicit commits, keeps the --log-opts argument small
+COMMITS_PER_SCAN = 1000
+# Interval at which the commit scan cache is polled for commits claimed by a scan of a fork
+SHARED_HISTORY_POLL_SECONDS = 10
+# Minimum interval between two maintenances of the object store of a project
+OBJECT_STORE_MAINTENANCE_SECONDS = 7 * 24 * 60 * 60
+
 logger = logging.getLogger(__name__)
 
 
+def determine_scan_type(
+    last_scan_for_repository: Scan | None,
+    rule_pack_version: str,
+    latest_commit: str | None,
+    force_base_scan: bool = False,
+) -> ScanType | None:
+    """
+        Determine which scan a repository needs
+    :param last_scan_for_repository:
+        The last scan of the repository, None when it was never scanned
+    :param rule_pack_version:
+        Version of the rule pack the scan would run with
+    :param latest_commit:
+        The latest commit of the repository
+    :param force_base_scan:
+        Always run a base scan
+    :return: ScanType or None.
+        The scan type to run, None when no scan is needed
+    """
+    # Force base scan, or has no previous scan
+    if force_base_scan or last_scan_for_repository is None:
+        return ScanType.BASE
+    # Rule-pack is different from previous scan
+    if last_scan_for_repository.rule_pack != rule_pack_version:
+        return ScanType.BASE
+    # Last commit is different from previous scan
+    if latest_commit and latest_commit != last_scan_for_repository.last_scanned_commit:
+        return ScanType.INCREMENTAL
+    # Skip scanning, no conditions match
+    return None
+
+
 class SecretScanner(RESCWorker):  # pylint: disable=R0902
     def __init__(
         self,
@@ -47,6 +113,21 @@ class SecretScanner(RESCWorker):  # pylint: disable=R0902
         local_path: str | None = None,
         force_base_scan: bool = False,
         latest_commit: str | None = None,
+        staged: bool = False,
+        scan_cache_directory: str | None = None,
+        shared_history_wait_seconds: int = DEFAULT_SHARED_HISTORY_WAIT_SECONDS,
+        gitleaks_limits: GitLeaksLimits | None = None,
+        keyword_filter: bool = False,
+        scan_engine: str = SCAN_ENGINE_GITLEAKS,
+        engine_processes: int = 1,
+        directory_reaper: DirectoryReaper | None = None,
+        scratch_allocator: ScratchAllocator | None = None,
+        estimated_size_kb: int | None = None,
+        object_store_directory: str | None = None,
+        object_store_maintenance_seconds: int = OBJECT_STORE_MAINTENANCE_SECONDS,
+        all_branches: bool = False,
+        cancel_event: threading.Event | None = None,
+        created_repository: RepositoryBase | None = None,
     ):
         self.rule_provider: RuleFileProvider | None = None
         self.gitleaks_rules_provider: RuleFileProvider = gitleaks_rules_provider
@@ -61,19 +142,45 @@ class SecretScanner(RESCWorker):  # pylint: disable=R0902
         self.local_path = local_path
         self.force_base_scan = force_base_scan
         self.latest_commit = latest_commit
+        self.staged = staged
+        self.scan_cache_directory = scan_cache_directory
+        self.shared_history_wait_seconds = shared_history_wait_seconds
+        self.gitleaks_limits = gitleaks_limits
+        self.keyword_filter = keyword_filter
+        self.scan_engine = scan_engine
+        self.engine_processes = engine_processes
+        self.directory_reaper = directory_reaper
+        self.scratch_allocator = scratch_allocator
+        self.estimated_size_kb = estimated_size_kb
+        self.object_store_directory = object_store_directory
+        self.object_store_maintenance_seconds = object_store_maintenance_seconds
+        self.all_branches = all_branches
+        self.truncated: bool = False
+        # Whether the findings of the scan were handed to the output module, or the scan found none
+        self.scan_completed: bool = False
+        # The scans of a task share the event of the task, which cancels them all at once
+        self._cancel_event: threading.Event = cancel_event or threading.Event()
         self.head_commit: None | Commit = None
 
         self._as_dir: bool = False
         self._as_repo: bool = False
-        self._created_repository: None | RepositoryBase = None
+        # A repository created in the web service before the scan is not written again
+        self._created_repository: None | RepositoryBase = created_repository
         self._last_scanned_commit: None | str = None
+        self._last_scan_for_repository: None | ScanRead = None
+        self._scanned_tips: None | dict[str, str] = None
+        self._history_scanned: bool = False
+        self._scan_failed: bool = False
         self._scan_type_to_run: None | ScanType = None
         self._scan_timestamp_start: None | datetime = None
         self._created_scan: None | ScanRead = None
         self._repo_clone_path: None | str = None
+        self._object_store_path: None | str = None
+        self._memory_scratch_directory: None | str = None
         self._findings_from_repo: list[FindingBase] = []
         self._findings_from_dir: list[FindingBase] = []
         self._findings: list[FindingBase] = []
+        self._keyword_filters: dict[str, KeywordFilter | None] = {}
 
         if self.local_path:
             self.repo_display_name = self.local_path.replace(".", "_").replace("/", "_")
@@ -98,26 +205,142 @@ class SecretScanner(RESCWorker):  # pylint: disable=R0902
             self._fetch_last_scanned_commit,
             self._is_scan_needed,
             self._start_timer,
-            self._create_scan,
             self._clone_repo,
             self._run_repo_scan,
             self._run_dir_scan,
+            # The scan is recorded once it ran, so a truncated scan does not advance the last scanned commit
+            self._create_scan,
             self._merge_findings,
             self._post_processing,
             self._write_findings,
         ]
 
-        try:
-            for pipe in pipes:
-                # If the pipe does not succeed we exit immediately.
-                if not pipe():
-                    return
-        except SystemExit:
-            raise
-        except BaseException:
-            logger.error(f"An error occurred while scanning {self.repository.repository_name}")
-        finally:
-            self._cleaning_up()
+        stage, outcome = "", "error"
+        with span(
+            "scan",
+            repository=f"{self.repository.project_key}/{self.repository.repository_name}",
+            as_dir=as_dir,
+            as_repo=as_repo,
+        ) as scan_span:
+            try:
+                for pipe in pipes:
+                    stage = self._get_stage_name(pipe)
+                    if self._cancel_event.is_set():
+                        outcome = "cancelled"
+                        logger.warning(f"Scan of {self.repository.repository_name} was cancelled")
+                        return
+                    # If the pipe does not succeed we exit immediately.
+                    outcome = self._run_pipe(stage, pipe)
+                    if outcome != "success":
+                        return
+            except SystemExit:
+                raise
+            except BaseException:
+                outcome = "error"
+                logger.error(f"An error occurred while scanning {self.repository.repository_name}")
+            finally:
+                SCANS.inc(stage=stage, outcome=outcome)
+                scan_span.set_attribute("stage", stage)
+                scan_span.set_attribute("outcome", outcome)
+                scan_span.set_attribute("truncated", self.truncated)
+                if self.truncated:
+                    logger.error(
+                        f"Scan of {self.repository.project_key}/{self.repository.repository_name} was truncated, "
+                        f"the reported findings are incomplete"
+                    )
+                self._record_branch_tips()
+                self._cleaning_up()
+                self._maintain_object_store()
+
+    @staticmethod
+    def _get_stage_name(pipe: Callable[[], bool]) -> str:
+        return pipe.__name__.lstrip("_")
+
+    @staticmethod
+    def _run_pipe(stage: str, pipe: Callable[[], bool]) -> str:
+        """
+            Run a step of the scan and record its duration
+        :param stage:
+            Name of the step, used as metric label
+        :param pipe:
+            The step to run
+        :return: str.
+            The outcome of the step: success, stopped when the scan does not need to go on, or error
+        """
+        outcome = "error"
+        start = time.perf_counter()
+        with span(stage) as stage_span:
+            try:
+                outcome = "success" if pipe() else "stopped"
+            finally:
+                SCAN_STAGE_DURATION.observe(time.perf_counter() - start, stage=stage, outcome=outcome)
+                stage_span.set_attribute("outcome", outcome)
+        return outcome
+
+    @property
+    def scan_type(self) -> ScanType | None:
+        """
+        The type of the scan which runs, None until it is determined or when no scan is needed
+        """
+        return self._scan_type_to_run
+
+    def cancel(self) -> None:
+        """
+        Cooperatively cancel the scan: running gitleaks processes are stopped and no further step is started.
+        """
+        self._cancel_event.set()
+
+    def _create_scan_command(self, **arguments) -> "GitLeaksWrapper | NativeScanEngine":
+        """
+            Create a scan with the selected engine, both engines take the arguments of the GitLeaksWrapper
+        :return: GitLeaksWrapper or NativeScanEngine.
+            The scan, ready to be started
+        """
+        if self.scan_engine == SCAN_ENGINE_NATIVE:
+            from vcs_scanner.secret_scanners.native_engine import NativeScanEngine  # pylint: disable=C0415
+
+            return NativeScanEngine(processes=self.engine_processes, **arguments)
+        return GitLeaksWrapper(**arguments)
+
+    def _start_gitleaks(self, gitleaks_command: "GitLeaksWrapper | NativeScanEngine") -> list[FindingBase]:
+        findings = gitleaks_command.start_scan()
+        if gitleaks_command.truncated:
+            self.truncated = True
+        if not gitleaks_command.succeeded():
+            self._scan_failed = True
+        return findings
+
+    def _get_keyword_filter(self, rule_file_path: str) -> KeywordFilter | None:
+        """
+            Keyword filter of a rule file, when keyword filtering is enabled
+        :param rule_file_path:
+            Path of the gitleaks rule file
+        :return: KeywordFilter or None.
+            None when keyword filtering is disabled or not possible for this rule file
+        """
+        if not self.keyword_filter:
+            return None
+        if rule_file_path not in self._keyword_filters:
+            try:
+                self._keyword_filters[rule_file_path] = KeywordFilter.from_rule_file(rule_file_path)
+            except (OSError, ValueError) as error:
+                logger.warning(f"Unable to read the keywords of {rule_file_path}, scanning without filter: {error}")
+                self._keyword_filters[rule_file_path] = None
+        return self._keyword_filters[rule_file_path]
+
+    def _filter_commits(self, commits: list[str], keyword_filter: KeywordFilter) -> list[str]:
+        from vcs_scanner.secret_scanners.git_operation import filter_commits_by_keywords  # pylint: disable=C0415
+
+        candidates = filter_commits_by_keywords(self._repo_clone_path, commits, keyword_filter)
+        SCAN_KEYWORD_FILTERED.inc(len(commits) - len(candidates), kind="commits")
+        logger.info(f"Keyword filter for {self.repo_display_name}: {len(candidates)} of {len(commits)} commits to scan")
+        return candidates
+
+    def _filter_files(self, directory_path: str, files: list[str], keyword_filter: KeywordFilter) -> list[str]:
+        candidates = keyword_filter.filter_files(directory_path, files)
+        SCAN_KEYWORD_FILTERED.inc(len(files) - len(candidates), kind="files")
+        logger.info(f"Keyword filter for {directory_path}: {len(candidates)} of {len(files)} files to scan")
+        return candidates
 
     def _is_valid(self) -> bool:
         if not self._as_dir and not self._as_repo:
@@ -140,6 +363,9 @@ class SecretScanner(RESCWorker):  # pylint: disable=R0902
         return True
 
     def _create_repository(self) -> bool:
+        if self._created_repository:
+            logger.info(f"Scanning repository {self.repository.project_key}/{self.repository.repository_name}")
+            return True
         # Insert in to repository table
         self._created_repository = self._output_module.write_repository(self.repository)
         if not self._created_repository:
@@ -154,28 +380,65 @@ class SecretScanner(RESCWorker):  # pylint: disable=R0902
         return True
 
     def _fetch_last_scanned_commit(self) -> True:
-        # Get last scanned commit for the repository
+        # Get last scanned commit for the repository, it is looked up when the scan starts as another task for the
+        # repository may have completed since the task was queued
         last_scan_for_repository = self._output_module.get_last_scan_for_repository(repository=self._created_repository)
+        self._last_scan_for_repository = last_scan_for_repository
         self._last_scanned_commit = last_scan_for_repository.last_scanned_commit if last_scan_for_repository else None
+        if self.all_branches and self.scan_cache_directory and last_scan_for_repository is not None:
+            try:
+                self._scanned_tips = BranchTipStore(self.scan_cache_directory).get_tips(
+                    self._branch_tips_key, self.rule_pack_version
+                )
+            except (OSError, sqlite3.Error) as error:
+                logger.warning(f"Unable to read the branch tips of {self.repo_display_name}: {error}")
         self._scan_type_to_run = self._determine_scan_type(
             last_scan_for_repository=last_scan_for_repository,
         )
         return True
 
+    @property
+    def _branch_tips_key(self) -> str:
+        # Local repositories without a remote all have the same placeholder url, their tips are kept by path
+        if self.local_path:
+            return os.path.realpath(self.local_path)
+        return str(self.repository.repository_url)
+
     def _determine_scan_type(self, last_scan_for_repository: Scan) -> ScanType | None:
-        # Force base scan, or has no previous scan
-        if self.force_base_scan or last_scan_for_repository is None:
-            return ScanType.BASE
-        # Has previous scan
-        if last_scan_for_repository:
-            # Rule-pack is different from previous scan
-            if last_scan_for_repository.rule_pack != self.rule_pack_version:
-                return ScanType.BASE
-            # Last commit is different from previous scan
-            if self.latest_commit and self.latest_commit != last_scan_for_repository.last_scanned_commit:
-                return ScanType.INCREMENTAL
-        # Skip scanning, no conditions match
-        return None
+        scan_type = determine_scan_type(
+            last_scan_for_repository=last_scan_for_repository,
+            rule_pack_version=self.rule_pack_version,
+            latest_commit=self.latest_commit,
+            force_base_scan=self.force_base_scan,
+        )
+        # Branches other than HEAD can have new commits while HEAD did not move
+        if scan_type is None and self._have_branch_tips_moved():
+            return ScanType.INCREMENTAL
+        return scan_type
+
+    def _have_branch_tips_moved(self) -> bool:
+        """
+            Compare the tips of the branches and tags of the repository with those of the last scan, without cloning
+        :return: bool.
+            True when a ref was created, deleted or moved since the last scan
+        """
+        if not self._as_repo or self._scanned_tips is None:
+            return False
+        # pylint: disable=C0415
+        from vcs_scanner.secret_scanners.git_operation import list_ref_tips, list_remote_ref_tips
+
+        if self.local_path:
+            tips = list_ref_tips(self.local_path)
+        else:
+            tips = list_remote_ref_tips(
+                repository_url=self.repository.repository_url,
+                username=self.username,
+                personal_access_token=self.personal_access_token,
+            )
+        if tips is None or tips == self._scanned_tips:
+            return False
+        logger.info(f"The branches of {self.repo_display_name} moved since the last scan")
+        return True
 
     def _is_scan_needed(self) -> bool:
         if self._scan_type_to_run is None:
@@ -191,12 +454,29 @@ class SecretScanner(RESCWorker):  # pylint: disable=R0902
         return True
 
     def _create_scan(self) -> bool:
+        last_scanned_commit, rule_pack = self.latest_commit, self.rule_pack_version
+        if self.truncated or self._scan_failed:
+            # The commits after the last complete scan are scanned again by the next scan
+            if self._last_scan_for_repository is not None:
+                last_scanned_commit = self._last_scan_for_repository.last_scanned_commit
+                rule_pack = self._last_scan_for_repository.rule_pack
+                logger.warning(
+                    f"Scan of {self.repo_display_name} did not complete, "
+                    f"the last scanned commit stays at {last_scanned_commit}"
+                )
+            else:
+                # Without a scanned commit the output module does not record the scan, the next scan is a base scan
+                last_scanned_commit = None
+                logger.error(
+                    f"Scan of {self.repo_display_name} did not complete and the repository has no complete scan, "
+                    f"the next scan is a base scan"
+                )
         self._created_scan = self._output_module.write_scan(
             self._scan_type_to_run,
-            self.latest_commit,
+            last_scanned_commit,
             self._scan_timestamp_start.isoformat(),
             self._created_repository,
-            rule_pack=self.rule_pack_version,
+            rule_pack=rule_pack,
         )
         if not self._created_scan:
             logger.error(
@@ -209,17 +489,108 @@ class SecretScanner(RESCWorker):  # pylint: disable=R0902
     def _clone_repo(self) -> True:
         # Clone and run scan upon the repository
         if not self.local_path:
-            self._repo_clone_path = f"{self._scan_tmp_directory}/{self.repository.repository_name}"
-            self.head_commit = clone_repository(
-                repository_url=self.repository.repository_url,
-                repo_clone_path=self._repo_clone_path,
-                username=self.username,
-                personal_access_token=self.personal_access_token,
-            )
+            # GitPython is only loaded by the scans which need it, directory scans of the CLI start faster without it
+            from git import GitCommandError  # pylint: disable=C0415
+
+            from vcs_scanner.secret_scanners.git_operation import get_object_database_size  # pylint: disable=C0415
+
+            reference = self._update_object_store()
+            self._allocate_memory_scratch_directory()
+            try:
+                self._clone_into(self._memory_scratch_directory or self._scan_tmp_directory, reference)
+            except (GitCommandError, OSError) as error:
+                # The estimated size of the repository was too small for the clone to fit in memory
+                if self._memory_scratch_directory is None or not self._is_out_of_space(error):
+                    raise
+                logger.warning(f"{self.repo_display_name} does not fit in memory, cloning it on disk")
+                self._release_memory_scratch_directory()
+                SCRATCH_ALLOCATIONS.inc(medium="disk")
+                self._clone_into(self._scan_tmp_directory, reference)
+            try:
+                SCAN_BYTES_CLONED.inc(get_object_database_size(self._repo_clone_path))
+            except BaseException as error:
+                logger.debug(f"Unable to determine the size of {self._repo_clone_path}: {error}")
         else:
             self._repo_clone_path = self.local_path
         return True
 
+    @staticmethod
+    def _is_out_of_space(error: Exception) -> bool:
+        if isinstance(error, OSError):
+            return error.errno == errno.ENOSPC
+        # git clones with the C locale, its message is the untranslated description of ENOSPC
+        return os.strerror(errno.ENOSPC) in str(error)
+
+    def _clone_into(self, directory: str, reference: str | None = None) -> None:
+        from vcs_scanner.secret_scanners.git_operation import clone_repository  # pylint: disable=C0415
+
+        self._repo_clone_path = f"{directory}/{self.repository.repository_name}"
+        self.head_commit = clone_repository(
+            repository_url=self.repository.repository_url,
+            repo_clone_path=self._repo_clone_path,
+            username=self.username,
+            personal_access_token=self.personal_access_token,
+            reference=reference,
+        )
+
+    def _update_object_store(self) -> str | None:
+        """
+            Fetch the repository into the object store of its project, which the clone borrows its objects from.
+            Repositories of a project share vendored code and copied history, their objects are downloaded and
+            stored once.
+        :return: str or None.
+            Path of the object store of the project, None when the repository is cloned without one
+        """
+        if not self.object_store_directory:
+            return None
+        from vcs_scanner.secret_scanners.git_operation import update_object_store  # pylint: disable=C0415
+
+        project = f"{self.repository.vcs_instance}:{self.repository.project_key}"
+        # The clones refer to the store by the path they are given, which must not depend on their location
+        object_store_path = os.path.join(
+            os.path.abspath(self.object_store_directory),
+            f"{hashlib.sha256(project.encode('utf-8')).hexdigest()[:32]}.git",
+        )
+        if not update_object_store(
+            object_store_path=object_store_path,
+            repository_url=self.repository.repository_url,
+            username=self.username,
+            personal_access_token=self.personal_access_token,
+        ):
+            return None
+        self._object_store_path = object_store_path
+        return object_store_path
+
+    def _maintain_object_store(self) -> None:
+        # The store is maintained once the scan is done, so the scan is not delayed by it
+        if self._object_store_path is None:
+            return
+        from vcs_scanner.secret_scanners.git_operation import maintain_object_store  # pylint: disable=C0415
+
+        try:
+            maintain_object_store(self._object_store_path, self.object_store_maintenance_seconds)
+        except OSError as error:
+            logger.warning(f"Unable to maintain the object store {self._object_store_path}: {error}")
+
+    def _allocate_memory_scratch_directory(self) -> None:
+        if self.scratch_allocator is None:
+            return
+        size_bytes = self.estimated_size_kb * 1024 if self.estimated_size_kb is not None else None
+        try:
+            self._memory_scratch_directory = self.scratch_allocator.allocate(size_bytes)
+        except (OSError, sqlite3.Error) as error:
+            logger.warning(f"Unable to allocate memory for the clone of {self.repo_display_name}: {error}")
+        SCRATCH_ALLOCATIONS.inc(medium="memory" if self._memory_scratch_directory else "disk")
+
+    def _release_memory_scratch_directory(self) -> None:
+        if self._memory_scratch_directory is None:
+            return
+        try:
+            self.scratch_allocator.release(self._memory_scratch_directory)
+        except (OSError, sqlite3.Error) as error:
+            logger.error(f"Failed to release the scratch directory {self._memory_scratch_directory}: {error}")
+        self._memory_scratch_directory = None
+
     def _run_repo_scan(self) -> True:
         if not self._as_repo:
             return True
@@ -232,11 +603,13 @@ class SecretScanner(RESCWorker):  # pylint: disable=R0902
         )
         scan_timestamp_start = datetime.now(UTC)
         self._findings_from_repo = self._scan_repo(self._scan_type_to_run, self._last_scanned_commit)
+        self._history_scanned = True
         scan_timestamp_end = datetime.now(UTC)
+        SCAN_FINDINGS.inc(len(self._findings_from_repo), source="repo")
         logger.info(
             f"Running {self._scan_type_to_run} scan on repository "
             f"{self.repository.project_key}/{self.repository.repository_name}"
-            f" took {scan_timestamp_end - scan_timestamp_start} ms."
+            f" took {(scan_timestamp_end - scan_timestamp_start).total_seconds():.3f} seconds."
         )
         return True
 
@@ -254,7 +627,7 @@ class SecretScanner(RESCWorker):  # pylint: disable=R0902
 
         logger.debug(f"Started scanning {self.repo_display_name}")
         if not self.local_path:
-            report_filepath = f"{self._scan_tmp_directory}/{self._repo_clone_path}_{str(uuid.uuid4().hex)}.json"
+            report_filepath = f"{self._repo_clone_path}_{str(uuid.uuid4().hex)}.json"
         else:
             report_filepath = f"{self.local_path}/{self.repo_display_name}_{str(uuid.uuid4().hex)}.json"
         try:
@@ -265,21 +638,49 @@ class SecretScanner(RESCWorker):  # pylint: disable=R0902
             else:
                 scan_from = None
 
-            gitleaks_command = GitLeaksWrapper(
+            # An incremental scan of all branches scans the commits of any ref which are not reachable from the tips
+            # of the previous scan, from the last scanned commit alone when those tips are unknown
+            scanned_tips = None
+            if self.all_branches and scan_from:
+                scanned_tips = sorted({scan_from, *(self._scanned_tips or {}).values()})
+                scan_from = None
+
+            if self.scan_cache_directory and not self.staged:
+                return self._scan_repo_with_cache(scan_from, report_filepath, scanned_tips)
+
+            keyword_filter = (
+                None
+                if self.staged
+                else self._get_keyword_filter(self.gitleaks_rules_provider.scan_as_repo_rule_file_path)
+            )
+            if keyword_filter or scanned_tips is not None:
+                from vcs_scanner.secret_scanners.git_operation import list_commits  # pylint: disable=C0415
+
+                commits = list_commits(self._repo_clone_path, scan_from, scanned_tips)
+                candidates = self._filter_commits(commits, keyword_filter) if keyword_filter else commits
+                # gitleaks walks the history from a single commit, the new commits of all branches are handed to it
+                if len(candidates) < len(commits) or scanned_tips is not None:
+                    return self._scan_commits(candidates, scan_from, report_filepath, None, walk_history=False)
+
+            gitleaks_command = self._create_scan_command(
                 scan_from=scan_from,
                 gitleaks_path=self.gitleaks_binary_path,
                 repository_path=self._repo_clone_path,
                 rules_filepath=self.gitleaks_rules_provider.scan_as_repo_rule_file_path,
                 report_filepath=report_filepath,
+                staged=self.staged,
+                limits=self.gitleaks_limits,
+                cancel_event=self._cancel_event,
             )
 
             before_scan = time.time()
-            findings: list[FindingBase] = gitleaks_command.start_scan()
+            findings: list[FindingBase] = self._start_gitleaks(gitleaks_command)
             after_scan = time.time()
             scan_duration = int(after_scan - before_scan)
             logger.info(f"scan of repository {self._repo_clone_path} took {scan_duration} seconds")
             return findings
-        except BaseException as error:
+        except Exception as error:
+            self._scan_failed = True
             logger.error(
                 f"An exception occurred while scanning repository {self.repository.repository_url} error: {error}"
             )
@@ -290,6 +691,161 @@ class SecretScanner(RESCWorker):  # pylint: disable=R0902
             if os.path.exists(report_filepath):
                 os.remove(report_filepath)
 
+    def _scan_repo_with_cache(
+        self, scan_from: str | None, report_filepath: str, scanned_tips: list[str] | None = None
+    ) -> list[FindingBase]:
+        """
+            Scan the history of the repository, only handing the commits unknown to the commit scan cache to gitleaks.
+            The findings of the cached commits, possibly scanned as part of a fork or mirror, are spliced in.
+            The commits to scan are claimed, so that concurrent scans of forks or mirrors, including the first scan
+            of a fork of which the parent is being scanned, scan the commits they share only once.
+        :param scan_from:
+            Last scanned commit for an incremental scan, None for a base scan
+        :param report_filepath:
+            Path of the gitleaks report
+        :param scanned_tips:
+            Tips of the refs the previous scan covered, for an incremental scan of all branches
+        :return: List[FindingBase].
+            The output will contain a list of findings or an empty list if no finding was found
+        """
+        from vcs_scanner.secret_scanners.git_operation import list_commits, list_root_commits  # pylint: disable=C0415
+
+        rule_pack_hash = hash_file(self.gitleaks_rules_provider.scan_as_repo_rule_file_path)
+        commits = list_commits(self._repo_clone_path, scan_from, scanned_tips)
+        commit_cache = CommitScanCache(cache_directory=self.scan_cache_directory, rule_pack_hash=rule_pack_hash)
+        cached_findings = commit_cache.get_findings(commits)
+        findings = [finding for commit_findings in cached_findings.values() for finding in commit_findings]
+        commits_to_scan = [commit for commit in commits if commit not in cached_findings]
+        logger.info(
+            f"Commit scan cache for {self.repo_display_name}: {len(commits_to_scan)} of {len(commits)} commits to scan"
+        )
+
+        skipped_commits: list[str] = []
+        keyword_filter = self._get_keyword_filter(self.gitleaks_rules_provider.scan_as_repo_rule_file_path)
+        if keyword_filter and commits_to_scan:
+            candidates = self._filter_commits(commits_to_scan, keyword_filter)
+            candidate_set = set(candidates)
+            skipped_commits = [commit for commit in commits_to_scan if commit not in candidate_set]
+            # Commits without any keyword cannot have findings, they are cached as scanned
+            commit_cache.store(skipped_commits, [])
+            commits_to_scan = candidates
+
+        history_index = SharedHistoryIndex(cache_directory=self.scan_cache_directory, rule_pack_hash=rule_pack_hash)
+        related_repositories = history_index.register_roots(
+            str(self.repository.repository_url), list_root_commits(self._repo_clone_path)
+        )
+        if not commits_to_scan:
+            return findings
+
+        commits_to_scan, deferred_commits = history_index.claim(commits_to_scan)
+        if related_repositories or deferred_commits:
+            logger.info(
+                f"{self.repo_display_name} shares its history with {len(related_repositories)} known repositories, "
+                f"{len(deferred_commits)} commits are being scanned by another task"
+            )
+
+        try:
+            # Without any cached or deferred commit, walking the history in one go is cheaper than explicit commits
+            walk_history = not cached_findings and not deferred_commits and not skipped_commits and scanned_tips is None
+            findings.extend(self._scan_commits(commits_to_scan, scan_from, report_filepath, commit_cache, walk_history))
+        finally:
+            history_index.release()
+
+        if deferred_commits:
+            deferred_findings = self._wait_for_cached_commits(deferred_commits, commit_cache, history_index)
+            findings.extend(finding for commit_findings in deferred_findings.values() for finding in commit_findings)
+            missing_commits = [commit for commit in deferred_commits if commit not in deferred_findings]
+            if missing_commits:
+                logger.warning(f"{len(missing_commits)} shared commits were not scanned by another task, scanning them")
+                findings.extend(self._scan_commits(missing_commits, scan_from, report_filepath, commit_cache, False))
+        return findings
+
+    def _scan_commits(
+        self,
+        commits: list[str],
+        scan_from: str | None,
+        report_filepath: str,
+        commit_cache: CommitScanCache | None,
+        walk_history: bool,
+    ) -> list[FindingBase]:
+        """
+            Scan the given commits and store the results in the commit scan cache
+        :param commits:
+            The commits to scan
+        :param scan_from:
+            Last scanned commit for an incremental scan, None for a base scan
+        :param report_filepath:
+            Path of the gitleaks report
+        :param commit_cache:
+            The commit scan cache to store the results in, None to not cache them
+        :param walk_history:
+            Whether to let gitleaks walk the history from scan_from instead of handing it explicit commits,
+            only valid when commits contains every commit of that history
+        :return: List[FindingBase].
+            The findings of the given commits
+        """
+        if walk_history:
+            batches = [None]
+        else:
+            batches = [commits[start : start + COMMITS_PER_SCAN] for start in range(0, len(commits), COMMITS_PER_SCAN)]
+
+        findings: list[FindingBase] = []
+        before_scan = time.time()
+        for batch in batches:
+            gitleaks_command = self._create_scan_command(
+                scan_from=scan_from,
+                gitleaks_path=self.gitleaks_binary_path,
+                repository_path=self._repo_clone_path,
+                rules_filepath=self.gitleaks_rules_provider.scan_as_repo_rule_file_path,
+                report_filepath=report_filepath,
+                commits=batch,
+                limits=self.gitleaks_limits,
+                cancel_event=self._cancel_event,
+            )
+            batch_findings = self._start_gitleaks(gitleaks_command)
+            findings.extend(batch_findings)
+            # A failed scan must not be cached, or its commits would never be scanned again
+            if commit_cache is not None and gitleaks_command.succeeded():
+                commit_cache.store(batch or commits, batch_findings)
+            if os.path.exists(report_filepath):
+                os.remove(report_filepath)
+        after_scan = time.time()
+        logger.info(
+            f"scan of {len(commits)} commits of repository {self._repo_clone_path} took "
+            f"{after_scan - before_scan:.3f} seconds"
+        )
+        return findings
+
+    def _wait_for_cached_commits(
+        self, commits: list[str], commit_cache: CommitScanCache, history_index: SharedHistoryIndex
+    ) -> dict[str, list[FindingBase]]:
+        """
+            Wait for the commits scanned by another task to appear in the commit scan cache
+        :param commits:
+            The commits claimed by other tasks
+        :param commit_cache:
+            The commit scan cache the other tasks store their results in
+        :param history_index:
+            The index holding the claims of the other tasks
+        :return: dict.
+            The findings per commit of the commits which were scanned before the timeout,
+            or before the tasks claiming the other commits stopped without scanning them
+        """
+        deadline = time.time() + self.shared_history_wait_seconds
+        found: dict[str, list[FindingBase]] = {}
+        pending = commits
+        while True:
+            found.update(commit_cache.get_findings(pending))
+            pending = [commit for commit in pending if commit not in found]
+            if not pending or time.time() >= deadline or self._cancel_event.is_set():
+                return found
+            # A task releases its claims once its results are cached, commits left without a live claim are not
+            # going to be scanned by another task
+            if not history_index.live_claims(pending):
+                found.update(commit_cache.get_findings(pending))
+                return found
+            time.sleep(SHARED_HISTORY_POLL_SECONDS)
+
     def _run_dir_scan(self):
         if not self._as_dir:
             return True
@@ -302,10 +858,12 @@ class SecretScanner(RESCWorker):  # pylint: disable=R0902
         )
 
         scan_timestamp_start = datetime.now(UTC)
-        self._findings_from_dir = self._scan_directory(self._repo_clone_path)
+        self._findings_from_dir = self._scan_directory(self._repo_clone_path) or []
         scan_timestamp_end = datetime.now(UTC)
+        SCAN_FINDINGS.inc(len(self._findings_from_dir), source="dir")
         logger.info(
-            f"Running directory scan on {self._repo_clone_path} took {scan_timestamp_end - scan_timestamp_start} ms."
+            f"Running directory scan on {self._repo_clone_path} took "
+            f"{(scan_timestamp_end - scan_timestamp_start).total_seconds():.3f} seconds."
         )
         return True
 
@@ -319,26 +877,44 @@ class SecretScanner(RESCWorker):  # pylint: disable=R0902
         """
         logger.debug(f"Started scanning {self.repo_display_name}:{directory_path}")
         if not self.local_path:
-            report_filepath = f"{self._scan_tmp_directory}/{directory_path}_{str(uuid.uuid4().hex)}.json"
+            report_filepath = f"{directory_path}_{str(uuid.uuid4().hex)}.json"
         else:
             report_filepath = f"{self.local_path}/{self.repo_display_name}_{str(uuid.uuid4().hex)}.json"
         try:
-            gitleaks_command = GitLeaksWrapper(
+            changed_files = self._list_changed_files(directory_path)
+            if changed_files is not None:
+                return self._scan_changed_files(directory_path, changed_files, report_filepath)
+
+            if self.scan_cache_directory:
+                return self._scan_directory_with_cache(directory_path, report_filepath)
+
+            keyword_filter = self._get_keyword_filter(self.gitleaks_rules_provider.scan_as_dir_rule_file_path)
+            if keyword_filter:
+                files = list_files(directory_path)
+                candidates = self._filter_files(directory_path, files, keyword_filter)
+                if len(candidates) < len(files):
+                    findings, _ = self._scan_staged_files(directory_path, candidates, report_filepath)
+                    return findings
+
+            gitleaks_command = self._create_scan_command(
                 scan_from=None,
                 gitleaks_path=self.gitleaks_binary_path,
                 repository_path=directory_path,
                 rules_filepath=self.gitleaks_rules_provider.scan_as_dir_rule_file_path,
                 report_filepath=report_filepath,
                 git_scan=False,
+                limits=self.gitleaks_limits,
+                cancel_event=self._cancel_event,
             )
 
             before_scan = time.time()
-            findings: list[FindingBase] = gitleaks_command.start_scan()
+            findings: list[FindingBase] = self._start_gitleaks(gitleaks_command)
             after_scan = time.time()
             scan_duration = int(after_scan - before_scan)
             logger.info(f"scan of repository {directory_path} took {scan_duration} seconds")
             return findings
-        except BaseException as error:
+        except Exception as error:
+            self._scan_failed = True
             logger.error(f"An exception occurred while scanning directory {directory_path} error: {error}")
         finally:
             # Make sure the tempfile is removed
@@ -347,6 +923,136 @@ class SecretScanner(RESCWorker):  # pylint: disable=R0902
                 os.remove(report_filepath)
         return None
 
+    def _list_changed_files(self, directory_path: str) -> list[str] | None:
+        """
+            The files an incremental directory scan is limited to
+        :param directory_path:
+            Directory path to be scanned
+        :return: list[str] or None.
+            The files changed since the last scanned commit, relative to directory_path, or None when the whole
+            directory needs to be scanned
+        """
+        if self._scan_type_to_run != ScanType.INCREMENTAL or not self._last_scanned_commit:
+            return None
+        from vcs_scanner.secret_scanners.git_operation import list_changed_files  # pylint: disable=C0415
+
+        changed_files = list_changed_files(directory_path, self._last_scanned_commit)
+        if changed_files is None:
+            logger.info(f"Scanning all files of {directory_path}, the files changed since the last scan are unknown")
+        return changed_files
+
+    def _scan_changed_files(
+        self, directory_path: str, changed_files: list[str], report_filepath: str
+    ) -> list[FindingBase]:
+        """
+            Scan the files of the directory which changed since the last scanned commit
+        :param directory_path:
+            Directory path to be scanned
+        :param changed_files:
+            Paths of the changed files, relative to directory_path
+        :param report_filepath:
+            Path of the gitleaks report
+        :return: List[FindingBase].
+            The output will contain a list of findings or an empty list if no finding was found
+        """
+        logger.info(
+            f"Incremental directory scan of {directory_path}: {len(changed_files)} files changed since "
+            f"{self._last_scanned_commit}"
+        )
+        keyword_filter = self._get_keyword_filter(self.gitleaks_rules_provider.scan_as_dir_rule_file_path)
+        if keyword_filter and changed_files:
+            changed_files = self._filter_files(directory_path, changed_files, keyword_filter)
+        findings, _ = self._scan_staged_files(directory_path, changed_files, report_filepath)
+        return findings
+
+    def _scan_directory_with_cache(self, directory_path: str, report_filepath: str) -> list[FindingBase]:
+        """
+            Scan the given directory, only handing the files which changed since the previous scan to gitleaks.
+            The findings of the unchanged files are replayed from the directory scan cache.
+        :param directory_path:
+            Directory path to be scanned
+        :param report_filepath:
+            Path of the gitleaks report
+        :return: List[FindingBase].
+            The output will contain a list of findings or an empty list if no finding was found
+        """
+        directory_cache = DirectoryScanCache(
+            cache_directory=self.scan_cache_directory,
+            cache_key=self.local_path or str(self.repository.repository_url),
+            rule_pack_hash=hash_file(self.gitleaks_rules_provider.scan_as_dir_rule_file_path),
+        )
+        directory_cache.load()
+        files_to_scan = directory_cache.plan(directory_path)
+        findings = directory_cache.get_cached_findings(directory_path)
+        keyword_filter = self._get_keyword_filter(self.gitleaks_rules_provider.scan_as_dir_rule_file_path)
+        if keyword_filter and files_to_scan:
+            # Files without any keyword cannot have findings, they are cached as scanned
+            files_to_scan = self._filter_files(directory_path, files_to_scan, keyword_filter)
+        if not files_to_scan:
+            directory_cache.save()
+            return findings
+
+        scanned_findings, succeeded = self._scan_staged_files(directory_path, files_to_scan, report_filepath)
+        logger.info(f"{len(findings)} findings of unchanged files in {directory_path} replayed from cache")
+        # A failed scan must not be cached, or the changed files would never be scanned again
+        if succeeded:
+            directory_cache.update(directory_path, scanned_findings)
+            directory_cache.save()
+
+        return findings + scanned_findings
+
+    def _scan_staged_files(
+        self, directory_path: str, files_to_scan: list[str], report_filepath: str
+    ) -> tuple[list[FindingBase], bool]:
+        """
+            Scan a subset of the files of a directory, the files are staged in a directory of their own
+        :param directory_path:
+            Directory the files are taken from
+        :param files_to_scan:
+            Paths of the files to scan, relative to directory_path
+        :param report_filepath:
+            Path of the gitleaks report
+        :return: tuple.
+            The findings with the paths within directory_path, and whether the scan succeeded
+        """
+        if not files_to_scan:
+            return [], True
+
+        staging_directory = stage_files(directory_path, files_to_scan)
+        try:
+            gitleaks_command = self._create_scan_command(
+                scan_from=None,
+                gitleaks_path=self.gitleaks_binary_path,
+                repository_path=staging_directory,
+                rules_filepath=self.gitleaks_rules_provider.scan_as_dir_rule_file_path,
+                report_filepath=report_filepath,
+                git_scan=False,
+                limits=self.gitleaks_limits,
+                cancel_event=self._cancel_event,
+            )
+
+            before_scan = time.time()
+            findings: list[FindingBase] = self._start_gitleaks(gitleaks_command)
+            after_scan = time.time()
+            logger.info(
+                f"scan of {len(files_to_scan)} files in {directory_path} took {after_scan - before_scan:.3f} seconds"
+            )
+            for finding in findings:
+                finding.file_path = restore_staged_path(finding.file_path, staging_directory, directory_path)
+            # The settings files are staged even when unchanged, their findings are replayed from the cache
+            unchanged_settings_files = {
+                os.path.normpath(os.path.join(directory_path, file_name))
+                for file_name in GITLEAKS_ROOT_FILES
+                if file_name not in files_to_scan
+            }
+            findings = [
+                finding for finding in findings if os.path.normpath(finding.file_path) not in unchanged_settings_files
+            ]
+        finally:
+            shutil.rmtree(staging_directory, ignore_errors=True)
+
+        return findings, gitleaks_command.succeeded()
+
     def _merge_findings(self) -> bool:
         if len(self._findings_from_dir) == 0 and len(self._findings_from_repo) == 0:
             path = (
@@ -355,6 +1061,7 @@ class SecretScanner(RESCWorker):  # pylint: disable=R0902
                 else self.repository.project_key + "/" + self.repository.repository_name
             )
             logger.info(f"No findings registered in {path}.")
+            self.scan_completed = True
             return False
 
         self._findings = self._findings_from_repo + self._findings_from_dir
@@ -376,6 +1083,9 @@ class SecretScanner(RESCWorker):  # pylint: disable=R0902
 
     def _write_findings(self) -> True:
         logger.info(f"Scan completed: {len(self._findings)} findings were found.")
+        SCAN_FINDINGS.inc(len(self._findings), source="written")
+        # The STDOUT writer exits the process once it wrote the findings
+        self.scan_completed = True
         self._output_module.write_findings(
             repository_id=getattr(self._created_repository, "id_", 0),
             scan_id=getattr(self._created_scan, "id_", 0),
@@ -396,6 +1106,24 @@ class SecretScanner(RESCWorker):  # pylint: disable=R0902
             return False
         return True
 
+    def _record_branch_tips(self) -> None:
+        """
+        Keep the tips of the refs the history scan covered, the next incremental scan of all branches starts from
+        them. The tips are only kept once every commit up to them was scanned and its findings were reported.
+        """
+        if not self.all_branches or not self.scan_cache_directory or not self._history_scanned:
+            return
+        if not self.scan_completed or self._scan_failed or self.truncated:
+            logger.warning(f"Not keeping the branch tips of {self.repo_display_name}, its scan did not complete")
+            return
+        from vcs_scanner.secret_scanners.git_operation import list_ref_tips  # pylint: disable=C0415
+
+        try:
+            tips = list_ref_tips(self._repo_clone_path, remote=None if self.local_path else "origin")
+            BranchTipStore(self.scan_cache_directory).record_tips(self._branch_tips_key, tips, self.rule_pack_version)
+        except Exception as error:  # pylint: disable=W0718
+            logger.error(f"Unable to keep the branch tips of {self.repo_display_name}: {error}")
+
     def _cleaning_up(self) -> True:
         # Make sure the tempfile and repo cloned path removed
         logger.info(f"Cleaning up: {self._repo_clone_path}")
@@ -404,7 +1132,15 @@ class SecretScanner(RESCWorker):  # pylint: disable=R0902
         if self._repo_clone_path and not self.local_path and os.path.exists(self._repo_clone_path):
             logger.debug(f"Cleaning up the repository cloned directory: {self._repo_clone_path}")
             try:
-                shutil.rmtree(self._repo_clone_path)
+                # A clone in memory is removed with its scratch directory, which returns the memory to the budget.
+                # The reaper removes a clone on disk in the background, so the worker can take the next task
+                if self._memory_scratch_directory is not None:
+                    self._release_memory_scratch_directory()
+                elif self.directory_reaper is not None:
+                    self.directory_reaper.discard(self._repo_clone_path)
+                else:
+                    shutil.rmtree(self._repo_clone_path)
             except BaseException:
                 logger.error(f"Failed to remove the repository cloned directory: {self._repo_clone_path}")
+        self._release_memory_scratch_directory()
         return True
@@ -0,0 +1,76 @@
+# Standard Library
+import logging
+from dataclasses import dataclass
+
+# Third Party
+from kombu import Queue
+
+# First Party
+from vcs_scanner.api.schema.scan_type import ScanType
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PRIORITY = 9
+DEFAULT_LARGE_REPOSITORY_SIZE_KB = 1024 * 1024
+
+
+@dataclass
+class TaskRoute:
+    queue: str
+    priority: int
+
+
+@dataclass
+class RoutingPolicy:
+    """
+    Routes the scan_repository tasks over the queues of the workers, by scan type and estimated repository size.
+    Incremental scans of small repositories go to the fast lane, scans of large repositories to the large lane
+    and the remaining base scans stay on the default queue. Within a lane, cheaper scans get a higher priority.
+    Routing is disabled when neither lane is configured.
+    """
+
+    default_queue: str
+    fast_queue: str | None = None
+    large_queue: str | None = None
+    large_repository_size_kb: int = DEFAULT_LARGE_REPOSITORY_SIZE_KB
+    max_priority: int = DEFAULT_MAX_PRIORITY
+
+    def is_enabled(self) -> bool:
+        return bool(self.fast_queue or self.large_queue)
+
+    def is_large(self, estimated_size_kb: int | None) -> bool:
+        return estimated_size_kb is not None and estimated_size_kb >= self.large_repository_size_kb
+
+    def route(self, scan_type: ScanType | None, estimated_size_kb: int | None = None) -> TaskRoute:
+        """
+            Select the queue and priority of a scan
+        :param scan_type:
+            The scan the repository needs, None when no scan is needed
+        :param estimated_size_kb:
+            Size of the repository, unknown sizes are treated as small
+        :return: TaskRoute.
+            The queue and priority to send the task with
+        """
+        # Clones are full regardless of the scan type, so large repositories always need the large lane
+        if self.large_queue and self.is_large(estimated_size_kb):
+            priority = self.max_priority // 2 if scan_type != ScanType.BASE else 0
+            return TaskRoute(queue=self.large_queue, priority=priority)
+
+        # Incremental scans, and repositories that turn out to need no scan, finish quickly
+        if scan_type != ScanType.BASE:
+            return TaskRoute(queue=self.fast_queue or self.default_queue, priority=self.max_priority)
+
+        return TaskRoute(queue=self.default_queue, priority=self.max_priority // 2)
+
+    def queues(self) -> list[Queue]:
+        """
+            Declarations of the queues the worker consumes from and routes to
+        :return: list.
+            The default queue as it is, and the lanes as priority queues
+        """
+        # The arguments of an existing queue cannot be changed, so the default queue is declared without priority
+        queues = [Queue(self.default_queue, routing_key=self.default_queue)]
+        for lane in (self.fast_queue, self.large_queue):
+            if lane and lane != self.default_queue:
+                queues.append(Queue(lane, routing_key=lane, queue_arguments={"x-max-priority": self.max_priority}))
+        return queues
@@ -0,0 +1,22 @@
+# First Party
+from benchmarks.cli_startup import DEFAULT_BUDGETS_MS, check_budgets, parse_budgets, run_startup_benchmark
+
+
+def test_parse_budgets():
+    budgets = parse_budgets("import=100,dir=2000")
+
+    assert budgets["import"] == 100
+    assert budgets["dir"] == 2000
+    assert budgets["help"] == DEFAULT_BUDGETS_MS["help"]
+
+
+def test_check_budgets():
+    assert check_budgets({"import": 120.0, "help": 80.0}, {"import": 100, "help": 100}) == ["import"]
+    assert not check_budgets({"import": 20.0}, {"import": 100})
+
+
+def test_run_startup_benchmark(tmp_path):
+    results = run_startup_benchmark(runs=1, work_directory=f"{tmp_path}", scenarios=["help", "dir"])
+
+    assert set(results) == {"help", "dir"}
+    assert all(duration > 0 for duration in results.values())
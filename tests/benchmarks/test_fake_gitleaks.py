@@ -0,0 +1,84 @@
+# Standard Library
+import time
+
+# First Party
+from benchmarks.end_to_end import BENCHMARK_RULES
+from benchmarks.fake_gitleaks import format_verbose, generate_findings, parse_arguments
+from benchmarks.load_test import FAKE_GITLEAKS
+from vcs_scanner.secret_scanners.gitleaks_wrapper import GitLeaksLimits, GitLeaksWrapper
+
+
+def _wrapper(tmp_path, **kwargs) -> GitLeaksWrapper:
+    return GitLeaksWrapper(
+        gitleaks_path=FAKE_GITLEAKS,
+        repository_path=f"{tmp_path}",
+        rules_filepath=BENCHMARK_RULES,
+        report_filepath=f"{tmp_path / 'report.json'}",
+        **kwargs,
+    )
+
+
+def test_parse_arguments():
+    command, options, flags = parse_arguments(
+        ["detect", "--source=/tmp/repo", "--log-opts=--no-walk abc def", "--no-git", "--verbose"]
+    )
+    assert command == "detect"
+    assert options == {"--source": "/tmp/repo", "--log-opts": "--no-walk abc def"}
+    assert flags == {"--no-git", "--verbose"}
+
+
+def test_generate_findings_is_deterministic():
+    findings = generate_findings(5, ["rule-a", "rule-b"], seed="1", git_scan=True)
+    assert findings == generate_findings(5, ["rule-a", "rule-b"], seed="1", git_scan=True)
+    assert [finding["RuleID"] for finding in findings] == ["rule-a", "rule-b", "rule-a", "rule-b", "rule-a"]
+    assert all(len(finding["Commit"]) == 40 for finding in findings)
+    assert all(finding["Commit"] == "" for finding in generate_findings(3, ["rule-a"], seed="1", git_scan=False))
+
+
+def test_verbose_output_is_parsed_by_the_wrapper():
+    findings = generate_findings(3, ["rule-a"], seed="1", git_scan=True)
+    output = "\n".join(format_verbose(finding) for finding in findings)
+
+    parsed = GitLeaksWrapper._parse_verbose_output(output)
+    assert [finding.file_path for finding in parsed] == [finding["File"] for finding in findings]
+    assert [finding.line_number for finding in parsed] == [finding["StartLine"] for finding in findings]
+
+
+def test_fake_gitleaks_reports_configured_findings(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GITLEAKS_FINDINGS", "7")
+
+    gitleaks_wrapper = _wrapper(tmp_path, git_scan=False)
+    findings = gitleaks_wrapper.start_scan()
+    assert gitleaks_wrapper.succeeded() is True
+    assert len(findings) == 7
+    assert {finding.rule_name for finding in findings} <= {
+        "benchmark-aws-access-key",
+        "benchmark-github-token",
+        "benchmark-password",
+    }
+
+
+def test_fake_gitleaks_without_findings(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GITLEAKS_FINDINGS", "0")
+
+    gitleaks_wrapper = _wrapper(tmp_path)
+    assert gitleaks_wrapper.start_scan() == []
+    assert gitleaks_wrapper.exit_code == 0
+
+
+def test_fake_gitleaks_latency(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GITLEAKS_LATENCY", "5")
+
+    gitleaks_wrapper = _wrapper(tmp_path, limits=GitLeaksLimits(timeout_seconds=0.5))
+    start = time.perf_counter()
+    gitleaks_wrapper.start_scan()
+    assert time.perf_counter() - start < 5
+    assert gitleaks_wrapper.truncated is True
+
+
+def test_fake_gitleaks_exit_code(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GITLEAKS_EXIT_CODE", "1")
+
+    gitleaks_wrapper = _wrapper(tmp_path)
+    assert gitleaks_wrapper.start_scan() == []
+    assert gitleaks_wrapper.succeeded() is False
@@ -0,0 +1,30 @@
+# First Party
+from benchmarks.load_test import _percentile, run_load_test
+
+
+def test_percentile():
+    values = [0.1, 0.2, 0.3, 0.4]
+    assert _percentile(values, 50) == 0.3
+    assert _percentile(values, 99) == 0.4
+    assert _percentile([], 50) == 0.0
+
+
+def test_run_load_test(tmp_path):
+    report = run_load_test(tasks=3, processes=1, work_directory=f"{tmp_path}", findings_per_scan=2)
+
+    assert report["failures"] == 0
+    assert report["tasks_per_minute"] > 0
+    # Every task scans the repository and the directory, each scan reports two findings
+    assert report["findings_received"] == 3 * 4
+    assert report["rws_requests"]["POST /scans"] == 3
+    assert report["rws_requests"]["GET /rule-packs"] == 1
+
+
+def test_run_load_test_with_batches(tmp_path):
+    report = run_load_test(tasks=4, processes=1, work_directory=f"{tmp_path}", findings_per_scan=1, batch_size=2)
+
+    assert report["failures"] == 0
+    assert report["findings_received"] == 4 * 2
+    assert report["rws_requests"]["POST /scans"] == 4
+    # The rule pack version is checked once per message, not once per repository
+    assert report["rws_requests"]["GET /rule-packs/versions"] == 2
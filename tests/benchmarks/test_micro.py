@@ -0,0 +1,48 @@
+# Standard Library
+import json
+
+# First Party
+from benchmarks.micro import BENCHMARKS, compare_results, generate_report, run_benchmarks
+from vcs_scanner.secret_scanners.gitleaks_wrapper import GitLeaksWrapper
+
+
+def test_generate_report(tmp_path):
+    report_path = tmp_path / "report.json"
+    generate_report(f"{report_path}", 50, seed=3)
+
+    findings = GitLeaksWrapper._parse_output(f"{report_path}")
+    assert len(findings) == 50
+    assert json.loads(report_path.read_text(encoding="utf-8"))[0]["RuleID"] == findings[0].rule_name
+
+
+def test_run_benchmarks():
+    results = run_benchmarks([20], repeat=1)
+
+    assert set(results["results"]) == {f"{name}[20]" for name in BENCHMARKS}
+    for result in results["results"].values():
+        assert result["size"] == 20
+        assert result["min_seconds"] > 0
+
+
+def _results(**seconds):
+    return {"results": {key: {"min_seconds": value} for key, value in seconds.items()}}
+
+
+def test_compare_results_flags_regressions():
+    baseline = _results(parse_output=1.0, post_processor_run=1.0, removed=1.0)
+    current = _results(parse_output=1.2, post_processor_run=0.5, added=1.0)
+
+    comparisons, regressed = compare_results(baseline, current, threshold=0.1)
+
+    assert regressed is True
+    assert {comparison["benchmark"]: comparison["status"] for comparison in comparisons} == {
+        "parse_output": "regression",
+        "post_processor_run": "improvement",
+    }
+
+
+def test_compare_results_within_threshold():
+    comparisons, regressed = compare_results(_results(parse_output=1.0), _results(parse_output=1.05), threshold=0.1)
+
+    assert regressed is False
+    assert comparisons[0]["status"] == "ok"
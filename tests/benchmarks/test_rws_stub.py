@@ -0,0 +1,50 @@
+# Standard Library
+import os
+import subprocess
+
+# First Party
+from benchmarks.end_to_end import BENCHMARK_RULES
+from benchmarks.rws_stub import RWSStub
+from benchmarks.synthetic_repository import SyntheticRepositorySpec, export_bare_repository, generate_repository
+from vcs_scanner.api.schema.repository import Repository
+from vcs_scanner.api.schema.scan_type import ScanType
+from vcs_scanner.output_modules.rws_api_writer import RESTAPIWriter
+
+
+def test_rws_stub_serves_the_scanner_routes():
+    with RWSStub(BENCHMARK_RULES) as stub:
+        writer = RESTAPIWriter(rws_url=stub.url)
+        repository = writer.write_repository(
+            Repository(
+                project_key="benchmark",
+                repository_id="benchmark",
+                repository_name="benchmark",
+                repository_url="https://fake-host.none/benchmark.git",
+                vcs_instance=1,
+            )
+        )
+        assert repository.id_ > 0
+        assert writer.get_last_scan_for_repository(repository) is None
+
+        scan = writer.write_scan(ScanType.BASE, "latest", "2020-08-07T16:31:11+00:00", repository, "0.0.1")
+        assert writer.get_last_scan_for_repository(repository).id_ == scan.id_
+        assert writer.get_active_rule_pack_version() == stub.rule_pack_version
+
+        writer.write_findings(scan_id=scan.id_, repository_id=repository.id_, scan_findings=[])
+        assert stub.requests["POST /scans/{id}/findings"] == 1
+
+
+def test_rws_stub_serves_repositories(tmp_path):
+    spec = SyntheticRepositorySpec(commits=3, files=2, files_per_commit=1, file_size=64, secrets=0)
+    repository = generate_repository(f"{tmp_path / 'repo'}", spec)
+    git_root = tmp_path / "git"
+    export_bare_repository(repository.path, f"{git_root / 'benchmark.git'}")
+
+    with RWSStub(BENCHMARK_RULES, git_root=f"{git_root}") as stub:
+        subprocess.run(
+            ["git", "clone", "--quiet", stub.repository_url("benchmark.git"), f"{tmp_path / 'clone'}"],
+            check=True,
+            env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+        )
+
+    assert (tmp_path / "clone" / ".git").is_dir()
@@ -0,0 +1,40 @@
+# Standard Library
+import subprocess
+
+# First Party
+from benchmarks.synthetic_repository import SyntheticRepositorySpec, export_bare_repository, generate_repository
+
+
+def _git(path, *args):
+    return subprocess.run(["git", *args], cwd=path, check=True, capture_output=True, text=True).stdout
+
+
+def test_generate_repository(tmp_path):
+    spec = SyntheticRepositorySpec(commits=20, files=8, files_per_commit=3, file_size=256, secrets=5, seed=1)
+    repository = generate_repository(f"{tmp_path / 'repo'}", spec)
+
+    assert _git(repository.path, "rev-list", "--count", "HEAD").strip() == "20"
+    assert len(repository.planted_secrets) == 5
+    assert repository.bytes_written >= 20 * 3 * 256
+    history = _git(repository.path, "log", "-p", "HEAD")
+    for planted_secret in repository.planted_secrets:
+        assert planted_secret.value in history
+
+
+def test_generate_repository_is_deterministic(tmp_path):
+    spec = SyntheticRepositorySpec(commits=5, files=4, files_per_commit=2, file_size=128, secrets=2, seed=7)
+    first = generate_repository(f"{tmp_path / 'first'}", spec)
+    second = generate_repository(f"{tmp_path / 'second'}", spec)
+
+    assert _git(first.path, "rev-parse", "HEAD") == _git(second.path, "rev-parse", "HEAD")
+    assert first.planted_secrets == second.planted_secrets
+
+
+def test_export_bare_repository(tmp_path):
+    spec = SyntheticRepositorySpec(commits=3, files=2, files_per_commit=1, file_size=64, secrets=0)
+    repository = generate_repository(f"{tmp_path / 'repo'}", spec)
+
+    bare_path = export_bare_repository(repository.path, f"{tmp_path / 'bare.git'}")
+
+    assert (tmp_path / "bare.git" / "info" / "refs").exists()
+    assert _git(bare_path, "rev-parse", "HEAD") == _git(repository.path, "rev-parse", "HEAD")
@@ -0,0 +1,26 @@
+# First Party
+from vcs_scanner.cache.branch_tips import BranchTipStore
+
+REPOSITORY_URL = "https://fake.url/project/repository"
+
+
+def test_branch_tips_round_trip(tmp_path):
+    store = BranchTipStore(str(tmp_path / "cache"))
+    assert store.get_tips(REPOSITORY_URL, "1.0.0") is None
+
+    store.record_tips(REPOSITORY_URL, {"refs/heads/main": "a" * 40, "refs/heads/feature": "b" * 40}, "1.0.0")
+    store.record_tips("https://fake.url/project/other", {"refs/heads/main": "c" * 40}, "1.0.0")
+    store.record_tips(REPOSITORY_URL, {"refs/heads/main": "d" * 40, "refs/tags/v1": "e" * 40}, "1.0.0")
+
+    assert BranchTipStore(str(tmp_path / "cache")).get_tips(REPOSITORY_URL, "1.0.0") == {
+        "refs/heads/main": "d" * 40,
+        "refs/tags/v1": "e" * 40,
+    }
+    assert store.get_tips("https://fake.url/project/other", "1.0.0") == {"refs/heads/main": "c" * 40}
+
+
+def test_branch_tips_of_another_rule_pack_are_ignored(tmp_path):
+    store = BranchTipStore(str(tmp_path))
+    store.record_tips(REPOSITORY_URL, {"refs/heads/main": "a" * 40}, "1.0.0")
+
+    assert store.get_tips(REPOSITORY_URL, "1.0.1") is None
@@ -0,0 +1,80 @@
+# Standard Library
+import sqlite3
+from datetime import UTC, datetime
+
+# Third Party
+from vcs_scanner.api.schema.finding import FindingBase
+
+# First Party
+from vcs_scanner.cache.commit_cache import COMMIT_CACHE_FILE, CommitScanCache
+from vcs_scanner.post_processing.entropy_processor import EntropyProcessor
+from vcs_scanner.post_processing.processor_interface import PostProcessingStatus
+
+
+def make_finding(commit_id: str) -> FindingBase:
+    return FindingBase(
+        file_path="file_path",
+        line_number=1,
+        column_start=1,
+        column_end=2,
+        commit_id=commit_id,
+        commit_message=f"message {commit_id}",
+        commit_timestamp=datetime.now(UTC),
+        author="author",
+        email="email",
+        rule_name="rule_1",
+    )
+
+
+def test_commit_cache_returns_only_cached_commits(tmp_path):
+    cache = CommitScanCache(str(tmp_path), "rules-1")
+    cache.store(["a", "b"], [make_finding("a"), make_finding("a")])
+
+    cached = cache.get_findings(["a", "b", "c"])
+    assert set(cached) == {"a", "b"}
+    assert len(cached["a"]) == 2
+    assert cached["a"][0].commit_message == "message a"
+    assert cached["b"] == []
+
+
+def test_commit_cache_is_shared_and_bound_to_rule_pack(tmp_path):
+    CommitScanCache(str(tmp_path), "rules-1").store(["a"], [make_finding("a")])
+
+    assert set(CommitScanCache(str(tmp_path), "rules-1").get_findings(["a"])) == {"a"}
+    assert CommitScanCache(str(tmp_path), "rules-2").get_findings(["a"]) == {}
+
+
+def test_cached_findings_keep_the_entropy_of_their_secret_for_post_processing(tmp_path):
+    placeholder, token = make_finding("a"), make_finding("a")
+    placeholder.secret = "aaaaaaaaaaaaaaaa"
+    token.secret = "k8Vq2LxT9pRz4NwE"
+    CommitScanCache(str(tmp_path), "rules-1").store(["a"], [placeholder, token])
+
+    # The database and its write ahead log
+    content = b"".join(path.read_bytes() for path in tmp_path.glob(f"{COMMIT_CACHE_FILE}*"))
+    assert b"aaaaaaaaaaaaaaaa" not in content
+    assert b"k8Vq2LxT9pRz4NwE" not in content
+
+    cached = CommitScanCache(str(tmp_path), "rules-1").get_findings(["a"])["a"]
+    assert [finding.secret for finding in cached] == [None, None]
+    assert [finding.secret_entropy for finding in cached] == [0.0, 4.0]
+    assert EntropyProcessor(threshold=3.0).process_findings(cached) == [
+        PostProcessingStatus.FALSE_POSITIVE,
+        PostProcessingStatus.NOT_PROCESSED,
+    ]
+
+
+def test_findings_stored_with_their_secret_are_dropped(tmp_path):
+    with sqlite3.connect(tmp_path / COMMIT_CACHE_FILE) as connection:
+        connection.execute(
+            "CREATE TABLE commit_results (rule_pack_hash TEXT, commit_sha TEXT, findings TEXT, scanned_at TEXT)"
+        )
+        connection.execute("INSERT INTO commit_results VALUES ('rules-1', 'a', '[]', '')")
+    connection.close()
+
+    cache = CommitScanCache(str(tmp_path), "rules-1")
+    assert cache.get_findings(["a"]) == {}
+    with sqlite3.connect(tmp_path / COMMIT_CACHE_FILE) as connection:
+        tables = {name for (name,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    connection.close()
+    assert "commit_results" not in tables
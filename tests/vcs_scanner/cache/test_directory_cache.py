@@ -0,0 +1,114 @@
+# Standard Library
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+
+# Third Party
+from vcs_scanner.api.schema.finding import FindingBase
+
+# First Party
+from vcs_scanner.cache.directory_cache import DirectoryScanCache
+
+
+def make_finding(file_path: str) -> FindingBase:
+    return FindingBase(
+        file_path=file_path,
+        line_number=1,
+        column_start=1,
+        column_end=2,
+        commit_id="",
+        commit_message="",
+        commit_timestamp=datetime.now(UTC),
+        author="",
+        email="",
+        rule_name="rule_1",
+    )
+
+
+def write_tree(directory, files: dict[str, str]):
+    for name, content in files.items():
+        path = directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+def test_plan_scans_every_file_without_cache(tmp_path):
+    scan_dir = tmp_path / "repo"
+    write_tree(scan_dir, {"a.txt": "a", "sub/b.txt": "b", ".git/config": "ignored"})
+
+    cache = DirectoryScanCache(str(tmp_path / "cache"), "key", "rules-1")
+    cache.load()
+    assert sorted(cache.plan(str(scan_dir))) == ["a.txt", os.path.join("sub", "b.txt")]
+    assert cache.get_cached_findings(str(scan_dir)) == []
+
+
+def test_plan_only_returns_changed_files_and_replays_findings(tmp_path):
+    scan_dir = tmp_path / "repo"
+    write_tree(scan_dir, {"a.txt": "a", "b.txt": "b"})
+
+    cache = DirectoryScanCache(str(tmp_path / "cache"), "key", "rules-1")
+    cache.load()
+    cache.plan(str(scan_dir))
+    finding = make_finding(str(scan_dir / "a.txt"))
+    finding.secret = "aaaabbbb"
+    cache.update(str(scan_dir), [finding])
+    cache.save()
+    with open(cache.cache_file_path, encoding="utf-8") as cache_file:
+        assert "aaaabbbb" not in cache_file.read()
+
+    write_tree(scan_dir, {"b.txt": "changed", "c.txt": "new"})
+    cache = DirectoryScanCache(str(tmp_path / "cache"), "key", "rules-1")
+    cache.load()
+    assert sorted(cache.plan(str(scan_dir))) == ["b.txt", "c.txt"]
+    replayed = cache.get_cached_findings(str(scan_dir))
+    assert len(replayed) == 1
+    assert replayed[0].file_path == str(scan_dir / "a.txt")
+    assert replayed[0].rule_name == "rule_1"
+    assert replayed[0].secret is None
+    assert replayed[0].secret_entropy == 1.0
+
+
+def test_cache_of_an_older_format_is_removed(tmp_path):
+    scan_dir = tmp_path / "repo"
+    write_tree(scan_dir, {"a.txt": "a"})
+    cache = DirectoryScanCache(str(tmp_path / "cache"), "key", "rules-1")
+    os.makedirs(cache.cache_directory)
+    with open(cache.cache_file_path, "w", encoding="utf-8") as cache_file:
+        json.dump({"version": 2, "rule_pack_hash": "rules-1", "files": {}}, cache_file)
+
+    cache.load()
+    assert not os.path.exists(cache.cache_file_path)
+    assert cache.plan(str(scan_dir)) == ["a.txt"]
+
+
+def test_rule_pack_change_invalidates_cache(tmp_path):
+    scan_dir = tmp_path / "repo"
+    write_tree(scan_dir, {"a.txt": "a"})
+
+    cache = DirectoryScanCache(str(tmp_path / "cache"), "key", "rules-1")
+    cache.plan(str(scan_dir))
+    cache.save()
+
+    cache = DirectoryScanCache(str(tmp_path / "cache"), "key", "rules-2")
+    cache.load()
+    assert cache.plan(str(scan_dir)) == ["a.txt"]
+
+
+def test_concurrent_saves_do_not_share_a_temporary_file(tmp_path):
+    scan_dir = tmp_path / "repo"
+    write_tree(scan_dir, {"a.txt": "a"})
+    caches = []
+    for _ in range(8):
+        cache = DirectoryScanCache(str(tmp_path / "cache"), "key", "rules-1")
+        cache.load()
+        cache.plan(str(scan_dir))
+        caches.append(cache)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda cache: [cache.save() for _ in range(20)], caches))
+
+    assert os.listdir(tmp_path / "cache") == [os.path.basename(caches[0].cache_file_path)]
+    cache = DirectoryScanCache(str(tmp_path / "cache"), "key", "rules-1")
+    cache.load()
+    assert cache.plan(str(scan_dir)) == []
@@ -0,0 +1,35 @@
+# Standard Library
+import json
+
+# First Party
+from vcs_scanner.api.schema.scan_type import ScanType
+from vcs_scanner.cache.scan_state import ScanStateStore
+
+REPOSITORY_URL = "https://fake.url/project/repository"
+
+
+def test_scan_state_round_trip(tmp_path):
+    state_store = ScanStateStore(str(tmp_path / "state" / "scans.json"))
+    assert state_store.get_last_scan(REPOSITORY_URL) is None
+
+    state_store.record_scan(REPOSITORY_URL, ScanType.BASE, "a" * 40, "1.0.0")
+    state_store.record_scan("https://fake.url/project/other", ScanType.BASE, "b" * 40, "1.0.0")
+    state_store.record_scan(REPOSITORY_URL, ScanType.INCREMENTAL, "c" * 40, "1.0.1")
+
+    last_scan = ScanStateStore(state_store.file_path).get_last_scan(REPOSITORY_URL)
+    assert last_scan.scan_type == ScanType.INCREMENTAL
+    assert last_scan.last_scanned_commit == "c" * 40
+    assert last_scan.rule_pack == "1.0.1"
+    assert state_store.get_last_scan("https://fake.url/project/other").last_scanned_commit == "b" * 40
+
+
+def test_scan_state_ignores_unreadable_file(tmp_path):
+    state_file = tmp_path / "scans.json"
+    state_file.write_text("not json")
+    assert ScanStateStore(str(state_file)).get_last_scan(REPOSITORY_URL) is None
+
+    state_file.write_text(json.dumps({"version": 0, "repositories": {REPOSITORY_URL: {}}}))
+    assert ScanStateStore(str(state_file)).get_last_scan(REPOSITORY_URL) is None
+
+    state_file.write_text(json.dumps({"version": 1, "repositories": {REPOSITORY_URL: {"rule_pack": "1.0.0"}}}))
+    assert ScanStateStore(str(state_file)).get_last_scan(REPOSITORY_URL) is None
@@ -0,0 +1,54 @@
+# Standard Library
+import socket
+import subprocess
+
+# First Party
+from vcs_scanner.cache.shared_history import SharedHistoryIndex
+
+
+def test_register_roots_returns_repositories_sharing_a_root(tmp_path):
+    index = SharedHistoryIndex(str(tmp_path), "rules-1")
+    assert index.register_roots("https://vcs/main", ["root-a"]) == []
+    assert index.register_roots("https://vcs/unrelated", ["root-b"]) == []
+    assert index.register_roots("https://vcs/fork", ["root-a", "root-c"]) == ["https://vcs/main"]
+    assert index.register_roots("https://vcs/main", ["root-a"]) == ["https://vcs/fork"]
+
+
+def test_claimed_commits_are_deferred_until_released(tmp_path):
+    first = SharedHistoryIndex(str(tmp_path), "rules-1")
+    second = SharedHistoryIndex(str(tmp_path), "rules-1")
+
+    assert first.claim(["a", "b"]) == (["a", "b"], [])
+    assert second.claim(["b", "c"]) == (["c"], ["b"])
+
+    first.release()
+    assert second.claim(["b"]) == (["b"], [])
+
+
+def test_expired_claims_are_taken_over(tmp_path):
+    first = SharedHistoryIndex(str(tmp_path), "rules-1", lease_seconds=-1)
+    second = SharedHistoryIndex(str(tmp_path), "rules-1")
+
+    assert first.claim(["a"]) == (["a"], [])
+    assert second.claim(["a"]) == (["a"], [])
+
+
+def test_live_claims_skip_released_and_gone_claims(tmp_path):
+    first = SharedHistoryIndex(str(tmp_path), "rules-1")
+    second = SharedHistoryIndex(str(tmp_path), "rules-1")
+    first.claim(["a", "b"])
+    assert second.live_claims(["a", "b", "c"]) == {"a", "b"}
+
+    first.release()
+    assert second.live_claims(["a", "b"]) == set()
+
+    gone = SharedHistoryIndex(str(tmp_path), "rules-1")
+    gone.owner = f"{socket.gethostname()}:{_finished_process_id()}:owner"
+    gone.claim(["a"])
+    assert second.live_claims(["a"]) == set()
+
+
+def _finished_process_id() -> int:
+    process = subprocess.Popen(["true"])
+    process.wait()
+    return process.pid
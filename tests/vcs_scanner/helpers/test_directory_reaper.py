@@ -0,0 +1,60 @@
+# Standard Library
+import os
+import time
+
+# First Party
+from vcs_scanner.helpers.directory_reaper import DirectoryReaper
+from vcs_scanner.helpers.metrics import SCRATCH_DIRECTORIES_REAPED
+
+
+def _create_tree(path, files: int = 3):
+    (path / "nested").mkdir(parents=True)
+    for index in range(files):
+        (path / "nested" / f"file_{index}.txt").write_text("content")
+    (path / "link").symlink_to(path / "nested")
+
+
+def test_discard_removes_directory_in_background(tmp_path):
+    clone = tmp_path / "scratch" / "clone"
+    _create_tree(clone)
+    reaper = DirectoryReaper(trash_directory=str(tmp_path / "scratch" / ".resc-trash"))
+    reaped = SCRATCH_DIRECTORIES_REAPED.get(origin="scan")
+
+    reaper.discard(str(clone))
+
+    assert not clone.exists()
+    assert reaper.wait(timeout=10)
+    assert os.listdir(tmp_path / "scratch" / ".resc-trash") == []
+    assert SCRATCH_DIRECTORIES_REAPED.get(origin="scan") == reaped + 1
+    # A directory which is already gone is ignored
+    reaper.discard(str(clone))
+
+
+def test_discard_is_throttled(tmp_path):
+    clone = tmp_path / "clone"
+    _create_tree(clone, files=300)
+    reaper = DirectoryReaper(trash_directory=str(tmp_path / ".resc-trash"), files_per_second=1000)
+
+    start = time.monotonic()
+    reaper.discard(str(clone))
+    assert reaper.wait(timeout=10)
+    assert time.monotonic() - start >= 0.3
+
+
+def test_sweep_orphans(tmp_path):
+    scratch = tmp_path / "scratch"
+    trash = scratch / ".resc-trash"
+    old = time.time() - 7200
+    for name in ("resc-scan-crashed", "resc-scan-running", "unrelated"):
+        _create_tree(scratch / name)
+    os.utime(scratch / "resc-scan-crashed", (old, old))
+    os.utime(scratch / "unrelated", (old, old))
+    _create_tree(trash / f"{int(old)}-abandoned-clone")
+    _create_tree(trash / f"{int(time.time())}-removing-clone")
+    reaper = DirectoryReaper(trash_directory=str(trash), scratch_directory=str(scratch), orphan_max_age_seconds=3600)
+
+    assert reaper.sweep_orphans() == 2
+    assert reaper.wait(timeout=10)
+
+    assert sorted(os.listdir(scratch)) == [".resc-trash", "resc-scan-running", "unrelated"]
+    assert [entry.split("-", 1)[1] for entry in os.listdir(trash)] == ["removing-clone"]
@@ -0,0 +1,29 @@
+# Standard Library
+import os
+import shutil
+
+# First Party
+from vcs_scanner.helpers.file_staging import list_files, restore_staged_path, stage_files
+
+
+def test_stage_files_keeps_the_gitleaks_settings_of_the_root(tmp_path):
+    directory = tmp_path / "repository"
+    (directory / "sub").mkdir(parents=True)
+    (directory / "sub" / "changed.py").write_text("changed")
+    (directory / "unchanged.py").write_text("unchanged")
+    (directory / ".gitleaksignore").write_text("fingerprint")
+    (directory / ".gitleaks.toml").write_text("[allowlist]")
+
+    staging_directory = stage_files(str(directory), [os.path.join("sub", "changed.py")], str(tmp_path))
+    try:
+        assert sorted(list_files(staging_directory)) == [
+            ".gitleaks.toml",
+            ".gitleaksignore",
+            os.path.join("sub", "changed.py"),
+        ]
+        staged_path = os.path.join(staging_directory, "sub", "changed.py")
+        assert restore_staged_path(staged_path, staging_directory, str(directory)) == str(
+            directory / "sub" / "changed.py"
+        )
+    finally:
+        shutil.rmtree(staging_directory)
@@ -0,0 +1,76 @@
+# Standard Library
+import urllib.request
+
+# Third Party
+import pytest
+
+# First Party
+from vcs_scanner.helpers.metrics import MetricsRegistry, start_metrics_server
+
+
+def test_render_counter_and_summary():
+    registry = MetricsRegistry()
+    counter = registry.counter("resc_test_total", "A test counter.", ("source",))
+    summary = registry.summary("resc_test_seconds", "A test summary.", ("stage",))
+
+    counter.inc(2, source="repo")
+    counter.inc(source="repo")
+    summary.observe(0.5, stage="clone_repo")
+    summary.observe(1.25, stage="clone_repo")
+
+    rendered = registry.render()
+    assert "# TYPE resc_test_total counter" in rendered
+    assert 'resc_test_total{source="repo"} 3' in rendered
+    assert "# TYPE resc_test_seconds summary" in rendered
+    assert 'resc_test_seconds_count{stage="clone_repo"} 2' in rendered
+    assert 'resc_test_seconds_sum{stage="clone_repo"} 1.75' in rendered
+
+
+def test_labels_are_escaped():
+    registry = MetricsRegistry()
+    counter = registry.counter("resc_test_total", "A test counter.", ("source",))
+    counter.inc(source='a "quoted"\nvalue')
+
+    assert 'resc_test_total{source="a \\"quoted\\"\\nvalue"} 1' in registry.render()
+
+
+def test_register_twice_returns_the_same_metric():
+    registry = MetricsRegistry()
+    counter = registry.counter("resc_test_total", "A test counter.")
+    assert registry.counter("resc_test_total", "A test counter.") is counter
+    with pytest.raises(ValueError):
+        registry.summary("resc_test_total", "A test summary.")
+
+
+def test_wrong_labels_are_rejected():
+    registry = MetricsRegistry()
+    counter = registry.counter("resc_test_total", "A test counter.", ("source",))
+    with pytest.raises(ValueError):
+        counter.inc(stage="clone_repo")
+    with pytest.raises(ValueError):
+        counter.inc(-1, source="repo")
+
+
+def test_write_to_file(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter("resc_test_total", "A test counter.").inc()
+    metrics_file = tmp_path / "metrics.prom"
+
+    registry.write_to_file(f"{metrics_file}")
+
+    assert "resc_test_total 1" in metrics_file.read_text(encoding="utf-8")
+
+
+def test_metrics_server():
+    registry = MetricsRegistry()
+    registry.counter("resc_test_total", "A test counter.").inc()
+    server = start_metrics_server(registry, port=0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            body = response.read().decode("utf-8")
+        assert response.status == 200
+        assert "resc_test_total 1" in body
+    finally:
+        server.shutdown()
+        server.server_close()
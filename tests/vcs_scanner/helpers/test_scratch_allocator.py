@@ -0,0 +1,83 @@
+# Standard Library
+import os
+import time
+
+# First Party
+from vcs_scanner.helpers.scratch_allocator import CLONE_SIZE_FACTOR, ScratchAllocator
+
+MB = 1024 * 1024
+
+
+def test_small_repositories_are_allocated_in_memory(tmp_path):
+    allocator = ScratchAllocator(str(tmp_path), max_repository_size_bytes=10 * MB, budget_bytes=100 * MB)
+
+    directory = allocator.allocate(5 * MB)
+    assert os.path.dirname(directory) == str(tmp_path)
+    assert os.path.isdir(directory)
+    assert allocator.reserved_bytes() == 5 * MB * CLONE_SIZE_FACTOR
+
+    # Repositories which are too large, or of which the size is unknown, are cloned on disk
+    assert allocator.allocate(11 * MB) is None
+    assert allocator.allocate(None) is None
+
+    allocator.release(directory)
+    assert not os.path.exists(directory)
+    assert allocator.reserved_bytes() == 0
+
+
+def test_budget_is_shared_between_allocators(tmp_path):
+    first = ScratchAllocator(str(tmp_path), max_repository_size_bytes=10 * MB, budget_bytes=30 * MB)
+    second = ScratchAllocator(str(tmp_path), max_repository_size_bytes=10 * MB, budget_bytes=30 * MB)
+
+    directory = first.allocate(10 * MB)
+    assert directory is not None
+    assert second.allocate(10 * MB) is None
+    assert second.allocate(5 * MB) is not None
+
+    first.release(directory)
+    assert second.allocate(5 * MB) is not None
+
+
+def test_expired_reservations_are_reclaimed(tmp_path):
+    crashed = ScratchAllocator(
+        str(tmp_path), max_repository_size_bytes=10 * MB, budget_bytes=20 * MB, reservation_seconds=-1
+    )
+    orphan = crashed.allocate(10 * MB)
+    (tmp_path / os.path.basename(orphan) / "clone.txt").write_text("content")
+
+    allocator = ScratchAllocator(str(tmp_path), max_repository_size_bytes=10 * MB, budget_bytes=20 * MB)
+    assert allocator.allocate(10 * MB) is not None
+    assert not os.path.exists(orphan)
+
+
+def test_reservations_in_use_are_renewed(tmp_path):
+    allocator = ScratchAllocator(
+        str(tmp_path), max_repository_size_bytes=10 * MB, budget_bytes=20 * MB, reservation_seconds=0.3
+    )
+    directory = allocator.allocate(10 * MB)
+
+    time.sleep(1)
+    other = ScratchAllocator(str(tmp_path), max_repository_size_bytes=10 * MB, budget_bytes=20 * MB)
+    assert other.reserved_bytes() == 10 * MB * CLONE_SIZE_FACTOR
+    assert other.allocate(10 * MB) is None
+    assert os.path.isdir(directory)
+
+    allocator.release(directory)
+    assert other.reserved_bytes() == 0
+
+
+def test_reservations_are_renewed_in_a_forked_process(tmp_path):
+    allocator = ScratchAllocator(
+        str(tmp_path), max_repository_size_bytes=10 * MB, budget_bytes=20 * MB, reservation_seconds=0.3
+    )
+    # The renewer of the parent is started before the fork, as for the allocator of the worker
+    allocator.release(allocator.allocate(10 * MB))
+
+    pid = os.fork()
+    if pid == 0:
+        directory = allocator.allocate(10 * MB)
+        time.sleep(1)
+        renewed = allocator.reserved_bytes() == 10 * MB * CLONE_SIZE_FACTOR and os.path.isdir(directory)
+        os._exit(0 if renewed else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
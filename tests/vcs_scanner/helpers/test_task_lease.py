@@ -0,0 +1,53 @@
+# First Party
+from vcs_scanner.helpers.task_lease import LeaseResult, TaskLeaseStore
+
+
+def test_duplicate_of_a_running_scan_is_reported(tmp_path):
+    store = TaskLeaseStore(str(tmp_path))
+
+    with store.lease("vcs:1", "commit-a") as first:
+        assert first == LeaseResult.ACQUIRED
+        with store.lease("vcs:1", "commit-a") as second:
+            assert second == LeaseResult.DUPLICATE
+        with store.lease("vcs:1", "commit-b") as newer:
+            assert newer == LeaseResult.BUSY
+        with store.lease("vcs:2", "commit-a") as other_repository:
+            assert other_repository == LeaseResult.ACQUIRED
+
+
+def test_lease_is_released_after_the_scan(tmp_path):
+    store = TaskLeaseStore(str(tmp_path))
+
+    with store.lease("vcs:1", "commit-a"):
+        pass
+    with store.lease("vcs:1", "commit-a") as result:
+        assert result == LeaseResult.ACQUIRED
+
+
+def test_lease_is_released_when_the_scan_fails(tmp_path):
+    store = TaskLeaseStore(str(tmp_path))
+
+    try:
+        with store.lease("vcs:1", "commit-a"):
+            raise RuntimeError("scan failed")
+    except RuntimeError:
+        pass
+    assert store.acquire("vcs:1", "commit-a", "owner") == LeaseResult.ACQUIRED
+
+
+def test_lease_is_shared_between_stores(tmp_path):
+    first = TaskLeaseStore(str(tmp_path))
+    second = TaskLeaseStore(str(tmp_path))
+
+    assert first.acquire("vcs:1", "commit-a", "first") == LeaseResult.ACQUIRED
+    assert second.acquire("vcs:1", "commit-a", "second") == LeaseResult.DUPLICATE
+    first.release("vcs:1", "first")
+    assert second.acquire("vcs:1", "commit-a", "second") == LeaseResult.ACQUIRED
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    first = TaskLeaseStore(str(tmp_path), lease_seconds=-1)
+    second = TaskLeaseStore(str(tmp_path))
+
+    assert first.acquire("vcs:1", "commit-a", "first") == LeaseResult.ACQUIRED
+    assert second.acquire("vcs:1", "commit-a", "second") == LeaseResult.ACQUIRED
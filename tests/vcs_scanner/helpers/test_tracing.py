@@ -0,0 +1,87 @@
+# Standard Library
+import json
+
+# Third Party
+import pytest
+
+# First Party
+from vcs_scanner.helpers.tracing import (
+    FileSpanExporter,
+    SpanExporter,
+    add_exporter,
+    get_current_span,
+    shutdown_exporters,
+    span,
+    traced,
+)
+
+
+class ListSpanExporter(SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def exporter():
+    list_exporter = ListSpanExporter()
+    add_exporter(list_exporter)
+    yield list_exporter
+    shutdown_exporters()
+
+
+def test_span_is_not_recorded_without_exporter():
+    with span("clone", repository="repo") as current:
+        current.set_attribute("size", 1)
+        assert get_current_span() is None
+    assert current.attributes == {}
+
+
+def test_nested_spans(exporter):
+    with span("scan", repository="repo") as parent:
+        with span("clone") as child:
+            child.set_attribute("size", 10)
+
+    assert [recorded.name for recorded in exporter.spans] == ["clone", "scan"]
+    assert child.parent_id == parent.span_id
+    assert child.trace_id == parent.trace_id
+    assert parent.parent_id is None
+    assert parent.attributes == {"repository": "repo"}
+    assert child.attributes == {"size": 10}
+    assert parent.duration_seconds >= child.duration_seconds
+
+
+def test_span_records_errors(exporter):
+    with pytest.raises(ValueError):
+        with span("parse"):
+            raise ValueError("invalid report")
+
+    assert exporter.spans[0].status == "error"
+    assert exporter.spans[0].error == "ValueError: invalid report"
+
+
+def test_traced_decorator(exporter):
+    @traced("gitleaks.parse_output")
+    def parse(value):
+        return value * 2
+
+    assert parse(2) == 4
+    assert exporter.spans[0].name == "gitleaks.parse_output"
+
+
+def test_file_span_exporter(tmp_path):
+    trace_file = tmp_path / "trace.jsonl"
+    add_exporter(FileSpanExporter(f"{trace_file}"))
+    try:
+        with span("scan"):
+            with span("post_processing.run"):
+                pass
+    finally:
+        shutdown_exporters()
+
+    lines = [json.loads(line) for line in trace_file.read_text(encoding="utf-8").splitlines()]
+    assert [line["name"] for line in lines] == ["post_processing.run", "scan"]
+    assert lines[0]["parent_id"] == lines[1]["span_id"]
+    assert "duration_seconds" in lines[0]
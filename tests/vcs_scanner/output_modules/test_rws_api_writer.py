@@ -204,6 +204,24 @@ def test_write_scan_unsuccessful(warning, post):
     warning.assert_called_with(f"Creating {expected_result.scan_type} scan failed with error: {400}->{expected_json}")
 
 
+@patch("requests.post")
+def test_write_scan_without_scanned_commit(post):
+    repository = RepositoryRead(
+        id_=1,
+        project_key="project_key",
+        repository_id=str(1),
+        repository_name="repository_name",
+        repository_url="http://repository.url",
+        vcs_instance=1,
+    )
+
+    result = RESTAPIWriter(rws_url="https://nonexistingwebsite.com").write_scan(
+        ScanType.BASE, None, datetime.now(UTC), repository, rule_pack="0.0.0"
+    )
+    assert result is None
+    post.assert_not_called()
+
+
 @patch("requests.get")
 def test_get_last_scan_for_repository(get):
     url = "https://nonexistingwebsite.com"
@@ -11,8 +11,10 @@ from vcs_scanner.api.schema.repository import (
     RepositoryRead,
 )
 from vcs_scanner.api.schema.scan import ScanRead
+from vcs_scanner.api.schema.scan_type import ScanType
 
 # First Party
+from vcs_scanner.cache.scan_state import ScanStateStore
 from vcs_scanner.helpers.providers.ignore_list import IgnoredListProvider
 from vcs_scanner.helpers.providers.rule_comment import RuleCommentProvider
 from vcs_scanner.helpers.providers.rule_tag import RuleTagProvider
@@ -342,3 +344,22 @@ def test_get_last_scanned_commit():
         rule_comment_provider=rule_comment_provider,
     ).get_last_scan_for_repository(repository)
     assert result is None
+
+
+def test_get_last_scanned_commit_from_state_store(tmp_path):
+    repository = RepositoryRead(
+        id_=1,
+        project_key="project_key",
+        repository_id=str(1),
+        repository_name="repository_name",
+        repository_url="http://repository.url",
+        vcs_instance=1,
+    )
+    state_store = ScanStateStore(str(tmp_path / "scans.json"))
+    state_store.record_scan(str(repository.repository_url), ScanType.BASE, "a" * 40, "1.0.0")
+
+    result = STDOUTWriter(exit_code_warn=2, exit_code_block=1, state_store=state_store).get_last_scan_for_repository(
+        repository
+    )
+    assert result.last_scanned_commit == "a" * 40
+    assert result.rule_pack == "1.0.0"
@@ -0,0 +1,54 @@
+# First Party
+from vcs_scanner.api.schema.finding import FindingBase
+from vcs_scanner.post_processing.processor_interface import PostProcessingStatus, Processor
+from vcs_scanner.post_processing.processor_registry import ProcessorRegistry
+
+
+class NoopProcessor(Processor):
+    def process_finding(self, finding: FindingBase) -> PostProcessingStatus:
+        return PostProcessingStatus.NOT_PROCESSED
+
+
+def test_rule_index_follows_the_order_of_the_tags():
+    block, warn = NoopProcessor(), NoopProcessor()
+    registry = ProcessorRegistry({"Block": block})
+    registry.register("Warn", warn)
+    rule_tags = {"rule_1": ["Warn", "Other", "Block"], "rule_2": ["Other"], "rule_3": ["Block"]}
+
+    index = registry.rule_index(rule_tags)
+
+    assert set(index) == {"rule_1", "rule_3"}
+    assert index["rule_1"].processors == [("Warn", warn), ("Block", block)]
+    assert index["rule_1"].tags == ("Warn", "Block")
+    assert not index["rule_1"].memoizable
+    assert "Warn" in registry and "Other" not in registry
+    assert len(registry) == 2
+
+
+def test_rule_index_is_built_once_per_rule_tags():
+    registry = ProcessorRegistry({"Block": NoopProcessor()})
+    rule_tags = {"rule_1": ["Block"]}
+
+    index = registry.rule_index(rule_tags)
+    assert registry.rule_index(rule_tags) is index
+    assert registry.rule_index({"rule_1": ["Block"]}) is not index
+
+    version = registry.version
+    other = NoopProcessor()
+    registry.register("Block", other)
+    assert registry.version == version + 1
+    assert registry.rule_index(rule_tags)["rule_1"].processors == [("Block", other)]
+
+
+def test_rule_is_memoizable_when_all_its_processors_are():
+    class MemoizableProcessor(NoopProcessor):
+        memoizable = True
+
+    registry = ProcessorRegistry(
+        {"Block": MemoizableProcessor(), "Warn": MemoizableProcessor(), "Info": NoopProcessor()}
+    )
+
+    index = registry.rule_index({"rule_1": ["Block", "Warn"], "rule_2": ["Block", "Info"]})
+
+    assert index["rule_1"].memoizable
+    assert not index["rule_2"].memoizable
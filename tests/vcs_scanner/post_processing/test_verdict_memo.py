@@ -0,0 +1,44 @@
+# First Party
+from vcs_scanner.post_processing.processor_interface import PostProcessingStatus
+from vcs_scanner.post_processing.verdict_memo import VerdictMemo, secret_fingerprint
+
+FALSE_POSITIVE = (PostProcessingStatus.FALSE_POSITIVE, "Block")
+
+
+def key(secret: str) -> tuple:
+    return "rule_1", ("Block",), secret_fingerprint(secret)
+
+
+def test_least_recently_used_verdict_is_evicted():
+    memo = VerdictMemo(maxsize=2)
+    memo.put_many([(key("a"), FALSE_POSITIVE), (key("b"), FALSE_POSITIVE)])
+    assert memo.get_many([key("a"), None]) == [FALSE_POSITIVE, None]
+
+    memo.put_many([(key("c"), FALSE_POSITIVE)])
+
+    assert memo.get_many([key("a"), key("b"), key("c")]) == [FALSE_POSITIVE, None, FALSE_POSITIVE]
+    assert len(memo) == 2
+
+
+def test_memo_of_size_zero_remembers_nothing():
+    memo = VerdictMemo(maxsize=0)
+    memo.put_many([(key("a"), FALSE_POSITIVE)])
+
+    assert memo.get_many([key("a")]) == [None]
+
+
+def test_validate_drops_the_verdicts_of_other_processors():
+    memo = VerdictMemo()
+    memo.validate(1)
+    memo.put_many([(key("a"), FALSE_POSITIVE)])
+
+    memo.validate(1)
+    assert memo.get_many([key("a")]) == [FALSE_POSITIVE]
+    memo.validate(2)
+    assert memo.get_many([key("a")]) == [None]
+
+
+def test_secret_fingerprint():
+    assert secret_fingerprint("hunter2") == secret_fingerprint("hunter2")
+    assert secret_fingerprint("hunter2") != secret_fingerprint("hunter3")
+    assert b"hunter2" not in secret_fingerprint("hunter2")
@@ -0,0 +1,110 @@
+# Standard Library
+import json
+import os
+import signal
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+from unittest.mock import MagicMock, patch
+
+# Third Party
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from celery.exceptions import SoftTimeLimitExceeded
+
+# First Party
+from vcs_scanner.api.schema.repository import RepositoryRead
+from vcs_scanner.api.schema.scan import ScanRead
+from vcs_scanner.api.schema.scan_type import ScanType
+from vcs_scanner.model import RepositoryRuntime
+from vcs_scanner.secret_scanners.gitleaks_wrapper import GitLeaksWrapper
+
+mp = MonkeyPatch()
+mp.setenv("GITLEAKS_PATH", "fake_gitleaks_path")
+mp.setenv("RESC_RABBITMQ_SERVICE_HOST", "fake-rabbitmq-host.fakehost.com")
+mp.setenv("RABBITMQ_DEFAULT_VHOST", "vhost")
+mp.setenv("RESC_API_NO_AUTH_SERVICE_HOST", "fake_api_service_host")
+mp.setenv("RABBITMQ_USERNAME", "fake user")
+mp.setenv("RABBITMQ_PASSWORD", "fake pass")
+mp.setenv("RABBITMQ_QUEUE", "queuename")
+mp.setenv("VCS_INSTANCES_FILE_PATH", "fake_vcs_instance_config_json_path")
+
+from vcs_scanner.secret_scanners import celery_worker  # noqa: E402  # isort:skip
+from vcs_scanner.secret_scanners.celery_worker import wait_for_scans  # noqa: E402  # isort:skip
+
+
+def test_soft_time_limit_cancels_the_scans_of_the_task(tmp_path):
+    fake_gitleaks = tmp_path / "gitleaks"
+    fake_gitleaks.write_text("#!/bin/sh\nexec sleep 30\n")
+    os.chmod(fake_gitleaks, os.stat(fake_gitleaks).st_mode | stat.S_IEXEC)
+    cancel_event = threading.Event()
+    gitleaks_wrapper = GitLeaksWrapper(
+        gitleaks_path=f"{fake_gitleaks}",
+        repository_path=f"{tmp_path}",
+        rules_filepath="rules.toml",
+        report_filepath=f"{tmp_path / 'report.json'}",
+        cancel_event=cancel_event,
+    )
+
+    # The pool process of celery raises the soft time limit from a signal handler in the task thread
+    def raise_soft_time_limit(_signal_number, _frame):
+        raise SoftTimeLimitExceeded()
+
+    previous_handler = signal.signal(signal.SIGUSR1, raise_soft_time_limit)
+    timer = threading.Timer(0.5, os.kill, args=(os.getpid(), signal.SIGUSR1))
+    start = time.monotonic()
+    try:
+        timer.start()
+        with pytest.raises(SoftTimeLimitExceeded):
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                wait_for_scans([executor.submit(gitleaks_wrapper.start_scan)], cancel_event)
+    finally:
+        timer.cancel()
+        signal.signal(signal.SIGUSR1, previous_handler)
+
+    assert cancel_event.is_set()
+    assert gitleaks_wrapper.truncated is True
+    assert time.monotonic() - start < 10
+
+
+def test_routed_task_carries_the_repository_but_not_its_last_scan():
+    repository_runtime = RepositoryRuntime(
+        repository_name="repository",
+        repository_id="1",
+        repository_url="https://vcs.example.com/repository",
+        project_key="project",
+        vcs_instance_name="vcs",
+        latest_commit="new_commit",
+    )
+    rws_repository = RepositoryRead(
+        id_=7,
+        project_key="project",
+        repository_id="1",
+        repository_name="repository",
+        repository_url="https://vcs.example.com/repository",
+        vcs_instance=1,
+    )
+    last_scan = ScanRead(
+        id_=3,
+        repository_id=7,
+        scan_type=ScanType.BASE,
+        last_scanned_commit="old_commit",
+        timestamp=datetime.now(UTC),
+        increment_number=0,
+        rule_pack="2.0.1",
+    )
+
+    with (
+        patch.object(celery_worker, "VCS_INSTANCES", {"vcs": MagicMock(id_=1)}),
+        patch.object(celery_worker.rws_writer, "write_repository", return_value=rws_repository),
+        patch.object(celery_worker.rws_writer, "get_last_scan_for_repository", return_value=last_scan),
+    ):
+        routes = celery_worker.route([repository_runtime], "2.0.1")
+
+    [messages] = routes.values()
+    routed = RepositoryRuntime(**json.loads(messages[0]))
+    assert routed.rws_repository == rws_repository
+    # The last scan can change before the lane runs the task
+    assert "last_scan" not in json.loads(messages[0])
@@ -1,17 +1,30 @@
 # Standard Library
+import os
 from argparse import ArgumentParser
 from pathlib import PosixPath
+from types import SimpleNamespace
+from unittest.mock import patch
 
 # Third Party
+import pytest
+from git import Repo
+
+from vcs_scanner.api.schema.scan_type import ScanType
 from vcs_scanner.api.schema.vcs_provider import VCSProviders
 
 # First Party
+from vcs_scanner.cache.scan_state import ScanStateStore
 from vcs_scanner.constants import CLI_VCS_AZURE, CLI_VCS_BITBUCKET, CLI_VCS_LOCAL_SCAN
+from vcs_scanner.output_modules.stdout_writer import STDOUTWriter
 from vcs_scanner.secret_scanners.cli import (
+    UNKNOWN_COMMIT,
+    _get_latest_commit,
+    _record_scan_state,
     create_cli_argparser,
     determine_vcs_name,
     get_repository_name_from_url,
     guess_vcs_provider,
+    scan_staged,
     validate_cli_arguments,
 )
 
@@ -105,6 +118,8 @@ def test_create_cli_argparser_repo_remote():
     assert args.gitleaks_path == PosixPath("/tmp")
     assert args.gitleaks_rules_path == PosixPath("/tmp")
     assert args.repo_url == "https://fake.url/repo"
+    assert args.password is None
+    assert args.state_file is None
 
 
 def test_create_cli_argparser_cli_tag():
@@ -115,3 +130,91 @@ def test_create_cli_argparser_cli_tag():
     args = validate_cli_arguments(args)
     assert args is not False
     assert args.include_tags == ["Cli", "second"]
+
+
+def test_create_cli_argparser_repo_staged():
+    parser = create_cli_argparser()
+    assert isinstance(parser, ArgumentParser)
+    argv = "repo staged --gitleaks-path=/tmp --gitleaks-rules-path=/tmp --dir=/tmp".split()
+    args = parser.parse_args(argv)
+    args = validate_cli_arguments(args)
+    assert args is not False
+    assert args.command == "repo"
+    assert args.repository_location == "staged"
+    assert args.dir == PosixPath("/tmp")
+    assert args.repo_name == "tmp"
+
+
+def test_scan_staged_reports_staged_secret(tmp_path):
+    repo = Repo.init(tmp_path / "repository")
+    (tmp_path / "repository" / "config.py").write_text("password = 'something'\n")
+    repo.index.add(["config.py"])
+    rules_path = os.path.join(os.path.dirname(__file__), "..", "..", "fixtures", "rules.toml")
+    argv = [
+        "repo",
+        "staged",
+        "--gitleaks-path=/tmp",
+        f"--gitleaks-rules-path={rules_path}",
+        f"--dir={tmp_path / 'repository'}",
+        "--engine=native",
+    ]
+    args = validate_cli_arguments(create_cli_argparser().parse_args(argv))
+
+    # The STDOUT writer exits with the exit code of the blocking finding in the staged file
+    with pytest.raises(SystemExit) as exit_info:
+        scan_staged(args)
+    assert exit_info.value.code == args.exit_code_block
+
+
+def test_get_latest_commit_of_remote_repository(tmp_path):
+    parser = create_cli_argparser()
+    argv = "repo remote --gitleaks-path=/tmp --gitleaks-rules-path=/tmp --repo-url=https://fake.url/repo".split()
+    args = validate_cli_arguments(parser.parse_args(argv))
+
+    # Without the RWS or a state file there is no last scan to compare the HEAD with
+    with patch("vcs_scanner.secret_scanners.git_operation.get_remote_head") as remote_head:
+        assert _get_latest_commit(args) == UNKNOWN_COMMIT
+    remote_head.assert_not_called()
+
+    args = validate_cli_arguments(parser.parse_args([*argv, f"--state-file={tmp_path / 'scans.json'}"]))
+
+    with patch("vcs_scanner.secret_scanners.git_operation.get_remote_head", return_value="a" * 40) as remote_head:
+        assert _get_latest_commit(args) == "a" * 40
+    remote_head.assert_called_once_with(
+        repository_url="https://fake.url/repo", username=None, personal_access_token=None
+    )
+
+    with patch("vcs_scanner.secret_scanners.git_operation.get_remote_head", return_value=None):
+        assert _get_latest_commit(args) == UNKNOWN_COMMIT
+
+    args = parser.parse_args("repo local --gitleaks-path=/tmp --gitleaks-rules-path=/tmp --dir=/tmp".split())
+    with patch("vcs_scanner.secret_scanners.git_operation.get_remote_head") as remote_head:
+        assert _get_latest_commit(args) == UNKNOWN_COMMIT
+    remote_head.assert_not_called()
+
+
+def test_record_scan_state(tmp_path):
+    output_plugin = STDOUTWriter(
+        exit_code_warn=2, exit_code_block=1, state_store=ScanStateStore(str(tmp_path / "scans.json"))
+    )
+    secret_scanner = SimpleNamespace(
+        scan_completed=True,
+        truncated=False,
+        head_commit=SimpleNamespace(hexsha="b" * 40),
+        latest_commit="a" * 40,
+        repository=SimpleNamespace(repository_url="https://fake.url/repo"),
+        scan_type=ScanType.BASE,
+        rule_pack_version="1.0.0",
+    )
+
+    _record_scan_state(output_plugin, secret_scanner)
+    assert output_plugin.state_store.get_last_scan("https://fake.url/repo").last_scanned_commit == "b" * 40
+
+    # Scans which did not report all their findings are not recorded
+    secret_scanner.head_commit = SimpleNamespace(hexsha="c" * 40)
+    secret_scanner.truncated = True
+    _record_scan_state(output_plugin, secret_scanner)
+    secret_scanner.truncated = False
+    secret_scanner.scan_completed = False
+    _record_scan_state(output_plugin, secret_scanner)
+    assert output_plugin.state_store.get_last_scan("https://fake.url/repo").last_scanned_commit == "b" * 40
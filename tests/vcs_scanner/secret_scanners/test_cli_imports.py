@@ -0,0 +1,55 @@
+# Standard Library
+import json
+import os
+import subprocess
+import sys
+
+# First Party
+from benchmarks.cli_startup import CLI_ENTRY_POINT, FAKE_GITLEAKS, RULES, _child_environment
+
+# Modules only the clone of a repository or the upload to the RWS need
+HEAVY_MODULES = ("git", "requests", "tenacity", "vcs_scanner.output_modules.rws_api_writer")
+
+PRINT_MODULES = (
+    "import atexit, json, sys\natexit.register(lambda: print(json.dumps(sorted(sys.modules)), file=sys.stderr))\n"
+)
+
+
+def _loaded_modules(tmp_path, code: str, *arguments: str) -> set[str]:
+    result = subprocess.run(
+        [sys.executable, "-c", PRINT_MODULES + code, *arguments],
+        cwd=tmp_path,
+        env=_child_environment(),
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return set(json.loads(result.stderr.strip().splitlines()[-1]))
+
+
+def test_import_cli_loads_standard_library_only(tmp_path):
+    modules = _loaded_modules(tmp_path, "import vcs_scanner.secret_scanners.cli")
+
+    assert "vcs_scanner.secret_scanners.cli" in modules
+    for module in HEAVY_MODULES + ("pydantic", "vcs_scanner.common", "vcs_scanner.secret_scanners.secret_scanner"):
+        assert module not in modules
+
+
+def test_scan_directory_does_not_load_git_or_rws_modules(tmp_path):
+    scanned_directory = tmp_path / "scanned"
+    scanned_directory.mkdir()
+    (scanned_directory / "settings.py").write_text("DEBUG = False\n")
+
+    modules = _loaded_modules(
+        tmp_path,
+        CLI_ENTRY_POINT,
+        "dir",
+        f"--gitleaks-path={FAKE_GITLEAKS}",
+        f"--gitleaks-rules-path={RULES}",
+        f"--dir={scanned_directory}",
+    )
+
+    assert "vcs_scanner.secret_scanners.secret_scanner" in modules
+    for module in HEAVY_MODULES:
+        assert module not in modules
+    assert os.path.isdir(scanned_directory)
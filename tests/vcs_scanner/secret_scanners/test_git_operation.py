@@ -1,8 +1,26 @@
 # Standard Library
+import fcntl
+import os
+import time
 from unittest.mock import patch
 
+# Third Party
+from git import Repo
+
 # First Party
-from vcs_scanner.secret_scanners.git_operation import clone_repository
+from vcs_scanner.helpers.keyword_filter import KeywordFilter
+from vcs_scanner.secret_scanners.git_operation import (
+    CLONE_ENVIRONMENT,
+    clone_repository,
+    filter_commits_by_keywords,
+    get_remote_head,
+    list_changed_files,
+    list_commits,
+    list_ref_tips,
+    list_remote_ref_tips,
+    maintain_object_store,
+    update_object_store,
+)
 
 
 @patch("git.repo.base.Repo.clone_from")
@@ -22,4 +40,172 @@ def test_clone_repository(clone_from):
     clone_from.assert_called_once()
     url = str(repository_url).replace("https://", "")
     expected_repo_clone_url = f"https://{username}:{personal_access_token}@{url}"
-    clone_from.assert_called_once_with(expected_repo_clone_url, repo_clone_path)
+    clone_from.assert_called_once_with(expected_repo_clone_url, repo_clone_path, env=CLONE_ENVIRONMENT)
+
+
+def test_get_remote_head(tmp_path):
+    repo = Repo.init(tmp_path / "remote")
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+    assert get_remote_head(str(tmp_path / "remote")) is None
+
+    (tmp_path / "remote" / "file.txt").write_text("content")
+    repo.index.add(["file.txt"])
+    head = repo.index.commit("first").hexsha
+
+    assert get_remote_head(str(tmp_path / "remote")) == head
+    assert get_remote_head(str(tmp_path / "missing")) is None
+
+
+def test_clone_repository_borrows_objects_from_object_store(tmp_path):
+    first = Repo.init(tmp_path / "first")
+    with first.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+    (tmp_path / "first" / "vendored.txt").write_text("vendored content\n" * 1000)
+    first.index.add(["vendored.txt"])
+    first.index.commit("vendored")
+    second = first.clone(tmp_path / "second")
+    (tmp_path / "second" / "own.txt").write_text("own content")
+    second.index.add(["own.txt"])
+    second.index.commit("own")
+
+    object_store = str(tmp_path / "objects" / "project.git")
+    assert update_object_store(object_store, f"file://{tmp_path / 'first'}")
+    assert update_object_store(object_store, f"file://{tmp_path / 'second'}")
+    assert not update_object_store(object_store, f"file://{tmp_path / 'missing'}")
+
+    head = clone_repository(f"file://{tmp_path / 'second'}", str(tmp_path / "clone"), reference=object_store)
+    assert head.hexsha == second.head.commit.hexsha
+    clone = Repo(tmp_path / "clone")
+    assert (tmp_path / "clone" / ".git" / "objects" / "info" / "alternates").read_text().strip() == (
+        f"{object_store}/objects"
+    )
+    # Every object is borrowed from the store, none was downloaded into the clone
+    statistics = dict(line.split(": ", 1) for line in clone.git.count_objects("-v").splitlines())
+    assert statistics["count"] == "0"
+    assert statistics["in-pack"] == "0"
+
+
+def test_list_commits(tmp_path):
+    repo = Repo.init(tmp_path)
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+    commits = []
+    for i in range(3):
+        (tmp_path / "file.txt").write_text(str(i))
+        repo.index.add(["file.txt"])
+        commits.append(repo.index.commit(f"commit {i}").hexsha)
+
+    assert list_commits(str(tmp_path)) == list(reversed(commits))
+    assert list_commits(str(tmp_path), scan_from=commits[0]) == [commits[2], commits[1]]
+
+
+def test_list_new_commits_of_all_branches(tmp_path):
+    remote = Repo.init(tmp_path / "remote", initial_branch="main")
+    with remote.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+    base = remote.index.commit("base").hexsha
+    remote.create_head("feature")
+    remote.create_tag("v1", message="release")
+    clone = remote.clone(tmp_path / "clone")
+
+    scanned_tips = {"refs/heads/main": base, "refs/heads/feature": base, "refs/tags/v1": base}
+    assert list_ref_tips(str(tmp_path / "clone"), remote="origin") == scanned_tips
+    assert list_remote_ref_tips(str(tmp_path / "remote")) == scanned_tips
+    assert list_remote_ref_tips(str(tmp_path / "missing")) is None
+
+    remote.heads.feature.checkout()
+    shared = remote.index.commit("shared").hexsha
+    remote.create_head("topic")
+    feature = remote.index.commit("feature").hexsha
+    clone.remote().fetch()
+
+    # The commit on both branches is listed once, the tip of a deleted branch is ignored
+    tips = [*scanned_tips.values(), "0" * 40]
+    assert list_commits(str(tmp_path / "clone"), scanned_tips=tips) == [feature, shared]
+    assert list_ref_tips(str(tmp_path / "clone"), remote="origin") == {
+        "refs/heads/main": base,
+        "refs/heads/feature": feature,
+        "refs/heads/topic": shared,
+        "refs/tags/v1": base,
+    }
+    assert list_ref_tips(str(tmp_path / "clone"))["refs/remotes/origin/topic"] == shared
+
+
+def test_filter_commits_by_keywords(tmp_path):
+    repo = Repo.init(tmp_path)
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+    commits = []
+    for content in ("plain text\n", "aws = 'AKIA0000000000000000'\n", "plain text again\n"):
+        (tmp_path / "file.txt").write_text(content)
+        repo.index.add(["file.txt"])
+        commits.append(repo.index.commit("commit").hexsha)
+
+    candidates = filter_commits_by_keywords(str(tmp_path), list(reversed(commits)), KeywordFilter(["akia"]))
+
+    # The last commit removes the keyword, only added lines count
+    assert candidates == [commits[1]]
+    assert filter_commits_by_keywords(str(tmp_path), [], KeywordFilter(["akia"])) == []
+
+
+def test_list_changed_files(tmp_path):
+    repo = Repo.init(tmp_path)
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+    (tmp_path / ".gitignore").write_text(".env\n")
+    for name in ("unchanged.txt", "modified.txt", "removed.txt"):
+        (tmp_path / name).write_text(name)
+    repo.index.add([".gitignore", "unchanged.txt", "modified.txt", "removed.txt"])
+    scanned_commit = repo.index.commit("scanned").hexsha
+
+    (tmp_path / "modified.txt").write_text("changed")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "added.txt").write_text("added")
+    repo.index.add(["modified.txt", "sub/added.txt"])
+    repo.index.remove(["removed.txt"], working_tree=True)
+    repo.index.commit("new")
+    (tmp_path / "untracked.txt").write_text("untracked")
+    (tmp_path / ".env").write_text("ignored")
+
+    assert list_changed_files(str(tmp_path), scanned_commit) == [
+        ".env",
+        "modified.txt",
+        "sub/added.txt",
+        "untracked.txt",
+    ]
+    assert list_changed_files(str(tmp_path / "sub"), scanned_commit) == ["added.txt"]
+    assert list_changed_files(str(tmp_path), "0" * 40) is None
+
+
+def test_object_store_is_maintained_once_per_interval_and_not_during_fetches(tmp_path):
+    repository = Repo.init(tmp_path / "repository")
+    with repository.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+    (tmp_path / "repository" / "file.txt").write_text("content")
+    repository.index.add(["file.txt"])
+    repository.index.commit("first")
+    object_store = str(tmp_path / "objects" / "project.git")
+    assert update_object_store(object_store, f"file://{tmp_path / 'repository'}")
+
+    # A new store is only maintained once its first interval passed
+    assert not maintain_object_store(object_store, interval_seconds=60)
+    os.utime(f"{object_store}.maintained", (time.time() - 120, time.time() - 120))
+    with open(f"{object_store}.lock", encoding="utf-8") as fetch_lock:
+        fcntl.flock(fetch_lock, fcntl.LOCK_SH)
+        assert not maintain_object_store(object_store, interval_seconds=60)
+    assert maintain_object_store(object_store, interval_seconds=60)
+    assert not maintain_object_store(object_store, interval_seconds=60)
+    assert os.listdir(f"{object_store}/objects/pack")
+
+    with open(f"{object_store}.lock", encoding="utf-8") as maintenance_lock:
+        fcntl.flock(maintenance_lock, fcntl.LOCK_EX)
+        assert not update_object_store(object_store, f"file://{tmp_path / 'repository'}")
+    assert update_object_store(object_store, f"file://{tmp_path / 'repository'}")
@@ -1,13 +1,17 @@
 # Standard Library
+import os
+import stat
+import subprocess
 import sys
 from datetime import UTC, datetime
+from unittest.mock import patch
 
 # Third Party
 from _pytest.monkeypatch import MonkeyPatch
 
 # First Party
 from vcs_scanner.constants import LEAKS_FOUND_EXIT_CODE
-from vcs_scanner.secret_scanners.gitleaks_wrapper import GitLeaksWrapper
+from vcs_scanner.secret_scanners.gitleaks_wrapper import GitLeaksLimits, GitLeaksWrapper
 
 sys.path.insert(0, "src")
 
@@ -155,3 +159,168 @@ def test_secret_scanner_build_gitleaks_command_for_incremental_scan():
     assert f"--report-path={report_filepath}" in gitleaks_command
     assert f"--exit-code={LEAKS_FOUND_EXIT_CODE}" in gitleaks_command
     assert f"--log-opts={scan_from}.." in gitleaks_command
+
+
+def test_secret_scanner_build_gitleaks_command_for_staged_scan():
+    gitleaks_path = "/usr/bin/gitleaks"
+    rules_filepath = "/usr/bin/gitleaks/rules.toml"
+    report_filepath = "/tmp"
+    repo_clone_path = "/tmp/project1"
+
+    gitleaks_wrapper = GitLeaksWrapper(
+        scan_from="fake-hash",
+        gitleaks_path=gitleaks_path,
+        repository_path=repo_clone_path,
+        rules_filepath=rules_filepath,
+        report_filepath=report_filepath,
+        staged=True,
+    )
+    gitleaks_command = gitleaks_wrapper._build_gitleaks_command()
+    assert gitleaks_command
+    assert len(gitleaks_command) == 7
+    assert gitleaks_command[0] == gitleaks_path
+    assert gitleaks_command[1] == "protect"
+    assert f"--source={repo_clone_path}" in gitleaks_command
+    assert "--staged" in gitleaks_command
+    assert "--log-opts=fake-hash.." not in gitleaks_command
+
+
+def test_secret_scanner_build_gitleaks_command_for_explicit_commits():
+    gitleaks_wrapper = GitLeaksWrapper(
+        scan_from="fake-hash",
+        gitleaks_path="/usr/bin/gitleaks",
+        repository_path="/tmp/project1",
+        rules_filepath="/usr/bin/gitleaks/rules.toml",
+        report_filepath="/tmp",
+        commits=["sha1", "sha2"],
+    )
+    gitleaks_command = gitleaks_wrapper._build_gitleaks_command()
+    assert len(gitleaks_command) == 7
+    assert "--log-opts=--no-walk sha1 sha2" in gitleaks_command
+    assert "--log-opts=fake-hash.." not in gitleaks_command
+
+
+def test_secret_scanner_build_gitleaks_command_with_limits():
+    gitleaks_wrapper = GitLeaksWrapper(
+        gitleaks_path="/usr/bin/gitleaks",
+        repository_path="/tmp/project1",
+        rules_filepath="/usr/bin/gitleaks/rules.toml",
+        report_filepath="/tmp",
+        limits=GitLeaksLimits(timeout_seconds=60),
+    )
+    gitleaks_command = gitleaks_wrapper._build_gitleaks_command()
+    assert "--verbose" in gitleaks_command
+    assert "--no-color" in gitleaks_command
+
+
+def test_parse_verbose_output():
+    output = (
+        "Finding:     password = hunter2\n"
+        "Secret:      hunter2\n"
+        "RuleID:      generic-password\n"
+        "Entropy:     2.5\n"
+        "File:        /tmp/project1/config.py\n"
+        "Line:        12\n"
+        "Commit:      123abc\n"
+        "Author:      Jane\n"
+        "Email:       jane@example.com\n"
+        "Date:        2020-08-07T16:31:11Z\n"
+        "Fingerprint: 123abc:config.py:generic-password:12\n"
+        "\n"
+        "10:00AM WRN leaks found: 1\n"
+    )
+    findings = GitLeaksWrapper._parse_verbose_output(output)
+    assert len(findings) == 1
+    assert findings[0].rule_name == "generic-password"
+    assert findings[0].file_path == "/tmp/project1/config.py"
+    assert findings[0].line_number == 12
+    assert findings[0].commit_id == "123abc"
+    assert findings[0].email == "jane@example.com"
+    assert findings[0].secret == "hunter2"
+
+
+def test_start_scan_timeout_returns_partial_findings(tmp_path):
+    fake_gitleaks = tmp_path / "gitleaks"
+    fake_gitleaks.write_text(
+        "#!/bin/sh\nprintf 'RuleID: generic-password\\nFile: config.py\\nLine: 3\\n\\n'\nexec sleep 30\n"
+    )
+    os.chmod(fake_gitleaks, os.stat(fake_gitleaks).st_mode | stat.S_IEXEC)
+
+    gitleaks_wrapper = GitLeaksWrapper(
+        gitleaks_path=f"{fake_gitleaks}",
+        repository_path=f"{tmp_path}",
+        rules_filepath="rules.toml",
+        report_filepath=f"{tmp_path / 'report.json'}",
+        limits=GitLeaksLimits(timeout_seconds=0.5),
+    )
+    findings = gitleaks_wrapper.start_scan()
+    assert gitleaks_wrapper.truncated is True
+    assert gitleaks_wrapper.succeeded() is False
+    assert len(findings) == 1
+    assert findings[0].rule_name == "generic-password"
+    assert findings[0].line_number == 3
+
+
+def _write_fake_gitleaks(tmp_path, script: str) -> str:
+    fake_gitleaks = tmp_path / "gitleaks"
+    fake_gitleaks.write_text(f"#!/bin/sh\n{script}\n")
+    os.chmod(fake_gitleaks, os.stat(fake_gitleaks).st_mode | stat.S_IEXEC)
+    return f"{fake_gitleaks}"
+
+
+def test_start_scan_failure_of_bounded_scan_is_not_truncated(tmp_path):
+    gitleaks_wrapper = GitLeaksWrapper(
+        gitleaks_path=_write_fake_gitleaks(tmp_path, "echo 'unable to load config' >&2\nexit 1"),
+        repository_path=f"{tmp_path}",
+        rules_filepath="missing.toml",
+        report_filepath=f"{tmp_path / 'report.json'}",
+        limits=GitLeaksLimits(timeout_seconds=60, max_cpu_seconds=60),
+    )
+    assert gitleaks_wrapper.start_scan() == []
+    assert gitleaks_wrapper.truncated is False
+    assert gitleaks_wrapper.succeeded() is False
+
+
+def test_start_scan_stopped_by_cpu_limit_is_truncated(tmp_path):
+    gitleaks_wrapper = GitLeaksWrapper(
+        gitleaks_path=_write_fake_gitleaks(
+            tmp_path, "printf 'RuleID: generic-password\\nFile: config.py\\nLine: 3\\n\\n'\nkill -XCPU $$"
+        ),
+        repository_path=f"{tmp_path}",
+        rules_filepath="rules.toml",
+        report_filepath=f"{tmp_path / 'report.json'}",
+        limits=GitLeaksLimits(max_cpu_seconds=60),
+    )
+    findings = gitleaks_wrapper.start_scan()
+    assert gitleaks_wrapper.truncated is True
+    assert [finding.rule_name for finding in findings] == ["generic-password"]
+
+
+def test_start_scan_applies_resource_limits_without_preexec_fn(tmp_path):
+    limits_file = tmp_path / "limits"
+    gitleaks_wrapper = GitLeaksWrapper(
+        # The limits are applied right after the start, give them the time to be set
+        gitleaks_path=_write_fake_gitleaks(tmp_path, f"sleep 1\nulimit -v > {limits_file}\nulimit -t >> {limits_file}"),
+        repository_path=f"{tmp_path}",
+        rules_filepath="rules.toml",
+        report_filepath=f"{tmp_path / 'report.json'}",
+        limits=GitLeaksLimits(max_memory_bytes=1024**3, max_cpu_seconds=60),
+    )
+    with patch("subprocess.Popen", wraps=subprocess.Popen) as popen:
+        assert gitleaks_wrapper.start_scan() == []
+    assert "preexec_fn" not in popen.call_args.kwargs
+    assert limits_file.read_text().split() == [str(1024**2), "60"]
+
+
+def test_parse_output_keeps_the_secret_out_of_the_finding_fields(tmp_path):
+    report = tmp_path / "report.json"
+    report.write_text(
+        '[{"File": "config.py", "StartLine": 3, "StartColumn": 1, "EndColumn": 20, "Email": "jane@example.com", '
+        '"Author": "Jane", "Commit": "123abc", "Message": "add config", "Date": "2020-08-07T16:31:11Z", '
+        '"RuleID": "generic-password", "Secret": "hunter2", "Entropy": 2.5}]'
+    )
+
+    findings = GitLeaksWrapper._parse_output(str(report))
+
+    assert findings[0].secret == "hunter2"
+    assert "hunter2" not in findings[0].model_dump_json()
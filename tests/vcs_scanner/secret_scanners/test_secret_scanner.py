@@ -1,17 +1,26 @@
 # Standard Library
+import errno
+import os
 import sys
+import time
 from datetime import UTC, datetime
 from unittest.mock import patch
 
 # Third Party
+import pytest
 from _pytest.monkeypatch import MonkeyPatch
 
-from vcs_scanner.api.schema.repository import Repository
+from vcs_scanner.api.schema.repository import Repository, RepositoryRead
 from vcs_scanner.api.schema.scan import ScanRead
 from vcs_scanner.api.schema.scan_type import ScanType
+from vcs_scanner.cache.commit_cache import CommitScanCache
+from vcs_scanner.cache.shared_history import SharedHistoryIndex
 
 # First Party
+from vcs_scanner.helpers.directory_reaper import DirectoryReaper
+from vcs_scanner.helpers.metrics import SCAN_STAGE_DURATION, SCANS
 from vcs_scanner.helpers.providers.rule_file import RuleFileProvider
+from vcs_scanner.helpers.scratch_allocator import ScratchAllocator
 from vcs_scanner.output_modules.rws_api_writer import RESTAPIWriter
 
 sys.path.insert(0, "src")
@@ -26,6 +35,7 @@ mp.setenv("RABBITMQ_PASSWORD", "fake pass")
 mp.setenv("RABBITMQ_QUEUE", "queuename")
 mp.setenv("VCS_INSTANCES_FILE_PATH", "fake_vcs_instance_config_json_path")
 
+from vcs_scanner.secret_scanners.git_operation import CLONE_ENVIRONMENT  # noqa: E402  # isort:skip
 from vcs_scanner.secret_scanners.secret_scanner import SecretScanner  # noqa: E402  # isort:skip
 
 BITBUCKET_USERNAME = "test"
@@ -63,7 +73,7 @@ def test_clone_repo(clone_from):
     expected_repo_clone_path = f"{secret_scanner._scan_tmp_directory}/{repository.repository_name}"
     expected_repo_clone_url = f"https://{username}:{personal_access_token}@{url}"
     clone_from.assert_called_once()
-    clone_from.assert_called_once_with(expected_repo_clone_url, expected_repo_clone_path)
+    clone_from.assert_called_once_with(expected_repo_clone_url, expected_repo_clone_path, env=CLONE_ENVIRONMENT)
 
 
 @patch("vcs_scanner.secret_scanners.gitleaks_wrapper.GitLeaksWrapper.start_scan")
@@ -124,6 +134,19 @@ def test_scan_directory(start_scan):
     start_scan.assert_called_once()
 
 
+@patch("vcs_scanner.secret_scanners.gitleaks_wrapper.GitLeaksWrapper.start_scan")
+def test_failed_scan_directory_is_recorded_as_failed(start_scan, tmp_path):
+    start_scan.side_effect = OSError("gitleaks not found")
+    secret_scanner = initialize_and_get_repo_scanner()
+    assert secret_scanner._scan_directory(directory_path=str(tmp_path)) is None
+    assert secret_scanner._scan_failed
+
+    # An interrupt of the worker is not taken for a scan without findings
+    start_scan.side_effect = KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        secret_scanner._scan_directory(directory_path=str(tmp_path))
+
+
 # not a test class
 def initialize_and_get_repo_scanner():
     repository = Repository(
@@ -224,3 +247,344 @@ def test_scan_type_is_incremental_when_a_latest_scan_is_present_and_rule_pack_is
     secret_scanner.latest_commit = "latest_commit"
     scan_type = secret_scanner._determine_scan_type(scan_read)
     assert scan_type == ScanType.INCREMENTAL
+
+
+def test_run_scan_records_stage_metrics():
+    secret_scanner = initialize_and_get_repo_scanner()
+    secret_scanner.latest_commit = None
+    stage_count, _ = SCAN_STAGE_DURATION.get(stage="is_scan_needed_from_latest_commit", outcome="stopped")
+    scans = SCANS.get(stage="is_scan_needed_from_latest_commit", outcome="stopped")
+
+    secret_scanner.run_scan(as_repo=True)
+
+    assert SCAN_STAGE_DURATION.get(stage="is_scan_needed_from_latest_commit", outcome="stopped")[0] == stage_count + 1
+    assert SCANS.get(stage="is_scan_needed_from_latest_commit", outcome="stopped") == scans + 1
+
+
+def test_cleaning_up_hands_clone_to_directory_reaper(tmp_path):
+    clone = tmp_path / "repository_name"
+    (clone / ".git").mkdir(parents=True)
+    reaper = DirectoryReaper(trash_directory=str(tmp_path / ".resc-trash"))
+    secret_scanner = initialize_and_get_repo_scanner()
+    secret_scanner.local_path = None
+    secret_scanner.directory_reaper = reaper
+    secret_scanner._repo_clone_path = str(clone)
+
+    with patch.object(reaper, "discard", wraps=reaper.discard) as discard:
+        secret_scanner._cleaning_up()
+    discard.assert_called_once_with(str(clone))
+    assert not clone.exists()
+    assert reaper.wait(timeout=10)
+
+
+@patch("vcs_scanner.secret_scanners.git_operation.get_object_database_size", return_value=0)
+@patch("vcs_scanner.secret_scanners.git_operation.clone_repository")
+def test_clone_repo_in_memory_scratch_directory(clone_repository, _object_database_size, tmp_path):
+    # Third Party
+    from git import GitCommandError
+
+    allocator = ScratchAllocator(str(tmp_path / "memory"), max_repository_size_bytes=1024 * 1024, budget_bytes=10**9)
+    secret_scanner = initialize_and_get_repo_scanner()
+    secret_scanner.local_path = None
+    secret_scanner._scan_tmp_directory = str(tmp_path / "disk")
+    secret_scanner.scratch_allocator = allocator
+    secret_scanner.estimated_size_kb = 100
+
+    secret_scanner._clone_repo()
+    memory_directory = secret_scanner._memory_scratch_directory
+    assert secret_scanner._repo_clone_path == f"{memory_directory}/{secret_scanner.repository.repository_name}"
+    assert allocator.reserved_bytes() > 0
+    secret_scanner._cleaning_up()
+    assert not os.path.exists(memory_directory)
+    assert allocator.reserved_bytes() == 0
+
+    # A clone which does not fit in memory is cloned on disk
+    clone_repository.side_effect = [GitCommandError("clone", 128, stderr="No space left on device"), None]
+    secret_scanner._clone_repo()
+    assert secret_scanner._repo_clone_path == f"{tmp_path / 'disk'}/{secret_scanner.repository.repository_name}"
+    assert secret_scanner._memory_scratch_directory is None
+    assert allocator.reserved_bytes() == 0
+
+    # The error is recognized by its errno, not by a translated message
+    clone_repository.side_effect = [OSError(errno.ENOSPC, "Kein Platz"), None]
+    secret_scanner._clone_repo()
+    assert secret_scanner._repo_clone_path == f"{tmp_path / 'disk'}/{secret_scanner.repository.repository_name}"
+    clone_repository.side_effect = [GitCommandError("clone", 128, stderr="Authentication failed")]
+    with pytest.raises(GitCommandError):
+        secret_scanner._clone_repo()
+    assert secret_scanner._memory_scratch_directory is not None
+
+
+@patch("vcs_scanner.secret_scanners.git_operation.get_object_database_size", return_value=0)
+@patch("vcs_scanner.secret_scanners.git_operation.clone_repository")
+@patch("vcs_scanner.secret_scanners.git_operation.update_object_store")
+def test_clone_repo_with_project_object_store(update_object_store, clone_repository, _object_database_size, tmp_path):
+    secret_scanner = initialize_and_get_repo_scanner()
+    secret_scanner.local_path = None
+    secret_scanner.object_store_directory = str(tmp_path)
+
+    update_object_store.return_value = True
+    secret_scanner._clone_repo()
+    object_store = update_object_store.call_args.kwargs["object_store_path"]
+    assert os.path.dirname(object_store) == str(tmp_path)
+    assert clone_repository.call_args.kwargs["reference"] == object_store
+
+    # Repositories of the same project share the store, when it cannot be updated the clone goes without it
+    update_object_store.return_value = False
+    secret_scanner._clone_repo()
+    assert update_object_store.call_args.kwargs["object_store_path"] == object_store
+    assert clone_repository.call_args.kwargs["reference"] is None
+
+
+@patch("vcs_scanner.secret_scanners.gitleaks_wrapper.GitLeaksWrapper.start_scan")
+def test_scan_directory_with_keyword_filter(start_scan, tmp_path):
+    start_scan.return_value = []
+    rule_file = tmp_path / "rules.toml"
+    rule_file.write_text(
+        'title = "rules"\nversion = "0.0.1"\n\n[[rules]]\nid = "aws"\ndescription = "aws"\n'
+        'regex = "AKIA[0-9A-Z]{16}"\nkeywords = ["akia"]\ntags = []\n'
+    )
+    directory = tmp_path / "directory"
+    directory.mkdir()
+    (directory / "config.py").write_text("aws_key = 'AKIA0000000000000000'")
+    (directory / "readme.md").write_text("nothing to see")
+
+    secret_scanner = initialize_and_get_repo_scanner()
+    secret_scanner.gitleaks_rules_provider = RuleFileProvider(str(rule_file), init=True)
+    secret_scanner.keyword_filter = True
+
+    with patch(
+        "vcs_scanner.secret_scanners.secret_scanner.stage_files", return_value=str(tmp_path / "staging")
+    ) as stage:
+        assert secret_scanner._scan_directory(directory_path=str(directory)) == []
+    stage.assert_called_once_with(str(directory), ["config.py"])
+    start_scan.assert_called_once()
+
+    # Without any file containing a keyword gitleaks is not started
+    (directory / "config.py").write_text("aws_key = None")
+    assert secret_scanner._scan_directory(directory_path=str(directory)) == []
+    start_scan.assert_called_once()
+
+
+def test_create_scan_command_with_native_engine():
+    # First Party
+    from vcs_scanner.secret_scanners.gitleaks_wrapper import GitLeaksWrapper
+    from vcs_scanner.secret_scanners.native_engine import NativeScanEngine
+
+    secret_scanner = initialize_and_get_repo_scanner()
+    arguments = {
+        "gitleaks_path": "/tmp/gitleaks",
+        "rules_filepath": "/rules.toml",
+        "report_filepath": "/tmp/report.json",
+        "repository_path": "/tmp/repository",
+    }
+    assert isinstance(secret_scanner._create_scan_command(**arguments), GitLeaksWrapper)
+
+    secret_scanner.scan_engine = "native"
+    secret_scanner.engine_processes = 4
+    scan_command = secret_scanner._create_scan_command(**arguments)
+    assert isinstance(scan_command, NativeScanEngine)
+    assert scan_command.processes == 4
+    assert scan_command.repository_path == "/tmp/repository"
+
+
+@patch("vcs_scanner.secret_scanners.gitleaks_wrapper.GitLeaksWrapper.start_scan")
+def test_incremental_directory_scan_is_limited_to_changed_files(start_scan, tmp_path):
+    # Third Party
+    from git import Repo
+
+    start_scan.return_value = []
+    directory = tmp_path / "repository"
+    repo = Repo.init(directory)
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+    (directory / "unchanged.py").write_text("x = 1")
+    (directory / "config.py").write_text("x = 1")
+    repo.index.add(["unchanged.py", "config.py"])
+    last_scanned_commit = repo.index.commit("scanned").hexsha
+    (directory / "config.py").write_text("aws_key = 'AKIA0000000000000000'")
+    repo.index.add(["config.py"])
+    repo.index.commit("changed")
+
+    secret_scanner = initialize_and_get_repo_scanner()
+    secret_scanner._scan_type_to_run = ScanType.INCREMENTAL
+    secret_scanner._last_scanned_commit = last_scanned_commit
+
+    with patch(
+        "vcs_scanner.secret_scanners.secret_scanner.stage_files", return_value=str(tmp_path / "staging")
+    ) as stage:
+        assert secret_scanner._scan_directory(directory_path=str(directory)) == []
+    stage.assert_called_once_with(str(directory), ["config.py"])
+    start_scan.assert_called_once()
+
+    # The whole directory is scanned when the last scanned commit is not in the history
+    secret_scanner._last_scanned_commit = "0" * 40
+    with patch("vcs_scanner.secret_scanners.secret_scanner.stage_files") as stage:
+        assert secret_scanner._scan_directory(directory_path=str(directory)) == []
+    stage.assert_not_called()
+    assert start_scan.call_count == 2
+
+
+def test_incremental_scan_of_all_branches_scans_new_commits_of_every_branch(tmp_path):
+    # Third Party
+    from git import Repo
+
+    # First Party
+    from vcs_scanner.cache.branch_tips import BranchTipStore
+
+    directory = tmp_path / "repository"
+    repo = Repo.init(directory, initial_branch="main")
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+    head = repo.index.commit("base").hexsha
+    repo.create_head("feature")
+    secret_scanner = initialize_and_get_repo_scanner()
+    # A local repository is keyed by its path, local repositories without a remote share the same url
+    repository_key = os.path.realpath(directory)
+    cache_directory = str(tmp_path / "cache")
+    BranchTipStore(cache_directory).record_tips(
+        repository_key, {"refs/heads/main": head, "refs/heads/feature": head}, "2.0.1"
+    )
+    repo.heads.feature.checkout()
+    feature = repo.index.commit("feature").hexsha
+    repo.heads.main.checkout()
+
+    secret_scanner.local_path = str(directory)
+    secret_scanner._repo_clone_path = str(directory)
+    secret_scanner.latest_commit = head
+    secret_scanner.all_branches = True
+    secret_scanner.scan_cache_directory = cache_directory
+    secret_scanner._as_repo = True
+    last_scan = ScanRead(
+        id_=1,
+        repository_id=str(1),
+        scan_type=ScanType.BASE,
+        last_scanned_commit=head,
+        timestamp=datetime.now(UTC),
+        increment_number=0,
+        rule_pack=secret_scanner.rule_pack_version,
+    )
+
+    # HEAD did not move, the new commit on the feature branch still needs an incremental scan
+    with patch.object(secret_scanner._output_module, "get_last_scan_for_repository", return_value=last_scan):
+        secret_scanner._fetch_last_scanned_commit()
+    assert secret_scanner._scan_type_to_run == ScanType.INCREMENTAL
+
+    with patch.object(secret_scanner, "_scan_repo_with_cache", return_value=[]) as scan_repo_with_cache:
+        assert secret_scanner._scan_repo(ScanType.INCREMENTAL, head) == []
+    scan_repo_with_cache.assert_called_once()
+    assert scan_repo_with_cache.call_args.args[2] == [head]
+
+    secret_scanner.scan_cache_directory = None
+    with patch.object(secret_scanner, "_scan_commits", return_value=[]) as scan_commits:
+        assert secret_scanner._scan_repo(ScanType.INCREMENTAL, head) == []
+    assert scan_commits.call_args.args[0] == [feature]
+    assert scan_commits.call_args.kwargs["walk_history"] is False
+
+    # The tips are only kept once the findings of the scan were reported
+    secret_scanner.scan_cache_directory = cache_directory
+    secret_scanner._history_scanned = True
+    secret_scanner._record_branch_tips()
+    assert BranchTipStore(cache_directory).get_tips(repository_key, "2.0.1")["refs/heads/feature"] == head
+    secret_scanner.scan_completed = True
+    secret_scanner._record_branch_tips()
+    assert BranchTipStore(cache_directory).get_tips(repository_key, "2.0.1") == {
+        "refs/heads/main": head,
+        "refs/heads/feature": feature,
+    }
+    assert BranchTipStore(cache_directory).get_tips(secret_scanner.repository.repository_url, "2.0.1") is None
+
+
+def test_truncated_scan_does_not_advance_last_scanned_commit():
+    secret_scanner = initialize_and_get_repo_scanner()
+    secret_scanner.latest_commit = "latest_commit"
+    secret_scanner._scan_timestamp_start = datetime.now(UTC)
+    secret_scanner._last_scan_for_repository = ScanRead(
+        id_=1,
+        repository_id=str(1),
+        scan_type=ScanType.BASE,
+        last_scanned_commit="previous_commit",
+        timestamp=datetime.now(UTC),
+        increment_number=0,
+        rule_pack="2.0.1",
+    )
+    secret_scanner.truncated = True
+
+    with patch.object(secret_scanner._output_module, "write_scan") as write_scan:
+        assert secret_scanner._create_scan()
+    write_scan.assert_called_once_with(
+        secret_scanner._scan_type_to_run,
+        "previous_commit",
+        secret_scanner._scan_timestamp_start.isoformat(),
+        secret_scanner._created_repository,
+        rule_pack="2.0.1",
+    )
+
+
+@patch("vcs_scanner.output_modules.rws_api_writer.create_scan")
+def test_truncated_first_scan_is_not_recorded(create_scan):
+    secret_scanner = initialize_and_get_repo_scanner()
+    secret_scanner.latest_commit = "latest_commit"
+    secret_scanner._scan_type_to_run = ScanType.BASE
+    secret_scanner._scan_timestamp_start = datetime.now(UTC)
+    secret_scanner._created_repository = RepositoryRead(id_=7, **secret_scanner.repository.model_dump())
+    secret_scanner._last_scan_for_repository = None
+    secret_scanner.truncated = True
+
+    # Without a scan of the repository the next scan determines it needs a base scan
+    assert not secret_scanner._create_scan()
+    create_scan.assert_not_called()
+
+
+def test_wait_for_cached_commits_stops_when_no_claim_is_left(tmp_path):
+    secret_scanner = initialize_and_get_repo_scanner()
+    secret_scanner.shared_history_wait_seconds = 600
+    commit_cache = CommitScanCache(cache_directory=str(tmp_path), rule_pack_hash="rules-1")
+    commit_cache.store(["scanned"], [])
+    history_index = SharedHistoryIndex(cache_directory=str(tmp_path), rule_pack_hash="rules-1")
+
+    start = time.time()
+    found = secret_scanner._wait_for_cached_commits(["scanned", "abandoned"], commit_cache, history_index)
+    assert found == {"scanned": []}
+    assert time.time() - start < 5
+
+
+def test_repository_created_before_the_scan_is_not_written_again():
+    secret_scanner = initialize_and_get_repo_scanner()
+    created_repository = RepositoryRead(id_=7, **secret_scanner.repository.model_dump())
+    secret_scanner = SecretScanner(
+        gitleaks_binary_path="/tmp/gitleaks",
+        gitleaks_rules_provider=secret_scanner.gitleaks_rules_provider,
+        rule_pack_version="2.0.1",
+        output_plugin=secret_scanner._output_module,
+        repository=secret_scanner.repository,
+        username="",
+        personal_access_token="",
+        latest_commit="new_commit",
+        created_repository=created_repository,
+    )
+    last_scan = ScanRead(
+        id_=1,
+        repository_id=str(7),
+        scan_type=ScanType.BASE,
+        last_scanned_commit="new_commit",
+        timestamp=datetime.now(UTC),
+        increment_number=0,
+        rule_pack="2.0.1",
+    )
+
+    with (
+        patch.object(secret_scanner._output_module, "write_repository") as write_repository,
+        patch.object(
+            secret_scanner._output_module, "get_last_scan_for_repository", return_value=last_scan
+        ) as get_last_scan,
+    ):
+        assert secret_scanner._create_repository()
+        assert secret_scanner._fetch_last_scanned_commit()
+    write_repository.assert_not_called()
+    # The last scan is looked up when the scan starts, another task may have scanned the commit meanwhile
+    get_last_scan.assert_called_once_with(repository=created_repository)
+    assert secret_scanner._created_repository == created_repository
+    assert not secret_scanner._is_scan_needed()
@@ -0,0 +1,54 @@
+# First Party
+from vcs_scanner.api.schema.scan_type import ScanType
+from vcs_scanner.secret_scanners.task_routing import RoutingPolicy, TaskRoute
+
+POLICY = RoutingPolicy(
+    default_queue="repositories",
+    fast_queue="repositories-fast",
+    large_queue="repositories-large",
+    large_repository_size_kb=1000,
+    max_priority=9,
+)
+
+
+def test_routing_is_disabled_without_lanes():
+    assert RoutingPolicy(default_queue="repositories").is_enabled() is False
+    assert POLICY.is_enabled() is True
+
+
+def test_route_incremental_scan_to_fast_lane():
+    assert POLICY.route(ScanType.INCREMENTAL, 10) == TaskRoute(queue="repositories-fast", priority=9)
+    assert POLICY.route(ScanType.INCREMENTAL, None) == TaskRoute(queue="repositories-fast", priority=9)
+    # Repositories which need no scan only cost a few RWS calls
+    assert POLICY.route(None, 10) == TaskRoute(queue="repositories-fast", priority=9)
+
+
+def test_route_base_scan_to_default_queue():
+    assert POLICY.route(ScanType.BASE, 999) == TaskRoute(queue="repositories", priority=4)
+    assert POLICY.route(ScanType.BASE, None) == TaskRoute(queue="repositories", priority=4)
+
+
+def test_route_large_repository_to_large_lane():
+    assert POLICY.route(ScanType.BASE, 1000) == TaskRoute(queue="repositories-large", priority=0)
+    assert POLICY.route(ScanType.INCREMENTAL, 5000) == TaskRoute(queue="repositories-large", priority=4)
+
+
+def test_route_without_fast_lane():
+    policy = RoutingPolicy(
+        default_queue="repositories", large_queue="repositories-large", large_repository_size_kb=1000
+    )
+    assert policy.route(ScanType.INCREMENTAL, 10) == TaskRoute(queue="repositories", priority=9)
+    assert policy.route(ScanType.BASE, 10) == TaskRoute(queue="repositories", priority=4)
+
+
+def test_route_without_large_lane():
+    policy = RoutingPolicy(default_queue="repositories", fast_queue="repositories-fast", large_repository_size_kb=1000)
+    assert policy.route(ScanType.BASE, 5000) == TaskRoute(queue="repositories", priority=4)
+
+
+def test_queues():
+    queues = {queue.name: queue for queue in POLICY.queues()}
+    assert set(queues) == {"repositories", "repositories-fast", "repositories-large"}
+    assert not queues["repositories"].queue_arguments
+    assert queues["repositories-fast"].queue_arguments == {"x-max-priority": 9}
+    assert queues["repositories-large"].queue_arguments == {"x-max-priority": 9}